@@ -0,0 +1,291 @@
+#!/usr/bin/env python3
+"""
+判定モデルに渡す前の回答の圧縮（決定的な前処理）
+・markdown の記法（見出し・強調・箇条書き・コードフェンス・リンク・表の罫線）を除去し、本文の語句だけを残す
+・定型の前置き・経過説明（"Perfect!" / "Let me ..." / "I found this by navigating ..." / "The data was extracted from ..." 等）と
+  状況報告（"I've saved this information to memory ..." / "Let me know ..." 等）の文を削除
+・根拠として再掲したレビュー本文等（"Review:" / "Summary:" / "Quote:" の行、引用が大半を占める行）と、最終回答の範囲の外の URL を削除。
+  ただし質問が URL・引用・レビュー・要約を求める場合（intent で判定）は削除しない
+・最終回答の範囲を抽出: "Answer:" / "Final answer:" / "Conclusion:" のラベル、"Answer" 見出し直後の行、
+  結論の接続語（Therefore / In conclusion / Overall 等）で始まる最後の文、いずれも無ければ最後の文
+・最終回答の範囲が質問（intent）と内容語を1つも共有しない場合は、範囲の推定を誤っている可能性があるため生の回答をそのまま使う
+・上限トークン数（AGENT_WEBARENA_JUDGE_INPUT_TOKENS）に収まらない場合は、最終回答の範囲を先頭に置き、残りの行を元の順に上限まで続ける
+・生の回答と圧縮後の回答は eval_details（raw_prediction / condensed_prediction）に両方残す
+
+環境変数:
+  AGENT_WEBARENA_ANSWER_CONDENSE     true で判定モデル（fuzzy_match / ua_match）に圧縮後の回答を渡す（既定 false）
+  AGENT_WEBARENA_JUDGE_INPUT_TOKENS  圧縮後の回答の上限トークン数（既定 400。推定は observation_report.estimate_tokens）
+
+使い方:
+  python scripts/answer_condense.py report --tasks-dir tasks -v   # 保存済みサマリーの回答での削減量
+  python scripts/answer_condense.py show --intent 'Lookup orders that are canceled' < answer.md
+"""
+import argparse
+import hashlib
+import json
+import os
+import re
+import sys
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+from observation_report import estimate_tokens
+
+DEFAULT_MAX_TOKENS = 400
+
+_FENCE = re.compile(r'^\s*```.*$', re.M)
+_HEADING = re.compile(r'^\s{0,3}#{1,6}\s*', re.M)
+_RULE = re.compile(r'^\s*(?:-{3,}|\*{3,}|_{3,}|=+)\s*$', re.M)
+_TABLE_RULE = re.compile(r'^\s*\|?\s*:?-{2,}:?\s*(?:\|\s*:?-{2,}:?\s*)*\|?\s*$', re.M)
+_BULLET = re.compile(r'^\s*(?:[-*+•]|\d+[.)])\s+', re.M)
+_BLOCKQUOTE = re.compile(r'^\s*>\s?', re.M)
+_EMPHASIS = re.compile(r'(\*\*|__|\*|_)(?=\S)(.+?)(?<=\S)\1')
+_INLINE_CODE = re.compile(r'`([^`]*)`')
+_LINK = re.compile(r'!?\[([^\]]*)\]\([^)]*\)')
+_URL = re.compile(r'\(?https?://\S+\)?')
+_SYMBOLS = re.compile(r'[✓✔✗✘✅❌⚠️🎉👍]')
+
+_SENTENCE_SPLIT = re.compile(r'(?<=[.!?])\s+(?=[A-Z"*(\[])')
+
+# 前置き・経過説明（文単位で削除）。感嘆詞は文全体がそれだけの場合のみ（"Great, the top seller is ..." は残す）
+_FILLER = re.compile(
+    r'^(?:'
+    r'(?:(?:perfect|great|excellent|good|done|success|okay|ok|alright|got it|task complete[d]?)\b[\s,.!]*)+$'
+    r'|let me\b'
+    r'|now (?:let me|i(?:\'ll| will))\b'
+    r'|i(?:\'ll| will) (?:now )?(?:check|look|navigate|search|try|verify|open)\b'
+    r'|i(?: have|\'ve)? (?:successfully )?(?:navigated|searched|retrieved|extracted|checked|looked|clicked|opened|scrolled|filtered|exhaustively|analyzed|compared|reviewed)\b'
+    r'|i (?:found|verified|confirmed|obtained|got) (?:this|these|the data|the information|the results?) by\b'
+    r'|(?:this|these|the) (?:data|information|results?) (?:was|were) (?:found|extracted|obtained|retrieved|collected|taken)\b'
+    r'|(?:based on|here|below|the following|i(?: have|\'ve)? (?:successfully )?(?:found|identified))\b.*:$'
+    r'|(?:hope this helps|let me know)\b'
+    r')',
+    re.IGNORECASE,
+)
+# 状況報告（メモリへの保存・追加の依頼の案内。文単位で削除し、最終回答の範囲にもしない）
+_STATUS = re.compile(
+    r'^(?:'
+    r'.*\b(?:saved|stored|noted|recorded|remembered)\b.*\b(?:to|in) (?:my )?memory\b'
+    r'|.*\bfor future reference\b'
+    r'|(?:please )?(?:let me know|feel free)\b'
+    r'|if you (?:need|have|want|would like)\b'
+    r')',
+    re.IGNORECASE,
+)
+# 根拠の再掲・URL が回答そのものになりうる質問
+_EVIDENCE_INTENT = re.compile(r'\b(?:urls?|links?|quotes?|quoted|reviews?|summar(?:y|ies|ize|ise))\b', re.IGNORECASE)
+_WORD = re.compile(r'[a-z0-9]+')
+_INTENT_STOPWORDS = frozenset(
+    'a an and are as at be by do does did for from has have how in is it its me of on or show that the their '
+    'there this to was were what when where which who whom whose why with you your tell give list find'.split()
+)
+# 根拠の再掲（行単位で削除）
+_EVIDENCE_LABEL = re.compile(r'^(?:review(?: text| content)?|summary|quote|source|url|link|page|evidence|screenshot)\s*:', re.IGNORECASE)
+_QUOTED = re.compile(r'"[^"]{12,}"|“[^”]{12,}”')
+
+# 見出しだけの行（最終回答の範囲の抽出後に除く）
+_BARE_HEADING = re.compile(r'^(?:final answer|answer|summary|conclusion|results?|details|key findings)\s*:?$', re.IGNORECASE)
+_ANSWER_LABEL = re.compile(r'^(?:final answer|answer|conclusion|result)\s*:\s*(.+)$', re.IGNORECASE)
+_ANSWER_HEADING = re.compile(r'^(?:final answer|answer|conclusion|result)s?\s*:?\s*$', re.IGNORECASE)
+_CONCLUSION = re.compile(r'^(?:therefore|thus|hence|so|in conclusion|in summary|overall|to summarize|in short)\b[,:]?', re.IGNORECASE)
+
+
+def condense_enabled() -> bool:
+    return str(os.environ.get('AGENT_WEBARENA_ANSWER_CONDENSE', 'false')).strip().lower() == 'true'
+
+
+def max_tokens() -> int:
+    raw = str(os.environ.get('AGENT_WEBARENA_JUDGE_INPUT_TOKENS', '')).strip()
+    try:
+        return max(int(raw), 16) if raw else DEFAULT_MAX_TOKENS
+    except ValueError:
+        return DEFAULT_MAX_TOKENS
+
+
+def fingerprint() -> str:
+    """評価キャッシュのキーに含める（圧縮のロジック・上限が変われば再評価）"""
+    h = hashlib.sha256(Path(__file__).read_bytes())
+    h.update(str(max_tokens()).encode('utf-8'))
+    return h.hexdigest()[:12]
+
+
+def strip_markdown(text: str) -> str:
+    s = str(text or '').replace('\r\n', '\n')
+    s = _FENCE.sub('', s)
+    s = _TABLE_RULE.sub('', s)
+    s = _RULE.sub('', s)
+    s = _HEADING.sub('', s)
+    s = _BLOCKQUOTE.sub('', s)
+    s = _BULLET.sub('', s)
+    s = _LINK.sub(r'\1', s)
+    s = _INLINE_CODE.sub(r'\1', s)
+    for _ in range(2):  # 入れ子の強調（***x*** 等）
+        s = _EMPHASIS.sub(r'\2', s)
+    s = _BULLET.sub('', s)  # 強調の内側にあった番号（**1. Name**）
+    s = _SYMBOLS.sub('', s)
+    s = s.replace('|', ' ')
+    return '\n'.join(re.sub(r'[ \t]+', ' ', line).strip() for line in s.split('\n'))
+
+
+def _is_evidence(line: str) -> bool:
+    if _EVIDENCE_LABEL.match(line):
+        return True
+    quoted = sum(len(m.group(0)) for m in _QUOTED.finditer(line))
+    return quoted > 40 and quoted >= 0.6 * len(line)
+
+
+def _is_noise(sentence: str) -> bool:
+    return bool(_FILLER.match(sentence) or _STATUS.match(sentence))
+
+
+def _clean_lines(text: str, keep_evidence: bool = False) -> List[str]:
+    """markdown 除去後の行から、前置き・経過説明・状況報告の文と根拠の再掲行を除く（URL は最終回答の範囲の抽出後に除く）"""
+    out: List[str] = []
+    for line in strip_markdown(text).split('\n'):
+        line = line.strip()
+        if not line or (not keep_evidence and _is_evidence(_URL.sub('', line).strip())):
+            continue
+        kept = [s for s in _SENTENCE_SPLIT.split(line) if s.strip() and not _is_noise(s.strip())]
+        line = ' '.join(kept).strip()
+        if line and line not in out:
+            out.append(line)
+    return out
+
+
+def _strip_urls(lines: List[str], span: str) -> List[str]:
+    """最終回答の範囲を含む行以外から URL を除く"""
+    out: List[str] = []
+    for line in lines:
+        if not (span and span in line):
+            line = _URL.sub('', line).strip()
+        if line and line not in out:
+            out.append(line)
+    return out
+
+
+def _content_words(text: str) -> set:
+    return {w for w in _WORD.findall(str(text or '').lower()) if w not in _INTENT_STOPWORDS}
+
+
+def shares_intent(span: str, intent: str) -> bool:
+    """最終回答の範囲が質問と内容語を共有するか（質問が無ければ真）"""
+    words = _content_words(intent)
+    return not words or bool(words & _content_words(span))
+
+
+def final_answer_span(lines: List[str]) -> str:
+    """最終回答の範囲（見出しだけの行・状況報告の文は範囲にしない）"""
+    for i, line in enumerate(lines):
+        m = _ANSWER_LABEL.match(line)
+        if m:
+            return m.group(1).strip()
+        if _ANSWER_HEADING.match(line):
+            # 見出し直後の、見出し・小見出し（末尾 ':'）でない最初の行
+            following = [x for x in lines[i + 1:] if not x.endswith(':') and not _BARE_HEADING.match(x)]
+            if following:
+                return following[0]
+    sentences = [s.strip() for line in lines if not _BARE_HEADING.match(line)
+                 for s in _SENTENCE_SPLIT.split(line) if s.strip() and not _is_noise(s.strip())]
+    for s in reversed(sentences):
+        if _CONCLUSION.match(s):
+            return s
+    return sentences[-1] if sentences else ''
+
+
+def condense(text: str, limit: Optional[int] = None, intent: str = '') -> Dict[str, Any]:
+    """圧縮後の回答と、その内訳（トークン数・最終回答の範囲・切り詰めや生の回答への差し戻しの有無）"""
+    limit = limit or max_tokens()
+    raw = str(text or '')
+    keep_evidence = bool(_EVIDENCE_INTENT.search(str(intent or '')))
+    lines = _clean_lines(raw, keep_evidence)
+    span = final_answer_span(lines)
+    if span and not shares_intent(span, intent):
+        # 範囲が質問と無関係（経過説明等を拾った可能性）: 圧縮せずに生の回答を判定させる
+        return {
+            'text': raw,
+            'final_span': span,
+            'raw_tokens': estimate_tokens(raw),
+            'condensed_tokens': estimate_tokens(raw),
+            'truncated': False,
+            'limit': limit,
+            'fallback': 'span_off_intent',
+        }
+    if not keep_evidence:
+        lines = _strip_urls(lines, span)
+    lines = [line for line in lines if not _BARE_HEADING.match(line)]
+    body = '\n'.join(lines)
+    truncated = estimate_tokens(body) > limit
+    if truncated:
+        # 最終回答の範囲を先頭に置き、残りの行を元の順に上限まで続ける
+        out = [span]
+        used = estimate_tokens(span)
+        for line in lines:
+            if line == span or span in line:
+                continue
+            cost = estimate_tokens(line) + 1
+            if used + cost > limit:
+                break
+            out.append(line)
+            used += cost
+        body = '\n'.join(out)
+    if not body.strip():
+        # すべて除去された場合は生の回答を使う（空の回答で判定しない）
+        body = raw
+    return {
+        'text': body,
+        'final_span': span,
+        'raw_tokens': estimate_tokens(raw),
+        'condensed_tokens': estimate_tokens(body),
+        'truncated': truncated,
+        'limit': limit,
+        'fallback': '',
+    }
+
+
+def cmd_report(tasks_dirs: List[Path], limit: int, verbose: bool) -> None:
+    from latency_report import load_summaries
+    rows = []
+    for tasks_dir in tasks_dirs:
+        for s in load_summaries(tasks_dir, all_runs=True):
+            answer = (s.get('eval_method_details') or {}).get('raw_prediction', s.get('pipeline_answer'))
+            if not answer:
+                continue
+            intent = s.get('question') or (s.get('task_config') or {}).get('intent') or ''
+            c = condense(answer, limit, intent)
+            rows.append({'task_id': s.get('task_id'), **c})
+    if not rows:
+        print("[エラー] 回答を含むサマリーがありません")
+        sys.exit(1)
+    raw = sum(r['raw_tokens'] for r in rows)
+    condensed = sum(r['condensed_tokens'] for r in rows)
+    fallbacks = sum(1 for r in rows if r['fallback'])
+    print(f"[結果] 回答 {len(rows)}件: 推定 {raw} → {condensed} トークン（{(1 - condensed / max(raw, 1)) * 100:.1f}% 削減、上限 {limit}、"
+          f"生の回答に差し戻し {fallbacks}件）")
+    for r in rows:
+        note = '（切り詰め）' if r['truncated'] else '（差し戻し）' if r['fallback'] else ''
+        print(f"  task {r['task_id']}: {r['raw_tokens']} → {r['condensed_tokens']}{note}  最終回答: {r['final_span'][:80]}")
+        if verbose:
+            print('    ' + r['text'].replace('\n', '\n    '))
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='判定モデルに渡す前の回答の圧縮')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p_rep = sub.add_parser('report', help='保存済みサマリーの回答での削減量')
+    p_rep.add_argument('--tasks-dir', type=Path, action='append', required=True)
+    p_rep.add_argument('--max-tokens', type=int, default=None)
+    p_rep.add_argument('-v', '--verbose', action='store_true', help='圧縮後の回答も表示')
+    p_show = sub.add_parser('show', help='標準入力の回答を圧縮して表示')
+    p_show.add_argument('--max-tokens', type=int, default=None)
+    p_show.add_argument('--intent', default='', help='質問（URL・引用を残すか、範囲が質問と無関係かの判定に使う）')
+    args = ap.parse_args()
+
+    limit = args.max_tokens or max_tokens()
+    if args.cmd == 'report':
+        cmd_report(args.tasks_dir, limit, args.verbose)
+    else:
+        print(json.dumps(condense(sys.stdin.read(), limit, args.intent), indent=2, ensure_ascii=False))
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,370 @@
+#!/usr/bin/env python3
+"""
+ランの成果物（trajectory・サマリー・HTMLレンダ・json_dump）の内容アドレス方式の圧縮ストア
+・大きな文字列（観測テキスト等）と config / observation のサブツリーを、内容の SHA-256 をキーにした圧縮 blob として1度だけ保存し、
+  ランの記録（JSON）には {"$blob": "<sha256>"} の参照だけを残す。同じスナップショット・task_config を含むランやタスク間で共有される
+・HTML レンダ（render_<id>.html）はファイル全体を blob にし、<name>.ref のスタブ（JSON）に置き換える。動画・MEMO.md 等は対象外
+・読み手は load_json() / read_bytes() / exists() を使えば、参照を含む記録も元の文書として透過的に読める
+  （latency_report.load_summaries・observation_report・evaluate.py の trajectory 読み込み・評価キャッシュはこれを使う）
+・圧縮は zstd（zstandard パッケージ）。未インストールの環境では gzip で保存し（拡張子で区別）、どちらの blob も読める
+・gc は走査したディレクトリ内の記録から参照されていない blob を削除する（書き込み中のランを考慮し、猶予時間内の blob は残す。
+  put で再利用した blob も mtime を更新するので猶予時間に入る）
+
+環境変数:
+  AGENT_WEBARENA_ARTIFACT_STORE      true で evaluate.py がランの成果物をストアに格納（既定 false）
+  AGENT_WEBARENA_ARTIFACT_STORE_DIR  blob の保存先（既定 /home/ec2-user/webarena-local/evaluation-result/store）
+
+使い方:
+  python scripts/artifact_store.py pack /home/ec2-user/webarena-local/evaluation-result output/webarena/trajectories
+  python scripts/artifact_store.py cat /home/ec2-user/webarena-local/evaluation-result/runs/<run>/render_4.html > render_4.html
+  python scripts/artifact_store.py gc --scan /home/ec2-user/webarena-local/evaluation-result --scan output/webarena/trajectories --dry-run
+  python scripts/artifact_store.py stats
+"""
+import argparse
+import gzip
+import hashlib
+import json
+import os
+import sys
+import time
+from pathlib import Path
+from typing import Any, Dict, Iterable, List, Optional, Set, Tuple
+
+try:
+    import zstandard  # type: ignore
+except ImportError:
+    zstandard = None
+
+DEFAULT_STORE_DIR = Path('/home/ec2-user/webarena-local/evaluation-result') / 'store'
+MARKER = '$artifact_store'
+# スタブは .json で終わらない名前にする（task_<id>/*.json をサマリーとして読む側に拾われないように）
+REF_SUFFIX = '.ref'
+MIN_BLOB_BYTES = 1024
+# 値全体を1つの blob にするキー（ランやステップ間でそのまま繰り返されるサブツリー）
+SUBTREE_KEYS = ('task_config', 'config', 'observation')
+# ファイル全体を blob にしてスタブに置き換える拡張子（JSON 以外。動画・メモ等はそのまま残す）
+FILE_SUFFIXES = ('.html', '.htm')
+ZSTD_LEVEL = 10
+DEFAULT_GC_GRACE_S = 3600.0
+# pack でディレクトリを走査するときに除くディレクトリ名
+_EXCLUDED_DIRS = {'store', 'cache', 'results'}
+
+
+def store_enabled() -> bool:
+    return str(os.environ.get('AGENT_WEBARENA_ARTIFACT_STORE', 'false')).strip().lower() == 'true'
+
+
+def store_dir() -> Path:
+    env = str(os.environ.get('AGENT_WEBARENA_ARTIFACT_STORE_DIR', '')).strip()
+    return Path(env) if env else DEFAULT_STORE_DIR
+
+
+def _is_ref(obj: Any) -> bool:
+    return isinstance(obj, dict) and '$blob' in obj and len(obj) <= 3
+
+
+class ArtifactStore:
+    """blobs/<sha[:2]>/<sha>.zst（または .gz）"""
+
+    def __init__(self, root: Optional[Path] = None):
+        self.root = Path(root or store_dir())
+        self.written = 0
+        self.written_bytes = 0
+        self.reused = 0
+        self.input_bytes = 0
+
+    # ----- blob -----
+
+    def _path(self, sha: str, codec: str) -> Path:
+        return self.root / 'blobs' / sha[:2] / f'{sha}.{codec}'
+
+    def _find(self, sha: str) -> Optional[Path]:
+        for codec in ('zst', 'gz'):
+            p = self._path(sha, codec)
+            if p.exists():
+                return p
+        return None
+
+    def put(self, data: bytes) -> str:
+        """内容を保存して SHA-256 を返す（既にあれば書き込まず、mtime だけ更新する）"""
+        sha = hashlib.sha256(data).hexdigest()
+        self.input_bytes += len(data)
+        existing = self._find(sha)
+        if existing is not None:
+            try:
+                # 再利用した blob も gc の猶予時間に入れる（これから書く記録が参照する前に消されないように）
+                os.utime(existing, None)
+                self.reused += 1
+                return sha
+            except FileNotFoundError:
+                pass  # gc が直前に削除した: 書き直す
+        codec = 'zst' if zstandard is not None else 'gz'
+        if codec == 'zst':
+            packed = zstandard.ZstdCompressor(level=ZSTD_LEVEL).compress(data)
+        else:
+            packed = gzip.compress(data, compresslevel=6, mtime=0)
+        path = self._path(sha, codec)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+        with open(tmp, 'wb') as f:
+            f.write(packed)
+        os.replace(tmp, path)
+        self.written += 1
+        self.written_bytes += len(packed)
+        return sha
+
+    def get(self, sha: str) -> bytes:
+        path = self._find(sha)
+        if path is None:
+            raise FileNotFoundError(f"blob がありません: {sha}（{self.root}）")
+        raw = path.read_bytes()
+        if path.suffix == '.zst':
+            if zstandard is None:
+                raise RuntimeError("zstd の blob を読むには zstandard が必要です（pip install zstandard）")
+            return zstandard.ZstdDecompressor().decompress(raw)
+        return gzip.decompress(raw)
+
+    # ----- JSON の参照化 / 復元 -----
+
+    def dehydrate(self, obj: Any, key: str = '') -> Any:
+        """大きな文字列と SUBTREE_KEYS のサブツリーを blob 参照に置き換える"""
+        if key in SUBTREE_KEYS and isinstance(obj, (dict, list)) and obj:
+            data = json.dumps(obj, ensure_ascii=False, sort_keys=True, separators=(',', ':')).encode('utf-8')
+            if len(data) >= MIN_BLOB_BYTES // 4:
+                return {'$blob': self.put(data), '$json': True, 'size': len(data)}
+        if isinstance(obj, dict):
+            return {k: self.dehydrate(v, k) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.dehydrate(v, key) for v in obj]
+        if isinstance(obj, str):
+            data = obj.encode('utf-8')
+            if len(data) >= MIN_BLOB_BYTES:
+                return {'$blob': self.put(data), 'size': len(data)}
+        return obj
+
+    def rehydrate(self, obj: Any) -> Any:
+        if _is_ref(obj):
+            data = self.get(str(obj['$blob']))
+            return json.loads(data) if obj.get('$json') else data.decode('utf-8')
+        if isinstance(obj, dict):
+            return {k: self.rehydrate(v) for k, v in obj.items()}
+        if isinstance(obj, list):
+            return [self.rehydrate(v) for v in obj]
+        return obj
+
+    # ----- ファイル単位 -----
+
+    def pack_file(self, path: Path) -> Optional[Tuple[int, int]]:
+        """ファイルをストアに移す（JSON は参照を含む記録に書き換え、HTML は .ref スタブに置換）。(元のサイズ, 記録のサイズ)"""
+        path = Path(path)
+        if path.suffix not in ('.json',) + FILE_SUFFIXES or not path.is_file():
+            return None
+        raw = path.read_bytes()
+        if path.suffix == '.json':
+            if raw.lstrip().startswith(b'{"' + MARKER.encode() + b'"'):
+                return None  # 格納済み
+            try:
+                doc = json.loads(raw)
+            except ValueError:
+                doc = None
+            if doc is not None:
+                record = {MARKER: {'version': 1, 'root': str(self.root)}, 'document': self.dehydrate(doc)}
+                _write_json(path, record)
+                return len(raw), path.stat().st_size
+            return None
+        stub = path.with_name(path.name + REF_SUFFIX)
+        _write_json(stub, {MARKER: {'version': 1, 'root': str(self.root)}, 'file': {'$blob': self.put(raw), 'size': len(raw)}})
+        path.unlink()
+        return len(raw), stub.stat().st_size
+
+    def summary(self) -> dict:
+        return {'blobs_written': self.written, 'blobs_reused': self.reused,
+                'written_bytes': self.written_bytes, 'input_bytes': self.input_bytes}
+
+
+def _write_json(path: Path, payload: Any) -> None:
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.tmp')
+    with open(tmp, 'w', encoding='utf-8') as f:
+        json.dump(payload, f, ensure_ascii=False, separators=(',', ':'))
+    os.replace(tmp, path)
+
+
+def _store_for(record: dict) -> ArtifactStore:
+    """記録に書かれた保存先（環境変数があればそちらを優先）"""
+    env = str(os.environ.get('AGENT_WEBARENA_ARTIFACT_STORE_DIR', '')).strip()
+    meta = record.get(MARKER) or {}
+    return ArtifactStore(Path(env) if env else Path(meta.get('root') or DEFAULT_STORE_DIR))
+
+
+# ----- 読み手向け（格納済みでも未格納でも同じ結果） -----
+
+def load_json(path) -> Any:
+    """JSON を読む（ストアの記録なら参照を復元した元の文書を返す）"""
+    with open(path, 'r', encoding='utf-8') as f:
+        doc = json.load(f)
+    if isinstance(doc, dict) and MARKER in doc and 'document' in doc:
+        return _store_for(doc).rehydrate(doc['document'])
+    return doc
+
+
+def read_bytes(path) -> bytes:
+    """ファイルの内容（.ref のスタブに置き換わっていれば blob から）"""
+    path = Path(path)
+    if path.exists():
+        return path.read_bytes()
+    stub = path.with_name(path.name + REF_SUFFIX)
+    with open(stub, 'r', encoding='utf-8') as f:
+        record = json.load(f)
+    return _store_for(record).get(record['file']['$blob'])
+
+
+def exists(path) -> bool:
+    path = Path(path)
+    return path.exists() or path.with_name(path.name + REF_SUFFIX).exists()
+
+
+def pack_paths(paths: Iterable[Path], store: Optional[ArtifactStore] = None) -> Tuple[ArtifactStore, int, int, int]:
+    """指定ファイルを格納する。(ストア, 件数, 元のサイズ合計, 記録のサイズ合計)"""
+    store = store or ArtifactStore()
+    n = before = after = 0
+    for p in paths:
+        try:
+            res = store.pack_file(Path(p))
+        except Exception as e:
+            print(f"[警告] 成果物ストアへの格納に失敗: {p}: {e}")
+            continue
+        if res:
+            n += 1
+            before += res[0]
+            after += res[1]
+    return store, n, before, after
+
+
+# ----- GC -----
+
+def _collect_refs(obj: Any, out: Set[str]) -> None:
+    if _is_ref(obj):
+        out.add(str(obj['$blob']))
+        return
+    if isinstance(obj, dict):
+        for v in obj.values():
+            _collect_refs(v, out)
+    elif isinstance(obj, list):
+        for v in obj:
+            _collect_refs(v, out)
+
+
+def referenced_blobs(scan_dirs: List[Path]) -> Tuple[Set[str], int]:
+    """走査したディレクトリ内の記録・スタブが参照する blob（先頭がマーカーの JSON だけを解析する）"""
+    refs: Set[str] = set()
+    records = 0
+    prefix = b'{"' + MARKER.encode() + b'"'
+    for d in scan_dirs:
+        for p in Path(d).rglob('*'):
+            if p.suffix not in ('.json', REF_SUFFIX) or not p.is_file():
+                continue
+            try:
+                with open(p, 'rb') as f:
+                    if f.read(len(prefix)) != prefix:
+                        continue
+                    f.seek(0)
+                    doc = json.load(f)
+            except (OSError, ValueError):
+                continue
+            records += 1
+            _collect_refs(doc, refs)
+    return refs, records
+
+
+def gc(store: ArtifactStore, scan_dirs: List[Path], grace_s: float, dry_run: bool) -> dict:
+    refs, records = referenced_blobs(scan_dirs)
+    now = time.time()
+    removed = kept = young = 0
+    freed = 0
+    for p in (store.root / 'blobs').rglob('*'):
+        if not p.is_file() or p.name.startswith('.'):
+            continue
+        sha = p.name.split('.', 1)[0]
+        if sha in refs:
+            kept += 1
+            continue
+        st = p.stat()
+        if now - st.st_mtime < grace_s:
+            young += 1  # 記録の書き込み前の可能性がある
+            continue
+        removed += 1
+        freed += st.st_size
+        if not dry_run:
+            p.unlink()
+    return {'records': records, 'referenced': len(refs), 'kept': kept, 'removed': removed,
+            'freed_bytes': freed, 'skipped_recent': young, 'dry_run': dry_run}
+
+
+def _human(n: float) -> str:
+    for unit in ('B', 'KB', 'MB', 'GB'):
+        if n < 1024 or unit == 'GB':
+            return f'{n:.1f}{unit}'
+        n /= 1024.0
+    return f'{n:.1f}GB'
+
+
+def _iter_files(dirs: List[Path]) -> List[Path]:
+    out: List[Path] = []
+    for d in dirs:
+        d = Path(d)
+        if d.is_file():
+            out.append(d)
+            continue
+        for p in sorted(d.rglob('*')):
+            # ストア自身・評価キャッシュのエントリ・結果JSON（ランナーや work_queue がそのまま読む）は対象外
+            if p.is_file() and not _EXCLUDED_DIRS.intersection(p.parts) and not p.name.startswith('.'):
+                out.append(p)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='ランの成果物の内容アドレス方式の圧縮ストア')
+    ap.add_argument('--store', type=Path, default=None, help='blob の保存先（既定: AGENT_WEBARENA_ARTIFACT_STORE_DIR または evaluation-result/store）')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p_pack = sub.add_parser('pack', help='既存の成果物（ディレクトリ / ファイル）をストアに移す')
+    p_pack.add_argument('paths', nargs='+', type=Path)
+    p_cat = sub.add_parser('cat', help='格納済みのファイル・記録を元の内容で標準出力へ')
+    p_cat.add_argument('path', type=Path)
+    p_gc = sub.add_parser('gc', help='参照されていない blob を削除')
+    p_gc.add_argument('--scan', type=Path, action='append', required=True, help='記録を探すディレクトリ（複数指定可。ストアを参照する全ディレクトリを指定）')
+    p_gc.add_argument('--grace', type=float, default=DEFAULT_GC_GRACE_S, help='この秒数以内に書かれた blob は削除しない')
+    p_gc.add_argument('--dry-run', action='store_true')
+    sub.add_parser('stats', help='blob 数と容量')
+    args = ap.parse_args()
+
+    store = ArtifactStore(args.store)
+    if args.cmd == 'pack':
+        if zstandard is None:
+            print("[警告] zstandard が見つからないため gzip で保存します（pip install zstandard で zstd）")
+        t0 = time.time()
+        _, n, before, after = pack_paths(_iter_files(args.paths), store)
+        s = store.summary()
+        print(f"[結果] 格納 {n}件: {_human(before)} → 記録 {_human(after)} + 新規 blob {s['blobs_written']}件 {_human(s['written_bytes'])}"
+              f"（再利用 {s['blobs_reused']}件、{time.time() - t0:.1f}秒）")
+        if before:
+            print(f"[結果] 容量 {(1 - (after + s['written_bytes']) / before) * 100:.1f}% 削減")
+    elif args.cmd == 'cat':
+        path = args.path
+        if path.suffix == '.json' and path.exists():
+            sys.stdout.write(json.dumps(load_json(path), indent=2, ensure_ascii=False) + '\n')
+        else:
+            sys.stdout.buffer.write(read_bytes(path))
+    elif args.cmd == 'gc':
+        r = gc(store, args.scan, args.grace, args.dry_run)
+        print(f"[結果] 記録 {r['records']}件 / 参照中の blob {r['referenced']}件 / 保持 {r['kept']}件 / "
+              f"{'削除予定' if args.dry_run else '削除'} {r['removed']}件（{_human(r['freed_bytes'])}） / 猶予内で保持 {r['skipped_recent']}件")
+    else:
+        files = [p for p in (store.root / 'blobs').rglob('*') if p.is_file() and not p.name.startswith('.')]
+        codecs: Dict[str, int] = {}
+        for p in files:
+            codecs[p.suffix] = codecs.get(p.suffix, 0) + 1
+        print(f"[結果] {store.root}: blob {len(files)}件 / {_human(sum(p.stat().st_size for p in files))} / {codecs}")
+
+
+if __name__ == '__main__':
+    main()
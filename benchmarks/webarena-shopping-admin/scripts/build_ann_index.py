@@ -0,0 +1,282 @@
+#!/usr/bin/env python3
+"""
+圧縮ANNインデックスの構築・比較ツール
+・既存の vectors.faiss（IndexFlatIP）とマッピングから IVF-Flat / IVF-PQ / HNSW / スカラー量子化インデックスを構築
+・パラメータ（nprobe / efSearch）をスイープし、サイズ・構築時間・検索レイテンシ・flat に対する recall@k を比較
+・条件（recall@k >= 目標）を満たす最小のインデックスを、エージェントの VectorStore が読み込める形式で書き出す
+
+書き出し: <out-dir>/<name>.faiss と <out-dir>/<name>.faiss.mapping.json（chunkIds は元と同一順序）
+エージェント側: AGENT_INDEX_VECTORS_FILE=<name>.faiss を設定（src/indexer/loader.ts）
+
+使い方:
+  python scripts/build_ann_index.py --k 10 --target-recall 0.95 --write
+  python scripts/build_ann_index.py --factories "IVF1024,PQ96;HNSW32" --queries intents --embedder bedrock
+"""
+import argparse
+import json
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import numpy as np
+
+from retrieval_benchmark import (
+    DEFAULT_CACHE_FILE,
+    DEFAULT_CONFIGS_DIR,
+    DEFAULT_INDEX_DIR,
+    CachedEmbedder,
+    MmapFlatIndex,
+    build_embedder,
+    load_mapping,
+    load_task_configs,
+    percentiles,
+)
+
+# 既定のスイープ対象（faiss.index_factory 文字列）。nlist は ntotal に応じて自動調整する
+DEFAULT_FACTORIES = [
+    'IVF{nlist},Flat',
+    'IVF{nlist},PQ48',
+    'IVF{nlist},PQ96',
+    'IVF{nlist},PQ192',
+    'IVF{nlist},SQ8',
+    'HNSW32',
+    'HNSW32,SQ8',
+    'SQ8',
+    'SQfp16',
+]
+DEFAULT_NPROBES = [8, 16, 32, 64, 128]
+DEFAULT_EF_SEARCH = [32, 64, 128, 256]
+
+
+def _default_nlist(ntotal: int) -> int:
+    """nlist ≈ 4·sqrt(N)（2の冪に丸め、学習点が1リストあたり39点以上になるよう上限を設ける）"""
+    target = max(16, int(4 * np.sqrt(max(1, ntotal))))
+    nlist = 1 << int(np.round(np.log2(target)))
+    return int(max(16, min(nlist, max(16, ntotal // 39))))
+
+
+def _iter_blocks(flat: MmapFlatIndex, block_rows: int = 8192):
+    for start in range(0, flat.ntotal, block_rows):
+        yield start, np.array(flat.vectors[start:start + block_rows])
+
+
+def _training_sample(flat: MmapFlatIndex, size: int, seed: int = 0) -> np.ndarray:
+    if size >= flat.ntotal:
+        return np.array(flat.vectors)
+    rng = np.random.default_rng(seed)
+    idx = np.sort(rng.choice(flat.ntotal, size=size, replace=False))
+    return np.array(flat.vectors[idx])
+
+
+def _sample_queries(flat: MmapFlatIndex, n: int, seed: int = 1) -> np.ndarray:
+    """DBベクトルにノイズを加えた合成クエリ（認証情報なしで recall を見積もる用途）"""
+    rng = np.random.default_rng(seed)
+    idx = rng.choice(flat.ntotal, size=min(n, flat.ntotal), replace=False)
+    q = np.array(flat.vectors[np.sort(idx)])
+    q += rng.standard_normal(q.shape).astype(np.float32) * 0.05 / np.sqrt(flat.d)
+    q /= np.linalg.norm(q, axis=1, keepdims=True) + 1e-12
+    return q.astype(np.float32)
+
+
+def _recall(ann_labels: np.ndarray, gt_labels: np.ndarray, k: int) -> float:
+    hits = 0
+    for a, g in zip(ann_labels[:, :k], gt_labels[:, :k]):
+        hits += len(set(int(x) for x in a if x >= 0) & set(int(x) for x in g))
+    return hits / float(gt_labels.shape[0] * k)
+
+
+def _search_params(factory: str, nprobes: List[int], efs: List[int]) -> List[Dict[str, int]]:
+    if factory.startswith('IVF'):
+        return [{'nprobe': p} for p in nprobes]
+    if factory.startswith('HNSW'):
+        return [{'efSearch': e} for e in efs]
+    return [{}]
+
+
+def _apply_params(faiss, index, params: Dict[str, int]) -> None:
+    ps = faiss.ParameterSpace()
+    for name, value in params.items():
+        ps.set_index_parameter(index, name, value)
+
+
+def build_index(faiss, flat: MmapFlatIndex, factory: str, train_size: int) -> Dict[str, Any]:
+    """index_factory で構築し、学習・追加（ラベル = 元の行番号）まで行う"""
+    metric = faiss.METRIC_INNER_PRODUCT if flat.metric_type == 0 else faiss.METRIC_L2
+    index = faiss.index_factory(flat.d, factory, metric)
+    t0 = time.perf_counter()
+    if not index.is_trained:
+        index.train(_training_sample(flat, train_size))
+    train_s = time.perf_counter() - t0
+    t1 = time.perf_counter()
+    for _, block in _iter_blocks(flat):
+        index.add(block)
+    add_s = time.perf_counter() - t1
+    return {'index': index, 'train_s': train_s, 'add_s': add_s, 'size_bytes': int(faiss.serialize_index(index).size)}
+
+
+def measure(faiss, index, queries: np.ndarray, gt: np.ndarray, k: int, params: Dict[str, int]) -> Dict[str, Any]:
+    _apply_params(faiss, index, params)
+    lat: List[float] = []
+    labels = np.empty((queries.shape[0], k), dtype=np.int64)
+    for i in range(queries.shape[0]):
+        t = time.perf_counter()
+        _, lab = index.search(queries[i:i + 1], k)
+        lat.append((time.perf_counter() - t) * 1000)
+        labels[i] = lab[0]
+    return {'params': params, 'recall': _recall(labels, gt, k), 'latency_ms': percentiles(lat)}
+
+
+def write_index(faiss, index, params: Dict[str, int], *, src_index_dir: Path, src_vectors: str,
+                out_dir: Path, name: str, factory: str) -> Path:
+    """探索パラメータを設定した状態で書き出す（nprobe / efSearch はファイルに保存される）"""
+    _apply_params(faiss, index, params)
+    out_dir.mkdir(parents=True, exist_ok=True)
+    out_path = out_dir / f'{name}.faiss'
+    faiss.write_index(index, str(out_path))
+    with open(src_index_dir / f'{src_vectors}.mapping.json', 'r') as f:
+        mapping = json.load(f)
+    mapping['indexType'] = factory
+    mapping['searchParams'] = params
+    with open(str(out_path) + '.mapping.json', 'w') as f:
+        json.dump(mapping, f, indent=2)
+    # 別ディレクトリに書き出す場合は chunks.parquet も揃える（IndexLoader は同一ディレクトリを参照）
+    chunks_src = src_index_dir / 'chunks.parquet'
+    chunks_dst = out_dir / 'chunks.parquet'
+    if out_dir.resolve() != src_index_dir.resolve() and chunks_src.exists() and not chunks_dst.exists():
+        shutil.copyfile(chunks_src, chunks_dst)
+    return out_path
+
+
+def _rank(row: Dict[str, Any]) -> tuple:
+    """選択基準: サイズ最小 → p50 レイテンシ最小"""
+    return (row['size_bytes'], row['latency_ms']['p50'])
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='flat インデックスから圧縮ANNインデックスを構築し recall / サイズ / レイテンシを比較')
+    ap.add_argument('--index-dir', default=str(DEFAULT_INDEX_DIR))
+    ap.add_argument('--vectors', default='vectors.faiss')
+    ap.add_argument('--factories', default='', help="';' 区切りの index_factory 文字列（{nlist} は自動値に置換）")
+    ap.add_argument('--nlist', type=int, default=0, help='IVF のリスト数（0 で自動）')
+    ap.add_argument('--nprobe', default=','.join(str(x) for x in DEFAULT_NPROBES))
+    ap.add_argument('--ef-search', default=','.join(str(x) for x in DEFAULT_EF_SEARCH))
+    ap.add_argument('--train-size', type=int, default=65536)
+    ap.add_argument('--k', type=int, default=10)
+    ap.add_argument('--queries', default='sample', choices=['sample', 'intents'],
+                    help='sample: DBベクトル+ノイズ / intents: configs の intent を埋め込み')
+    ap.add_argument('--num-queries', type=int, default=500)
+    ap.add_argument('--embedder', default='bedrock')
+    ap.add_argument('--embedding-model', default='cohere.embed-v4:0')
+    ap.add_argument('--regions', default='ap-northeast-1')
+    ap.add_argument('--cache-file', default=str(DEFAULT_CACHE_FILE))
+    ap.add_argument('--target-recall', type=float, default=0.95)
+    ap.add_argument('--write', action='store_true', help='条件を満たす最小インデックスを書き出す')
+    ap.add_argument('--out-dir', default='', help='書き出し先（既定: --index-dir）')
+    ap.add_argument('--name', default='vectors.ann', help='書き出しファイル名（拡張子 .faiss を除く）')
+    ap.add_argument('--output', default='', help='比較結果JSONの出力先')
+    args = ap.parse_args()
+
+    try:
+        import faiss  # type: ignore
+    except ImportError:
+        print("[エラー] faiss が見つかりません。pip install faiss-cpu を実行してください")
+        raise
+
+    index_dir = Path(args.index_dir)
+    flat = MmapFlatIndex(index_dir / args.vectors)
+    chunk_ids = load_mapping(index_dir, args.vectors)
+    if len(chunk_ids) != flat.ntotal:
+        print(f"[警告] マッピング件数 {len(chunk_ids)} と ntotal {flat.ntotal} が一致しません")
+    flat_size = (index_dir / args.vectors).stat().st_size
+    nlist = args.nlist or _default_nlist(flat.ntotal)
+    k = int(args.k)
+    print(f"[情報] flat: ntotal={flat.ntotal} d={flat.d} size={flat_size/1e6:.1f}MB nlist={nlist}")
+
+    if args.queries == 'intents':
+        configs = load_task_configs(DEFAULT_CONFIGS_DIR)
+        regions = [r.strip() for r in args.regions.split(',') if r.strip()]
+        embedder = CachedEmbedder(build_embedder(args.embedder, model_id=args.embedding_model, regions=regions, dim=flat.d),
+                                  Path(args.cache_file))
+        queries = embedder.embed([str(c.get('intent') or '') for c in configs])
+    else:
+        queries = _sample_queries(flat, args.num_queries)
+
+    t0 = time.perf_counter()
+    _, gt = flat.search(queries, k)
+    flat_ms = (time.perf_counter() - t0) * 1000 / max(1, queries.shape[0])
+    print(f"[情報] flat 正解計算: {queries.shape[0]}クエリ 平均{flat_ms:.2f}ms/クエリ")
+
+    factories = [f.strip() for f in (args.factories.split(';') if args.factories else DEFAULT_FACTORIES) if f.strip()]
+    nprobes = [int(x) for x in args.nprobe.split(',') if x.strip()]
+    nprobes = [p for p in nprobes if p <= nlist] or [nlist]
+    efs = [int(x) for x in args.ef_search.split(',') if x.strip()]
+
+    results: List[Dict[str, Any]] = []
+    # 書き出し用に保持するのはその時点の最良候補のインデックスだけ（ピークメモリを候補1つ分に抑える）
+    best_index: Any = None
+    best_row: Optional[Dict[str, Any]] = None
+    for tmpl in factories:
+        factory = tmpl.format(nlist=nlist)
+        print(f"\n[構築] {factory}")
+        try:
+            b = build_index(faiss, flat, factory, args.train_size)
+        except Exception as e:
+            print(f"[警告] 構築失敗: {factory}: {e}")
+            continue
+        print(f"  - train={b['train_s']:.1f}s add={b['add_s']:.1f}s size={b['size_bytes']/1e6:.1f}MB ({flat_size/max(1, b['size_bytes']):.1f}x 小)")
+        for params in _search_params(factory, nprobes, efs):
+            m = measure(faiss, b['index'], queries, gt, k, params)
+            row = {
+                'factory': factory,
+                'params': params,
+                'size_bytes': b['size_bytes'],
+                'compression': flat_size / max(1, b['size_bytes']),
+                'build_s': b['train_s'] + b['add_s'],
+                f'recall@{k}': m['recall'],
+                'latency_ms': m['latency_ms'],
+            }
+            results.append(row)
+            print(f"  - {json.dumps(params)}: recall@{k}={m['recall']:.4f} p50={m['latency_ms']['p50']:.2f}ms p99={m['latency_ms']['p99']:.2f}ms")
+            if args.write and row[f'recall@{k}'] >= args.target_recall and (best_row is None or _rank(row) < _rank(best_row)):
+                best_row = row
+                best_index = b['index']
+        del b  # 最良でなければここで解放
+
+    eligible = [r for r in results if r[f'recall@{k}'] >= args.target_recall]
+    chosen: Optional[Dict[str, Any]] = None
+    if eligible:
+        chosen = sorted(eligible, key=_rank)[0]
+        print(f"\n[結果] 選択: {chosen['factory']} {json.dumps(chosen['params'])} "
+              f"size={chosen['size_bytes']/1e6:.1f}MB ({chosen['compression']:.1f}x) recall@{k}={chosen[f'recall@{k}']:.4f}")
+    else:
+        print(f"\n[結果] recall@{k} >= {args.target_recall} を満たすインデックスはありません")
+
+    report = {
+        'flat': {'path': str(index_dir / args.vectors), 'ntotal': flat.ntotal, 'dimension': flat.d,
+                 'size_bytes': flat_size, 'latency_ms_per_query': flat_ms},
+        'k': k,
+        'queries': {'kind': args.queries, 'count': int(queries.shape[0])},
+        'target_recall': args.target_recall,
+        'results': results,
+        'chosen': chosen,
+    }
+
+    if args.write and chosen:
+        out_dir = Path(args.out_dir) if args.out_dir else index_dir
+        out_path = write_index(faiss, best_index, chosen['params'], src_index_dir=index_dir,
+                               src_vectors=args.vectors, out_dir=out_dir, name=args.name, factory=chosen['factory'])
+        report['written'] = str(out_path)
+        print(f"[情報] インデックス書き出し: {out_path}")
+        print(f"[ヒント] エージェントで使用するには AGENT_INDEX_VECTORS_FILE={out_path.name} を設定してください")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"[情報] 結果保存: {args.output}")
+    flat.close()
+
+
+if __name__ == '__main__':
+    main()
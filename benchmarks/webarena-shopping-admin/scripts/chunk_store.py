@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+メモリマップ型チャンクストア（chunks.store）の変換ツールとリーダー
+・vectors.faiss.mapping.json（3.4MB JSON）と chunks.parquet（117MB）を、固定長オフセット表つきバイナリ1ファイルに変換
+・序数（= FAISSラベル）→ chunk_id / URL / チャンク本文 を、ストア全体をデシリアライズせずに解決
+・ロード時はヘッダ（64バイト）のみ読み、検索で返ったチャンクのページだけがメモリに載る
+
+ファイルレイアウト（リトルエンディアン）:
+  header (64B): magic 'WGCS' | version u32 | count u64 | table_off u64 | lookup_off u64 | heap_off u64 | heap_size u64 | reserved
+  table (count × 48B): id_off u64 | url_off u64 | text_off u64 | id_len u32 | url_len u32 | text_len u32 | page_id i32 | chunk_index i32 | reserved u32
+  lookup (count × 16B): chunk_id のハッシュ u64（昇順）| ordinal u32 | reserved u32
+  heap: UTF-8 文字列（URL は重複排除して1回のみ格納）
+  ※ *_off は heap 先頭からの相対オフセット
+
+使い方:
+  python scripts/chunk_store.py build                       # resources/index/chunks.store を生成
+  python scripts/chunk_store.py get 0 1 2                   # ラベルから本文を表示
+  python scripts/chunk_store.py bench --labels 1000         # ロード時間 / RSS / ルックアップ時間
+"""
+import argparse
+import hashlib
+import json
+import mmap
+import os
+import struct
+import time
+from pathlib import Path
+from typing import Dict, Iterable, List, Optional
+
+MAGIC = b'WGCS'
+VERSION = 1
+HEADER = struct.Struct('<4sIQQQQQ16x')
+ENTRY = struct.Struct('<QQQIIIiiI')
+LOOKUP = struct.Struct('<QII')
+assert HEADER.size == 64 and ENTRY.size == 48 and LOOKUP.size == 16
+
+BENCH_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX_DIR = BENCH_DIR / 'resources' / 'index'
+
+
+def chunk_id_hash(chunk_id: str) -> int:
+    """chunk_id → u64（sha256 先頭8バイトのリトルエンディアン。src/indexer/chunk-store.ts と同じ定義）"""
+    return int.from_bytes(hashlib.sha256(chunk_id.encode('utf-8')).digest()[:8], 'little')
+
+
+class ChunkStore:
+    """chunks.store の読み取り専用リーダー（mmap、遅延デコード）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        magic, version, count, table_off, lookup_off, heap_off, heap_size = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"chunks.store ではありません: {self.path}")
+        if version != VERSION:
+            raise ValueError(f"未対応のバージョン: {version}")
+        self.count = int(count)
+        self._table_off = table_off
+        self._lookup_off = lookup_off
+        self._heap_off = heap_off
+        self._heap_size = heap_size
+
+    def __len__(self) -> int:
+        return self.count
+
+    def _entry(self, ordinal: int):
+        if ordinal < 0 or ordinal >= self.count:
+            raise IndexError(ordinal)
+        return ENTRY.unpack_from(self._mm, self._table_off + ordinal * ENTRY.size)
+
+    def _str(self, off: int, length: int) -> str:
+        start = self._heap_off + off
+        return self._mm[start:start + length].decode('utf-8')
+
+    def chunk_id(self, ordinal: int) -> str:
+        e = self._entry(ordinal)
+        return self._str(e[0], e[3])
+
+    def url(self, ordinal: int) -> str:
+        e = self._entry(ordinal)
+        return self._str(e[1], e[4])
+
+    def text(self, ordinal: int) -> str:
+        e = self._entry(ordinal)
+        return self._str(e[2], e[5])
+
+    def get(self, ordinal: int) -> Dict[str, object]:
+        id_off, url_off, text_off, id_len, url_len, text_len, page_id, chunk_index, _ = self._entry(ordinal)
+        return {
+            'ordinal': ordinal,
+            'chunk_id': self._str(id_off, id_len),
+            'page_id': page_id,
+            'chunk_index': chunk_index,
+            'url': self._str(url_off, url_len),
+            'chunk_text': self._str(text_off, text_len),
+        }
+
+    def get_many(self, ordinals: Iterable[int]) -> List[Dict[str, object]]:
+        return [self.get(int(o)) for o in ordinals if 0 <= int(o) < self.count]
+
+    def ordinal_of(self, chunk_id: str) -> Optional[int]:
+        """chunk_id → 序数（ハッシュ表の二分探索）"""
+        h = chunk_id_hash(chunk_id)
+        lo, hi = 0, self.count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            mh, _, _ = LOOKUP.unpack_from(self._mm, self._lookup_off + mid * LOOKUP.size)
+            if mh < h:
+                lo = mid + 1
+            else:
+                hi = mid
+        while lo < self.count:
+            mh, ordinal, _ = LOOKUP.unpack_from(self._mm, self._lookup_off + lo * LOOKUP.size)
+            if mh != h:
+                break
+            if self.chunk_id(ordinal) == chunk_id:
+                return int(ordinal)
+            lo += 1
+        return None
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+            self._file.close()
+        except Exception:
+            pass
+
+
+def build_store(index_dir: Path, out_path: Path, vectors_name: str = 'vectors.faiss') -> Dict[str, object]:
+    """mapping.json の順序（= FAISSラベル）で chunks.parquet の行を並べ、chunks.store を書き出す"""
+    import pyarrow.parquet as pq  # type: ignore
+
+    with open(index_dir / f'{vectors_name}.mapping.json', 'r') as f:
+        chunk_ids: List[str] = list(json.load(f).get('chunkIds') or [])
+    table = pq.read_table(index_dir / 'chunks.parquet', columns=['chunk_id', 'page_id', 'url', 'chunk_index', 'chunk_text'])
+    row_of: Dict[str, int] = {str(cid): i for i, cid in enumerate(table.column('chunk_id').to_pylist())}
+    page_ids = table.column('page_id').to_pylist()
+    urls = table.column('url').to_pylist()
+    chunk_indexes = table.column('chunk_index').to_pylist()
+    texts = table.column('chunk_text')
+
+    count = len(chunk_ids)
+    table_off = HEADER.size
+    lookup_off = table_off + count * ENTRY.size
+    heap_off = lookup_off + count * LOOKUP.size
+    missing = 0
+    url_offsets: Dict[str, tuple] = {}
+    tmp_path = Path(str(out_path) + '.tmp')
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    with open(tmp_path, 'wb') as f:
+        f.write(b'\0' * heap_off)
+        heap_pos = 0
+        entries = bytearray(count * ENTRY.size)
+        lookups = []
+
+        def put(b: bytes) -> tuple:
+            nonlocal heap_pos
+            off = heap_pos
+            f.write(b)
+            heap_pos += len(b)
+            return off, len(b)
+
+        for ordinal, cid in enumerate(chunk_ids):
+            row = row_of.get(str(cid))
+            if row is None:
+                missing += 1
+                url, text, page_id, chunk_index = '', '', -1, -1
+            else:
+                url = str(urls[row] or '')
+                text = str(texts[row].as_py() or '')
+                page_id = int(page_ids[row] if page_ids[row] is not None else -1)
+                chunk_index = int(chunk_indexes[row] if chunk_indexes[row] is not None else -1)
+            id_off, id_len = put(str(cid).encode('utf-8'))
+            if url not in url_offsets:
+                url_offsets[url] = put(url.encode('utf-8'))
+            url_off, url_len = url_offsets[url]
+            text_off, text_len = put(text.encode('utf-8'))
+            ENTRY.pack_into(entries, ordinal * ENTRY.size, id_off, url_off, text_off, id_len, url_len, text_len, page_id, chunk_index, 0)
+            lookups.append((chunk_id_hash(str(cid)), ordinal))
+        lookups.sort()
+        f.seek(0)
+        f.write(HEADER.pack(MAGIC, VERSION, count, table_off, lookup_off, heap_off, heap_pos))
+        f.write(entries)
+        f.write(b''.join(LOOKUP.pack(h, o, 0) for h, o in lookups))
+    os.replace(tmp_path, out_path)
+    return {'path': str(out_path), 'count': count, 'missing': missing, 'unique_urls': len(url_offsets),
+            'size_bytes': out_path.stat().st_size}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='メモリマップ型チャンクストア（chunks.store）の生成と参照')
+    ap.add_argument('--index-dir', default=str(DEFAULT_INDEX_DIR))
+    ap.add_argument('--vectors', default='vectors.faiss', help='ラベル順の基準とするマッピング（<vectors>.mapping.json）')
+    ap.add_argument('--store', default='', help='ストアのパス（既定: <index-dir>/chunks.store）')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('build', help='mapping.json + chunks.parquet から chunks.store を生成')
+    g = sub.add_parser('get', help='ラベル（序数）または chunk_id からチャンクを表示')
+    g.add_argument('keys', nargs='+')
+    b = sub.add_parser('bench', help='ロード時間 / RSS / ルックアップ時間を計測')
+    b.add_argument('--labels', type=int, default=1000)
+    args = ap.parse_args()
+
+    index_dir = Path(args.index_dir)
+    store_path = Path(args.store) if args.store else index_dir / 'chunks.store'
+
+    if args.cmd == 'build':
+        t0 = time.perf_counter()
+        info = build_store(index_dir, store_path, args.vectors)
+        print(f"[情報] チャンクストア生成: {info['path']} ({info['count']}件, URL {info['unique_urls']}件, "
+              f"{info['size_bytes']/1e6:.1f}MB, {time.perf_counter()-t0:.1f}s)")
+        if info['missing']:
+            print(f"[警告] chunks.parquet に存在しない chunk_id: {info['missing']}件（空文字で格納）")
+        return
+
+    if args.cmd == 'get':
+        store = ChunkStore(store_path)
+        for key in args.keys:
+            ordinal = int(key) if key.isdigit() else store.ordinal_of(key)
+            if ordinal is None:
+                print(f"[警告] 見つかりません: {key}")
+                continue
+            print(json.dumps(store.get(ordinal), ensure_ascii=False, indent=2))
+        store.close()
+        return
+
+    # bench
+    import random
+    from retrieval_benchmark import current_rss_mb, percentiles
+    rss0 = current_rss_mb()
+    t0 = time.perf_counter()
+    store = ChunkStore(store_path)
+    load_ms = (time.perf_counter() - t0) * 1000
+    rng = random.Random(0)
+    lat: List[float] = []
+    for _ in range(args.labels):
+        o = rng.randrange(store.count)
+        t = time.perf_counter()
+        store.get(o)
+        lat.append((time.perf_counter() - t) * 1000)
+    p = percentiles(lat)
+    print(f"[結果] ロード: {load_ms:.3f}ms / 件数 {store.count}")
+    print(f"[結果] ルックアップ: p50={p['p50']*1000:.1f}us p99={p['p99']*1000:.1f}us")
+    print(f"[結果] RSS増分: {current_rss_mb() - rss0:.1f}MB")
+    store.close()
+
+
+if __name__ == '__main__':
+    main()
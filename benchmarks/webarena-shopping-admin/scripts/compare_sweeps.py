@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+2つのスイープ（リーダーボード風サマリー tasks/task_<id>/*.json）の比較とリグレッション判定
+・指標: execution_time（秒）/ cost（エージェント + 判定、USD）/ agent_cost / judge_cost / score
+  コストはサマリーの step_timing.tokens（エージェント）と judge_usage（判定モデル）のトークン数に単価を掛けて算出
+  （単価の既定値は src/agent/observability.ts の Langfuse 用コスト換算と同じ。トークン記録の無いランはコスト集計対象外）
+・タスクごとに複数ランがあれば反復として扱い、タスク内平均の差分と、ランの再標本化によるブートストラップ信頼区間を出す
+・全体は両スイープに共通するタスクについて、タスクと各タスク内のランを階層的に再標本化して差分の信頼区間を出す
+・閾値を超え、かつ信頼区間が0を含まない（悪化が有意）場合にリグレッションとして終了コード 1
+  （--strict では点推定が閾値を超えた時点でリグレッション）
+
+使い方:
+  python scripts/compare_sweeps.py tasks /home/ec2-user/webarena-local/evaluation-result
+  python scripts/compare_sweeps.py base/ cand/ --max-time-regression 0.10 --max-cost-regression 0.10 --max-score-drop 0.05
+  python scripts/compare_sweeps.py base/ cand/ --bootstrap 5000 --confidence 0.9 --output resources/bench/compare.json
+"""
+import argparse
+import json
+import math
+import sys
+from pathlib import Path
+from typing import Dict, List, Optional, Tuple
+
+import numpy as np
+
+from latency_report import load_summaries
+
+METRICS = ('execution_time', 'cost', 'agent_cost', 'judge_cost', 'score')
+# 値が大きいほど悪い指標（score は小さいほど悪い）
+_HIGHER_IS_WORSE = {'execution_time': True, 'cost': True, 'agent_cost': True, 'judge_cost': True, 'score': False}
+
+# 1トークンあたり USD（observability.ts の AGENT_LANGFUSE_COST_* 既定値と同じ）
+DEFAULT_PRICES = {'input': 0.00000300, 'output': 0.00001500, 'cache_read': 0.00000030, 'cache_write': 0.00000375}
+
+
+def _tokens_cost(tokens: dict, prices: Dict[str, float]) -> float:
+    return sum(float(tokens.get(k) or 0) * p for k, p in prices.items())
+
+
+def run_metrics(summary: dict, prices: Dict[str, float]) -> Dict[str, Optional[float]]:
+    """1ランのサマリーから指標を取り出す（記録の無い指標は None）"""
+    out: Dict[str, Optional[float]] = {
+        'execution_time': float(summary['execution_time']) if summary.get('execution_time') is not None else None,
+        'score': float(summary.get('score') or 0.0),
+    }
+    agent_tokens = (summary.get('step_timing') or {}).get('tokens')
+    judge_usage = summary.get('judge_usage')
+    out['agent_cost'] = _tokens_cost(agent_tokens, prices) if agent_tokens else None
+    out['judge_cost'] = _tokens_cost(judge_usage, prices) if judge_usage else None
+    if out['agent_cost'] is None and out['judge_cost'] is None:
+        out['cost'] = None
+    else:
+        out['cost'] = (out['agent_cost'] or 0.0) + (out['judge_cost'] or 0.0)
+    return out
+
+
+def load_sweep(tasks_dir: Path, prices: Dict[str, float]) -> Dict[int, List[Dict[str, Optional[float]]]]:
+    """task_id → 各ランの指標（全ランを反復として読む）"""
+    runs: Dict[int, List[Dict[str, Optional[float]]]] = {}
+    for s in load_summaries(tasks_dir, all_runs=True):
+        try:
+            task_id = int(s.get('task_id'))
+        except (TypeError, ValueError):
+            continue
+        runs.setdefault(task_id, []).append(run_metrics(s, prices))
+    return runs
+
+
+def _values(runs: List[dict], metric: str) -> np.ndarray:
+    return np.asarray([r[metric] for r in runs if r.get(metric) is not None], dtype=np.float64)
+
+
+def _ci(samples: np.ndarray, confidence: float) -> Tuple[float, float]:
+    alpha = (1.0 - confidence) / 2.0
+    return float(np.quantile(samples, alpha)), float(np.quantile(samples, 1.0 - alpha))
+
+
+def task_delta(base: np.ndarray, cand: np.ndarray, rng: np.random.Generator, n_boot: int, confidence: float) -> dict:
+    """1タスク内の平均差分（反復が2以上ずつあればランの再標本化で信頼区間）"""
+    row = {
+        'base_mean': float(base.mean()), 'cand_mean': float(cand.mean()),
+        'delta': float(cand.mean() - base.mean()), 'base_runs': int(base.size), 'cand_runs': int(cand.size),
+    }
+    if base.size >= 2 and cand.size >= 2:
+        b = rng.choice(base, size=(n_boot, base.size)).mean(axis=1)
+        c = rng.choice(cand, size=(n_boot, cand.size)).mean(axis=1)
+        row['ci'] = _ci(c - b, confidence)
+    return row
+
+
+def aggregate_delta(pairs: List[Tuple[np.ndarray, np.ndarray]], rng: np.random.Generator,
+                    n_boot: int, confidence: float) -> dict:
+    """共通タスクのタスク内平均を等重みで平均した値の差分と相対差分。タスク → ラン の階層ブートストラップで信頼区間"""
+    base_means = np.asarray([b.mean() for b, _ in pairs])
+    cand_means = np.asarray([c.mean() for _, c in pairs])
+    base_agg, cand_agg = float(base_means.mean()), float(cand_means.mean())
+    n = len(pairs)
+    # 各タスクのラン再標本化平均を先に n_boot 本ずつ作り、タスクの再標本化はそれを添字で引く
+    boot_base = np.stack([rng.choice(b, size=(n_boot, b.size)).mean(axis=1) for b, _ in pairs])
+    boot_cand = np.stack([rng.choice(c, size=(n_boot, c.size)).mean(axis=1) for _, c in pairs])
+    idx = rng.integers(0, n, size=(n_boot, n))
+    cols = np.arange(n_boot)[:, None]
+    b_sum = boot_base[idx, cols].sum(axis=1)
+    c_sum = boot_cand[idx, cols].sum(axis=1)
+    boot_delta = (c_sum - b_sum) / n
+    with np.errstate(divide='ignore', invalid='ignore'):
+        boot_rel = np.where(b_sum != 0, (c_sum - b_sum) / b_sum, 0.0)
+    return {
+        'tasks': n,
+        'base_mean': base_agg,
+        'cand_mean': cand_agg,
+        'delta': cand_agg - base_agg,
+        'relative': (cand_agg - base_agg) / base_agg if base_agg else None,
+        'ci': _ci(boot_delta, confidence),
+        'relative_ci': _ci(boot_rel, confidence),
+    }
+
+
+def check_regression(metric: str, agg: dict, threshold: Optional[float], relative: bool, strict: bool) -> Optional[str]:
+    """閾値を超える悪化なら理由を返す"""
+    if threshold is None:
+        return None
+    worse = 1.0 if _HIGHER_IS_WORSE[metric] else -1.0
+    if relative:
+        point = agg.get('relative')
+        lo, hi = agg['relative_ci']
+    else:
+        point = agg['delta']
+        lo, hi = agg['ci']
+    if point is None or point * worse <= threshold + 1e-12:
+        return None
+    # 悪化方向の信頼区間が0をまたぐならノイズの範囲とみなす
+    significant = (lo > 0) if worse > 0 else (hi < 0)
+    if not strict and not significant:
+        return None
+    unit = '%' if relative else ''
+    shown = point * 100 if relative else point
+    return f"{metric}: {shown:+.3g}{unit}（閾値 {threshold * 100 if relative else threshold:.3g}{unit}）"
+
+
+def _fmt(metric: str, v: Optional[float]) -> str:
+    if v is None or (isinstance(v, float) and math.isnan(v)):
+        return '-'
+    if metric.endswith('cost'):
+        return f"${v:.4f}"
+    if metric == 'execution_time':
+        return f"{v:.2f}s"
+    return f"{v:.3f}"
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='2つのスイープの実行時間・コスト・スコアを比較し、リグレッションで非0終了する')
+    ap.add_argument('baseline', help='比較元の task_<id>/*.json を含むディレクトリ')
+    ap.add_argument('candidate', help='比較先の task_<id>/*.json を含むディレクトリ')
+    ap.add_argument('--bootstrap', type=int, default=2000, help='ブートストラップ反復回数')
+    ap.add_argument('--confidence', type=float, default=0.95)
+    ap.add_argument('--seed', type=int, default=0)
+    ap.add_argument('--max-time-regression', type=float, default=0.10, help='execution_time の相対増加の許容値（0.10 = +10%%）')
+    ap.add_argument('--max-cost-regression', type=float, default=0.10, help='cost の相対増加の許容値')
+    ap.add_argument('--max-score-drop', type=float, default=0.05, help='score（成功率）の絶対低下の許容値')
+    ap.add_argument('--strict', action='store_true', help='信頼区間に関わらず点推定で判定する')
+    ap.add_argument('--top', type=int, default=10, help='悪化の大きいタスクの表示件数')
+    ap.add_argument('--output', default='', help='結果JSONの出力先')
+    for k, v in DEFAULT_PRICES.items():
+        ap.add_argument(f"--price-{k.replace('_', '-')}", type=float, default=v, help=f'1トークンあたり USD（{k}）')
+    args = ap.parse_args()
+
+    prices = {k: getattr(args, f'price_{k}') for k in DEFAULT_PRICES}
+    base = load_sweep(Path(args.baseline), prices)
+    cand = load_sweep(Path(args.candidate), prices)
+    common = sorted(set(base) & set(cand))
+    print(f"[情報] baseline {len(base)}タスク / candidate {len(cand)}タスク / 共通 {len(common)}タスク")
+    if not common:
+        print("[エラー] 共通するタスクがありません")
+        sys.exit(2)
+    for label, only in (('baseline のみ', sorted(set(base) - set(cand))), ('candidate のみ', sorted(set(cand) - set(base)))):
+        if only:
+            print(f"[警告] {label}: {', '.join(map(str, only))}（比較対象外）")
+
+    rng = np.random.default_rng(args.seed)
+    thresholds = {
+        'execution_time': (args.max_time_regression, True),
+        'cost': (args.max_cost_regression, True),
+        'score': (args.max_score_drop, False),
+    }
+    result: Dict[str, dict] = {}
+    regressions: List[str] = []
+    for metric in METRICS:
+        per_task: Dict[int, dict] = {}
+        pairs: List[Tuple[np.ndarray, np.ndarray]] = []
+        for tid in common:
+            b, c = _values(base[tid], metric), _values(cand[tid], metric)
+            if b.size and c.size:
+                pairs.append((b, c))
+                per_task[tid] = task_delta(b, c, rng, args.bootstrap, args.confidence)
+        if not pairs:
+            print(f"[情報] {metric}: 両スイープに記録のあるタスクがないため比較対象外")
+            continue
+        agg = aggregate_delta(pairs, rng, args.bootstrap, args.confidence)
+        threshold, relative = thresholds.get(metric, (None, False))
+        reason = check_regression(metric, agg, threshold, relative, args.strict)
+        if reason:
+            regressions.append(reason)
+        result[metric] = {'aggregate': agg, 'per_task': per_task, 'regression': reason}
+
+        rel = f" ({agg['relative'] * 100:+.1f}%)" if agg.get('relative') is not None else ''
+        lo, hi = agg['ci']
+        print(f"[結果] {metric:14s} {_fmt(metric, agg['base_mean'])} → {_fmt(metric, agg['cand_mean'])}{rel} "
+              f"差分 {agg['delta']:+.4g} [{lo:+.4g}, {hi:+.4g}] ({int(args.confidence * 100)}% CI, {agg['tasks']}タスク)"
+              f"{'  ← リグレッション' if reason else ''}")
+
+    for metric in ('execution_time', 'cost', 'score'):
+        if metric not in result:
+            continue
+        sign = 1.0 if _HIGHER_IS_WORSE[metric] else -1.0
+        worst = sorted(result[metric]['per_task'].items(), key=lambda kv: kv[1]['delta'] * sign, reverse=True)[:args.top]
+        worst = [(tid, r) for tid, r in worst if r['delta'] * sign > 0]
+        if not worst:
+            continue
+        print(f"\n[結果] {metric} が悪化したタスク")
+        for tid, r in worst:
+            ci = f" [{r['ci'][0]:+.4g}, {r['ci'][1]:+.4g}]" if 'ci' in r else ''
+            print(f"  task {tid:4d}: {_fmt(metric, r['base_mean'])} → {_fmt(metric, r['cand_mean'])} "
+                  f"(差分 {r['delta']:+.4g}{ci}, ラン {r['base_runs']}/{r['cand_runs']})")
+
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump({
+                'baseline': args.baseline,
+                'candidate': args.candidate,
+                'common_tasks': common,
+                'prices_per_token': prices,
+                'metrics': result,
+                'regressions': regressions,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"[情報] 結果を保存: {out}")
+
+    if regressions:
+        print("\n[エラー] リグレッションを検出:")
+        for r in regressions:
+            print(f"  - {r}")
+        sys.exit(1)
+    print("\n[情報] リグレッションなし")
+
+
+if __name__ == '__main__':
+    main()
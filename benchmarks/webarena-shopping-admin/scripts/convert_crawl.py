@@ -0,0 +1,240 @@
+#!/usr/bin/env python3
+"""
+crawl.csv の前処理ツール（Parquet 変換 / 永続 DuckDB 構築 / 読み込みベンチマーク）
+・エージェント（src/agent/duckdb.ts）は起動のたびに 78MB の CSV を read_csv_auto で推定・パースしている
+・列を型付け（URL / id / site / snapshotforai / timestamp）し、site ごとに分割した URL 順の Parquet に変換
+  （行グループ統計で URL の範囲検索が枝刈りされる）
+・--duckdb 指定時は、URL / id のインデックスと snapshotforai の全文検索インデックスを持つ永続 DB も生成
+・生成物は AGENT_CSV_PATH にそのまま指定できる（.parquet ディレクトリ / .duckdb ファイル）
+
+使い方:
+  python scripts/convert_crawl.py convert                                   # resources/crawl_parquet/ を生成
+  python scripts/convert_crawl.py convert --duckdb resources/crawl.duckdb   # 永続 DB も生成
+  python scripts/convert_crawl.py bench --lookups 50                        # CSV / Parquet / DB の比較
+"""
+import argparse
+import json
+import os
+import random
+import shutil
+import sys
+import time
+from pathlib import Path
+from typing import Dict, List
+from urllib.parse import quote
+
+BENCH_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CSV = BENCH_DIR / 'resources' / 'crawl.csv'
+DEFAULT_PARQUET_DIR = BENCH_DIR / 'resources' / 'crawl_parquet'
+DEFAULT_DB = BENCH_DIR / 'resources' / 'crawl.duckdb'
+
+# crawler/main.ts の CsvWriter と同じ列（型は明示して推定を省く）
+CRAWL_COLUMNS: Dict[str, str] = {
+    'URL': 'VARCHAR',
+    'id': 'BIGINT',
+    'site': 'VARCHAR',
+    'snapshotforai': 'VARCHAR',
+    'timestamp': 'VARCHAR',
+}
+
+TYPED_SELECT = (
+    'SELECT "URL", id, site, snapshotforai, TRY_CAST("timestamp" AS TIMESTAMPTZ) AS "timestamp"'
+)
+
+
+def _require_duckdb():
+    try:
+        import duckdb  # type: ignore
+    except ImportError:
+        print("[エラー] duckdb が見つかりません（pip install duckdb）")
+        sys.exit(1)
+    return duckdb
+
+
+def _sql_str(value: str) -> str:
+    return "'" + str(value).replace("'", "''") + "'"
+
+
+def read_csv_sql(csv_path: Path) -> str:
+    columns = '{' + ', '.join(f"{_sql_str(k)}: {_sql_str(v)}" for k, v in CRAWL_COLUMNS.items()) + '}'
+    return f"read_csv({_sql_str(str(csv_path))}, header=true, columns={columns})"
+
+
+def parquet_glob(parquet_dir: Path) -> str:
+    return str(parquet_dir / '**' / '*.parquet')
+
+
+def read_parquet_sql(parquet_dir: Path) -> str:
+    # ディレクトリ名を列として解釈させない（site 列はファイル内の値を使う）
+    return f"read_parquet({_sql_str(parquet_glob(parquet_dir))}, hive_partitioning=false)"
+
+
+def convert_to_parquet(con, csv_path: Path, out_dir: Path, row_group_size: int) -> Dict[str, object]:
+    """site ごとに site_<値>/part-0.parquet を URL 順で書き出す（一時ディレクトリに書いてから置き換え）
+    ディレクトリ名は key=value 形式にしない（DuckDB 等の hive 自動検出で site 列が名前の値に置き換わるため）"""
+    con.execute(f"CREATE OR REPLACE TEMP TABLE crawl AS {TYPED_SELECT} FROM {read_csv_sql(csv_path)}")
+    sites = [r[0] for r in con.execute('SELECT DISTINCT site FROM crawl ORDER BY site NULLS LAST').fetchall()]
+    tmp_dir = Path(str(out_dir) + '.tmp')
+    if tmp_dir.exists():
+        shutil.rmtree(tmp_dir)
+    partitions: List[Dict[str, object]] = []
+    for site in sites:
+        label = quote(site, safe='') if site else '__none__'
+        part_dir = tmp_dir / f'site_{label}'
+        part_dir.mkdir(parents=True, exist_ok=True)
+        where = 'site IS NULL' if site is None else f'site = {_sql_str(site)}'
+        out_file = part_dir / 'part-0.parquet'
+        con.execute(
+            f'COPY (SELECT * FROM crawl WHERE {where} ORDER BY "URL") TO {_sql_str(str(out_file))} '
+            f'(FORMAT PARQUET, COMPRESSION ZSTD, ROW_GROUP_SIZE {int(row_group_size)})'
+        )
+        rows = con.execute(f'SELECT COUNT(*) FROM crawl WHERE {where}').fetchone()[0]
+        partitions.append({'site': site, 'rows': int(rows), 'bytes': out_file.stat().st_size})
+    if out_dir.exists():
+        shutil.rmtree(out_dir)
+    os.replace(tmp_dir, out_dir)
+    return {'path': str(out_dir), 'partitions': partitions,
+            'rows': sum(int(p['rows']) for p in partitions),
+            'bytes': sum(int(p['bytes']) for p in partitions)}
+
+
+def build_duckdb(duckdb, source_sql: str, db_path: Path, fts: bool) -> Dict[str, object]:
+    """pages テーブル（URL 順）+ URL / id インデックス +（任意）snapshotforai の全文検索インデックス"""
+    tmp_path = Path(str(db_path) + '.tmp')
+    if tmp_path.exists():
+        tmp_path.unlink()
+    con = duckdb.connect(str(tmp_path))
+    con.execute(f'CREATE TABLE pages AS SELECT * FROM {source_sql} ORDER BY "URL"')
+    con.execute('CREATE INDEX pages_url_idx ON pages ("URL")')
+    con.execute('CREATE INDEX pages_id_idx ON pages (id)')
+    fts_ok = False
+    if fts:
+        try:
+            con.execute('INSTALL fts')
+            con.execute('LOAD fts')
+            con.execute("PRAGMA create_fts_index('pages', 'id', 'snapshotforai', overwrite=1)")
+            fts_ok = True
+        except Exception as e:
+            print(f"[警告] 全文検索インデックスを作成できませんでした（fts 拡張）: {e}")
+    con.execute('CHECKPOINT')
+    rows = con.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+    con.close()
+    os.replace(tmp_path, db_path)
+    return {'path': str(db_path), 'rows': int(rows), 'fts': fts_ok, 'bytes': db_path.stat().st_size}
+
+
+# ---- ベンチマーク ----
+
+def _open_source(duckdb, kind: str, path: Path):
+    """エージェントと同じ方法で pages を用意する（初回クエリまでを「ロード」として計測）"""
+    if kind == 'duckdb':
+        return duckdb.connect(str(path), read_only=True)
+    con = duckdb.connect(':memory:')
+    if kind == 'csv':
+        con.execute(f"CREATE VIEW pages AS SELECT * FROM read_csv_auto({_sql_str(str(path))}, HEADER=true)")
+    else:
+        con.execute(f"CREATE VIEW pages AS SELECT * FROM {read_parquet_sql(path)}")
+    return con
+
+
+def bench_source(duckdb, kind: str, path: Path, urls: List[str], ids: List[str]) -> Dict[str, object]:
+    from retrieval_benchmark import percentiles
+
+    t0 = time.perf_counter()
+    con = _open_source(duckdb, kind, path)
+    total = con.execute('SELECT COUNT(*) FROM pages').fetchone()[0]
+    load_ms = (time.perf_counter() - t0) * 1000
+
+    # snapshot_fetch / browser_goto と同じ形のクエリ
+    url_lat: List[float] = []
+    for u in urls:
+        t = time.perf_counter()
+        con.execute('SELECT "URL" AS url, CAST(id AS VARCHAR) AS id, snapshotforai FROM pages WHERE "URL" IN (?)', [u]).fetchall()
+        url_lat.append((time.perf_counter() - t) * 1000)
+    id_lat: List[float] = []
+    for i in ids:
+        t = time.perf_counter()
+        con.execute('SELECT "URL" AS url FROM pages WHERE CAST(id AS VARCHAR) = ? LIMIT 1', [i]).fetchall()
+        id_lat.append((time.perf_counter() - t) * 1000)
+    con.close()
+    return {'source': kind, 'path': str(path), 'rows': int(total), 'load_ms': load_ms,
+            'url_lookup_ms': percentiles(url_lat), 'id_lookup_ms': percentiles(id_lat)}
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='crawl.csv を Parquet / 永続 DuckDB に変換し、読み込み性能を比較する')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    c = sub.add_parser('convert', help='CSV → site 分割・URL 順の Parquet（+ 任意で永続 DuckDB）')
+    c.add_argument('--csv', default=str(DEFAULT_CSV))
+    c.add_argument('--parquet-dir', default=str(DEFAULT_PARQUET_DIR))
+    c.add_argument('--row-group-size', type=int, default=2048, help='行グループの行数（小さいほど URL 検索の枝刈りが効く）')
+    c.add_argument('--duckdb', default='', help='永続 DuckDB ファイルの出力先（例: resources/crawl.duckdb）')
+    c.add_argument('--no-fts', action='store_true', help='全文検索インデックスを作成しない')
+
+    b = sub.add_parser('bench', help='CSV / Parquet / 永続 DB のロード時間と URL・id ルックアップのレイテンシ')
+    b.add_argument('--csv', default=str(DEFAULT_CSV))
+    b.add_argument('--parquet-dir', default=str(DEFAULT_PARQUET_DIR))
+    b.add_argument('--duckdb', default=str(DEFAULT_DB))
+    b.add_argument('--lookups', type=int, default=50, help='CSV はクエリ毎に再パースされるため多すぎると時間がかかる')
+    b.add_argument('--seed', type=int, default=0)
+    b.add_argument('--output', default='', help='結果JSONの出力先')
+    args = ap.parse_args()
+
+    duckdb = _require_duckdb()
+
+    if args.cmd == 'convert':
+        csv_path = Path(args.csv)
+        if not csv_path.exists():
+            print(f"[エラー] CSV が見つかりません: {csv_path}")
+            sys.exit(1)
+        con = duckdb.connect(':memory:')
+        t0 = time.perf_counter()
+        info = convert_to_parquet(con, csv_path, Path(args.parquet_dir), args.row_group_size)
+        con.close()
+        print(f"[情報] Parquet 出力: {info['path']} ({info['rows']}行, {len(info['partitions'])}パーティション, "
+              f"{info['bytes']/1e6:.1f}MB, {time.perf_counter()-t0:.1f}s)")
+        for p in info['partitions']:
+            print(f"  - site={p['site']}: {p['rows']}行 {int(p['bytes'])/1e6:.1f}MB")
+        if args.duckdb:
+            t0 = time.perf_counter()
+            source_sql = read_parquet_sql(Path(args.parquet_dir))
+            db = build_duckdb(duckdb, source_sql, Path(args.duckdb), fts=not args.no_fts)
+            print(f"[情報] DuckDB 出力: {db['path']} ({db['rows']}行, FTS={'あり' if db['fts'] else 'なし'}, "
+                  f"{db['bytes']/1e6:.1f}MB, {time.perf_counter()-t0:.1f}s)")
+        return
+
+    # bench
+    sources = [('csv', Path(args.csv)), ('parquet', Path(args.parquet_dir)), ('duckdb', Path(args.duckdb))]
+    sources = [(k, p) for k, p in sources if p.exists()]
+    if not sources:
+        print("[エラー] 比較対象が見つかりません（先に convert を実行してください）")
+        sys.exit(1)
+
+    # ルックアップ対象は最初のソースからサンプル（全ソースで同じキーを使う）
+    con = _open_source(duckdb, sources[0][0], sources[0][1])
+    keys = con.execute('SELECT "URL", CAST(id AS VARCHAR) FROM pages').fetchall()
+    con.close()
+    rng = random.Random(args.seed)
+    sample = [keys[rng.randrange(len(keys))] for _ in range(args.lookups)] if keys else []
+    urls = [str(k[0]) for k in sample]
+    ids = [str(k[1]) for k in sample]
+
+    results = []
+    for kind, path in sources:
+        r = bench_source(duckdb, kind, path, urls, ids)
+        results.append(r)
+        print(f"[結果] {kind:8s} ロード={r['load_ms']:.1f}ms "
+              f"URL p50={r['url_lookup_ms']['p50']:.2f}ms p99={r['url_lookup_ms']['p99']:.2f}ms "
+              f"id p50={r['id_lookup_ms']['p50']:.2f}ms p99={r['id_lookup_ms']['p99']:.2f}ms")
+
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump({'lookups': args.lookups, 'results': results}, f, ensure_ascii=False, indent=2)
+        print(f"[情報] 結果を保存: {out}")
+
+
+if __name__ == '__main__':
+    main()
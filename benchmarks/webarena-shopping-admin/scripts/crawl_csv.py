@@ -0,0 +1,54 @@
+#!/usr/bin/env python3
+"""
+crawl.csv の読み取り（インデクサ src/indexer/crawl-diff.ts の loadCrawlCsv / decodeSnapshotText と同じ解釈）
+・行は改行で分割し、各行を parseCsvLine と同じ規則でフィールドに分ける（" は引用の開始/終了として読み飛ばし、値は前後の空白を除去）
+・snapshotforai は \\n / \\t / \\" / \\\\ のエスケープだけを戻す（JSON としてはパースしない）
+・Python 側のツールが TS 側と別の本文を見ると、重複判定やスタンドイン応答がインデックスの内容とずれるため、解釈はここに揃える
+"""
+import re
+from pathlib import Path
+from typing import Dict, Iterator, List, Tuple
+
+
+def parse_csv_line(line: str) -> List[str]:
+    """CSV の1行をフィールドに分割（crawl-diff.ts の parseCsvLine と同じ結果）"""
+    values = ['']
+    for i, part in enumerate(line.split('"')):
+        if i % 2:
+            # 引用符の内側: カンマも値の一部
+            values[-1] += part
+            continue
+        pieces = part.split(',')
+        values[-1] += pieces[0]
+        values.extend(pieces[1:])
+    return [v.strip() for v in values]
+
+
+def parse_header(line: str) -> List[str]:
+    """ヘッダー行の列名（カンマで分割し、前後の空白と先頭・末尾の引用符を除去）"""
+    return [re.sub(r'^"|"$', '', h.strip()) for h in line.split(',')]
+
+
+def decode_snapshot_text(value: str) -> str:
+    """snapshotforai の本文（crawl-diff.ts の decodeSnapshotText と同じ置換を同じ順で適用）"""
+    return (value.replace('\\r\\n', '\n')
+            .replace('\\n', '\n')
+            .replace('\\t', '\t')
+            .replace('\\"', '"')
+            .replace('\\\\', '\\'))
+
+
+def read_lines(csv_path: Path) -> List[str]:
+    """ファイル全体の行（loadCrawlCsv と同様に前後の空白を除いてから改行で分割）"""
+    with open(csv_path, 'r', encoding='utf-8', newline='') as f:
+        return f.read().strip().split('\n')
+
+
+def iter_rows(lines: List[str]) -> Iterator[Tuple[str, Dict[str, str]]]:
+    """ヘッダー行以降の (元の行, 列名 → 値)。空行は飛ばし、足りない列は空文字"""
+    header = parse_header(lines[0])
+    for line in lines[1:]:
+        if not line.strip():
+            continue
+        values = parse_csv_line(line)
+        yield line, {key: (values[j] if j < len(values) else '') for j, key in enumerate(header)}
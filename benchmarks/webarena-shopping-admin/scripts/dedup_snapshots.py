@@ -0,0 +1,520 @@
+#!/usr/bin/env python3
+"""
+スナップショットの近似重複除去（MinHash + LSH）
+・Magento 管理画面はページング / ソート / フィルタ違いの URL でも、グリッド・メニュー・フッターがほぼ同一
+・snapshotforai（ref 番号・空白を正規化）をトークン 5-gram の MinHash に変換し、LSH バンドで候補を絞ってから
+  署名一致率（推定 Jaccard）が閾値以上のものを同一クラスタにまとめる。クラスタごとに代表を1つ残し、別名 URL を記録する
+・代表: ページは URL が最も短いもの（クエリの少ないもの）、チャンクは FAISS ラベルが最小のもの
+
+サブコマンド:
+  crawl  crawl.csv のページ単位で重複除去し、代表行のみの CSV を出力（インデクサ INDEXER_CSV_PATH にそのまま渡せる）
+  index  既存インデックス（chunks.parquet / vectors.faiss）をページ単位 + チャンク単位で重複除去し、
+         サイズ・構築時間・検索レイテンシ・recall@k を除去前後で比較（--write で除去後のインデックスを書き出す）
+
+使い方:
+  python scripts/dedup_snapshots.py crawl --out resources/crawl.dedup.csv
+  python scripts/dedup_snapshots.py index --k 10 --output resources/bench/dedup.json
+  python scripts/dedup_snapshots.py index --queries intents --embedder bedrock --write --out-dir resources/index_dedup
+"""
+import argparse
+import json
+import re
+import sys
+import time
+import zlib
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+import crawl_csv
+from build_ann_index import _sample_queries
+from retrieval_benchmark import (
+    DEFAULT_CACHE_FILE,
+    DEFAULT_CONFIGS_DIR,
+    DEFAULT_INDEX_DIR,
+    DEFAULT_TASKS_DIR,
+    CachedEmbedder,
+    MmapFlatIndex,
+    build_embedder,
+    gold_urls_for_task,
+    load_mapping,
+    load_task_configs,
+    normalize_url,
+    percentiles,
+    recall_at_k,
+)
+
+BENCH_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_CSV = BENCH_DIR / 'resources' / 'crawl.csv'
+
+NUM_PERM = 128
+DEFAULT_BANDS = 16  # 16 バンド × 8 行（候補化の閾値 ≈ (1/16)^(1/8) ≈ 0.71）
+SHINGLE = 5
+EMBED_BATCH = 96  # src/indexer/processor.ts の API_MAX_BATCH_SIZE（埋め込み API 呼び出し回数の見積もり用）
+DEFAULT_MAX_CHUNK = 5500  # INDEXER_MAX_CHUNK_SIZE の既定値（CSV 段階でのチャンク数見積もり用）
+
+_PRIME = np.uint64(4294967311)  # 2^32 より大きい素数（a·x + b が uint64 に収まる）
+_REF_RE = re.compile(r'\s*\[\s*ref\s*=\s*[\w:-]+\s*\]', re.I)
+# 英数字は単語単位、それ以外（日本語など）は1文字を1トークンとする
+_TOKEN_RE = re.compile(r'[A-Za-z0-9_]+|[^\sA-Za-z0-9_]')
+
+
+# ===== MinHash / LSH =====
+
+def normalize_snapshot(text: str) -> str:
+    """src/indexer/crawl-diff.ts の normalizeSnapshotForDiff と同じ正規化（+ 小文字化）"""
+    lines = (re.sub(r'\s+', ' ', line).rstrip() for line in _REF_RE.sub('', text).splitlines())
+    return '\n'.join(line for line in lines if line.strip()).lower()
+
+
+def shingle_hashes(text: str, k: int = SHINGLE) -> np.ndarray:
+    """トークン k-gram の 32bit ハッシュ（重複除去済み）"""
+    tokens = _TOKEN_RE.findall(normalize_snapshot(text))
+    if not tokens:
+        return np.empty(0, dtype=np.uint64)
+    th = np.fromiter((zlib.crc32(t.encode('utf-8')) for t in tokens), dtype=np.uint64, count=len(tokens))
+    if len(th) < k:
+        return np.unique(th)
+    # 多項式ローリングハッシュ（mod 2^32）をベクトル化して k-gram を合成
+    h = np.zeros(len(th) - k + 1, dtype=np.uint64)
+    for j in range(k):
+        h = (h * np.uint64(1000003) + th[j:len(th) - k + 1 + j]) & np.uint64(0xFFFFFFFF)
+    return np.unique(h)
+
+
+class MinHasher:
+    def __init__(self, num_perm: int = NUM_PERM, seed: int = 1):
+        rng = np.random.default_rng(seed)
+        self.num_perm = num_perm
+        self.a = rng.integers(1, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+        self.b = rng.integers(0, 2 ** 32 - 1, size=num_perm, dtype=np.uint64)
+
+    def signature(self, hashes: np.ndarray, block: int = 4096) -> np.ndarray:
+        sig = np.full(self.num_perm, np.iinfo(np.uint64).max, dtype=np.uint64)
+        for start in range(0, len(hashes), block):
+            x = hashes[start:start + block]
+            hv = (self.a[:, None] * x[None, :] + self.b[:, None]) % _PRIME
+            np.minimum(sig, hv.min(axis=1), out=sig)
+        return sig
+
+
+class _UnionFind:
+    def __init__(self, n: int):
+        self.parent = list(range(n))
+
+    def find(self, x: int) -> int:
+        while self.parent[x] != x:
+            self.parent[x] = self.parent[self.parent[x]]
+            x = self.parent[x]
+        return x
+
+    def union(self, a: int, b: int) -> None:
+        ra, rb = self.find(a), self.find(b)
+        if ra != rb:
+            self.parent[max(ra, rb)] = min(ra, rb)
+
+
+def cluster_signatures(sigs: np.ndarray, valid: np.ndarray, threshold: float, bands: int = DEFAULT_BANDS) -> List[int]:
+    """
+    LSH（bands × rows）で候補を作り、推定 Jaccard（署名一致率）>= threshold を union する
+    戻り値: 各要素のクラスタ根（最小インデックス）。valid=False（空テキスト）は単独クラスタ
+    """
+    n, num_perm = sigs.shape
+    rows = num_perm // bands
+    uf = _UnionFind(n)
+    idx = np.nonzero(valid)[0]
+    for band in range(bands):
+        part = np.ascontiguousarray(sigs[idx, band * rows:(band + 1) * rows])
+        buckets: Dict[bytes, List[int]] = {}
+        for i, key in zip(idx, part):
+            buckets.setdefault(key.tobytes(), []).append(int(i))
+        for members in buckets.values():
+            if len(members) < 2:
+                continue
+            head = members[0]
+            for other in members[1:]:
+                if uf.find(head) == uf.find(other):
+                    continue
+                if float(np.mean(sigs[head] == sigs[other])) >= threshold:
+                    uf.union(head, other)
+    return [uf.find(i) for i in range(n)]
+
+
+def signatures_for(texts: Sequence[str], hasher: MinHasher) -> Tuple[np.ndarray, np.ndarray]:
+    sigs = np.empty((len(texts), hasher.num_perm), dtype=np.uint64)
+    valid = np.zeros(len(texts), dtype=bool)
+    for i, text in enumerate(texts):
+        h = shingle_hashes(text)
+        valid[i] = h.size > 0
+        sigs[i] = hasher.signature(h) if h.size else 0
+    return sigs, valid
+
+
+def pick_representatives(roots: List[int], rank: Sequence[Any]) -> Dict[int, int]:
+    """クラスタ根 → 代表（rank が最小の要素）"""
+    best: Dict[int, int] = {}
+    for i, r in enumerate(roots):
+        if r not in best or rank[i] < rank[best[r]]:
+            best[r] = i
+    return best
+
+
+def _url_rank(url: str) -> Tuple[int, int, str]:
+    return (url.count('/') + url.count('&') + url.count('?'), len(url), url)
+
+
+# ===== crawl.csv =====
+
+def dedup_crawl(csv_path: Path, out_path: Optional[Path], threshold: float, bands: int) -> Dict[str, Any]:
+    """ページ単位の重複除去。行はそのまま（バイト単位で）書き出すため、インデクサの CSV パーサと互換"""
+    t0 = time.perf_counter()
+    lines = crawl_csv.read_lines(csv_path)
+    header = lines[0]
+    # 本文はインデクサと同じ解釈で読む（JSON としてパースすると TS 側と別の本文になる）
+    rows: List[Tuple[str, str, str]] = [
+        (line, normalize_url(fields.get('URL', '')), crawl_csv.decode_snapshot_text(fields.get('snapshotforai', '')))
+        for line, fields in crawl_csv.iter_rows(lines)
+    ]
+    # 同一URLの行は後の行（再クロールで追記された行）を採用
+    latest: Dict[str, int] = {}
+    for i, (_, url, _) in enumerate(rows):
+        latest[url] = i
+    pages = [rows[i] for i in sorted(latest.values())]
+    read_s = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    sigs, valid = signatures_for([p[2] for p in pages], MinHasher())
+    roots = cluster_signatures(sigs, valid, threshold, bands)
+    reps = pick_representatives(roots, [_url_rank(p[1]) for p in pages])
+    cluster_s = time.perf_counter() - t1
+
+    aliases: Dict[str, List[str]] = {}
+    kept: List[int] = sorted(reps.values())
+    for i, r in enumerate(roots):
+        rep = reps[r]
+        if i != rep:
+            aliases.setdefault(pages[rep][1], []).append(pages[i][1])
+
+    def _chars(idx: Sequence[int]) -> int:
+        return sum(len(pages[i][2]) for i in idx)
+
+    def _est_chunks(idx: Sequence[int]) -> int:
+        return sum(max(1, -(-len(pages[i][2]) // DEFAULT_MAX_CHUNK)) for i in idx if pages[i][2].strip())
+
+    before_idx = list(range(len(pages)))
+    report: Dict[str, Any] = {
+        'csv': str(csv_path),
+        'threshold': threshold,
+        'rows': len(rows),
+        'pages': {'before': len(pages), 'after': len(kept), 'clusters_with_aliases': len(aliases)},
+        'snapshot_chars': {'before': _chars(before_idx), 'after': _chars(kept)},
+        'estimated_chunks': {'before': _est_chunks(before_idx), 'after': _est_chunks(kept)},
+        'estimated_embedding_calls': {'before': -(-_est_chunks(before_idx) // EMBED_BATCH),
+                                      'after': -(-_est_chunks(kept) // EMBED_BATCH)},
+        'time_s': {'read': read_s, 'minhash_lsh': cluster_s},
+    }
+    if out_path:
+        out_path.parent.mkdir(parents=True, exist_ok=True)
+        with open(out_path, 'w', encoding='utf-8', newline='') as f:
+            f.write(header + '\n')
+            for i in kept:
+                f.write(pages[i][0] + '\n')
+        alias_path = out_path.with_suffix('.aliases.json')
+        with open(alias_path, 'w', encoding='utf-8') as f:
+            json.dump({'pages': aliases}, f, ensure_ascii=False, indent=2)
+        report['written'] = {'csv': str(out_path), 'aliases': str(alias_path)}
+    return report
+
+
+# ===== 既存インデックス =====
+
+def _load_chunks(index_dir: Path) -> Dict[str, Dict[str, Any]]:
+    import pyarrow.parquet as pq  # type: ignore
+    table = pq.read_table(index_dir / 'chunks.parquet', columns=['chunk_id', 'url', 'chunk_index', 'chunk_text'])
+    out: Dict[str, Dict[str, Any]] = {}
+    for cid, url, ci, text in zip(*(table.column(c).to_pylist() for c in ('chunk_id', 'url', 'chunk_index', 'chunk_text'))):
+        out[str(cid)] = {'url': normalize_url(str(url or '')), 'chunk_index': int(ci or 0), 'text': str(text or '')}
+    return out
+
+
+def dedup_index_labels(chunk_ids: List[str], chunks: Dict[str, Dict[str, Any]], threshold: float,
+                       bands: int) -> Dict[str, Any]:
+    """
+    ページ単位 → チャンク単位の順に重複除去し、ラベル → 代表ラベルの対応を返す
+    ・別名ページのチャンクは代表ページの同じ位置（無ければ末尾）のチャンクに対応付けて除去
+    ・残りのチャンクをチャンク本文の MinHash で再度クラスタリング
+    """
+    n = len(chunk_ids)
+    meta = [chunks.get(cid) or {'url': '', 'chunk_index': 0, 'text': ''} for cid in chunk_ids]
+    by_page: Dict[str, List[int]] = {}
+    for label, m in enumerate(meta):
+        by_page.setdefault(m['url'], []).append(label)
+    for labels in by_page.values():
+        labels.sort(key=lambda l: meta[l]['chunk_index'])
+    page_urls = list(by_page.keys())
+    hasher = MinHasher()
+
+    t0 = time.perf_counter()
+    page_texts = ['\n'.join(meta[l]['text'] for l in by_page[u]) for u in page_urls]
+    psigs, pvalid = signatures_for(page_texts, hasher)
+    proots = cluster_signatures(psigs, pvalid, threshold, bands)
+    preps = pick_representatives(proots, [_url_rank(u) for u in page_urls])
+    rep_of = list(range(n))
+    page_aliases: Dict[str, List[str]] = {}
+    for pi, root in enumerate(proots):
+        rep = preps[root]
+        if pi == rep:
+            continue
+        page_aliases.setdefault(page_urls[rep], []).append(page_urls[pi])
+        rep_labels = by_page[page_urls[rep]]
+        for pos, label in enumerate(by_page[page_urls[pi]]):
+            rep_of[label] = rep_labels[min(pos, len(rep_labels) - 1)]
+    page_s = time.perf_counter() - t0
+
+    t1 = time.perf_counter()
+    remaining = [l for l in range(n) if rep_of[l] == l]
+    csigs, cvalid = signatures_for([meta[l]['text'] for l in remaining], hasher)
+    croots = cluster_signatures(csigs, cvalid, threshold, bands)
+    creps = pick_representatives(croots, remaining)
+    for i, root in enumerate(croots):
+        rep_of[remaining[i]] = remaining[creps[root]]
+    # ページ段階で付け替えた先がチャンク段階で別名になった場合をたどる
+    for label in range(n):
+        r = rep_of[label]
+        while rep_of[r] != r:
+            r = rep_of[r]
+        rep_of[label] = r
+    chunk_s = time.perf_counter() - t1
+
+    chunk_aliases: Dict[str, List[str]] = {}
+    for label, r in enumerate(rep_of):
+        if label != r:
+            chunk_aliases.setdefault(chunk_ids[r], []).append(chunk_ids[label])
+    kept = [l for l in range(n) if rep_of[l] == l]
+    return {
+        'rep_of': np.asarray(rep_of, dtype=np.int64),
+        'kept': np.asarray(kept, dtype=np.int64),
+        'page_aliases': page_aliases,
+        'chunk_aliases': chunk_aliases,
+        'pages': {'before': len(page_urls), 'after': len(page_urls) - sum(len(v) for v in page_aliases.values())},
+        'time_s': {'pages_minhash_lsh': page_s, 'chunks_minhash_lsh': chunk_s},
+    }
+
+
+def _search(vectors: np.ndarray, queries: np.ndarray, k: int, block: int = 8192) -> np.ndarray:
+    """内積の上位 k ラベル（ブロック単位）"""
+    k = min(k, vectors.shape[0])
+    best_s = np.full((queries.shape[0], 0), -np.inf, dtype=np.float32)
+    best_i = np.empty((queries.shape[0], 0), dtype=np.int64)
+    for start in range(0, vectors.shape[0], block):
+        s = queries @ np.asarray(vectors[start:start + block]).T
+        kk = min(k, s.shape[1])
+        part = np.argpartition(-s, kk - 1, axis=1)[:, :kk]
+        best_s = np.concatenate([best_s, np.take_along_axis(s, part, axis=1)], axis=1)
+        best_i = np.concatenate([best_i, part + start], axis=1)
+        order = np.argsort(-best_s, axis=1)[:, :k]
+        best_s = np.take_along_axis(best_s, order, axis=1)
+        best_i = np.take_along_axis(best_i, order, axis=1)
+    return best_i
+
+
+def _time_build(vectors: np.ndarray, metric_type: int) -> Optional[float]:
+    """faiss IndexFlat への追加時間（faiss が無ければ None）"""
+    try:
+        import faiss  # type: ignore
+    except ImportError:
+        return None
+    index = faiss.IndexFlatIP(vectors.shape[1]) if metric_type == 0 else faiss.IndexFlatL2(vectors.shape[1])
+    t0 = time.perf_counter()
+    for start in range(0, vectors.shape[0], 8192):
+        index.add(np.ascontiguousarray(vectors[start:start + 8192], dtype=np.float32))
+    return time.perf_counter() - t0
+
+
+def _latency(vectors: np.ndarray, queries: np.ndarray, k: int, n: int = 20) -> Dict[str, float]:
+    lat: List[float] = []
+    for i in range(min(n, queries.shape[0])):
+        t = time.perf_counter()
+        _search(vectors, queries[i:i + 1], k)
+        lat.append((time.perf_counter() - t) * 1000)
+    return percentiles(lat)
+
+
+def write_dedup_index(index_dir: Path, out_dir: Path, vectors_name: str, chunk_ids: List[str],
+                      kept: np.ndarray, vectors: np.ndarray, dimension: int, result: Dict[str, Any]) -> Dict[str, str]:
+    import faiss  # type: ignore
+    import pyarrow as pa  # type: ignore
+    import pyarrow.compute as pc  # type: ignore
+    import pyarrow.parquet as pq  # type: ignore
+    out_dir.mkdir(parents=True, exist_ok=True)
+    kept_ids = [chunk_ids[int(l)] for l in kept]
+    table = pq.read_table(index_dir / 'chunks.parquet')
+    table = table.filter(pc.is_in(table.column('chunk_id'), value_set=pa.array(kept_ids)))
+    pq.write_table(table, out_dir / 'chunks.parquet')
+    index = faiss.IndexFlatIP(dimension)
+    index.add(np.ascontiguousarray(vectors, dtype=np.float32))
+    vec_path = out_dir / vectors_name
+    faiss.write_index(index, str(vec_path))
+    with open(str(vec_path) + '.mapping.json', 'w') as f:
+        json.dump({'chunkIds': kept_ids, 'dimension': dimension}, f, indent=2)
+    alias_path = out_dir / 'aliases.json'
+    with open(alias_path, 'w', encoding='utf-8') as f:
+        json.dump({'pages': result['page_aliases'], 'chunks': result['chunk_aliases']}, f, ensure_ascii=False, indent=2)
+    return {'vectors': str(vec_path), 'chunks': str(out_dir / 'chunks.parquet'), 'aliases': str(alias_path)}
+
+
+def run_index(args: argparse.Namespace) -> Dict[str, Any]:
+    index_dir = Path(args.index_dir)
+    flat = MmapFlatIndex(index_dir / args.vectors)
+    chunk_ids = load_mapping(index_dir, args.vectors)
+    if len(chunk_ids) != flat.ntotal:
+        print(f"[警告] マッピング件数 {len(chunk_ids)} と ntotal {flat.ntotal} が一致しません")
+    chunks = _load_chunks(index_dir)
+    print(f"[情報] インデックス: ntotal={flat.ntotal} d={flat.d} チャンク={len(chunks)}")
+
+    result = dedup_index_labels(chunk_ids, chunks, args.threshold, args.bands)
+    kept, rep_of = result['kept'], result['rep_of']
+    print(f"[情報] ページ: {result['pages']['before']} → {result['pages']['after']} / "
+          f"チャンク: {flat.ntotal} → {len(kept)}（{result['time_s']['pages_minhash_lsh'] + result['time_s']['chunks_minhash_lsh']:.1f}秒）")
+    kept_vectors = np.array(flat.vectors[kept])
+    new_label = np.full(flat.ntotal, -1, dtype=np.int64)
+    new_label[kept] = np.arange(len(kept))
+
+    k = int(args.k)
+    if args.queries == 'intents':
+        configs = load_task_configs(Path(args.configs_dir))
+        regions = [r.strip() for r in args.regions.split(',') if r.strip()]
+        embedder = CachedEmbedder(build_embedder(args.embedder, model_id=args.embedding_model, regions=regions, dim=flat.d),
+                                  Path(args.cache_file))
+        queries = embedder.embed([str(c.get('intent') or '') for c in configs])
+    else:
+        configs = []
+        queries = _sample_queries(flat, args.num_queries)
+    queries = np.ascontiguousarray(queries, dtype=np.float32)
+
+    _, gt = flat.search(queries, k)
+    got = _search(kept_vectors, queries, k)
+    # 除去前の上位 k を代表に写した集合のうち、除去後の上位 k に含まれる割合（別名チャンクは代表で代替される）
+    label_recalls = []
+    for g, r in zip(gt, got):
+        want = {int(new_label[rep_of[int(l)]]) for l in g}
+        label_recalls.append(len(want & {int(x) for x in r}) / max(1, len(want)))
+
+    report: Dict[str, Any] = {
+        'index': str(index_dir / args.vectors),
+        'threshold': args.threshold,
+        'k': k,
+        'queries': {'kind': args.queries, 'count': int(queries.shape[0])},
+        'pages': result['pages'],
+        'chunks': {'before': flat.ntotal, 'after': int(len(kept))},
+        'index_bytes': {'before': flat.ntotal * flat.d * 4, 'after': int(len(kept)) * flat.d * 4},
+        'build_s': {'before': _time_build(flat.vectors, flat.metric_type), 'after': _time_build(kept_vectors, flat.metric_type)},
+        'embedding_calls': {'before': -(-flat.ntotal // EMBED_BATCH), 'after': -(-int(len(kept)) // EMBED_BATCH)},
+        'search_latency_ms': {'before': _latency(flat.vectors, queries, k), 'after': _latency(kept_vectors, queries, k)},
+        f'alias_recall@{k}': float(np.mean(label_recalls)) if label_recalls else 0.0,
+        'dedup_time_s': result['time_s'],
+    }
+
+    if configs:
+        # gold URL に対する recall@k（除去後は代表 URL の別名も取得済みとみなす）
+        chunk_url = [chunks.get(cid, {}).get('url', '') for cid in chunk_ids]
+        aliases_of = result['page_aliases']
+        before, after = [], []
+        for cfg, g, r in zip(configs, gt, got):
+            gold = gold_urls_for_task(cfg, Path(args.tasks_dir))
+            if not gold:
+                continue
+            urls_b = [chunk_url[int(l)] for l in g]
+            urls_a: List[str] = []
+            for x in r:
+                u = chunk_url[int(kept[int(x)])]
+                urls_a.extend([u] + aliases_of.get(u, []))
+            before.append(recall_at_k(urls_b, gold))
+            after.append(recall_at_k(urls_a, gold))
+        report[f'gold_recall@{k}'] = {'before': float(np.mean(before)) if before else 0.0,
+                                      'after': float(np.mean(after)) if after else 0.0,
+                                      'tasks_with_gold': len(before)}
+
+    if args.write:
+        out_dir = Path(args.out_dir) if args.out_dir else index_dir.parent / f'{index_dir.name}_dedup'
+        report['written'] = write_dedup_index(index_dir, out_dir, args.vectors, chunk_ids, kept, kept_vectors, flat.d, result)
+    flat.close()
+    return report
+
+
+def _print_index_report(r: Dict[str, Any]) -> None:
+    k = r['k']
+    mb = lambda b: b / 1e6  # noqa: E731
+    print(f"\n[結果] チャンク: {r['chunks']['before']} → {r['chunks']['after']} "
+          f"({1 - r['chunks']['after'] / max(1, r['chunks']['before']):.1%} 削減)")
+    print(f"[結果] インデックスサイズ: {mb(r['index_bytes']['before']):.1f}MB → {mb(r['index_bytes']['after']):.1f}MB")
+    print(f"[結果] 埋め込み API 呼び出し: {r['embedding_calls']['before']} → {r['embedding_calls']['after']}")
+    if r['build_s']['before'] is not None:
+        print(f"[結果] FAISS 構築: {r['build_s']['before']:.2f}s → {r['build_s']['after']:.2f}s")
+    lat = r['search_latency_ms']
+    print(f"[結果] 検索 p50: {lat['before']['p50']:.2f}ms → {lat['after']['p50']:.2f}ms")
+    print(f"[結果] 別名考慮 recall@{k}: {r[f'alias_recall@{k}']:.4f}")
+    if f'gold_recall@{k}' in r:
+        g = r[f'gold_recall@{k}']
+        print(f"[結果] gold URL recall@{k}: {g['before']:.4f} → {g['after']:.4f}（{g['tasks_with_gold']}タスク）")
+
+
+def main() -> None:
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--threshold', type=float, default=0.9, help='同一クラスタとみなす推定 Jaccard の下限')
+    common.add_argument('--bands', type=int, default=DEFAULT_BANDS, help=f'LSH バンド数（{NUM_PERM} の約数）')
+    common.add_argument('--output', default='', help='レポートJSONの出力先')
+    ap = argparse.ArgumentParser(description='スナップショットの近似重複除去（MinHash + LSH）')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    c = sub.add_parser('crawl', parents=[common], help='crawl.csv をページ単位で重複除去')
+    c.add_argument('--csv', default=str(DEFAULT_CSV))
+    c.add_argument('--out', default='', help='代表行のみの CSV（別名は <out>.aliases.json）')
+
+    i = sub.add_parser('index', parents=[common], help='既存インデックスをページ + チャンク単位で重複除去し、前後を比較')
+    i.add_argument('--index-dir', default=str(DEFAULT_INDEX_DIR))
+    i.add_argument('--vectors', default='vectors.faiss')
+    i.add_argument('--k', type=int, default=10)
+    i.add_argument('--queries', default='sample', choices=['sample', 'intents'],
+                   help='sample: DBベクトル+ノイズ / intents: configs の intent を埋め込み（gold URL recall も出力）')
+    i.add_argument('--num-queries', type=int, default=200)
+    i.add_argument('--configs-dir', default=str(DEFAULT_CONFIGS_DIR))
+    i.add_argument('--tasks-dir', default=str(DEFAULT_TASKS_DIR))
+    i.add_argument('--embedder', default='bedrock')
+    i.add_argument('--embedding-model', default='cohere.embed-v4:0')
+    i.add_argument('--regions', default='ap-northeast-1')
+    i.add_argument('--cache-file', default=str(DEFAULT_CACHE_FILE))
+    i.add_argument('--write', action='store_true', help='除去後のインデックスを書き出す')
+    i.add_argument('--out-dir', default='', help='書き出し先（既定: <index-dir>_dedup）')
+    args = ap.parse_args()
+
+    if NUM_PERM % args.bands:
+        print(f"[エラー] --bands は {NUM_PERM} の約数を指定してください")
+        sys.exit(1)
+
+    if args.cmd == 'crawl':
+        report = dedup_crawl(Path(args.csv), Path(args.out) if args.out else None, args.threshold, args.bands)
+        p, ch = report['pages'], report['estimated_chunks']
+        print(f"[結果] ページ: {p['before']} → {p['after']}（別名を持つクラスタ {p['clusters_with_aliases']}）")
+        print(f"[結果] スナップショット文字数: {report['snapshot_chars']['before']} → {report['snapshot_chars']['after']}")
+        print(f"[結果] チャンク数（見積もり）: {ch['before']} → {ch['after']} / 埋め込み API 呼び出し "
+              f"{report['estimated_embedding_calls']['before']} → {report['estimated_embedding_calls']['after']}")
+        for name, path in (report.get('written') or {}).items():
+            print(f"[情報] 書き出し（{name}）: {path}")
+    else:
+        report = run_index(args)
+        _print_index_report(report)
+        for name, path in (report.get('written') or {}).items():
+            print(f"[情報] 書き出し（{name}）: {path}")
+
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[情報] レポート: {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,113 @@
+#!/usr/bin/env python3
+"""
+evaluate.py の評価結果メモ化
+・キー = (trajectory 内容ハッシュ, config 内容ハッシュ, 評価器バージョン, 判定モデル, 判定に効く環境変数)
+・メモ化するのはオフライン評価（string_match のみ）の結果だけ。program_html / url_match はサイトの現在の状態に依存するため対象外
+・ヒット時は保存済みの結果（result_file の内容とサマリー / HTMLレンダ等の成果物パス）をそのまま返す
+  （evaluate.py はキャッシュ元のサマリーを写したヒット時のサマリーも書く）
+・判定モデルの呼び出し失敗・判定不明を含む結果は保存しない（evaluate.py 側で判定）
+・評価器バージョンには evaluate.py と判定に関わる補助モジュールのソースハッシュも含めるため、ロジック変更時は自動的に無効化される
+・成果物が削除されているエントリはミス扱い（成果物ストアに移されたファイルは .ref のスタブで存在を確認）
+
+環境変数:
+  AGENT_WEBARENA_EVAL_CACHE_DIR  キャッシュ保存先（既定: /home/ec2-user/webarena-local/evaluation-result/cache）
+  AGENT_WEBARENA_EVAL_CACHE      false でメモ化を無効化
+"""
+import hashlib
+import json
+import os
+import time
+from pathlib import Path
+from typing import Any, Dict, List, Optional
+
+import artifact_store
+
+DEFAULT_CACHE_DIR = Path('/home/ec2-user/webarena-local/evaluation-result') / 'cache'
+
+# trajectory ファイル内で評価結果に影響しないフィールド（保存時刻など）
+_VOLATILE_TRAJECTORY_FIELDS = ('evaluated_at',)
+
+
+def cache_enabled() -> bool:
+    return str(os.environ.get('AGENT_WEBARENA_EVAL_CACHE', 'true')).strip().lower() != 'false'
+
+
+def cache_dir() -> Path:
+    env = str(os.environ.get('AGENT_WEBARENA_EVAL_CACHE_DIR', '')).strip()
+    return Path(env) if env else DEFAULT_CACHE_DIR
+
+
+def _canonical_hash(obj: Any) -> str:
+    payload = json.dumps(obj, sort_keys=True, ensure_ascii=False, separators=(',', ':'))
+    return hashlib.sha256(payload.encode('utf-8')).hexdigest()
+
+
+def source_digest(path: Path) -> str:
+    try:
+        return hashlib.sha256(Path(path).read_bytes()).hexdigest()[:12]
+    except Exception:
+        return 'unknown'
+
+
+def sources_digest(paths: List[Path]) -> str:
+    """複数ファイルのソースハッシュをまとめた値（どれか1つが変われば変わる）"""
+    h = hashlib.sha256()
+    for path in paths:
+        h.update(f'{Path(path).name}={source_digest(path)};'.encode('utf-8'))
+    return h.hexdigest()[:12]
+
+
+def build_key(trajectory_data: dict, cfg: dict, evaluator_version: str, judge_model: str,
+              env: Optional[Dict[str, str]] = None) -> Dict[str, str]:
+    """キーの各要素と、それらをまとめたキー文字列を返す（env は判定結果を変えうる環境変数の値）"""
+    traj = {k: v for k, v in (trajectory_data or {}).items() if k not in _VOLATILE_TRAJECTORY_FIELDS}
+    parts = {
+        'trajectory_sha256': _canonical_hash(traj),
+        'config_sha256': _canonical_hash(cfg),
+        'evaluator_version': str(evaluator_version),
+        'judge_model': str(judge_model or ''),
+        'env_sha256': _canonical_hash(env or {}),
+    }
+    parts['key'] = _canonical_hash(parts)
+    return parts
+
+
+def _entry_path(key: str) -> Path:
+    return cache_dir() / key[:2] / f'{key}.json'
+
+
+def lookup(key: str) -> Optional[Dict[str, Any]]:
+    """保存済みエントリを返す（成果物が欠けている場合は None）"""
+    path = _entry_path(key)
+    if not path.exists():
+        return None
+    try:
+        with open(path, 'r') as f:
+            entry = json.load(f)
+    except Exception:
+        return None
+    for artifact in (entry.get('artifacts') or {}).values():
+        if artifact and not artifact_store.exists(Path(str(artifact))):
+            return None
+    return entry
+
+
+def store(parts: Dict[str, str], *, score: float, result: dict, artifacts: Dict[str, str]) -> Optional[Path]:
+    """エントリを書き込む（失敗しても評価は継続）"""
+    path = _entry_path(parts['key'])
+    try:
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_suffix('.json.tmp')
+        with open(tmp, 'w') as f:
+            json.dump({
+                **parts,
+                'score': score,
+                'result': result,
+                'artifacts': artifacts,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
+            }, f, indent=2, ensure_ascii=False)
+        os.replace(tmp, path)
+        return path
+    except Exception as e:
+        print(f"[警告] 評価キャッシュの保存に失敗: {e}")
+        return None
@@ -0,0 +1,178 @@
+#!/usr/bin/env python3
+"""
+evaluate.py の1タスクあたりの締め切り（フェーズ別の時間予算と打ち切り）
+・締め切り（秒）は --deadline=<秒> または AGENT_WEBARENA_TASK_DEADLINE で指定（未設定 / 0 なら無効 = 従来どおり無制限）
+・評価はフェーズ（judge = 文字列評価 / browser = CDP 接続〜ページ評価 / report = レンダ・html2json・サマリー）に分け、
+  各フェーズには「締め切りまでの残り − 後続フェーズの確保分」を割り当てる（早く終わったフェーズの余りは後続へ回る）
+・ネットワーク / ブラウザ操作には timeout_ms() / timeout_s() でフェーズ残り時間以内のタイムアウトを渡す
+・タイムアウトを指定できない処理（locator の evaluate、html2json、ヘッジ待ち等）は SIGALRM でフェーズ期限に割り込み、
+  DeadlineExceeded を送出する（BaseException の派生なので、各処理の except Exception では握りつぶされない）
+・打ち切り時は note() で記録した途中結果とフェーズ別の経過時間を summary() で返す（evaluate.py が timed_out の結果に記録）
+
+環境変数:
+  AGENT_WEBARENA_TASK_DEADLINE    1タスクの評価の締め切り（秒、既定 なし）
+  AGENT_WEBARENA_DEADLINE_SHARES  後続フェーズに確保する締め切りの割合（既定 report=0.15）
+"""
+import os
+import signal
+import threading
+import time
+from typing import Any, Dict, List, Optional, Sequence
+
+DEFAULT_SHARES = {'report': 0.15}
+MIN_PHASE_S = 1.0  # 確保分を差し引いても最低限フェーズに与える時間（残りがあれば）
+
+
+class DeadlineExceeded(BaseException):
+    """フェーズの期限切れ（phase に期限切れになったフェーズ名）"""
+
+    def __init__(self, phase: str):
+        super().__init__(f"締め切り超過: {phase}")
+        self.phase = phase
+
+
+def _parse_shares(raw: str) -> Dict[str, float]:
+    shares = dict(DEFAULT_SHARES)
+    for part in str(raw or '').split(','):
+        name, sep, value = part.partition('=')
+        if not sep or not name.strip():
+            continue
+        try:
+            shares[name.strip()] = min(max(float(value), 0.0), 1.0)
+        except ValueError:
+            continue
+    return shares
+
+
+class TaskDeadline:
+    """1タスクの締め切り。total_s が None なら無効（全メソッドが従来動作と同じ値を返す）"""
+
+    def __init__(self, total_s: Optional[float] = None, shares: Optional[Dict[str, float]] = None):
+        self.total_s = total_s if total_s and total_s > 0 else None
+        self.shares = dict(shares if shares is not None else DEFAULT_SHARES)
+        self.started = time.monotonic()
+        self.phases: Dict[str, Dict[str, Any]] = {}
+        self.partial: Dict[str, Any] = {}
+        self.expired: Optional[str] = None
+        self._phase: Optional[str] = None
+        self._phase_end = float('inf')
+        self._phase_started = 0.0
+        self._alarm = False
+
+    @classmethod
+    def from_env(cls, cli_value: Optional[str] = None) -> 'TaskDeadline':
+        raw = str(cli_value if cli_value is not None else os.environ.get('AGENT_WEBARENA_TASK_DEADLINE', '')).strip()
+        try:
+            total_s = float(raw) if raw else None
+        except ValueError:
+            print(f"[警告] 締め切りの指定が不正です（無効として扱います）: {raw}")
+            total_s = None
+        return cls(total_s, _parse_shares(os.environ.get('AGENT_WEBARENA_DEADLINE_SHARES', '')))
+
+    @property
+    def enabled(self) -> bool:
+        return self.total_s is not None
+
+    def start(self) -> None:
+        """時計を開始し直す（trajectory ストリームの待機時間は締め切りに含めない）"""
+        self.started = time.monotonic()
+
+    def remaining(self) -> float:
+        if self.total_s is None:
+            return float('inf')
+        return max(self.total_s - (time.monotonic() - self.started), 0.0)
+
+    def phase_remaining(self) -> float:
+        return max(self._phase_end - time.monotonic(), 0.0)
+
+    def start_phase(self, name: str, then: Sequence[str] = ()) -> None:
+        """フェーズを開始（then に続くフェーズの確保分を残した残り時間を割り当て、期限に SIGALRM を設定）"""
+        self.end_phase()
+        self._phase = name
+        self._phase_started = time.monotonic()
+        if self.total_s is None:
+            return
+        remaining = self.remaining()
+        reserve = sum(self.shares.get(p, 0.0) for p in then) * self.total_s
+        budget = max(remaining - reserve, min(remaining, MIN_PHASE_S))
+        self._phase_end = self._phase_started + budget
+        self.phases[name] = {'budget_s': round(budget, 3)}
+        print(f"[情報] 締め切り: フェーズ {name} に {budget:.1f}秒（残り {remaining:.1f}秒）")
+        self._arm(budget)
+
+    def end_phase(self) -> None:
+        if self._phase is None:
+            return
+        self._disarm()
+        if self.total_s is not None:
+            entry = self.phases.setdefault(self._phase, {})
+            entry['elapsed_s'] = round(time.monotonic() - self._phase_started, 3)
+            entry['timed_out'] = self.expired == self._phase
+        self._phase = None
+        self._phase_end = float('inf')
+
+    def check(self) -> None:
+        """フェーズの期限を過ぎていれば DeadlineExceeded を送出"""
+        if self._phase is not None and self.total_s is not None and time.monotonic() >= self._phase_end:
+            self._expire()
+
+    def timeout_ms(self, default_ms: float) -> float:
+        """操作のタイムアウト（ミリ秒）。既定値とフェーズ残り時間の小さい方（無効時は既定値）"""
+        if self._phase is None or self.total_s is None:
+            return default_ms
+        return max(min(float(default_ms), self.phase_remaining() * 1000.0), 1.0)
+
+    def timeout_s(self, default_s: float) -> float:
+        return self.timeout_ms(default_s * 1000.0) / 1000.0
+
+    def sleep(self, seconds: float) -> None:
+        """フェーズ残り時間を超えない待機（期限に達したら DeadlineExceeded）"""
+        if self._phase is not None and self.total_s is not None:
+            seconds = min(seconds, self.phase_remaining())
+        time.sleep(max(seconds, 0.0))
+        self.check()
+
+    def note(self, key: str, value: Any) -> None:
+        """打ち切り時に結果へ残す途中経過（リスト等を渡せば以降の追記も反映される）"""
+        self.partial[key] = value
+
+    def summary(self) -> Dict[str, Any]:
+        self.end_phase()
+        return {
+            'total_s': self.total_s,
+            'elapsed_s': round(time.monotonic() - self.started, 3),
+            'timed_out_phase': self.expired,
+            'phases': self.phases,
+            'partial': self.partial,
+        }
+
+    def _expire(self) -> None:
+        phase = self._phase or 'unknown'
+        self.expired = self.expired or phase
+        self._disarm()
+        raise DeadlineExceeded(phase)
+
+    def _on_alarm(self, signum, frame) -> None:
+        if self._phase is not None:
+            self._expire()
+
+    def _arm(self, budget_s: float) -> None:
+        # SIGALRM はメインスレッドでのみ設定できる（他スレッドから呼ばれた場合は check() / タイムアウトのみで制御）
+        if not hasattr(signal, 'setitimer') or threading.current_thread() is not threading.main_thread():
+            return
+        signal.signal(signal.SIGALRM, self._on_alarm)
+        signal.setitimer(signal.ITIMER_REAL, max(budget_s, 0.001))
+        self._alarm = True
+
+    def _disarm(self) -> None:
+        if self._alarm:
+            signal.setitimer(signal.ITIMER_REAL, 0)
+            self._alarm = False
+
+
+def cli_value(flags: List[str]) -> Optional[str]:
+    """--deadline=<秒> の値（無ければ None）"""
+    for flag in flags:
+        if flag.startswith('--deadline='):
+            return flag.split('=', 1)[1]
+    return None
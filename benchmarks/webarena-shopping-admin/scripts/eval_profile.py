@@ -0,0 +1,125 @@
+#!/usr/bin/env python3
+"""
+evaluate.py --profile の実装（プロファイル無効時は import されない）
+・cProfile（決定的）で関数単位の累積時間 → <result>.prof（pstats 形式、snakeviz 等で閲覧可）
+・メインスレッドのサンプリング（sys._current_frames）でスタックを収集 → <result>.collapsed.txt
+  （flamegraph.pl / speedscope にそのまま渡せる collapsed 形式）
+・tracemalloc でピークと確保元の上位N件 → <result>.alloc.txt
+・pstats の上位N件 → <result>.cpu.txt
+string_match のオフライン経路・Playwright 経路のどちらも main() 全体を対象にする
+
+環境変数:
+  AGENT_WEBARENA_PROFILE_INTERVAL_MS  サンプリング間隔（既定 5ms）
+  AGENT_WEBARENA_PROFILE_TOP          レポートの上位件数（既定 30）
+"""
+import cProfile
+import io
+import os
+import pstats
+import sys
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from pathlib import Path
+from typing import Callable
+
+
+def _frame_label(frame) -> str:
+    code = frame.f_code
+    return f"{code.co_name} ({Path(code.co_filename).name}:{code.co_firstlineno})"
+
+
+class StackSampler(threading.Thread):
+    """対象スレッドのスタックを一定間隔で採取し、collapsed 形式で集計する"""
+
+    def __init__(self, target_ident: int, interval_s: float):
+        super().__init__(name='eval-profile-sampler', daemon=True)
+        self.target_ident = target_ident
+        self.interval_s = interval_s
+        self.stacks: Counter = Counter()
+        self.samples = 0
+        self._stop_event = threading.Event()
+
+    def run(self) -> None:
+        while not self._stop_event.wait(self.interval_s):
+            frame = sys._current_frames().get(self.target_ident)
+            if frame is None:
+                continue
+            names = []
+            while frame is not None:
+                names.append(_frame_label(frame))
+                frame = frame.f_back
+            self.stacks[';'.join(reversed(names))] += 1
+            self.samples += 1
+
+    def stop(self) -> None:
+        self._stop_event.set()
+        self.join(timeout=1.0)
+
+    def write_collapsed(self, path: Path) -> None:
+        with open(path, 'w') as f:
+            for stack, count in self.stacks.most_common():
+                f.write(f"{stack} {count}\n")
+
+
+def _write_alloc_report(path: Path, snapshot, peak: int, current: int, top_n: int) -> None:
+    stats = snapshot.statistics('lineno')
+    with open(path, 'w') as f:
+        f.write(f"peak={peak / 1e6:.1f}MB current={current / 1e6:.1f}MB\n\n")
+        f.write(f"[確保元 上位{top_n}件（終了時点で生存しているもの）]\n")
+        for st in stats[:top_n]:
+            f.write(f"{st.size / 1e6:9.2f}MB {st.count:8d}blocks  {st.traceback}\n")
+        f.write(f"\n[確保元 上位5件のトレースバック]\n")
+        for st in snapshot.statistics('traceback')[:5]:
+            f.write(f"--- {st.size / 1e6:.2f}MB {st.count}blocks\n")
+            for line in st.traceback.format():
+                f.write(f"{line}\n")
+
+
+def run_profiled(fn: Callable[[], None], result_file: str) -> None:
+    """fn（evaluate.main）をプロファイラ下で実行し、result_file の隣にレポートを書き出す"""
+    base = Path(result_file)
+    base.parent.mkdir(parents=True, exist_ok=True)
+    stem = base.with_suffix('')
+    interval_ms = float(os.environ.get('AGENT_WEBARENA_PROFILE_INTERVAL_MS', '5') or 5)
+    top_n = int(os.environ.get('AGENT_WEBARENA_PROFILE_TOP', '30') or 30)
+
+    tracemalloc.start(25)
+    sampler = StackSampler(threading.get_ident(), interval_ms / 1000.0)
+    profiler = cProfile.Profile()
+    exit_code = None
+    t0 = time.perf_counter()
+    sampler.start()
+    profiler.enable()
+    try:
+        fn()
+    except SystemExit as e:
+        # main() は sys.exit で終了するため、レポート出力後に同じ終了コードで抜ける
+        exit_code = e.code
+    finally:
+        profiler.disable()
+        sampler.stop()
+        elapsed = time.perf_counter() - t0
+        current, peak = tracemalloc.get_traced_memory()
+        snapshot = tracemalloc.take_snapshot()
+        tracemalloc.stop()
+
+        prof_path = Path(f"{stem}.prof")
+        profiler.dump_stats(str(prof_path))
+        cpu_path = Path(f"{stem}.cpu.txt")
+        buf = io.StringIO()
+        pstats.Stats(profiler, stream=buf).sort_stats('cumulative').print_stats(top_n)
+        cpu_path.write_text(buf.getvalue())
+        collapsed_path = Path(f"{stem}.collapsed.txt")
+        sampler.write_collapsed(collapsed_path)
+        alloc_path = Path(f"{stem}.alloc.txt")
+        _write_alloc_report(alloc_path, snapshot, peak, current, top_n)
+
+        print(f"[情報] プロファイル: 実行時間 {elapsed:.2f}s / サンプル {sampler.samples}件 / ピークメモリ {peak / 1e6:.1f}MB")
+        print(f"[情報] pstats: {prof_path}")
+        print(f"[情報] CPU上位: {cpu_path}")
+        print(f"[情報] collapsed stacks: {collapsed_path}")
+        print(f"[情報] メモリ確保元: {alloc_path}")
+    if exit_code is not None:
+        sys.exit(exit_code)
@@ -15,6 +15,15 @@ import base64
 import html
 from typing import Any, List, Tuple, Dict, Optional
 import subprocess
+import threading
+
+import artifact_store
+import eval_cache
+import eval_deadline
+import judge_hedge
+
+# 評価ロジックのバージョン（判定の意味が変わる変更時に更新。メモ化キーにはソースハッシュも含める）
+EVALUATOR_VERSION = '1'
 
 # WebArenaパッケージパスを通す（必要時のみ各モジュールを遅延インポート）
 sys.path.insert(0, str(Path(__file__).parent.parent.parent / 'webarena'))
@@ -76,13 +85,92 @@ def _must_include(ref: str, pred: str, tokenize: bool = False) -> float:
     return 1.0 if clean_ref in clean_pred else 0.0
 
 
+# 判定モデル呼び出しのトークン使用量（サマリーの judge_usage に記録し、compare_sweeps.py でコストに換算）
+_JUDGE_USAGE: Dict[str, int] = {'calls': 0, 'input': 0, 'output': 0, 'cache_read': 0, 'cache_write': 0}
+# ヘッジで放棄した呼び出しは別スレッドから記録されるため排他する
+_JUDGE_USAGE_LOCK = threading.Lock()
+
+# 1タスクの締め切り（--deadline / AGENT_WEBARENA_TASK_DEADLINE。main() で設定、未設定なら無効）
+_DEADLINE = eval_deadline.TaskDeadline()
+
+
+def _record_judge_usage(response: dict) -> None:
+    usage = (response or {}).get('usage') or {}
+    with _JUDGE_USAGE_LOCK:
+        _JUDGE_USAGE['calls'] += 1
+        _JUDGE_USAGE['input'] += int(usage.get('inputTokens') or 0)
+        _JUDGE_USAGE['output'] += int(usage.get('outputTokens') or 0)
+        _JUDGE_USAGE['cache_read'] += int(usage.get('cacheReadInputTokens') or 0)
+        _JUDGE_USAGE['cache_write'] += int(usage.get('cacheWriteInputTokens') or 0)
+
+
+def _judge_usage_snapshot() -> Dict[str, int]:
+    """サマリー用の judge_usage。ヘッジで放棄した呼び出しの完了を待ってから集計する（締め切りの残り時間以内）"""
+    if judge_hedge.hedge_enabled():
+        judge_hedge.drain(min(_DEADLINE.timeout_s(judge_hedge.drain_timeout_s()), _DEADLINE.remaining()))
+    with _JUDGE_USAGE_LOCK:
+        return dict(_JUDGE_USAGE)
+
+
 def _get_bedrock_client(region: str):
     """Bedrock Runtime Clientを取得"""
     if boto3 is None:
         raise RuntimeError("boto3がインストールされていません")
+    if _DEADLINE.enabled:
+        # 締め切り有効時は接続・応答待ちをフェーズ残り時間以内に抑え、リトライは次リージョンへのフェイルオーバーに任せる
+        from botocore.config import Config
+        config = Config(connect_timeout=_DEADLINE.timeout_s(10.0), read_timeout=_DEADLINE.timeout_s(60.0),
+                        retries={'max_attempts': 1})
+        return boto3.client('bedrock-runtime', region_name=region, config=config)
     return boto3.client('bedrock-runtime', region_name=region)
 
 
+def _judge_converse(client: Any, model_id: str, message: str) -> dict:
+    return client.converse(
+        modelId=model_id,
+        messages=[
+            {
+                "role": "user",
+                "content": [{"text": message}]
+            }
+        ],
+        inferenceConfig={
+            "temperature": 0.0,
+            "maxTokens": 768,
+        }
+    )
+
+
+def _judge_text(response: dict) -> str:
+    output = response.get('output', {})
+    content = output.get('message', {}).get('content', [])
+    reasoning = ""
+    for block in content:
+        if block.get('text'):
+            reasoning += block['text']
+    return reasoning
+
+
+def _fuzzy_verdict(reasoning: str) -> Tuple[float, str]:
+    reasoning_lower = reasoning.lower()
+    if "partially correct" in reasoning_lower or "incorrect" in reasoning_lower:
+        return 0.0, reasoning
+    elif "correct" in reasoning_lower:
+        return 1.0, reasoning
+    else:
+        return 0.0, f"[判定不明] {reasoning}"
+
+
+def _ua_verdict(reasoning: str) -> Tuple[float, str]:
+    reasoning_lower = reasoning.lower()
+    if "different" in reasoning_lower:
+        return 0.0, reasoning
+    elif "same" in reasoning_lower:
+        return 1.0, reasoning
+    else:
+        return 0.0, f"[判定不明] {reasoning}"
+
+
 def _llm_fuzzy_match_bedrock(
     pred: str, 
     reference: str, 
@@ -115,38 +203,25 @@ def _llm_fuzzy_match_bedrock(
     except Exception:
         regions = [region] if region else ['us-west-2']
 
+    if judge_hedge.hedge_enabled() and len(regions) > 1:
+        # ヘッジ: 先頭リージョンが遅ければ次のリージョンにも送り、先に返った応答を採用
+        try:
+            response, _ = judge_hedge.hedged_call(regions, _get_bedrock_client,
+                                                  lambda client: _judge_converse(client, model_id, message), label='fuzzy_match',
+                                                  on_response=_record_judge_usage)
+        except RuntimeError as e:
+            error_msg = f"[LLM呼び出しエラー] 全リージョン失敗: {e}"
+            print(f"[警告] fuzzy_match中にエラー: {error_msg}")
+            return 0.0, error_msg
+        return _fuzzy_verdict(_judge_text(response))
+
     last_error: Optional[str] = None
     for idx, r in enumerate(regions):
+        _DEADLINE.check()
         try:
-            client = _get_bedrock_client(r)
-            response = client.converse(
-                modelId=model_id,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [{"text": message}]
-                    }
-                ],
-                inferenceConfig={
-                    "temperature": 0.0,
-                    "maxTokens": 768,
-                }
-            )
-
-            output = response.get('output', {})
-            content = output.get('message', {}).get('content', [])
-            reasoning = ""
-            for block in content:
-                if block.get('text'):
-                    reasoning += block['text']
-
-            reasoning_lower = reasoning.lower()
-            if "partially correct" in reasoning_lower or "incorrect" in reasoning_lower:
-                return 0.0, reasoning
-            elif "correct" in reasoning_lower:
-                return 1.0, reasoning
-            else:
-                return 0.0, f"[判定不明] {reasoning}"
+            response = _judge_converse(_get_bedrock_client(r), model_id, message)
+            _record_judge_usage(response)
+            return _fuzzy_verdict(_judge_text(response))
         except Exception as e:
             msg = str(e)
             last_error = msg
@@ -157,7 +232,7 @@ def _llm_fuzzy_match_bedrock(
                     print(f"[情報] fuzzy_match: リージョン {r} でスロットリング。{wait_ms}ms 待機してフェイルオーバーします ({idx+1}/{len(regions)})")
                 except Exception:
                     pass
-                time.sleep(wait_ms / 1000.0)
+                _DEADLINE.sleep(wait_ms / 1000.0)
                 continue
             # その他のエラーでも次のリージョンへフォールバック
             try:
@@ -206,38 +281,25 @@ def _llm_ua_match_bedrock(
     except Exception:
         regions = [region] if region else ['us-west-2']
 
+    if judge_hedge.hedge_enabled() and len(regions) > 1:
+        # ヘッジ: 先頭リージョンが遅ければ次のリージョンにも送り、先に返った応答を採用
+        try:
+            response, _ = judge_hedge.hedged_call(regions, _get_bedrock_client,
+                                                  lambda client: _judge_converse(client, model_id, message), label='ua_match',
+                                                  on_response=_record_judge_usage)
+        except RuntimeError as e:
+            error_msg = f"[LLM呼び出しエラー] 全リージョン失敗: {e}"
+            print(f"[警告] ua_match中にエラー: {error_msg}")
+            return 0.0, error_msg
+        return _ua_verdict(_judge_text(response))
+
     last_error: Optional[str] = None
     for idx, r in enumerate(regions):
+        _DEADLINE.check()
         try:
-            client = _get_bedrock_client(r)
-            response = client.converse(
-                modelId=model_id,
-                messages=[
-                    {
-                        "role": "user",
-                        "content": [{"text": message}]
-                    }
-                ],
-                inferenceConfig={
-                    "temperature": 0.0,
-                    "maxTokens": 768,
-                }
-            )
-
-            output = response.get('output', {})
-            content = output.get('message', {}).get('content', [])
-            reasoning = ""
-            for block in content:
-                if block.get('text'):
-                    reasoning += block['text']
-
-            reasoning_lower = reasoning.lower()
-            if "different" in reasoning_lower:
-                return 0.0, reasoning
-            elif "same" in reasoning_lower:
-                return 1.0, reasoning
-            else:
-                return 0.0, f"[判定不明] {reasoning}"
+            response = _judge_converse(_get_bedrock_client(r), model_id, message)
+            _record_judge_usage(response)
+            return _ua_verdict(_judge_text(response))
         except Exception as e:
             msg = str(e)
             last_error = msg
@@ -247,7 +309,7 @@ def _llm_ua_match_bedrock(
                     print(f"[情報] ua_match: リージョン {r} でスロットリング。{wait_ms}ms 待機してフェイルオーバーします ({idx+1}/{len(regions)})")
                 except Exception:
                     pass
-                time.sleep(wait_ms / 1000.0)
+                _DEADLINE.sleep(wait_ms / 1000.0)
                 continue
             try:
                 print(f"[情報] ua_match: リージョン {r} でエラー。次を試行: {msg}")
@@ -260,6 +322,22 @@ def _llm_ua_match_bedrock(
     return 0.0, error_msg
 
 
+def _prejudge_fuzzy(pred_raw: str, reference: str) -> Optional[dict]:
+    """fuzzy_match のローカル事前判定（AGENT_WEBARENA_PREJUDGE=on / shadow のときのみ）。used=True なら判定モデルを呼ばない"""
+    import prejudge
+    mode = prejudge.mode()
+    if mode == 'off':
+        return None
+    result = prejudge.prejudge(pred_raw, reference, prejudge.load_thresholds())
+    result['mode'] = mode
+    result['used'] = mode == 'on' and result['verdict'] is not None
+    if result['verdict'] is not None:
+        label = '一致' if result['verdict'] == 1.0 else '不一致'
+        action = '判定モデルを省略' if result['used'] else '記録のみ'
+        print(f"[情報] fuzzy_match 事前判定: {label}（{result['reason']}）{action}: {reference[:60]}")
+    return result
+
+
 def _eval_string_offline(
     trajectory: list,
     config: dict,
@@ -301,8 +379,23 @@ def _eval_string_offline(
     intent = config.get('intent', '')
     
     ref_cfg = (config.get("eval") or {}).get("reference_answers") or {}
+
+    # 判定モデルに渡す回答（AGENT_WEBARENA_ANSWER_CONDENSE=true なら markdown・前置き・根拠の再掲を除いて上限トークン数に収めたもの）
+    judge_pred = pred_raw
+    condensed = None
+    if 'fuzzy_match' in ref_cfg:
+        import answer_condense
+        if answer_condense.condense_enabled():
+            condensed = answer_condense.condense(pred_raw, intent=intent)
+            judge_pred = condensed['text']
+            if condensed['fallback']:
+                print(f"[情報] 最終回答の範囲が質問と無関係なため、判定には生の回答を使います: {condensed['final_span'][:60]}")
+            else:
+                print(f"[情報] 判定用の回答を圧縮: 推定 {condensed['raw_tokens']} → {condensed['condensed_tokens']} トークン"
+                      f"{'（上限で切り詰め）' if condensed['truncated'] else ''}")
     score = 1.0
     approaches = []
+    _DEADLINE.note('approaches', approaches)
     
     # WebArenaのStringEvaluator.__call__と同じ順序で処理
     for approach, value in ref_cfg.items():
@@ -371,7 +464,7 @@ def _eval_string_offline(
                     if model_id and region and boto3:
                         try:
                             ua_score, ua_reasoning = _llm_ua_match_bedrock(
-                                pred=pred_raw,  # clean前の生の回答を使用
+                                pred=judge_pred,  # clean前の回答（圧縮有効時は圧縮後）
                                 reference=string_note,
                                 question=intent,
                                 model_id=model_id,
@@ -431,10 +524,20 @@ def _eval_string_offline(
                 # 各参照文字列に対してfuzzy_matchを実行（AND条件）
                 fuzzy_scores = []
                 fuzzy_reasonings = []
+                prejudgements = []
                 for reference in value:
+                    # 事前判定: 明らかな一致 / 不一致は判定モデルを呼ばずに確定（shadow では判定モデルの結果と並べて記録）
+                    pj = _prejudge_fuzzy(pred_raw, str(reference))
+                    if pj is not None:
+                        prejudgements.append(pj)
+                        if pj['used']:
+                            fuzzy_scores.append(pj['verdict'])
+                            fuzzy_reasonings.append(f"[事前判定] {pj['reason']}")
+                            score *= pj['verdict']
+                            continue
                     try:
                         fuzzy_score, fuzzy_reasoning = _llm_fuzzy_match_bedrock(
-                            pred=pred_raw,  # clean前の生の回答を使用
+                            pred=judge_pred,  # clean前の回答（圧縮有効時は圧縮後）
                             reference=str(reference),
                             question=intent,
                             model_id=model_id,
@@ -443,6 +546,8 @@ def _eval_string_offline(
                         fuzzy_scores.append(fuzzy_score)
                         fuzzy_reasonings.append(fuzzy_reasoning)
                         score *= fuzzy_score
+                        if pj is not None:
+                            pj['llm'] = fuzzy_score
                     except Exception as e:
                         print(f"[エラー] fuzzy_match失敗: {e}")
                         fuzzy_scores.append(0.0)
@@ -456,6 +561,8 @@ def _eval_string_offline(
                     'individual_scores': fuzzy_scores,
                     'llm_reasonings': fuzzy_reasonings
                 })
+                if prejudgements:
+                    approaches[-1]['prejudge'] = prejudgements
         else:
             # 未対応の評価方法
             print(f"[警告] 未対応の評価方法: {approach}")
@@ -473,6 +580,9 @@ def _eval_string_offline(
         'cleaned_prediction': pred,
         'raw_prediction': pred_raw
     }
+    if condensed is not None:
+        eval_details['condensed_prediction'] = condensed['text']
+        eval_details['condense'] = {k: v for k, v in condensed.items() if k != 'text'}
     
     return float(score), eval_details
 
@@ -516,68 +626,116 @@ def _capture_screenshot_base64(page: Any) -> str:
         return _default_placeholder_png_base64()
 
 
+def _state_url(st: dict) -> str:
+    return str(((st.get('info') or {}).get('page') or {}).get('url') or '')
+
+
+def _render_header(task_id: int) -> List[str]:
+    return [
+        '<!doctype html>',
+        '<html><head><meta charset="utf-8"><title>WebArena Render</title></head><body>',
+        f'<h2>Rendered Result (task {task_id})</h2>',
+    ]
+
+
+def _render_step_html(st: dict, ac: dict) -> List[str]:
+    """1ステップ（state + action）分の HTML 断片"""
+    url = _state_url(st)
+    obv = str(((st.get('observation') or {}).get('text')) or '')
+    raw = str(ac.get('raw_prediction') or '')
+    atype = _action_type_to_name(ac.get('action_type', -1))
+    el_name = str(ac.get('element_name') or '')
+    key = str(ac.get('key_comb') or '')
+    goto_url = str(ac.get('url') or '')
+    parsed = f"{atype} {('name='+el_name) if el_name else ''} {('key='+key) if key else ''} {('url='+goto_url) if goto_url else ''}".strip()
+    return [
+        f'<h3 class="url">{html.escape(url)}</h3>',
+        '<div class="state_obv"><pre>',
+        html.escape(obv),
+        '</pre></div>',
+        f'<div class="raw_parsed_prediction">{html.escape(raw)}</div>',
+        f'<div class="parsed_action">{html.escape(parsed)}</div>',
+        '<hr>',
+    ]
+
+
 def _build_render_html(task_id: int, states: List[dict], actions: List[dict]) -> str:
     # Ensure same length
     n = min(len(states), len(actions))
-    parts: List[str] = []
-    parts.append('<!doctype html>')
-    parts.append('<html><head><meta charset="utf-8"><title>WebArena Render</title></head><body>')
-    parts.append(f'<h2>Rendered Result (task {task_id})</h2>')
+    parts: List[str] = _render_header(task_id)
     for i in range(n):
-        st = states[i]
-        ac = actions[i]
-        url = str(((st.get('info') or {}).get('page') or {}).get('url') or '')
-        obv = str(((st.get('observation') or {}).get('text')) or '')
-        raw = str(ac.get('raw_prediction') or '')
-        atype = _action_type_to_name(ac.get('action_type', -1))
-        el_name = str(ac.get('element_name') or '')
-        key = str(ac.get('key_comb') or '')
-        goto_url = str(ac.get('url') or '')
-        parsed = f"{atype} {('name='+el_name) if el_name else ''} {('key='+key) if key else ''} {('url='+goto_url) if goto_url else ''}".strip()
-
-        parts.append(f'<h3 class="url">{html.escape(url)}</h3>')
-        parts.append('<div class="state_obv"><pre>')
-        parts.append(html.escape(obv))
-        parts.append('</pre></div>')
-        parts.append(f'<div class="raw_parsed_prediction">{html.escape(raw)}</div>')
-        parts.append(f'<div class="parsed_action">{html.escape(parsed)}</div>')
-        parts.append('<hr>')
+        parts.extend(_render_step_html(states[i], actions[i]))
     parts.append('</body></html>')
     return '\n'.join(parts)
 
 
+# trajectory の action.timing（src/agent/tools/util.ts）の内訳項目
+STEP_TIMING_COMPONENTS = ('model_ms', 'action_ms', 'retrieval_ms', 'observation_ms', 'other_ms')
+
+
+def _as_ms(v: Any) -> float:
+    try:
+        return float(v or 0.0)
+    except (TypeError, ValueError):
+        return 0.0
+
+
+def _action_history_item(i: int, st: dict, ac: dict, url_after: str) -> dict:
+    item = {
+        'step': i,
+        'url_before': _state_url(st),
+        'action_type': int(ac.get('action_type', -1)),
+        'action': _action_type_to_name(ac.get('action_type', -1)),
+        'element_name': str(ac.get('element_name') or ''),
+        'element_id': str(ac.get('element_id') or ''),
+        'key_comb': str(ac.get('key_comb') or ''),
+        'goto_url': str(ac.get('url') or ''),
+        'url_after': url_after,
+        'raw_prediction': str(ac.get('raw_prediction') or ''),
+    }
+    timing = ac.get('timing')
+    if isinstance(timing, dict):
+        item['duration_ms'] = _as_ms(timing.get('duration_ms'))
+        item['breakdown'] = {k: _as_ms(timing.get(k)) for k in STEP_TIMING_COMPONENTS}
+        item['tokens'] = dict(timing.get('tokens') or {})
+    return item
+
+
 def _build_action_history(states: List[dict], actions: List[dict]) -> List[dict]:
     n = min(len(states), len(actions))
     history: List[dict] = []
     for i in range(n):
-        st = states[i]
-        ac = actions[i]
-        url_before = str(((st.get('info') or {}).get('page') or {}).get('url') or '')
-        url_after = ''
-        if i + 1 < len(states):
-            nxt = states[i + 1]
-            url_after = str(((nxt.get('info') or {}).get('page') or {}).get('url') or '')
-        item = {
-            'step': i,
-            'url_before': url_before,
-            'action_type': int(ac.get('action_type', -1)),
-            'action': _action_type_to_name(ac.get('action_type', -1)),
-            'element_name': str(ac.get('element_name') or ''),
-            'element_id': str(ac.get('element_id') or ''),
-            'key_comb': str(ac.get('key_comb') or ''),
-            'goto_url': str(ac.get('url') or ''),
-            'url_after': url_after,
-            'raw_prediction': str(ac.get('raw_prediction') or ''),
-        }
-        history.append(item)
+        url_after = _state_url(states[i + 1]) if i + 1 < len(states) else ''
+        history.append(_action_history_item(i, states[i], actions[i], url_after))
     return history
 
 
+def _summarize_step_timing(action_history: List[dict]) -> Optional[dict]:
+    """action_history の所要時間をタスク単位で集計（timing の無い trajectory では None）"""
+    timed = [h for h in action_history if 'duration_ms' in h]
+    if not timed:
+        return None
+    totals = {k: sum(h['breakdown'].get(k, 0.0) for h in timed) for k in STEP_TIMING_COMPONENTS}
+    tokens: Dict[str, int] = {}
+    for h in timed:
+        for k, v in (h.get('tokens') or {}).items():
+            tokens[k] = tokens.get(k, 0) + int(v or 0)
+    slowest = max(timed, key=lambda h: h['duration_ms'])
+    return {
+        'steps': len(timed),
+        'total_ms': sum(h['duration_ms'] for h in timed),
+        'breakdown_ms': totals,
+        'tokens': tokens,
+        'slowest_step': {'step': slowest['step'], 'action': slowest['action'], 'url_before': slowest['url_before'],
+                         'duration_ms': slowest['duration_ms']},
+    }
+
+
 def _collect_pages_visited(states: List[dict], actions: List[dict]) -> List[str]:
     urls: List[str] = []
     seen = set()
     for st in states:
-        u = str(((st.get('info') or {}).get('page') or {}).get('url') or '')
+        u = _state_url(st)
         if u and u not in seen:
             seen.add(u)
             urls.append(u)
@@ -589,6 +747,82 @@ def _collect_pages_visited(states: List[dict], actions: List[dict]) -> List[str]
     return urls
 
 
+class _IncrementalTrajectory:
+    """
+    NDJSON ストリーム（trajectory_stream.py）から届く要素を順に取り込み、
+    HTML レンダ断片・action_history・pages_visited をエージェント実行中に組み立てておく。
+    結果は _extract_pairs_from_trajectory + _build_* を trajectory 全体に適用した場合と一致する
+    """
+
+    def __init__(self):
+        self.trajectory: List[dict] = []
+        self._states: List[dict] = []
+        self._actions: List[dict] = []
+        self._fragments: List[str] = []
+        self._history: List[dict] = []
+
+    def add(self, item: dict) -> None:
+        self.trajectory.append(item)
+        if isinstance(item, dict) and 'observation' in item and 'info' in item:
+            self._states.append(item)
+        elif isinstance(item, dict) and 'action_type' in item:
+            self._actions.append(item)
+        else:
+            return
+        # state と action が揃ったステップを確定
+        while len(self._history) < min(len(self._states), len(self._actions)):
+            i = len(self._history)
+            st, ac = self._states[i], self._actions[i]
+            # 直前ステップの遷移先は次のステップが確定した時点で埋める（バッチ版と同じく最終ステップは空のまま）
+            if self._history:
+                self._history[-1]['url_after'] = _state_url(st)
+            self._fragments.extend(_render_step_html(st, ac))
+            self._history.append(_action_history_item(i, st, ac, ''))
+
+    @property
+    def steps(self) -> int:
+        return len(self._history)
+
+    def pairs(self) -> Tuple[List[dict], List[dict]]:
+        n = self.steps
+        return self._states[:n], self._actions[:n]
+
+    def render_html(self, task_id: int) -> str:
+        return '\n'.join(_render_header(task_id) + self._fragments + ['</body></html>'])
+
+    def action_history(self) -> List[dict]:
+        return [dict(h) for h in self._history]
+
+    def pages_visited(self) -> List[str]:
+        states, actions = self.pairs()
+        return _collect_pages_visited(states, actions)
+
+
+def _follow_trajectory_stream(trajectory_file: str, follow: bool) -> Tuple[dict, _IncrementalTrajectory]:
+    """NDJSON trajectory を（--follow なら end 行まで追従して）読み、JSON 版と同じ形の data を返す"""
+    import trajectory_stream
+    inc = _IncrementalTrajectory()
+    if follow:
+        print("[情報] trajectory ストリームを追従中（エージェント終了待ち）")
+    meta = trajectory_stream.read_stream(Path(trajectory_file), inc.add, follow=follow)
+    end = meta.get('end') or {}
+    write_errors = int(end.get('write_errors') or 0)
+    if write_errors:
+        # 追記に失敗した行があり、ストリームは不完全。end 行の前に保存される JSON 版から組み直す
+        json_file = Path(trajectory_file).with_suffix('.json')
+        print(f"[警告] trajectory ストリームに追記失敗が {write_errors}件あります。JSON 版で評価します: {json_file}")
+        if not artifact_store.exists(json_file):
+            raise trajectory_stream.StreamAborted(f"ストリームが不完全で、JSON 版もありません: {json_file}")
+        inc = _IncrementalTrajectory()
+        for item in artifact_store.load_json(json_file).get('trajectory') or []:
+            inc.add(item)
+    data = {'trajectory': inc.trajectory, 'final_url': end.get('final_url', '')}
+    for k in ('cdp_endpoint', 'evaluated_at'):
+        if k in end:
+            data[k] = end[k]
+    return data, inc
+
+
 def _ensure_bs4_installed() -> None:
     try:
         import bs4  # noqa: F401
@@ -619,6 +853,22 @@ def _wrap_config_for_html2json(config_file: str, out_path: Path) -> Path:
     return out_path
 
 
+def _create_summary_file(summary_dir: Path, timestamp_iso: str) -> Path:
+    """日付付きのサマリーファイルを排他的に作成して返す"""
+    summary_dir.mkdir(parents=True, exist_ok=True)
+    ts_compact = timestamp_iso.replace(':', '-').replace('.', '-')
+    # 同じタスクを並行に評価すると同じ秒のファイル名になるため、既存なら連番を付けて別ファイルにする
+    out_path = summary_dir / f"{ts_compact}.json"
+    n = 1
+    while True:
+        try:
+            with open(out_path, 'x'):
+                return out_path
+        except FileExistsError:
+            n += 1
+            out_path = summary_dir / f"{ts_compact}-{n}.json"
+
+
 def _save_leaderboard_style_summary(
     summary_dir: Path,
     *,
@@ -638,10 +888,9 @@ def _save_leaderboard_style_summary(
     trajectory_file: str,
     run_result_folder: str,
     video_file: str,
+    result_file: str = '',
 ) -> Path:
-    summary_dir.mkdir(parents=True, exist_ok=True)
-    ts_compact = timestamp_iso.replace(':', '-').replace('.', '-')
-    out_path = summary_dir / f"{ts_compact}.json"
+    out_path = _create_summary_file(summary_dir, timestamp_iso)
     payload = {
         "task_id": task_id,
         "success": bool(success),
@@ -671,18 +920,147 @@ def _save_leaderboard_style_summary(
             "video_file": video_file,
         },
     }
+    if result_file:
+        payload["artifacts"]["result_file"] = str(result_file)
     with open(out_path, 'w') as f:
         json.dump(payload, f, indent=2, ensure_ascii=False)
     return out_path
 
 
-def _evaluate_program_html_fallback(cfg: dict, page) -> float:
+def _resolve_program_html_url(url: str, cfg: dict) -> str:
+    """program_html 項目の url を絶対URLに解決（'last' 以外）"""
+    if url.startswith('http') and '/../' in url:
+        # 絶対URLだが相対パス（../)を含む場合
+        # http://127.0.0.1:7780/admin/../antonia-racer-tank.html
+        # -> http://127.0.0.1:7780/antonia-racer-tank.html
+        # 相対パス解決（../ を除去）
+        import re
+        target_url = url
+        # /dir/../ を / に置き換える（繰り返し適用）
+        while '/../' in target_url:
+            target_url = re.sub(r'/[^/]+/\.\./', '/', target_url)
+    elif url.startswith('http'):
+        target_url = url
+    elif url.startswith('../'):
+        # ../で始まる場合は、start_urlをベースに解決
+        # shopping_adminの場合、フロントエンドのショッピングサイトに解決する必要がある
+        start_url = cfg.get('start_url', 'http://127.0.0.1:7780/admin')
+        
+        # URLから相対パス部分を取得（例: ../antonia-racer-tank.html -> antonia-racer-tank.html）
+        relative_path = url.replace('../', '')
+        
+        # start_urlがadminの場合、フロントエンドのポート7770に変換
+        if '/admin' in start_url:
+            # http://127.0.0.1:7780/admin -> http://127.0.0.1:7770
+            base_url = start_url.replace(':7780/admin', ':7770').replace('/admin', '')
+            target_url = f"{base_url}/{relative_path}"
+        else:
+            # 通常の相対パス解決
+            base_url = start_url.rsplit('/', 1)[0]
+            target_url = f"{base_url}/{relative_path}"
+    else:
+        target_url = url
+    return target_url
+
+
+def _read_program_html_page(item: dict, cfg: dict, page, replica_pages=None, http_fastpath=None, page_cache=None) -> str:
+    """program_html 項目の url を開き、locator の値（locator が空ならページ本文）を返す"""
+    # URLの取得
+    url = item.get('url', '')
+    # ページキャッシュ: 同じエポックで読み込み済みの URL ならナビゲーションせずに答える（'last' は対象外）
+    cache_url = _resolve_program_html_url(url, cfg) if page_cache is not None and url and url != 'last' else None
+    if cache_url:
+        value = page_cache.lookup(cache_url, item.get('locator', ''))
+        if value is not None:
+            return value
+    if http_fastpath is not None and url and url != 'last':
+        # HTTP高速経路: 単純な locator は HTTP 取得 + HTML パースで評価（対象外なら None でブラウザへ）
+        value = http_fastpath.read(_resolve_program_html_url(url, cfg), item.get('locator', ''))
+        if value is not None:
+            if cache_url:
+                page_cache.store(cache_url, item.get('locator', ''), value)
+            return value
+    eval_page = page
+    if url == 'last':
+        # 'last'の場合は現在のURLをそのまま使用
+        print(f"[情報] 現在のURLで評価: {page.url}")
+    elif url:
+        target_url = _resolve_program_html_url(url, cfg)
+        replica_page = None
+        if replica_pages is not None:
+            # レプリカプール: 未完了数最小の健全なレプリカ上の専用ページで開く
+            try:
+                replica_page = replica_pages.open(target_url, timeout_ms=_DEADLINE.timeout_ms(30000))
+            except eval_deadline.DeadlineExceeded:
+                raise
+            except Exception as e:
+                print(f"[警告] レプリカでのナビゲーション中に例外: {e}")
+            if replica_page is None:
+                print("[情報] レプリカで開けなかったため、メインのページで評価します")
+        if replica_page is not None:
+            eval_page = replica_page
+        else:
+            print(f"[情報] URLにナビゲート: {target_url}")
+            try:
+                page.goto(target_url, timeout=_DEADLINE.timeout_ms(30000), wait_until='networkidle')
+                print(f"[情報] ナビゲーション完了: {page.url}")
+            except Exception as e:
+                print(f"[警告] ナビゲーション失敗: {e}")
+                print(f"[情報] 現在のURL: {page.url}")
+                # ネットワークアイドル待機がタイムアウトした場合でも続行
+                cache_url = None
+    
+    # locatorの実行（inner_text 等の待機もフェーズ残り時間以内に抑える）
+    _DEADLINE.check()
+    if _DEADLINE.enabled:
+        eval_page.set_default_timeout(_DEADLINE.timeout_ms(30000))
+    locator = item.get('locator', '')
+    if locator:
+        print(f"[情報] locatorを実行: {locator[:100]}...")
+        try:
+            result = eval_page.evaluate(locator)
+            result_text = str(result or '')
+            print(f"[情報] locator結果: {result_text[:200]}...")
+        except Exception as e:
+            print(f"[警告] locator実行失敗: {e}")
+            print(f"[情報] フォールバック: ページ全体のテキストコンテンツを使用します")
+            # locator失敗時のフォールバック: ページ全体のテキストを取得
+            try:
+                result_text = eval_page.inner_text('body')
+                print(f"[情報] ページテキスト取得成功: {len(result_text)} 文字")
+            except Exception as e2:
+                print(f"[エラー] ページテキスト取得も失敗: {e2}")
+                result_text = ''
+                cache_url = None
+    else:
+        # locatorが空の場合はページ全体のテキストを取得
+        try:
+            result_text = eval_page.inner_text('body')
+        except Exception as e:
+            print(f"[エラー] ページコンテンツ取得失敗: {e}")
+            result_text = ''
+            cache_url = None
+    if cache_url:
+        # 目的のページに着地した場合のみ保存（ログイン画面等へのリダイレクトはキャッシュしない）
+        landed = str(eval_page.url)
+        if replica_pages is not None:
+            landed = replica_pages.pool.canonicalize(landed)
+        if _normalize_url(landed) == _normalize_url(cache_url):
+            page_cache.store(cache_url, locator, result_text, eval_page)
+    return result_text
+
+
+def _evaluate_program_html_fallback(cfg: dict, page, replica_pages=None, sql_verifier=None, http_fastpath=None, page_cache=None) -> float:
     """
     program_html評価をフォールバックモードで実行
     
     Args:
         cfg: config_fileの内容（辞書）
         page: Playwrightのページオブジェクト
+        replica_pages: レプリカプール（replica_pool.ReplicaPages）。指定時は URL 指定項目をレプリカ上で評価
+        sql_verifier: SQL 検証バックエンド（sql_verify.SqlVerifier）。指定時はマッピング済み項目を DB で評価
+        http_fastpath: HTTP高速経路（http_fastpath.HttpFastPath）。指定時は単純な locator をブラウザなしで評価
+        page_cache: ページキャッシュ（page_cache.PageCache）。指定時は同じエポックで読み込み済みのページをキャッシュから評価
     
     Returns:
         評価スコア（0.0-1.0）
@@ -696,84 +1074,31 @@ def _evaluate_program_html_fallback(cfg: dict, page) -> float:
             return 0.0
         
         total_score = 1.0
+        # 締め切りで打ち切られた場合に結果へ残す項目別の途中結果
+        item_results: List[dict] = []
+        _DEADLINE.note('program_html', item_results)
         
         for idx, item in enumerate(program_html_list):
+            _DEADLINE.check()
             print(f"[評価] program_html項目 {idx+1}/{len(program_html_list)} を評価中...")
+            passed = True
             
-            # URLの取得
             url = item.get('url', '')
-            if url == 'last':
-                # 'last'の場合は現在のURLをそのまま使用
-                print(f"[情報] 現在のURLで評価: {page.url}")
-            elif url:
-                # URLが指定されている場合はナビゲート
-                if url.startswith('http') and '/../' in url:
-                    # 絶対URLだが相対パス（../)を含む場合
-                    # http://127.0.0.1:7780/admin/../antonia-racer-tank.html
-                    # -> http://127.0.0.1:7780/antonia-racer-tank.html
-                    # 相対パス解決（../ を除去）
-                    import re
-                    target_url = url
-                    # /dir/../ を / に置き換える（繰り返し適用）
-                    while '/../' in target_url:
-                        target_url = re.sub(r'/[^/]+/\.\./', '/', target_url)
-                elif url.startswith('http'):
-                    target_url = url
-                elif url.startswith('../'):
-                    # ../で始まる場合は、start_urlをベースに解決
-                    # shopping_adminの場合、フロントエンドのショッピングサイトに解決する必要がある
-                    start_url = cfg.get('start_url', 'http://127.0.0.1:7780/admin')
-                    
-                    # URLから相対パス部分を取得（例: ../antonia-racer-tank.html -> antonia-racer-tank.html）
-                    relative_path = url.replace('../', '')
-                    
-                    # start_urlがadminの場合、フロントエンドのポート7770に変換
-                    if '/admin' in start_url:
-                        # http://127.0.0.1:7780/admin -> http://127.0.0.1:7770
-                        base_url = start_url.replace(':7780/admin', ':7770').replace('/admin', '')
-                        target_url = f"{base_url}/{relative_path}"
-                    else:
-                        # 通常の相対パス解決
-                        base_url = start_url.rsplit('/', 1)[0]
-                        target_url = f"{base_url}/{relative_path}"
-                else:
-                    target_url = url
-                
-                print(f"[情報] URLにナビゲート: {target_url}")
-                try:
-                    page.goto(target_url, timeout=30000, wait_until='networkidle')
-                    print(f"[情報] ナビゲーション完了: {page.url}")
-                except Exception as e:
-                    print(f"[警告] ナビゲーション失敗: {e}")
-                    print(f"[情報] 現在のURL: {page.url}")
-                    # ネットワークアイドル待機がタイムアウトした場合でも続行
-                    pass
-            
-            # locatorの実行
             locator = item.get('locator', '')
-            if locator:
-                print(f"[情報] locatorを実行: {locator[:100]}...")
-                try:
-                    result = page.evaluate(locator)
-                    result_text = str(result or '')
-                    print(f"[情報] locator結果: {result_text[:200]}...")
-                except Exception as e:
-                    print(f"[警告] locator実行失敗: {e}")
-                    print(f"[情報] フォールバック: ページ全体のテキストコンテンツを使用します")
-                    # locator失敗時のフォールバック: ページ全体のテキストを取得
-                    try:
-                        result_text = page.inner_text('body')
-                        print(f"[情報] ページテキスト取得成功: {len(result_text)} 文字")
-                    except Exception as e2:
-                        print(f"[エラー] ページテキスト取得も失敗: {e2}")
-                        result_text = ''
+            # SQL 検証: マッピングに一致する URL 指定項目はページを開かずに DB の値を使う
+            sql_value = None
+            if sql_verifier is not None and url and url != 'last':
+                target_url = _resolve_program_html_url(url, cfg)
+                sql_value = sql_verifier.query(target_url, locator)
+            if sql_value is not None and not sql_verifier.consistency:
+                result_text = sql_value
             else:
-                # locatorが空の場合はページ全体のテキストを取得
-                try:
-                    result_text = page.inner_text('body')
-                except Exception as e:
-                    print(f"[エラー] ページコンテンツ取得失敗: {e}")
-                    result_text = ''
+                result_text = _read_program_html_page(item, cfg, page, replica_pages, http_fastpath, page_cache)
+                if sql_value is not None:
+                    sql_verifier.record_consistency(
+                        target_url, locator, sql_value, result_text,
+                        matched=_clean_answer(sql_value) == _clean_answer(result_text),
+                    )
             
             # required_contentsのチェック
             required_contents = item.get('required_contents', {})
@@ -788,6 +1113,7 @@ def _evaluate_program_html_fallback(cfg: dict, page) -> float:
                     print(f"  期待値: {expected}")
                     print(f"  実際値: {result_text[:200]}")
                     total_score *= 0.0
+                    passed = False
             
             # must_includeのチェック
             if 'must_include' in required_contents:
@@ -805,6 +1131,8 @@ def _evaluate_program_html_fallback(cfg: dict, page) -> float:
                         print(f"[失敗] must_include: '{must_text[:50]}...' が含まれていません")
                         print(f"  検索対象テキスト（最初の500文字）: {result_text_clean[:500]}...")
                         total_score *= 0.0
+                        passed = False
+            item_results.append({'index': idx, 'url': url, 'passed': passed})
         
         return total_score
     
@@ -815,6 +1143,15 @@ def _evaluate_program_html_fallback(cfg: dict, page) -> float:
         return 0.0
 
 
+def _resolve_storage_state(cfg: dict) -> Path:
+    """config の storage_state（./.auth/...）を絶対パスに解決"""
+    storage_state_path = cfg.get('storage_state', './.auth/shopping_admin_state.json')
+    # ./ で始まる場合は削除して、ベースディレクトリと結合
+    if storage_state_path.startswith('./'):
+        storage_state_path = storage_state_path[2:]
+    return Path('/home/ec2-user/webarena-local') / storage_state_path
+
+
 def _normalize_url(u: str) -> str:
     try:
         u = str(u or '').strip()
@@ -858,15 +1195,284 @@ def _evaluate_url_match_fallback(cfg: dict, *, current_url: str, final_url: str)
         return 0.0
 
 
+# 判定結果を左右する補助モジュール（ソースハッシュを評価器バージョンに含める）
+_SCORING_MODULES = (
+    'eval_cache', 'eval_deadline', 'judge_hedge', 'prejudge', 'answer_condense', 'trajectory_stream',
+    'http_fastpath', 'sql_verify', 'replica_pool', 'page_cache',
+)
+# 判定結果を左右する環境変数（値をメモ化キーに含める。判定モデルの ID はキーの別要素）
+_SCORING_ENV = (
+    'AGENT_EVAL_OVERRIDE_ANSWER',
+    'AGENT_WEBARENA_PREJUDGE', 'AGENT_WEBARENA_PREJUDGE_THRESHOLDS',
+    'AGENT_WEBARENA_ANSWER_CONDENSE', 'AGENT_WEBARENA_JUDGE_INPUT_TOKENS', 'AGENT_WEBARENA_JUDGE_HEDGE',
+    'AGENT_WEBARENA_HTTP_FASTPATH', 'AGENT_WEBARENA_SQL_DSN', 'AGENT_WEBARENA_SQL_CHECKS', 'AGENT_WEBARENA_SQL_VERIFY_MODE',
+    'AGENT_WEBARENA_REPLICAS', 'AGENT_WEBARENA_PAGE_CACHE',
+)
+
+
+def _scoring_env() -> Dict[str, str]:
+    return {name: str(os.environ.get(name, '')).strip() for name in _SCORING_ENV}
+
+
+def _evaluator_version() -> str:
+    script_dir = Path(__file__).resolve().parent
+    modules = [Path(__file__).resolve()] + [script_dir / f'{m}.py' for m in _SCORING_MODULES]
+    version = f"{EVALUATOR_VERSION}+{eval_cache.sources_digest(modules)}"
+    import prejudge
+    if prejudge.mode() != 'off':
+        # 事前判定の有無・ロジック・閾値で判定結果が変わりうるため、メモ化キーを分ける
+        version += f"+prejudge-{prejudge.mode()}-{prejudge.fingerprint(prejudge.load_thresholds())}"
+    import answer_condense
+    if answer_condense.condense_enabled():
+        # 判定モデルへの入力が変わるため、圧縮の有無・ロジック・上限でメモ化キーを分ける
+        version += f"+condense-{answer_condense.fingerprint()}"
+    return version
+
+
+def _write_result_file(result_file: str, payload: dict) -> None:
+    Path(result_file).parent.mkdir(parents=True, exist_ok=True)
+    with open(result_file, 'w') as f:
+        json.dump(payload, f, indent=2)
+    print(f"[評価] 結果保存: {result_file}")
+
+
+def _pack_run_artifacts(summary_file: Optional[Path], run_dir: Path) -> None:
+    """成果物ストアが有効なら、サマリー・HTMLレンダ・json_dump 等を blob 参照の記録に置き換える（結果ファイルは対象外）"""
+    if not artifact_store.store_enabled():
+        return
+    paths = [p for p in sorted(run_dir.glob('*')) if p.is_file()]
+    if summary_file:
+        paths.append(Path(summary_file))
+    store, n, before, after = artifact_store.pack_paths(paths)
+    if n:
+        s = store.summary()
+        print(f"[情報] 成果物ストアに格納: {n}件 {before}B → 記録 {after}B + 新規 blob {s['written_bytes']}B（再利用 {s['blobs_reused']}件）")
+
+
+def _cached_result_payload(cached: dict, key: str, trajectory_file: str, config_file: str) -> dict:
+    """キャッシュ済みの結果を今回のランの入力パスで書き出す（キャッシュ元のランのパスは残さない）"""
+    payload = dict(cached.get('result') or {'score': float(cached.get('score', 0.0))})
+    payload['trajectory_file'] = trajectory_file
+    payload['config_file'] = config_file
+    payload['eval_cache'] = {'hit': True, 'key': key}
+    return payload
+
+
+# 判定モデルの呼び出し失敗・判定不能を示す理由の接頭辞（一時的な失敗の 0 点をメモ化しない）
+_JUDGE_FAILURE_MARKERS = ('[LLM呼び出しエラー]', '[判定不明]', '[エラー]')
+
+
+def _judge_failed(eval_details: dict) -> bool:
+    """いずれかの評価方法がエラー、または判定モデルの理由にエラー / 判定不明の印を含むか"""
+    for approach in (eval_details or {}).get('approaches') or []:
+        if approach.get('error'):
+            return True
+        reasonings = [approach.get('llm_reasoning')] + list(approach.get('llm_reasonings') or [])
+        if any(str(r).startswith(_JUDGE_FAILURE_MARKERS) for r in reasonings if r):
+            return True
+    return False
+
+
+def _save_cached_summary(summary_dir: Path, cached: dict, key: str, *, task_id: int, cfg: dict, execution_time: float,
+                         trajectory_file: str, result_file: str) -> Path:
+    """
+    キャッシュヒット時のサマリー（キャッシュ元のサマリーを今回のランの入力パスで書き直し、eval_cache.hit を付ける）
+    判定モデルを呼んでいないため judge_usage / judge_hedge / deadline は引き継がない。レンダ等はキャッシュ元を指す
+    """
+    timestamp_iso = time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime())
+    source = str((cached.get('artifacts') or {}).get('summary_file') or '')
+    eval_details = (cached.get('result') or {}).get('eval_details') or {}
+    score = float(cached.get('score', 0.0))
+    try:
+        p = artifact_store.load_json(source)
+    except Exception as e:
+        print(f"[警告] キャッシュ元のサマリーを読めないため、結果から作成します: {e}")
+        answer = str(eval_details.get('raw_prediction') or '')
+        out_path = _save_leaderboard_style_summary(
+            summary_dir,
+            task_id=task_id,
+            score=score,
+            success=score == 1.0,
+            execution_time=execution_time,
+            question=str(cfg.get('intent') or ''),
+            reference_answer=str(((cfg.get('eval') or {}).get('reference_answer_raw_annotation')) or ''),
+            pipeline_answer=answer,
+            string_references=[],
+            targets=[answer] if answer else [],
+            eval_detail=eval_details,
+            error='',
+            timestamp_iso=timestamp_iso,
+            config_obj=cfg,
+            trajectory_file=trajectory_file,
+            run_result_folder='',
+            video_file=str(Path(trajectory_file).with_suffix('.webm')),
+            result_file=result_file,
+        )
+        with open(out_path, 'r') as f:
+            p = json.load(f)
+        p['eval_method_details'] = eval_details
+    else:
+        out_path = _create_summary_file(summary_dir, timestamp_iso)
+        for name in ('judge_usage', 'judge_hedge', 'deadline'):
+            p.pop(name, None)
+        p.update(timestamp=timestamp_iso, execution_time=float(execution_time), error='')
+        artifacts = p.get('artifacts') or {}
+        artifacts.update(trajectory_file=trajectory_file, result_file=str(result_file),
+                         video_file=str(Path(trajectory_file).with_suffix('.webm')))
+        p['artifacts'] = artifacts
+    p['eval_cache'] = {'hit': True, 'key': key, 'source_summary': source}
+    with open(out_path, 'w') as f:
+        json.dump(p, f, indent=2, ensure_ascii=False)
+    return out_path
+
+
+def _store_eval_cache(cache_parts: Optional[dict], *, score: float, result: dict, summary_file: Optional[Path], render_path: Path) -> None:
+    if not cache_parts:
+        return
+    if _judge_failed(result.get('eval_details') or {}):
+        print("[情報] 判定モデルの呼び出し失敗・判定不明を含むため、評価結果をキャッシュしません")
+        return
+    artifacts = {'render_file': str(render_path)}
+    if summary_file:
+        artifacts['summary_file'] = str(summary_file)
+    if eval_cache.store(cache_parts, score=score, result=result, artifacts=artifacts):
+        print(f"[情報] 評価結果をキャッシュ: {cache_parts['key'][:16]}")
+
+
+_CLI_FLAGS = ('--force', '--profile', '--follow')
+_CLI_OPTIONS = ('--deadline=',)
+
+
+def _is_cli_flag(arg: str) -> bool:
+    return arg in _CLI_FLAGS or arg.startswith(_CLI_OPTIONS)
+
+
+def _parse_cli_args() -> Tuple[List[str], set]:
+    """位置引数とフラグ（--force / --profile / --follow / --deadline=<秒>）を分離"""
+    argv = sys.argv[1:]
+    return [a for a in argv if not _is_cli_flag(a)], {a for a in argv if _is_cli_flag(a)}
+
+
+def _default_result_file(trajectory_file: str) -> str:
+    return str(Path(trajectory_file).parent.parent / 'results' / f'{Path(trajectory_file).stem}_result.json')
+
+
+# 締め切り超過時の結果出力に使うタスク情報（_evaluate_task() がフェーズ開始前に設定）
+_TIMEOUT_CONTEXT: Dict[str, Any] = {}
+
+
+def _close_fallback_browser(context, browser) -> None:
+    """フォールバックで起動したブラウザ / コンテキストを閉じる（失敗は警告のみ）"""
+    for name, target in (('コンテキスト', context), ('ブラウザ', browser)):
+        if target is None:
+            continue
+        try:
+            target.close()
+            print(f"[情報] フォールバック{name}を閉じました")
+        except Exception as e:
+            print(f"[警告] フォールバック{name}のクローズに失敗: {e}")
+
+
+def _exit_timed_out(phase: str) -> None:
+    """
+    締め切り超過: 途中結果とフェーズ別の経過時間付きの結果を書き出して終了
+    採点が終わる前（judge / browser）の超過はスコア 0・status=timed_out。
+    採点後（report）の超過は確定済みのスコアをそのまま残す（レンダ・サマリーの一部が欠けるだけ）
+    """
+    deadline = _DEADLINE.summary()
+    ctx = _TIMEOUT_CONTEXT
+    cfg = ctx['cfg']
+    graded = ctx.get('graded')
+    print(f"[警告] 締め切り {_DEADLINE.total_s}秒 を超過したため評価を打ち切りました（フェーズ: {phase}）")
+    if graded:
+        score = float(graded['score'])
+        eval_detail = graded['eval_details'] or deadline['partial']
+        print(f"[結果] スコア: {score}（採点済み。レポート出力は一部省略）")
+        _write_result_file(ctx['result_file'], {
+            'score': score,
+            'timed_out_phase': phase,
+            'trajectory_file': ctx['trajectory_file'],
+            'config_file': ctx['config_file'],
+            'final_url': graded['final_url'],
+            'eval_details': graded['eval_details'],
+            'deadline': deadline,
+        })
+    else:
+        score = 0.0
+        eval_detail = deadline['partial']
+        print(f"[結果] スコア: 0.0（タイムアウト）")
+        _write_result_file(ctx['result_file'], {
+            'score': 0.0,
+            'status': 'timed_out',
+            'timed_out_phase': phase,
+            'trajectory_file': ctx['trajectory_file'],
+            'config_file': ctx['config_file'],
+            'final_url': ctx['final_url'],
+            'deadline': deadline,
+        })
+    actions = ctx['actions']
+    last_stop_answer = str(actions[-1].get('answer') or '') if actions else ''
+    incremental = ctx['incremental']
+    summary_file = _save_leaderboard_style_summary(
+        Path('/home/ec2-user/webarena-local/evaluation-result') / f"task_{ctx['task_id']}",
+        task_id=ctx['task_id'],
+        score=score,
+        success=score == 1.0,
+        execution_time=time.time() - ctx['t0'],
+        question=str(cfg.get('intent') or ''),
+        reference_answer=str(((cfg.get('eval') or {}).get('reference_answer_raw_annotation')) or ''),
+        pipeline_answer=last_stop_answer,
+        string_references=[],
+        targets=[last_stop_answer] if last_stop_answer else [],
+        eval_detail=eval_detail,
+        error='' if graded else f"timeout: {phase}",
+        timestamp_iso=time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
+        config_obj=cfg,
+        trajectory_file=ctx['trajectory_file'],
+        run_result_folder=str(ctx['run_dir']),
+        video_file=str(Path(ctx['trajectory_file']).with_suffix('.webm')),
+        result_file=ctx['result_file'],
+    )
+    try:
+        with open(summary_file, 'r') as f:
+            p = json.load(f)
+        p['action_history'] = incremental.action_history() if incremental else _build_action_history(ctx['states'], actions)
+        p['eval_method_details'] = eval_detail
+        p['deadline'] = deadline
+        if _JUDGE_USAGE['calls']:
+            p['judge_usage'] = _judge_usage_snapshot()
+        with open(summary_file, 'w') as wf:
+            json.dump(p, wf, indent=2, ensure_ascii=False)
+    except Exception as e:
+        print(f"[警告] サマリー追記中に例外: {e}")
+    # タイムアウトも評価結果の一つとして扱い、スイープは続行させる（結果JSONの status で区別）
+    sys.exit(0)
+
+
 def main():
-    if len(sys.argv) < 4:
-        print("Usage: evaluate_webarena.py <trajectory.json> <config_file> <cdp_endpoint> [result_file]")
+    global _DEADLINE
+    _, flags = _parse_cli_args()
+    _DEADLINE = eval_deadline.TaskDeadline.from_env(eval_deadline.cli_value(list(flags)))
+    try:
+        _evaluate_task()
+    except BaseException as e:
+        # 締め切りの割り込み（または割り込み後の後始末で起きた別の例外・異常終了）は timed_out の結果にする
+        if _DEADLINE.expired and _TIMEOUT_CONTEXT and not (isinstance(e, SystemExit) and not e.code):
+            _exit_timed_out(_DEADLINE.expired)
+        raise
+
+
+def _evaluate_task():
+    args, flags = _parse_cli_args()
+    force = '--force' in flags
+    if len(args) < 3:
+        print("Usage: evaluate_webarena.py <trajectory.json> <config_file> <cdp_endpoint> [result_file] [--force] [--profile] [--follow] [--deadline=SECONDS]")
         sys.exit(1)
     
-    trajectory_file = sys.argv[1]
-    config_file = sys.argv[2]
-    cdp_endpoint = sys.argv[3]
-    result_file = sys.argv[4] if len(sys.argv) > 4 else str(Path(trajectory_file).parent.parent / 'results' / f'{Path(trajectory_file).stem}_result.json')
+    trajectory_file = args[0]
+    config_file = args[1]
+    cdp_endpoint = args[2]
+    result_file = args[3] if len(args) > 3 else _default_result_file(trajectory_file)
     
     print(f"[評価] trajectory: {trajectory_file}")
     print(f"[評価] config: {config_file}")
@@ -881,9 +1487,20 @@ def main():
     
     t0 = time.time()
 
-    # Trajectory読み込み
-    with open(trajectory_file, 'r') as f:
-        data = json.load(f)
+    # Trajectory読み込み（.ndjson はストリーム。--follow ならエージェント実行と並行して取り込む）
+    incremental: Optional[_IncrementalTrajectory] = None
+    if trajectory_file.endswith('.ndjson'):
+        import trajectory_stream
+        try:
+            data, incremental = _follow_trajectory_stream(trajectory_file, '--follow' in flags)
+        except trajectory_stream.StreamAborted as e:
+            print(f"[エラー] trajectory ストリームが完了しませんでした: {e}")
+            sys.exit(1)
+        print(f"[情報] trajectory ストリームの取り込み完了（{time.time() - t0:.1f}秒待機）")
+        t0 = time.time()
+        _DEADLINE.start()
+    else:
+        data = artifact_store.load_json(trajectory_file)
     trajectory = data['trajectory']
     final_url = data.get('final_url', '')
 
@@ -896,14 +1513,50 @@ def main():
 
     only_string = isinstance(eval_types, list) and len(eval_types) == 1 and eval_types[0] == 'string_match'
 
-    # 共通: states/actions抽出（HTMLレンダ生成に使用）
-    states, actions = _extract_pairs_from_trajectory(trajectory)
+    # ページキャッシュ（AGENT_WEBARENA_PAGE_CACHE=true のときのみ）: 変更系のタスクは評価キャッシュのヒット時もエポックを進める
+    from page_cache import PageCache
+    page_cache = PageCache.from_env()
+    if page_cache:
+        page_cache.begin_task(cfg)
+
     task_id = int(cfg.get('task_id', -1)) if isinstance(cfg.get('task_id', -1), int) else int(str(Path(config_file).stem))
     # ラン出力フォルダ（HTML等）: /home/ec2-user/webarena-local/evaluation-result/runs/task_<id>_<ts>/
     ts_from_traj = Path(trajectory_file).stem.replace('task_', '')
     # 例: task_4_2025-10-13T11-31-35 → 4_2025-10-13T11-31-35
     run_dir = Path('/home/ec2-user/webarena-local/evaluation-result/runs') / f"task_{ts_from_traj}"
 
+    # メモ化: 同一 trajectory + config + 評価器バージョン + 判定モデル + 判定に効く環境変数なら保存済み結果を返す
+    # （オフライン評価のみ。program_html / url_match はサイトの現在の状態に依存するため毎回評価する）
+    cache_parts = None
+    if eval_cache.cache_enabled() and only_string:
+        judge_model = os.environ.get('AGENT_BEDROCK_MODEL_ID', '').strip()
+        cache_parts = eval_cache.build_key(data, cfg, _evaluator_version(), judge_model, env=_scoring_env())
+        cached = None if force else eval_cache.lookup(cache_parts['key'])
+        if cached:
+            score = float(cached.get('score', 0.0))
+            print(f"[情報] 評価キャッシュにヒット: {cache_parts['key'][:16]}（--force で再評価）")
+            print(f"[結果] スコア: {score}")
+            _write_result_file(result_file, _cached_result_payload(cached, cache_parts['key'], trajectory_file, config_file))
+            for name, path in (cached.get('artifacts') or {}).items():
+                print(f"[情報] キャッシュ元の {name}: {path}")
+            # ヒットしたランもサマリーを読む集計（latency_report / compare_sweeps / work_queue）に残す
+            summary_file = _save_cached_summary(
+                Path('/home/ec2-user/webarena-local/evaluation-result') / f'task_{task_id}', cached, cache_parts['key'],
+                task_id=task_id, cfg=cfg, execution_time=time.time() - t0,
+                trajectory_file=trajectory_file, result_file=result_file)
+            print(f"[情報] サマリー保存（キャッシュヒット）: {summary_file}")
+            _pack_run_artifacts(summary_file, run_dir)
+            if score < score_threshold:
+                print(f"[情報] スコア {score} は閾値 {score_threshold} 未満ですが、評価プロセスは正常終了します")
+            sys.exit(0)
+
+    # 共通: states/actions抽出（HTMLレンダ生成に使用）
+    states, actions = incremental.pairs() if incremental else _extract_pairs_from_trajectory(trajectory)
+    _TIMEOUT_CONTEXT.update(
+        cfg=cfg, task_id=task_id, run_dir=run_dir, t0=t0, result_file=result_file, trajectory_file=trajectory_file,
+        config_file=config_file, final_url=final_url, states=states, actions=actions, incremental=incremental,
+    )
+
     if only_string:
         # オフライン採点
         # 環境変数からモデルIDとリージョンを取得（fuzzy_match/ua_match用）
@@ -919,7 +1572,10 @@ def main():
         print(f"[評価設定] モデルID: {model_id or 'なし (fuzzy_match不可)'}")
         print(f"[評価設定] リージョン: {region}")
         
+        _DEADLINE.start_phase('judge', then=('report',))
         score, eval_details = _eval_string_offline(trajectory, cfg, model_id=model_id, region=region)
+        _TIMEOUT_CONTEXT['graded'] = {'score': score, 'eval_details': eval_details, 'final_url': final_url}
+        _DEADLINE.start_phase('report')
         
         print(f"\n[評価詳細]")
         print(f"  - 最終スコア: {score}")
@@ -933,7 +1589,7 @@ def main():
                 print(f"      LLM判定: {reasoning_preview}...")
         
         # HTMLレンダ（画像なし）
-        render_html = _build_render_html(task_id, states, actions)
+        render_html = incremental.render_html(task_id) if incremental else _build_render_html(task_id, states, actions)
         run_dir.mkdir(parents=True, exist_ok=True)
         render_path = run_dir / f'render_{task_id}.html'
         with open(render_path, 'w') as f:
@@ -946,20 +1602,23 @@ def main():
             from scripts.html2json import main as html2json_main
             cfg_list_path = _wrap_config_for_html2json(config_file, run_dir / 'config_for_html2json.json')
             html2json_main(str(run_dir), str(cfg_list_path))
+        except eval_deadline.DeadlineExceeded:
+            # スコアは確定済みのため、json_dump を諦めて結果とサマリーの出力を続ける
+            print("[警告] html2json 変換が締め切りまでに終わらなかったため打ち切りました")
         except Exception as e:
             print(f"[警告] html2json 変換に失敗: {e}")
 
         # 最終サマリー出力
-        Path(result_file).parent.mkdir(parents=True, exist_ok=True)
-        with open(result_file, 'w') as f:
-            json.dump({
-                'score': score,
-                'trajectory_file': trajectory_file,
-                'config_file': config_file,
-                'final_url': final_url,
-                'eval_details': eval_details
-            }, f, indent=2)
-        print(f"[評価] 結果保存: {result_file}")
+        result_payload = {
+            'score': score,
+            'trajectory_file': trajectory_file,
+            'config_file': config_file,
+            'final_url': final_url,
+            'eval_details': eval_details
+        }
+        if _DEADLINE.enabled:
+            result_payload['deadline'] = _DEADLINE.summary()
+        _write_result_file(result_file, result_payload)
 
         # リーダーボード風サマリー
         question = str(cfg.get('intent') or '')
@@ -985,12 +1644,15 @@ def main():
             last_stop_answer = str(actions[-1].get('answer') or '')
         elapsed = time.time() - t0
         # 追加の詳細（操作履歴/訪問URL）
-        action_history = _build_action_history(states, actions)
-        pages_visited = _collect_pages_visited(states, actions)
+        if incremental:
+            action_history, pages_visited = incremental.action_history(), incremental.pages_visited()
+        else:
+            action_history = _build_action_history(states, actions)
+            pages_visited = _collect_pages_visited(states, actions)
         json_dump_file = run_dir / 'json_dump.json'
         # evaluation-result にタスク別ディレクトリを作成し、日付付きJSONを保存
         eval_task_dir = Path('/home/ec2-user/webarena-local/evaluation-result') / f'task_{task_id}'
-        _save_leaderboard_style_summary(
+        summary_file = _save_leaderboard_style_summary(
             eval_task_dir,
             task_id=task_id,
             score=score,
@@ -1008,14 +1670,22 @@ def main():
             trajectory_file=trajectory_file,
             run_result_folder=str(run_dir),
             video_file=str(Path(trajectory_file).with_suffix('.webm')),
+            result_file=result_file,
         )
-        # サマリーに詳細を追記
+        # サマリーに詳細を追記（並行評価で別の実行のサマリーに書かないよう、このプロセスが書いたファイルに追記）
         try:
-            files = sorted(list(eval_task_dir.glob('*.json')))
+            files = [summary_file]
             if files:
                 p = json.load(open(files[-1], 'r'))
                 p['action_history'] = action_history
                 p['pages_visited'] = pages_visited
+                step_timing = _summarize_step_timing(action_history)
+                if step_timing:
+                    p['step_timing'] = step_timing
+                if _JUDGE_USAGE['calls']:
+                    p['judge_usage'] = _judge_usage_snapshot()
+                if judge_hedge.hedge_enabled() and _JUDGE_USAGE['calls']:
+                    p['judge_hedge'] = judge_hedge.stats()
                 # eval_method_detailsを追加
                 p['eval_method_details'] = eval_details
                 artifacts = p.get('artifacts', {})
@@ -1029,6 +1699,8 @@ def main():
                     json.dump(p, wf, indent=2, ensure_ascii=False)
         except Exception as e:
             print(f"[警告] サマリー追記中に例外: {e}")
+        _pack_run_artifacts(summary_file, run_dir)
+        _store_eval_cache(cache_parts, score=score, result=result_payload, summary_file=summary_file, render_path=render_path)
 
         # スコアに関わらず評価プロセスは成功とする（スコアはJSONで確認可能）
         if score < score_threshold:
@@ -1045,203 +1717,279 @@ def main():
     if not use_fallback:
         from evaluation_harness.evaluators import evaluator_router
 
+    # レプリカプール（AGENT_WEBARENA_REPLICAS 指定時のみ）: URL 指定の program_html 項目を複数インスタンスへ振り分け
+    from replica_pool import ReplicaPool, ReplicaPages
+    replica_pool = ReplicaPool.from_env()
+    if replica_pool:
+        print(f"[情報] レプリカプール: {', '.join(r.name for r in replica_pool.replicas)}")
+
+    # SQL 検証（AGENT_WEBARENA_SQL_DSN 指定時のみ）: マッピング済みの program_html 項目をページを開かずに DB で評価
+    sql_verifier = None
+    if has_program_html:
+        from sql_verify import SqlVerifier
+        sql_verifier = SqlVerifier.from_env()
+        if sql_verifier:
+            print(f"[情報] SQL 検証: mode={sql_verifier.mode} 規則 {len(sql_verifier.rules)}件")
+
+    # HTTP高速経路（AGENT_WEBARENA_HTTP_FASTPATH=true のときのみ）: 単純な locator をブラウザを使わずに評価
+    http_fastpath = None
+    if has_program_html and str(os.environ.get('AGENT_WEBARENA_HTTP_FASTPATH', '')).strip().lower() == 'true':
+        _ensure_bs4_installed()
+        from http_fastpath import HttpFastPath
+        http_fastpath = HttpFastPath.from_env(_resolve_storage_state(cfg))
+        if http_fastpath:
+            print("[情報] HTTP高速経路: 有効")
+
+    _DEADLINE.start_phase('browser', then=('report',))
     with sync_playwright() as p:
         cdp_failed = False
         fallback_page = None
         fallback_browser = None
-        
+        browser = None
+        replica_pages = None
+        fallback_context = None
         try:
-            browser = p.chromium.connect_over_cdp(cdp_endpoint)
-            contexts = browser.contexts
-            if not contexts:
-                print("[エラー] ブラウザコンテキストが見つかりません")
-                sys.exit(1)
+            try:
+                browser = p.chromium.connect_over_cdp(cdp_endpoint, timeout=_DEADLINE.timeout_ms(30000))
+                contexts = browser.contexts
+                if not contexts:
+                    print("[エラー] ブラウザコンテキストが見つかりません")
+                    sys.exit(1)
 
-            context = contexts[0]
-            pages = context.pages
-            if not pages:
-                print("[エラー] ページが見つかりません")
-                sys.exit(1)
+                context = contexts[0]
+                pages = context.pages
+                if not pages:
+                    print("[エラー] ページが見つかりません")
+                    sys.exit(1)
 
-            page = pages[0]
+                page = pages[0]
 
-            # CDPセッション作成
-            client = page.context.new_cdp_session(page)
+                # CDPセッション作成
+                client = page.context.new_cdp_session(page)
 
-            print(f"[評価] ブラウザ再接続成功: {page.url}")
+                print(f"[評価] ブラウザ再接続成功: {page.url}")
         
-        except Exception as cdp_error:
-            # CDP接続失敗時の処理
-            print(f"[警告] CDP接続失敗: {cdp_error}")
+            except Exception as cdp_error:
+                # CDP接続失敗時の処理
+                print(f"[警告] CDP接続失敗: {cdp_error}")
             
-            # program_html評価が含まれる場合はフォールバックモードで続行
-            if 'program_html' in eval_types:
-                print("[情報] program_html評価のためフォールバックモードで続行します")
-                cdp_failed = True
+                # program_html評価が含まれる場合はフォールバックモードで続行
+                if 'program_html' in eval_types:
+                    print("[情報] program_html評価のためフォールバックモードで続行します")
+                    cdp_failed = True
                 
-                # storage_stateファイルの取得
-                storage_state_path = cfg.get('storage_state', './.auth/shopping_admin_state.json')
-                # ./ で始まる場合は削除して、ベースディレクトリと結合
-                if storage_state_path.startswith('./'):
-                    storage_state_path = storage_state_path[2:]
-                storage_state_abs = Path('/home/ec2-user/webarena-local') / storage_state_path
+                    # storage_stateファイルの取得
+                    storage_state_abs = _resolve_storage_state(cfg)
                 
-                if storage_state_abs.exists():
-                    print(f"[情報] 認証情報を使用: {storage_state_abs}")
-                    fallback_browser = p.chromium.launch(headless=True)
-                    fallback_context = fallback_browser.new_context(storage_state=str(storage_state_abs))
-                    fallback_page = fallback_context.new_page()
-                else:
-                    print(f"[警告] storage_stateが見つかりません: {storage_state_abs}")
-                    fallback_browser = p.chromium.launch(headless=True)
-                    fallback_context = fallback_browser.new_context()
-                    fallback_page = fallback_context.new_page()
+                    if storage_state_abs.exists():
+                        print(f"[情報] 認証情報を使用: {storage_state_abs}")
+                        fallback_browser = p.chromium.launch(headless=True, timeout=_DEADLINE.timeout_ms(30000))
+                        fallback_context = fallback_browser.new_context(storage_state=str(storage_state_abs))
+                        fallback_page = fallback_context.new_page()
+                    else:
+                        print(f"[警告] storage_stateが見つかりません: {storage_state_abs}")
+                        fallback_browser = p.chromium.launch(headless=True, timeout=_DEADLINE.timeout_ms(30000))
+                        fallback_context = fallback_browser.new_context()
+                        fallback_page = fallback_context.new_page()
                 
-                page = fallback_page
-                client = None
-            else:
-                # それ以外はエラー終了
-                print("[エラー] CDP接続が必要な評価タイプです")
-                raise
+                    page = fallback_page
+                    client = None
+                else:
+                    # それ以外はエラー終了
+                    print("[エラー] CDP接続が必要な評価タイプです")
+                    raise
         
-        try:
-            # フォールバックモードの場合は program_html / url_match を実行
-            if cdp_failed or use_fallback:
-                if has_program_html:
-                    print("[情報] フォールバックモード: program_html評価を実行中...")
-                    score = _evaluate_program_html_fallback(cfg, page)
-                    print(f"[評価] program_html評価完了: スコア={score}")
-                elif has_url_match:
-                    print("[情報] フォールバックモード: url_match評価を実行中...")
-                    # current_url は page.url（CDP再接続時）/ fallback時も同様
-                    cur_url = ''
-                    try:
-                        cur_url = str(page.url)
-                    except Exception:
-                        pass
-                    score = _evaluate_url_match_fallback(cfg, current_url=cur_url, final_url=final_url)
-                    print(f"[評価] url_match評価完了: スコア={score}")
-            else:
-                # 通常のCDP経由評価
-                evaluator = evaluator_router(config_file)
-                score = evaluator(
-                    trajectory=trajectory,
-                    config_file=config_file,
-                    page=page,
-                    client=client
-                )
-
-            print(f"\n{'='*60}")
-            print(f"[結果] スコア: {score}")
-            print(f"{'='*60}\n")
-
-            # HTMLレンダ生成
-            states, actions = _extract_pairs_from_trajectory(trajectory)
-            # 画像は使用しない
-            render_html = _build_render_html(task_id, states, actions)
-            run_dir.mkdir(parents=True, exist_ok=True)
-            render_path = run_dir / f'render_{task_id}.html'
-            with open(render_path, 'w') as f:
-                f.write(render_html)
-            _write_merged_log(run_dir, config_file, score)
-
-            # html2json を呼び出し
             try:
-                _ensure_bs4_installed()
-                from scripts.html2json import main as html2json_main
-                cfg_list_path = _wrap_config_for_html2json(config_file, run_dir / 'config_for_html2json.json')
-                html2json_main(str(run_dir), str(cfg_list_path))
-            except Exception as e:
-                print(f"[警告] html2json 変換に失敗: {e}")
+                # フォールバックモードの場合は program_html / url_match を実行
+                if cdp_failed or use_fallback:
+                    if has_program_html:
+                        print("[情報] フォールバックモード: program_html評価を実行中...")
+                        check_browser = fallback_browser or browser
+                        if replica_pool and check_browser:
+                            replica_pages = ReplicaPages(replica_pool, check_browser)
+                        try:
+                            score = _evaluate_program_html_fallback(cfg, page, replica_pages, sql_verifier, http_fastpath, page_cache)
+                        finally:
+                            if replica_pages:
+                                replica_pages.close()
+                            if sql_verifier:
+                                sql_verifier.close()
+                            if http_fastpath:
+                                http_fastpath.close()
+                        print(f"[評価] program_html評価完了: スコア={score}")
+                        if sql_verifier:
+                            sv = sql_verifier.summary()
+                            print(f"[情報] SQL 検証: 解決 {sv['answered']}件 / ページ評価 {sv['fallbacks']}件 / 問い合わせ {sv['query_ms']:.1f}ms")
+                            if sql_verifier.consistency:
+                                print(f"[結果] SQL/ページ整合性: 比較 {sv['compared']}件 / 不一致 {len(sv['mismatches'])}件")
+                        if http_fastpath:
+                            hf = http_fastpath.summary()
+                            print(f"[情報] HTTP高速経路: 評価 {hf['hits']}件 / ブラウザへ {sum(hf['fallbacks'].values())}件 / 取得 {hf['fetch_ms']:.0f}ms")
+                        if page_cache:
+                            pc = page_cache.summary()
+                            print(f"[情報] ページキャッシュ: ヒット {pc['hits']}件（DOM評価 {pc['dom_hits']}件）/ ミス {pc['misses']}件 / 保存 {pc['stored']}件")
+                    elif has_url_match:
+                        print("[情報] フォールバックモード: url_match評価を実行中...")
+                        # current_url は page.url（CDP再接続時）/ fallback時も同様
+                        cur_url = ''
+                        try:
+                            cur_url = str(page.url)
+                        except Exception:
+                            pass
+                        if replica_pool:
+                            # レプリカ上で操作した場合もconfigの正規ベースURLで比較する
+                            cur_url = replica_pool.canonicalize(cur_url)
+                            final_url_for_match = replica_pool.canonicalize(final_url)
+                        else:
+                            final_url_for_match = final_url
+                        score = _evaluate_url_match_fallback(cfg, current_url=cur_url, final_url=final_url_for_match)
+                        print(f"[評価] url_match評価完了: スコア={score}")
+                else:
+                    # 通常のCDP経由評価
+                    if _DEADLINE.enabled:
+                        page.set_default_timeout(_DEADLINE.timeout_ms(30000))
+                    evaluator = evaluator_router(config_file)
+                    score = evaluator(
+                        trajectory=trajectory,
+                        config_file=config_file,
+                        page=page,
+                        client=client
+                    )
 
-            # ミニ結果JSON（従来）
-            Path(result_file).parent.mkdir(parents=True, exist_ok=True)
-            with open(result_file, 'w') as f:
-                json.dump({
+                try:
+                    graded_url = str(page.url)
+                except Exception:
+                    graded_url = final_url
+                _TIMEOUT_CONTEXT['graded'] = {'score': score, 'eval_details': {}, 'final_url': graded_url}
+                _DEADLINE.start_phase('report')
+                print(f"\n{'='*60}")
+                print(f"[結果] スコア: {score}")
+                print(f"{'='*60}\n")
+
+                # HTMLレンダ生成
+                # 画像は使用しない
+                render_html = incremental.render_html(task_id) if incremental else _build_render_html(task_id, states, actions)
+                run_dir.mkdir(parents=True, exist_ok=True)
+                render_path = run_dir / f'render_{task_id}.html'
+                with open(render_path, 'w') as f:
+                    f.write(render_html)
+                _write_merged_log(run_dir, config_file, score)
+
+                # html2json を呼び出し
+                try:
+                    _ensure_bs4_installed()
+                    from scripts.html2json import main as html2json_main
+                    cfg_list_path = _wrap_config_for_html2json(config_file, run_dir / 'config_for_html2json.json')
+                    html2json_main(str(run_dir), str(cfg_list_path))
+                except eval_deadline.DeadlineExceeded:
+                    print("[警告] html2json 変換が締め切りまでに終わらなかったため打ち切りました")
+                except Exception as e:
+                    print(f"[警告] html2json 変換に失敗: {e}")
+
+                # ミニ結果JSON（従来）
+                result_payload = {
                     'score': score,
                     'trajectory_file': trajectory_file,
                     'config_file': config_file,
                     'final_url': page.url
-                }, f, indent=2)
-            print(f"[評価] 結果保存: {result_file}")
-
-            # リーダーボード風サマリー
-            question = str(cfg.get('intent') or '')
-            ref_ans = str(((cfg.get('eval') or {}).get('reference_answer_raw_annotation')) or '')
-            must_include = list(((cfg.get('eval') or {}).get('reference_answers') or {}).get('must_include') or [])
-            last_stop_answer = ''
-            if actions:
-                last_stop_answer = str(actions[-1].get('answer') or '')
-            elapsed = time.time() - t0
-            action_history = _build_action_history(states, actions)
-            pages_visited = _collect_pages_visited(states, actions)
-            json_dump_file = run_dir / 'json_dump.json'
-            eval_task_dir = Path('/home/ec2-user/webarena-local/evaluation-result') / f'task_{task_id}'
-            _save_leaderboard_style_summary(
-                eval_task_dir,
-                task_id=task_id,
-                score=score,
-                success=float(score) == 1.0,
-                execution_time=elapsed,
-                question=question,
-                reference_answer=ref_ans,
-                pipeline_answer=last_stop_answer,
-                string_references=must_include,
-                targets=[last_stop_answer] if last_stop_answer else [],
-                eval_detail={},
-                error='',
-                timestamp_iso=time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
-                config_obj=cfg,
-                trajectory_file=trajectory_file,
-                run_result_folder=str(run_dir),
-                video_file=str(Path(trajectory_file).with_suffix('.webm')),
-            )
-            # サマリーに詳細を追記
-            try:
-                files = sorted(list(eval_task_dir.glob('*.json')))
-                if files:
-                    p = json.load(open(files[-1], 'r'))
-                    p['action_history'] = action_history
-                    p['pages_visited'] = pages_visited
-                    artifacts = p.get('artifacts', {})
-                    artifacts['html_render_file'] = str(render_path)
-                    artifacts['video_file'] = str(Path(trajectory_file).with_suffix('.webm'))
-                    if json_dump_file.exists():
-                        artifacts['json_dump_file'] = str(json_dump_file)
-                    artifacts['final_url'] = page.url
-                    p['artifacts'] = artifacts
-                    with open(files[-1], 'w') as wf:
-                        json.dump(p, wf, indent=2, ensure_ascii=False)
-            except Exception as e:
-                print(f"[警告] サマリー追記中に例外: {e}")
-            # スコアに関わらず評価プロセスは成功とする（スコアはJSONで確認可能）
-            if score < score_threshold:
-                print(f"[情報] スコア {score} は閾値 {score_threshold} 未満ですが、評価プロセスは正常終了します")
-            
-            # フォールバックブラウザのクリーンアップ
-            if fallback_browser:
+                }
+                if sql_verifier:
+                    result_payload['sql_verify'] = sql_verifier.summary()
+                if http_fastpath:
+                    result_payload['http_fastpath'] = http_fastpath.summary()
+                if page_cache and has_program_html:
+                    result_payload['page_cache'] = page_cache.summary()
+                if _DEADLINE.enabled:
+                    result_payload['deadline'] = _DEADLINE.summary()
+                _write_result_file(result_file, result_payload)
+
+                # リーダーボード風サマリー
+                question = str(cfg.get('intent') or '')
+                ref_ans = str(((cfg.get('eval') or {}).get('reference_answer_raw_annotation')) or '')
+                must_include = list(((cfg.get('eval') or {}).get('reference_answers') or {}).get('must_include') or [])
+                last_stop_answer = ''
+                if actions:
+                    last_stop_answer = str(actions[-1].get('answer') or '')
+                elapsed = time.time() - t0
+                if incremental:
+                    action_history, pages_visited = incremental.action_history(), incremental.pages_visited()
+                else:
+                    action_history = _build_action_history(states, actions)
+                    pages_visited = _collect_pages_visited(states, actions)
+                json_dump_file = run_dir / 'json_dump.json'
+                eval_task_dir = Path('/home/ec2-user/webarena-local/evaluation-result') / f'task_{task_id}'
+                summary_file = _save_leaderboard_style_summary(
+                    eval_task_dir,
+                    task_id=task_id,
+                    score=score,
+                    success=float(score) == 1.0,
+                    execution_time=elapsed,
+                    question=question,
+                    reference_answer=ref_ans,
+                    pipeline_answer=last_stop_answer,
+                    string_references=must_include,
+                    targets=[last_stop_answer] if last_stop_answer else [],
+                    eval_detail={},
+                    error='',
+                    timestamp_iso=time.strftime('%Y-%m-%dT%H:%M:%S', time.localtime()),
+                    config_obj=cfg,
+                    trajectory_file=trajectory_file,
+                    run_result_folder=str(run_dir),
+                    video_file=str(Path(trajectory_file).with_suffix('.webm')),
+                    result_file=result_file,
+                )
+                # サマリーに詳細を追記（並行評価で別の実行のサマリーに書かないよう、このプロセスが書いたファイルに追記）
                 try:
-                    fallback_browser.close()
-                    print("[情報] フォールバックブラウザを閉じました")
+                    files = [summary_file]
+                    if files:
+                        p = json.load(open(files[-1], 'r'))
+                        p['action_history'] = action_history
+                        p['pages_visited'] = pages_visited
+                        step_timing = _summarize_step_timing(action_history)
+                        if step_timing:
+                            p['step_timing'] = step_timing
+                        if _JUDGE_USAGE['calls']:
+                            p['judge_usage'] = _judge_usage_snapshot()
+                        if judge_hedge.hedge_enabled() and _JUDGE_USAGE['calls']:
+                            p['judge_hedge'] = judge_hedge.stats()
+                        artifacts = p.get('artifacts', {})
+                        artifacts['html_render_file'] = str(render_path)
+                        artifacts['video_file'] = str(Path(trajectory_file).with_suffix('.webm'))
+                        if json_dump_file.exists():
+                            artifacts['json_dump_file'] = str(json_dump_file)
+                        artifacts['final_url'] = page.url
+                        p['artifacts'] = artifacts
+                        with open(files[-1], 'w') as wf:
+                            json.dump(p, wf, indent=2, ensure_ascii=False)
                 except Exception as e:
-                    print(f"[警告] フォールバックブラウザのクローズに失敗: {e}")
-            
-            sys.exit(0)
+                    print(f"[警告] サマリー追記中に例外: {e}")
+                _pack_run_artifacts(summary_file, run_dir)
+                _store_eval_cache(cache_parts, score=score, result=result_payload, summary_file=summary_file, render_path=render_path)
+                # スコアに関わらず評価プロセスは成功とする（スコアはJSONで確認可能）
+                if score < score_threshold:
+                    print(f"[情報] スコア {score} は閾値 {score_threshold} 未満ですが、評価プロセスは正常終了します")
 
-        except Exception as e:
-            # フォールバックブラウザのクリーンアップ（エラー時）
-            if fallback_browser:
-                try:
-                    fallback_browser.close()
-                except:
-                    pass
-            
-            print(f"[エラー] 評価中に例外が発生: {e}")
-            import traceback
-            traceback.print_exc()
-            sys.exit(1)
+                sys.exit(0)
+
+            except Exception as e:
+                print(f"[エラー] 評価中に例外が発生: {e}")
+                import traceback
+                traceback.print_exc()
+                sys.exit(1)
+        finally:
+            # 締め切りの SIGALRM は同期 Playwright 呼び出しの途中でも割り込むため、起動したブラウザは終了経路に関わらず閉じる
+            # （CDP 接続したエージェントのブラウザは閉じない。接続は sync_playwright の終了時に切断される）。
+            # クローズ中に report フェーズの期限が来ないよう、先にフェーズを終える
+            _DEADLINE.end_phase()
+            _close_fallback_browser(fallback_context, fallback_browser)
 
 
 if __name__ == '__main__':
-    main()
+    _args, _flags = _parse_cli_args()
+    if '--profile' in _flags and len(_args) >= 3:
+        # プロファイルモード: CPU（cProfile + スタックサンプリング）と tracemalloc のレポートを結果JSONの隣に出力
+        import eval_profile
+        eval_profile.run_profiled(main, _args[3] if len(_args) > 3 else _default_result_file(_args[0]))
+    else:
+        main()
 
@@ -0,0 +1,632 @@
+#!/usr/bin/env python3
+"""
+program_html の単純な locator を HTTP だけで評価する高速経路
+・対象の locator 形: document.querySelector('<sel>').value / outerText / innerText / textContent / selectedIndex と、
+  それらの '+' 連結（(document.querySelector(...)?.outerText || '') 形式を含む）
+・空 locator（body のテキスト）はページ全体の可視性に依存するため、常にブラウザ経路で評価する
+・innerText / outerText は、要素・祖先・子孫の可視性が静的 HTML から決まらない場合（祖先が非表示、
+  クラスで非表示になりうる要素を含む）はブラウザ経路にフォールバック。クラスは既知の非表示用クラスと、
+  ページ内 <style> で display:none / visibility:hidden を指定されたクラスで判定する
+・storage_state の Cookie を使う keep-alive の HTTP セッションでページを取得し、BeautifulSoup（lxml があれば lxml）で
+  ブラウザと同じ文字列を組み立てる。同一URLの複数項目は1回の取得を共有
+・以下はブラウザ経路にフォールバック（None を返す）:
+  未対応の locator / 要素が静的 HTML に無い（JS 描画）/ 非200 応答 / ログイン画面へのリダイレクト / 取得失敗
+・conformance サブコマンドで configs/ の URL 指定項目をブラウザ経路と突き合わせ、不一致があれば終了コード 1
+  （url='last' の項目はエージェント操作後のページに依存するため、評価時も高速経路の対象外）
+  --record <dir> で取得した HTML とブラウザ経路の値をフィクスチャとして保存し、
+  --fixtures <dir> でブラウザなしに再照合できる（tests/fixtures/http_fastpath はこの形式）
+
+環境変数:
+  AGENT_WEBARENA_HTTP_FASTPATH          true で evaluate.py の program_html 評価に使用（既定 false）
+  AGENT_WEBARENA_HTTP_FASTPATH_TIMEOUT  HTTP タイムアウト秒（既定 15）
+
+使い方:
+  python scripts/http_fastpath.py parse                       # configs/ の locator のうち高速経路の対象になる数
+  python scripts/http_fastpath.py fetch <url> "<locator>" --storage-state /home/ec2-user/webarena-local/.auth/shopping_admin_state.json
+  python scripts/http_fastpath.py conformance --storage-state /home/ec2-user/webarena-local/.auth/shopping_admin_state.json --record resources/bench/fastpath_fixtures
+  python scripts/http_fastpath.py conformance --fixtures tests/fixtures/http_fastpath
+"""
+import argparse
+import gzip
+import http.client
+import json
+import os
+import re
+import sys
+import time
+import zlib
+from collections import Counter
+from pathlib import Path
+from typing import Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import urljoin, urlparse
+
+from bs4 import BeautifulSoup, NavigableString, Tag
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_CONFIGS_DIR = SCRIPT_DIR.parent / 'configs'
+PROPS = ('value', 'outerText', 'innerText', 'textContent', 'selectedIndex')
+MAX_REDIRECTS = 5
+
+_QS = r"document\.querySelector\(\s*(?P<q>['\"])(?P<sel>(?:(?!(?P=q)).)*)(?P=q)\s*\)"
+_READ = re.compile(_QS + r"\s*(?P<opt>\?)?\.(?P<prop>" + '|'.join(PROPS) + r")\b")
+_WRAPPED_READ = re.compile(r"\(\s*" + _READ.pattern + r"\s*\|\|\s*(?P<e>['\"])(?P=e)\s*\)")
+
+try:
+    import lxml  # noqa: F401
+    _PARSER = 'lxml'
+except ImportError:
+    _PARSER = 'html.parser'
+
+# innerText で前後に改行が入る要素（CSS の display:block 相当の既定値）
+_BLOCK_TAGS = {
+    'address', 'article', 'aside', 'blockquote', 'dd', 'details', 'dialog', 'div', 'dl', 'dt', 'fieldset',
+    'figcaption', 'figure', 'footer', 'form', 'h1', 'h2', 'h3', 'h4', 'h5', 'h6', 'header', 'hr', 'li',
+    'main', 'nav', 'ol', 'p', 'pre', 'section', 'summary', 'table', 'tbody', 'thead', 'tfoot', 'tr', 'ul',
+    'legend', 'caption', 'option', 'optgroup',
+}
+_SKIP_TAGS = {'script', 'style', 'noscript', 'template', 'head', 'title', 'meta', 'link'}
+# 外部 CSS で display:none になる（Magento / 一般的な）非表示用クラス
+_HIDDEN_CLASSES = {'hidden', '_hidden', 'no-display', 'hide', 'd-none', 'invisible'}
+_STYLE_HIDDEN_RULE = re.compile(r'([^{}]+)\{[^{}]*(?:display\s*:\s*none|visibility\s*:\s*hidden)[^{}]*\}', re.I)
+_CLASS_SELECTOR = re.compile(r'\.(-?[_a-zA-Z][\w-]*)')
+# 可視性に依存するプロパティ（描画されない部分を含まない）
+_RENDERED_PROPS = ('innerText', 'outerText')
+_CELL_TAGS = {'td', 'th'}
+
+
+class Read(NamedTuple):
+    selector: str
+    prop: str
+    optional: bool
+
+
+def parse_locator(locator: str) -> Optional[List[Read]]:
+    """対応する形なら Read の列を返す（空 locator は空リスト = body のテキスト）。未対応なら None"""
+    s = (locator or '').strip().rstrip(';').strip()
+    if not s:
+        return []
+    reads: List[Read] = []
+    pos = 0
+    while True:
+        while pos < len(s) and s[pos].isspace():
+            pos += 1
+        m = _WRAPPED_READ.match(s, pos)
+        optional = bool(m)
+        if not m:
+            m = _READ.match(s, pos)
+            if not m:
+                return None
+            optional = bool(m.group('opt'))
+        reads.append(Read(_normalize_selector(m.group('sel')), m.group('prop'), optional))
+        pos = m.end()
+        while pos < len(s) and s[pos].isspace():
+            pos += 1
+        if pos == len(s):
+            return reads
+        if s[pos] != '+':
+            return None
+        pos += 1
+
+
+def _normalize_selector(sel: str) -> str:
+    """閉じ忘れた [ / ( を補う（ブラウザは末尾で自動的に閉じる: '[name="product[price]"' も有効）"""
+    stack: List[str] = []
+    quote = ''
+    for ch in sel:
+        if quote:
+            if ch == quote:
+                quote = ''
+        elif ch in ('"', "'"):
+            quote = ch
+        elif ch in '[(':
+            stack.append(']' if ch == '[' else ')')
+        elif ch in '])' and stack and stack[-1] == ch:
+            stack.pop()
+    return sel + quote + ''.join(reversed(stack))
+
+
+def _is_hidden(el: Tag) -> bool:
+    if el.has_attr('hidden'):
+        return True
+    style = str(el.get('style') or '').replace(' ', '').lower()
+    return 'display:none' in style
+
+
+def hidden_classes(soup: BeautifulSoup) -> set:
+    """非表示になりうるクラス（既知の非表示用クラス + ページ内 <style> で非表示にされるクラス）"""
+    out = set(_HIDDEN_CLASSES)
+    for style in soup.find_all('style'):
+        for m in _STYLE_HIDDEN_RULE.finditer(style.get_text()):
+            out.update(_CLASS_SELECTOR.findall(m.group(1)))
+    return out
+
+
+def _visibility_known(el: Tag, hidden: set) -> bool:
+    """innerText が静的 HTML から決まるか（祖先が非表示でなく、要素・子孫に非表示になりうるクラスが無い）"""
+    for node in [el] + list(el.parents):
+        if isinstance(node, Tag) and node is not el and _is_hidden(node):
+            return False
+        if isinstance(node, Tag) and hidden.intersection(node.get('class') or []):
+            return False
+    return not any(hidden.intersection(d.get('class') or []) for d in el.find_all(True))
+
+
+def _collapse(text: str) -> str:
+    return re.sub(r'[ \t\r\n\f]+', ' ', text)
+
+
+def inner_text(el: Tag) -> str:
+    """HTMLElement.innerText の近似（script/style/hidden を除き、ブロック要素・p・br・セルで区切る）"""
+    # 文字列と「必要な改行数」（int）を並べ、連続する改行要求は最大値に畳む（innerText のアルゴリズムと同じ）
+    parts: List[object] = []
+
+    def walk(node) -> None:
+        if isinstance(node, NavigableString):
+            if type(node) is NavigableString:
+                parts.append(_collapse(str(node)))
+            return
+        if not isinstance(node, Tag):
+            return
+        name = node.name.lower()
+        if name in _SKIP_TAGS or _is_hidden(node):
+            return
+        if name == 'br':
+            parts.append('\n')
+            return
+        breaks = 2 if name == 'p' else (1 if name in _BLOCK_TAGS else 0)
+        if breaks:
+            parts.append(breaks)
+        for child in node.children:
+            walk(child)
+        if name in _CELL_TAGS:
+            parts.append('\t')
+        if breaks:
+            parts.append(breaks)
+
+    for child in el.children:
+        walk(child)
+
+    out: List[str] = []
+    pending = 0
+    for part in parts:
+        if isinstance(part, int):
+            pending = max(pending, part)
+            continue
+        if not part.strip() and part != '\n' and (pending or not out):
+            # ブロック境界の空白だけのテキストノードは描画されない
+            continue
+        if out and pending:
+            out.append('\n' * pending)
+        pending = 0
+        out.append(part)
+    lines = [re.sub(r' {2,}', ' ', ln).strip(' ').rstrip('\t') for ln in ''.join(out).split('\n')]
+    return '\n'.join(lines).strip('\n')
+
+
+def _options(el: Tag) -> List[Tag]:
+    return el.find_all('option')
+
+
+def _select_value(el: Tag) -> str:
+    opts = _options(el)
+    chosen = next((o for o in opts if o.has_attr('selected')), None)
+    if chosen is None and opts and not el.has_attr('multiple'):
+        chosen = opts[0]
+    if chosen is None:
+        return ''
+    return str(chosen['value']) if chosen.has_attr('value') else _collapse(chosen.get_text()).strip()
+
+
+def read_prop(el: Tag, prop: str) -> Optional[str]:
+    """要素のプロパティをブラウザと同じ文字列で返す（静的 HTML から決まらない場合は None）"""
+    name = el.name.lower()
+    if prop == 'value':
+        if name == 'select':
+            return _select_value(el)
+        if name == 'textarea':
+            return el.get_text()
+        if name in ('input', 'button', 'option', 'data'):
+            if name == 'input' and str(el.get('type') or '').lower() in ('checkbox', 'radio') and not el.has_attr('value'):
+                return 'on'
+            if name == 'option' and not el.has_attr('value'):
+                return _collapse(el.get_text()).strip()
+            return str(el.get('value') or '')
+        # div 等の .value は undefined（ブラウザ経路では str(None) → ''）。静的判定を避けてブラウザに任せる
+        return None
+    if prop == 'selectedIndex':
+        if name != 'select':
+            return None
+        opts = _options(el)
+        for i, o in enumerate(opts):
+            if o.has_attr('selected'):
+                return str(i)
+        return '0' if opts and not el.has_attr('multiple') else '-1'
+    if prop == 'textContent':
+        return el.get_text()
+    return inner_text(el)
+
+
+def evaluate_reads(soup: BeautifulSoup, reads: List[Read]) -> Optional[str]:
+    if not reads:
+        # body のテキストは外部 CSS による非表示を反映できないため、ブラウザに任せる
+        return None
+    hidden: Optional[set] = None
+    out: List[str] = []
+    for r in reads:
+        try:
+            el = soup.select_one(r.selector)
+        except Exception:
+            return None
+        if el is None:
+            # 静的 HTML に無い要素は JS 描画の可能性があるため、optional でもブラウザに任せる
+            return None
+        if r.prop in _RENDERED_PROPS:
+            hidden = hidden_classes(soup) if hidden is None else hidden
+            if not _visibility_known(el, hidden):
+                return None
+        value = read_prop(el, r.prop)
+        if value is None:
+            return None
+        out.append(value)
+    return ''.join(out)
+
+
+def read_html(html_text: str, locator: str) -> Optional[str]:
+    """HTML 文字列に対して locator を評価（未対応の locator・要素なしは None）"""
+    reads = parse_locator(locator)
+    if reads is None:
+        return None
+    return evaluate_reads(BeautifulSoup(html_text, _PARSER), reads)
+
+
+def _is_login_page(html_text: str) -> bool:
+    return 'id="login-form"' in html_text and 'name="login[username]"' in html_text
+
+
+class HttpSession:
+    """storage_state の Cookie を送る keep-alive の HTTP セッション（ホストごとに接続を1本保持）"""
+
+    def __init__(self, storage_state: Optional[Path] = None, timeout: float = 15.0):
+        self.timeout = timeout
+        self._conns: Dict[Tuple[str, str, int], http.client.HTTPConnection] = {}
+        self._cookies: List[dict] = []
+        if storage_state and Path(storage_state).exists():
+            with open(storage_state, 'r') as f:
+                self._cookies = list((json.load(f) or {}).get('cookies') or [])
+
+    def _cookie_header(self, host: str, path: str) -> str:
+        pairs: Dict[str, str] = {}
+        for c in self._cookies:
+            domain = str(c.get('domain') or '').lstrip('.')
+            if domain and host != domain and not host.endswith('.' + domain):
+                continue
+            if not path.startswith(str(c.get('path') or '/')):
+                continue
+            pairs[str(c['name'])] = str(c.get('value') or '')
+        return '; '.join(f'{k}={v}' for k, v in pairs.items())
+
+    def _remember(self, host: str, set_cookies: List[str]) -> None:
+        for raw in set_cookies:
+            name, _, rest = raw.partition('=')
+            value = rest.split(';', 1)[0]
+            self._cookies = [c for c in self._cookies if not (c.get('name') == name.strip() and str(c.get('domain') or '').lstrip('.') == host)]
+            self._cookies.append({'name': name.strip(), 'value': value, 'domain': host, 'path': '/'})
+
+    def _conn(self, scheme: str, host: str, port: int) -> http.client.HTTPConnection:
+        key = (scheme, host, port)
+        conn = self._conns.get(key)
+        if conn is None:
+            cls = http.client.HTTPSConnection if scheme == 'https' else http.client.HTTPConnection
+            conn = cls(host, port, timeout=self.timeout)
+            self._conns[key] = conn
+        return conn
+
+    def _request_once(self, url: str) -> Tuple[int, Dict[str, str], bytes]:
+        u = urlparse(url)
+        scheme = u.scheme or 'http'
+        host = u.hostname or ''
+        port = u.port or (443 if scheme == 'https' else 80)
+        path = (u.path or '/') + (f'?{u.query}' if u.query else '')
+        headers = {'Accept': 'text/html,application/xhtml+xml', 'Accept-Encoding': 'gzip, deflate', 'Connection': 'keep-alive'}
+        cookie = self._cookie_header(host, u.path or '/')
+        if cookie:
+            headers['Cookie'] = cookie
+        for attempt in range(2):
+            conn = self._conn(scheme, host, port)
+            try:
+                conn.request('GET', path, headers=headers)
+                res = conn.getresponse()
+                body = res.read()
+                break
+            except (http.client.HTTPException, ConnectionError, OSError):
+                # keep-alive 切断は1回だけ張り直して再試行
+                conn.close()
+                self._conns.pop((scheme, host, port), None)
+                if attempt:
+                    raise
+        enc = str(res.getheader('Content-Encoding') or '').lower()
+        if enc == 'gzip':
+            body = gzip.decompress(body)
+        elif enc == 'deflate':
+            body = zlib.decompress(body)
+        hdrs = {k.lower(): v for k, v in res.getheaders()}
+        self._remember(host, res.msg.get_all('Set-Cookie') or [])
+        return res.status, hdrs, body
+
+    def get(self, url: str) -> Tuple[int, str, str]:
+        """(status, 最終URL, 本文) を返す（リダイレクトは追従）"""
+        for _ in range(MAX_REDIRECTS + 1):
+            status, hdrs, body = self._request_once(url)
+            if status in (301, 302, 303, 307, 308) and hdrs.get('location'):
+                url = urljoin(url, hdrs['location'])
+                continue
+            m = re.search(r'charset=([\w-]+)', hdrs.get('content-type', ''))
+            return status, url, body.decode(m.group(1) if m else 'utf-8', errors='replace')
+        return 599, url, ''
+
+    def close(self) -> None:
+        for conn in self._conns.values():
+            try:
+                conn.close()
+            except Exception:
+                pass
+        self._conns.clear()
+
+
+class HttpFastPath:
+    """program_html 項目を HTTP 取得 + HTML パースで評価する（対象外なら None を返しブラウザ経路へ）"""
+
+    def __init__(self, storage_state: Optional[Path] = None, timeout: float = 15.0):
+        self.session = HttpSession(storage_state, timeout)
+        self._docs: Dict[str, Optional[BeautifulSoup]] = {}
+        self.html: Dict[str, str] = {}  # 取得した HTML（conformance --record 用）
+        self.hits = 0
+        self.fallbacks: Counter = Counter()
+        self.fetch_ms = 0.0
+
+    @classmethod
+    def from_env(cls, storage_state: Optional[Path] = None) -> Optional['HttpFastPath']:
+        if str(os.environ.get('AGENT_WEBARENA_HTTP_FASTPATH', 'false')).strip().lower() != 'true':
+            return None
+        try:
+            timeout = float(os.environ.get('AGENT_WEBARENA_HTTP_FASTPATH_TIMEOUT', '15') or 15)
+        except ValueError:
+            timeout = 15.0
+        return cls(storage_state, timeout)
+
+    def _fallback(self, reason: str) -> None:
+        self.fallbacks[reason] += 1
+        print(f"[情報] HTTP高速経路の対象外（ブラウザで評価）: {reason}")
+
+    def _document(self, url: str) -> Optional[BeautifulSoup]:
+        if url in self._docs:
+            return self._docs[url]
+        doc = None
+        t0 = time.perf_counter()
+        try:
+            status, final_url, text = self.session.get(url)
+            if status != 200:
+                self._fallback(f'HTTP {status}')
+            elif _is_login_page(text):
+                self._fallback('ログイン画面')
+            else:
+                doc = BeautifulSoup(text, _PARSER)
+                self.html[url] = text
+        except Exception as e:
+            self._fallback(f'取得失敗: {e}')
+        self.fetch_ms += (time.perf_counter() - t0) * 1000.0
+        self._docs[url] = doc
+        return doc
+
+    def read(self, url: str, locator: str) -> Optional[str]:
+        reads = parse_locator(locator)
+        if reads is None:
+            self._fallback('未対応の locator')
+            return None
+        if not reads:
+            self._fallback('空 locator（ページ全体の可視性に依存）')
+            return None
+        doc = self._document(url)
+        if doc is None:
+            return None
+        value = evaluate_reads(doc, reads)
+        if value is None:
+            self._fallback('要素が静的HTMLに無い / 可視性が決まらない')
+            return None
+        self.hits += 1
+        print(f"[情報] HTTP高速経路: {url} → {value[:200]}")
+        return value
+
+    def summary(self) -> dict:
+        return {'hits': self.hits, 'fallbacks': dict(self.fallbacks), 'fetch_ms': round(self.fetch_ms, 1)}
+
+    def close(self) -> None:
+        self.session.close()
+        self._docs.clear()
+        self.html.clear()
+
+
+def _iter_url_items(configs_dir: Path):
+    for path in sorted(configs_dir.glob('*.json')):
+        with open(path, 'r') as f:
+            cfg = json.load(f)
+        for idx, item in enumerate((cfg.get('eval') or {}).get('program_html') or []):
+            yield path, cfg, idx, item
+
+
+def cmd_parse(args) -> None:
+    total = supported = 0
+    for path, _, idx, item in _iter_url_items(Path(args.configs_dir)):
+        total += 1
+        reads = parse_locator(str(item.get('locator') or ''))
+        supported += int(reads is not None)
+        if args.verbose:
+            shape = 'body' if reads == [] else (' + '.join(f"{r.selector}.{r.prop}" for r in reads) if reads else '未対応')
+            print(f"  {path.name}[{idx}] url={item.get('url')} {shape}")
+    print(f"[結果] program_html 項目 {total}件中 {supported}件の locator が高速経路の対象")
+
+
+def cmd_fetch(args) -> None:
+    fast = HttpFastPath(Path(args.storage_state) if args.storage_state else None)
+    value = fast.read(args.url, args.locator)
+    print(json.dumps({'value': value, **fast.summary()}, ensure_ascii=False, indent=2))
+    fast.close()
+
+
+def _ws(s: str) -> str:
+    return ' '.join(str(s).split())
+
+
+def compare(fast_value: Optional[str], browser_value: str, required: dict) -> dict:
+    """高速経路とブラウザ経路の値を照合（値の一致と、required_contents に対する合否の一致）"""
+    from evaluate import _clean_answer
+
+    def verdict(text: str) -> bool:
+        ok = True
+        if 'exact_match' in required:
+            ok = _clean_answer(text) == _clean_answer(str(required['exact_match']))
+        for must in required.get('must_include') or []:
+            ok = ok and _clean_answer(str(must)) in _clean_answer(text)
+        return ok
+
+    if fast_value is None:
+        return {'status': 'fallback'}
+    same_text = _ws(_clean_answer(fast_value)) == _ws(_clean_answer(browser_value))
+    same_verdict = verdict(fast_value) == verdict(browser_value)
+    row = {'status': 'agree' if same_text and same_verdict else 'disagree', 'exact': fast_value == browser_value}
+    if row['status'] == 'disagree':
+        row['fast_value'] = fast_value[:500]
+        row['browser_value'] = browser_value[:500]
+    return row
+
+
+def load_fixture_cases(fixtures_dir: Path) -> List[dict]:
+    """<dir>/cases.json: [{name, url, locator, html（<dir> からの相対パス）, browser_value, required_contents}]"""
+    with open(fixtures_dir / 'cases.json', 'r', encoding='utf-8') as f:
+        return list(json.load(f))
+
+
+def check_fixtures(fixtures_dir: Path) -> List[dict]:
+    """保存済みの HTML とブラウザ経路の値で、高速経路の値を照合する（ブラウザ不要）"""
+    rows: List[dict] = []
+    for case in load_fixture_cases(fixtures_dir):
+        html_text = (fixtures_dir / case['html']).read_text(encoding='utf-8')
+        t0 = time.perf_counter()
+        fast_value = read_html(html_text, str(case.get('locator') or ''))
+        row = {'config': case.get('name', case['html']), 'index': case.get('index', 0), 'url': case.get('url', ''),
+               'fast_ms': round((time.perf_counter() - t0) * 1000.0, 1), 'browser_ms': 0.0}
+        row.update(compare(fast_value, str(case.get('browser_value') or ''), case.get('required_contents') or {}))
+        rows.append(row)
+    return rows
+
+
+def _record_fixture(record_dir: Path, cases: List[dict], fast: 'HttpFastPath', row: dict, item: dict, browser_value: str) -> None:
+    html_text = fast.html.get(row['url'])
+    if html_text is None:
+        return
+    name = f"{Path(row['config']).stem}_{row['index']}"
+    (record_dir / f'{name}.html').write_text(html_text, encoding='utf-8')
+    cases.append({'name': name, 'index': row['index'], 'url': row['url'], 'locator': str(item.get('locator') or ''),
+                  'html': f'{name}.html', 'browser_value': browser_value,
+                  'required_contents': item.get('required_contents') or {}})
+
+
+def _live_rows(args, fast: 'HttpFastPath') -> List[dict]:
+    """URL 指定の program_html 項目を高速経路とブラウザ経路の両方で評価する"""
+    # evaluate.py と同じ URL 解決・ページ読み取りを使う
+    from evaluate import _read_program_html_page, _resolve_program_html_url
+    from playwright.sync_api import sync_playwright
+
+    storage_state = Path(args.storage_state) if args.storage_state else None
+    record_dir = Path(args.record) if args.record else None
+    cases: List[dict] = []
+    if record_dir:
+        record_dir.mkdir(parents=True, exist_ok=True)
+    rows: List[dict] = []
+    with sync_playwright() as p:
+        browser = p.chromium.launch(headless=True)
+        kwargs = {'storage_state': str(storage_state)} if storage_state and storage_state.exists() else {}
+        page = browser.new_context(**kwargs).new_page()
+        for path, cfg, idx, item in _iter_url_items(Path(args.configs_dir)):
+            url = str(item.get('url') or '')
+            if not url or url == 'last':
+                continue
+            target = _resolve_program_html_url(url, cfg)
+            locator = str(item.get('locator') or '')
+            t0 = time.perf_counter()
+            fast_value = fast.read(target, locator)
+            fast_ms = (time.perf_counter() - t0) * 1000.0
+            t0 = time.perf_counter()
+            browser_value = _read_program_html_page(item, cfg, page)
+            browser_ms = (time.perf_counter() - t0) * 1000.0
+            row = {'config': path.name, 'index': idx, 'url': target, 'fast_ms': round(fast_ms, 1), 'browser_ms': round(browser_ms, 1)}
+            row.update(compare(fast_value, browser_value, item.get('required_contents') or {}))
+            rows.append(row)
+            if record_dir:
+                _record_fixture(record_dir, cases, fast, row, item, browser_value)
+        browser.close()
+    if record_dir:
+        with open(record_dir / 'cases.json', 'w', encoding='utf-8') as f:
+            json.dump(cases, f, ensure_ascii=False, indent=2)
+        print(f"[情報] フィクスチャを保存: {record_dir}（{len(cases)}件）")
+    return rows
+
+
+def cmd_conformance(args) -> None:
+    """高速経路の値をブラウザ経路（ライブ、または --fixtures の保存済みの値）と突き合わせる"""
+    fast = HttpFastPath(Path(args.storage_state) if args.storage_state else None)
+    rows = check_fixtures(Path(args.fixtures)) if args.fixtures else _live_rows(args, fast)
+    fast.close()
+
+    counts = Counter(r['status'] for r in rows)
+    agreed = [r for r in rows if r['status'] == 'agree']
+    fast_total = sum(r['fast_ms'] for r in agreed)
+    browser_total = sum(r['browser_ms'] for r in agreed)
+    print(f"[結果] 一致 {counts['agree']}件 / 不一致 {counts['disagree']}件 / フォールバック {counts['fallback']}件（全 {len(rows)}件）")
+    if agreed and not args.fixtures:
+        print(f"[結果] 一致項目の所要時間: HTTP {fast_total:.0f}ms / ブラウザ {browser_total:.0f}ms")
+    for r in rows:
+        if r['status'] == 'disagree':
+            print(f"[失敗] {r['config']}[{r['index']}] {r['url']}")
+            print(f"  HTTP:     {_ws(r['fast_value'])[:200]}")
+            print(f"  ブラウザ: {_ws(r['browser_value'])[:200]}")
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump({'counts': dict(counts), 'fallbacks': dict(fast.fallbacks), 'items': rows}, f, ensure_ascii=False, indent=2)
+        print(f"[情報] 結果を保存: {out}")
+    sys.exit(1 if counts['disagree'] else 0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='program_html の単純な locator を HTTP + HTML パースで評価する高速経路')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    p_parse = sub.add_parser('parse', help='configs/ の locator のうち高速経路の対象になる数を集計')
+    p_parse.add_argument('--configs-dir', default=str(DEFAULT_CONFIGS_DIR))
+    p_parse.add_argument('-v', '--verbose', action='store_true')
+
+    p_fetch = sub.add_parser('fetch', help='1件の url + locator を高速経路で評価')
+    p_fetch.add_argument('url')
+    p_fetch.add_argument('locator', nargs='?', default='')
+    p_fetch.add_argument('--storage-state', default='')
+
+    p_conf = sub.add_parser('conformance', help='高速経路とブラウザ経路の結果を configs/ の全 URL 指定項目で突き合わせ')
+    p_conf.add_argument('--configs-dir', default=str(DEFAULT_CONFIGS_DIR))
+    p_conf.add_argument('--storage-state', default='/home/ec2-user/webarena-local/.auth/shopping_admin_state.json')
+    p_conf.add_argument('--output', default='', help='結果JSONの出力先')
+    p_conf.add_argument('--record', default='', help='取得した HTML とブラウザ経路の値をフィクスチャとして保存するディレクトリ')
+    p_conf.add_argument('--fixtures', default='', help='保存済みフィクスチャで照合（ブラウザ不要）')
+
+    args = ap.parse_args()
+    if args.cmd == 'parse':
+        cmd_parse(args)
+    elif args.cmd == 'fetch':
+        cmd_fetch(args)
+    else:
+        cmd_conformance(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,249 @@
+#!/usr/bin/env python3
+"""
+判定モデル（fuzzy_match / ua_match）呼び出しのヘッジ（リージョン間）
+・先頭リージョンへ送信し、過去の応答レイテンシの指定パーセンタイル以内に返らなければ、
+  同じリクエストを次のリージョンにも送る（以降も同じ間隔で残りのリージョンへ広げる）
+・最初に成功した応答を採用する。残りの実行中リクエストは打ち切れない（boto3 は送信済みの呼び出しを中断できない）ため
+  「放棄」として数え、完了し次第 on_response に渡して使用量を記録する（判定結果には使わない）
+・終了前に drain() で放棄したリクエストの完了を一定時間待ち、間に合わなかった件数を stats() の abandoned_pending に残す
+・エラー応答のリージョンは待たずに次のリージョンへ送る（スロットリング時の固定待機は行わない）
+・応答レイテンシは共有ファイル（fcntl.flock で排他）に直近分を保持し、並列に動く複数の evaluate.py 間で共有する
+・ヘッジ率とリージョン別の採用数を stats() で返す（evaluate.py がサマリーの judge_hedge に記録）
+
+環境変数:
+  AGENT_WEBARENA_JUDGE_HEDGE             true でヘッジを有効化（既定 false = 従来の順次フェイルオーバー）
+  AGENT_WEBARENA_JUDGE_HEDGE_PERCENTILE  ヘッジを送るまでの待ち時間に使うパーセンタイル（既定 95）
+  AGENT_WEBARENA_JUDGE_HEDGE_DELAY_MS    レイテンシ履歴が少ない間の待ち時間（既定 3000ms）
+  AGENT_WEBARENA_JUDGE_LATENCY_FILE      レイテンシ履歴ファイル（既定 /tmp/webarena-judge-latency.json）
+  AGENT_WEBARENA_JUDGE_HEDGE_DRAIN_S     drain() で放棄したリクエストの完了を待つ上限秒数（既定 15）
+
+使い方:
+  python scripts/judge_hedge.py status     # レイテンシ履歴のパーセンタイルと現在のヘッジ待ち時間を表示
+"""
+import argparse
+import fcntl
+import json
+import os
+import queue
+import threading
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Tuple
+
+DEFAULT_LATENCY_FILE = Path('/tmp/webarena-judge-latency.json')
+HISTORY_SIZE = 500  # 保持する直近のレイテンシ件数
+MIN_SAMPLES = 20  # これ未満はパーセンタイルを使わず既定の待ち時間
+MIN_DELAY_S = 0.2  # 待ち時間の下限（ほぼ常にヘッジしてしまうのを防ぐ）
+
+
+def hedge_enabled() -> bool:
+    return str(os.environ.get('AGENT_WEBARENA_JUDGE_HEDGE', 'false')).strip().lower() == 'true'
+
+
+def _env_float(name: str, default: float) -> float:
+    try:
+        return float(str(os.environ.get(name, '')).strip() or default)
+    except ValueError:
+        return default
+
+
+def _percentile(values: List[float], pct: float) -> float:
+    s = sorted(values)
+    if not s:
+        return 0.0
+    k = (len(s) - 1) * min(max(pct, 0.0), 100.0) / 100.0
+    lo = int(k)
+    hi = min(lo + 1, len(s) - 1)
+    return s[lo] + (s[hi] - s[lo]) * (k - lo)
+
+
+class LatencyHistory:
+    """判定モデル応答レイテンシ（秒）の共有履歴"""
+
+    def __init__(self, path: Optional[Path] = None):
+        env = str(os.environ.get('AGENT_WEBARENA_JUDGE_LATENCY_FILE', '')).strip()
+        self.path = Path(path or env or DEFAULT_LATENCY_FILE)
+        self.lock_path = self.path.with_suffix('.lock')
+
+    def load(self) -> List[float]:
+        try:
+            with open(self.path, 'r') as f:
+                return [float(v) for v in (json.load(f).get('latency_s') or [])]
+        except (FileNotFoundError, json.JSONDecodeError, ValueError, AttributeError):
+            return []
+
+    def add(self, latency_s: float) -> None:
+        try:
+            self.path.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.lock_path, 'a+') as lock:
+                fcntl.flock(lock, fcntl.LOCK_EX)
+                try:
+                    values = (self.load() + [float(latency_s)])[-HISTORY_SIZE:]
+                    tmp = self.path.with_suffix('.json.tmp')
+                    with open(tmp, 'w') as f:
+                        json.dump({'latency_s': values}, f)
+                    os.replace(tmp, self.path)
+                finally:
+                    fcntl.flock(lock, fcntl.LOCK_UN)
+        except OSError as e:
+            print(f"[警告] 判定レイテンシ履歴を更新できません: {e}")
+
+    def hedge_delay_s(self) -> float:
+        values = self.load()
+        if len(values) < MIN_SAMPLES:
+            return _env_float('AGENT_WEBARENA_JUDGE_HEDGE_DELAY_MS', 3000.0) / 1000.0
+        pct = _env_float('AGENT_WEBARENA_JUDGE_HEDGE_PERCENTILE', 95.0)
+        return max(MIN_DELAY_S, _percentile(values, pct))
+
+
+_STATS: Dict[str, Any] = {'requests': 0, 'hedged': 0, 'hedge_calls': 0, 'abandoned': 0, 'abandoned_completed': 0,
+                          'failed': 0, 'wins': {}}
+_LOCK = threading.Lock()
+_ABANDONED: List[threading.Thread] = []  # 採用されなかったが実行中のリクエスト
+
+
+def stats() -> Dict[str, Any]:
+    """
+    このプロセスでのヘッジ集計
+    requests / hedged / hedge_rate / hedge_calls / failed / wins に加え、
+    abandoned（採用後も実行中だった呼び出し）・abandoned_completed（そのうち完了して使用量を記録できた数）・
+    abandoned_pending（集計時点でまだ実行中の数）
+    """
+    with _LOCK:
+        out = dict(_STATS, wins=dict(_STATS['wins']))
+        out['abandoned_pending'] = sum(1 for t in _ABANDONED if t.is_alive())
+    out['hedge_rate'] = (out['hedged'] / out['requests']) if out['requests'] else 0.0
+    return out
+
+
+def drain_timeout_s() -> float:
+    return max(0.0, _env_float('AGENT_WEBARENA_JUDGE_HEDGE_DRAIN_S', 15.0))
+
+
+def drain(timeout_s: Optional[float] = None) -> int:
+    """放棄したリクエストの完了を最大 timeout_s 秒待つ（使用量の記録漏れを減らす）。まだ実行中の件数を返す"""
+    deadline = time.monotonic() + (drain_timeout_s() if timeout_s is None else max(0.0, timeout_s))
+    with _LOCK:
+        threads = list(_ABANDONED)
+    for t in threads:
+        t.join(max(0.0, deadline - time.monotonic()))
+    with _LOCK:
+        _ABANDONED[:] = [t for t in _ABANDONED if t.is_alive()]
+        return len(_ABANDONED)
+
+
+def hedged_call(regions: List[str], make_client: Callable[[str], Any], invoke: Callable[[Any], dict],
+                label: str = 'judge', history: Optional[LatencyHistory] = None,
+                on_response: Optional[Callable[[dict], None]] = None) -> Tuple[dict, str]:
+    """
+    regions 順にヘッジ付きで invoke(client) を実行し、(最初に成功した応答, そのリージョン) を返す
+    on_response は採用されたかに関わらず成功したすべての呼び出しの応答で呼ばれる（使用量の記録用）。
+    放棄した呼び出しは後から別スレッドで呼ぶため、on_response はスレッドセーフであること
+    全リージョンが失敗した場合は最後のエラーで RuntimeError
+    """
+    history = history or LatencyHistory()
+    delay_s = history.hedge_delay_s()
+    results: 'queue.Queue[Tuple[str, Optional[dict], Optional[str], float]]' = queue.Queue()
+    threads: Dict[str, threading.Thread] = {}
+    done: Dict[str, bool] = {}
+    settled = threading.Event()
+
+    def _worker(region: str) -> None:
+        t0 = time.perf_counter()
+        try:
+            response = invoke(make_client(region))
+        except Exception as e:
+            results.put((region, None, str(e) or type(e).__name__, time.perf_counter() - t0))
+            return
+        elapsed = time.perf_counter() - t0
+        # 採用されなかった呼び出しも課金されレイテンシ分布の一部なので、応答はすべて記録する
+        history.add(elapsed)
+        if on_response:
+            try:
+                on_response(response)
+            except Exception as e:
+                print(f"[警告] {label}: 応答の記録に失敗: {e}")
+        if settled.is_set():
+            with _LOCK:
+                _STATS['abandoned_completed'] += 1
+        results.put((region, response, None, elapsed))
+
+    def _launch(region: str) -> None:
+        done[region] = False
+        # 負けたリクエストの終了を待たずにプロセスを終えられるよう daemon スレッド
+        t = threading.Thread(target=_worker, args=(region,), daemon=True, name=f'{label}-{region}')
+        threads[region] = t
+        t.start()
+
+    with _LOCK:
+        _STATS['requests'] += 1
+    pending = list(regions)
+    _launch(pending.pop(0))
+    hedged = False
+    last_error: Optional[str] = None
+    next_hedge_at = time.monotonic() + delay_s
+    while True:
+        in_flight = [r for r, fin in done.items() if not fin]
+        if not in_flight and not pending:
+            with _LOCK:
+                _STATS['failed'] += 1
+            raise RuntimeError(last_error or 'unknown error')
+        if not in_flight:
+            # 実行中が無い（全てエラー）→ 待たずに次のリージョンへ
+            _launch(pending.pop(0))
+            next_hedge_at = time.monotonic() + delay_s
+            continue
+        timeout = max(0.0, next_hedge_at - time.monotonic()) if pending else None
+        try:
+            region, response, error, elapsed = results.get(timeout=timeout)
+        except queue.Empty:
+            region = pending.pop(0)
+            print(f"[情報] {label}: {delay_s * 1000:.0f}ms 応答なし。リージョン {region} にヘッジ送信します")
+            with _LOCK:
+                if not hedged:
+                    _STATS['hedged'] += 1
+                _STATS['hedge_calls'] += 1
+            hedged = True
+            _launch(region)
+            next_hedge_at = time.monotonic() + delay_s
+            continue
+        done[region] = True
+        if error is not None:
+            last_error = error
+            print(f"[情報] {label}: リージョン {region} でエラー: {error}")
+            continue
+        # 以降に完了した呼び出しは abandoned_completed として数える
+        settled.set()
+        while True:
+            # 採用と同時に終わっていた呼び出しは放棄扱いにしない
+            try:
+                done[results.get_nowait()[0]] = True
+            except queue.Empty:
+                break
+        with _LOCK:
+            _STATS['wins'][region] = _STATS['wins'].get(region, 0) + 1
+            for other, fin in done.items():
+                if not fin:
+                    _STATS['abandoned'] += 1
+                    _ABANDONED.append(threads[other])
+        if hedged:
+            print(f"[情報] {label}: リージョン {region} の応答を採用（{elapsed * 1000:.0f}ms）")
+        return response, region
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='判定モデル呼び出しのヘッジ状態確認')
+    ap.add_argument('cmd', choices=['status'])
+    ap.add_argument('--history', default='', help='レイテンシ履歴ファイル（既定: AGENT_WEBARENA_JUDGE_LATENCY_FILE）')
+    args = ap.parse_args()
+    history = LatencyHistory(Path(args.history) if args.history else None)
+    values = history.load()
+    print(f"[結果] 履歴: {history.path}（{len(values)} 件）")
+    if values:
+        for pct in (50, 90, 95, 99):
+            print(f"[結果] p{pct}: {_percentile(values, pct) * 1000:.0f}ms")
+    print(f"[結果] ヘッジ待ち時間: {history.hedge_delay_s() * 1000:.0f}ms（有効: {hedge_enabled()}）")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,541 @@
+#!/usr/bin/env python3
+"""
+キーワード転置インデックス（keywords.index）の生成・検索・ベンチマーク
+・snapshot_search の keywords（AND 部分一致・小文字比較）を、chunk_text の全件走査ではなく転置インデックスで絞り込む
+・英数字は単語（[a-z0-9_]+）、それ以外の文字（日本語など）は1文字 + 隣接2文字（bigram）を語として索引
+・ポスティングは FAISS ラベル（= mapping.json の序数）の差分 varint + 出現回数 varint。BM25 用に文書長も保持
+
+キーワードの照合（src/indexer/keyword-index.ts と同じ規則）:
+  キーワードを英数字の連続（片）と非英数字・非空白の連続（連）に分解し、片ごとの候補の積を取る
+  ・片: キーワード内で前後が区切られていれば単語の前方一致 / 後方一致 / 完全一致、区切られていなければ部分一致（語彙を走査）
+  ・連: 1文字ならその文字、2文字以上なら全 bigram の積
+  ・キーワードが1つの片のみ、または2文字以下の1つの連のみなら候補は厳密（本文での確認不要）。それ以外は本文で確認する
+
+ファイルレイアウト（リトルエンディアン）:
+  header (64B): magic 'WGKI' | version u32 | doc_count u64 | term_count u64 | ascii_terms u64
+                | dict_off u64 | heap_off u64 | doclen_off u64 | postings_off u64
+  dict (term_count × 24B, 語の UTF-8 バイト列の昇順。ASCII 語が先頭 ascii_terms 件):
+       term_off u32 | term_len u16 | reserved u16 | df u32 | postings_len u32 | postings_off u64
+  heap: 語の UTF-8 を '\\n' 区切りで連結（term_off は heap 先頭からの相対）
+  doclen (doc_count × u32): 文書長（語数）
+  postings: 語ごとに [ラベル差分 varint × df][出現回数 varint × df]（postings_off は postings 先頭からの相対）
+
+使い方:
+  python scripts/keyword_index.py build                                   # resources/index/keywords.index を生成
+  python scripts/keyword_index.py query 注文 pending                      # AND 絞り込みの件数と上位
+  python scripts/keyword_index.py bench --output resources/bench/keyword_index.json
+  python scripts/keyword_index.py bench --hybrid --embedder bedrock       # BM25 + ベクトルの recall 比較
+"""
+import argparse
+import json
+import mmap
+import os
+import random
+import re
+import struct
+import time
+from collections import Counter
+from pathlib import Path
+from typing import Callable, Dict, List, Optional, Sequence, Tuple
+
+import numpy as np
+
+MAGIC = b'WGKI'
+VERSION = 1
+HEADER = struct.Struct('<4sIQQQQQQQ')
+DICT = struct.Struct('<IHHIIQ')
+assert HEADER.size == 64 and DICT.size == 24
+
+BENCH_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX_DIR = BENCH_DIR / 'resources' / 'index'
+
+BM25_K1 = 1.2
+BM25_B = 0.75
+
+_WORD_RE = re.compile(r'[a-z0-9_]+')
+# キーワード分解: 英数字の片 / 非英数字・非空白の連（ASCII 記号は区切りとして扱う）
+_PIECE_RE = re.compile(r'[a-z0-9_]+|[^\x00-\x7f\s]+')
+_RUN_RE = re.compile(r'[^\x00-\x7f\s]+')
+
+
+# ===== 語の抽出 =====
+
+def doc_terms(text: str) -> Tuple[Counter, int]:
+    """本文 → (語の出現回数, 文書長)。英数字単語 + 非ASCII文字の unigram / bigram"""
+    lc = text.lower()
+    terms: Counter = Counter(_WORD_RE.findall(lc))
+    length = sum(terms.values())
+    for run in _RUN_RE.findall(lc):
+        terms.update(run)
+        length += len(run)
+        terms.update(run[i:i + 2] for i in range(len(run) - 1))
+    return terms, length
+
+
+def query_terms(text: str) -> List[str]:
+    """BM25 クエリの語（英数字単語 + 非ASCII連の bigram。1文字の連は unigram）"""
+    lc = text.lower()
+    out = _WORD_RE.findall(lc)
+    for run in _RUN_RE.findall(lc):
+        out.extend([run] if len(run) == 1 else [run[i:i + 2] for i in range(len(run) - 1)])
+    return out
+
+
+def _encode_varints(values: Sequence[int]) -> bytes:
+    out = bytearray()
+    for v in values:
+        v = int(v)
+        while v >= 0x80:
+            out.append((v & 0x7f) | 0x80)
+            v >>= 7
+        out.append(v)
+    return bytes(out)
+
+
+def _decode_varints(buf: bytes) -> np.ndarray:
+    """varint 列を一括デコード（numpy でベクトル化）"""
+    arr = np.frombuffer(buf, dtype=np.uint8)
+    if not arr.size:
+        return np.empty(0, dtype=np.int64)
+    ends = np.nonzero(arr < 0x80)[0]
+    starts = np.concatenate(([0], ends[:-1] + 1))
+    group = np.repeat(np.arange(ends.size), ends - starts + 1)
+    shift = np.arange(arr.size) - starts[group]
+    weights = (arr & 0x7f).astype(np.float64) * np.exp2(7 * shift)
+    return np.bincount(group, weights=weights, minlength=ends.size).astype(np.int64)
+
+
+# ===== 生成 =====
+
+def load_texts_by_label(index_dir: Path, vectors_name: str = 'vectors.faiss') -> List[str]:
+    """mapping.json の順序（= FAISSラベル）で chunk_text を並べる（欠損は空文字）"""
+    import pyarrow.parquet as pq  # type: ignore
+    with open(index_dir / f'{vectors_name}.mapping.json', 'r') as f:
+        chunk_ids: List[str] = list(json.load(f).get('chunkIds') or [])
+    table = pq.read_table(index_dir / 'chunks.parquet', columns=['chunk_id', 'chunk_text'])
+    text_of = {str(c): str(t or '') for c, t in zip(table.column('chunk_id').to_pylist(), table.column('chunk_text').to_pylist())}
+    return [text_of.get(str(cid), '') for cid in chunk_ids]
+
+
+def build_index(texts: Sequence[str], out_path: Path) -> Dict[str, object]:
+    postings: Dict[str, List[Tuple[int, int]]] = {}
+    doclens = np.zeros(len(texts), dtype=np.uint32)
+    for label, text in enumerate(texts):
+        terms, length = doc_terms(text)
+        doclens[label] = length
+        for term, tf in terms.items():
+            postings.setdefault(term, []).append((label, tf))
+
+    encoded = sorted(((t.encode('utf-8'), p) for t, p in postings.items()), key=lambda x: x[0])
+    term_count = len(encoded)
+    ascii_terms = sum(1 for t, _ in encoded if t.isascii())
+    dict_off = HEADER.size
+    heap_off = dict_off + term_count * DICT.size
+    heap = b'\n'.join(t for t, _ in encoded)
+    doclen_off = heap_off + len(heap)
+    postings_off = doclen_off + doclens.nbytes
+
+    entries = bytearray(term_count * DICT.size)
+    blobs: List[bytes] = []
+    term_pos = 0
+    post_pos = 0
+    for i, (term, plist) in enumerate(encoded):
+        labels = [l for l, _ in plist]
+        deltas = [labels[0]] + [labels[j] - labels[j - 1] for j in range(1, len(labels))]
+        blob = _encode_varints(deltas) + _encode_varints([min(tf, 0xffff) for _, tf in plist])
+        DICT.pack_into(entries, i * DICT.size, term_pos, len(term), 0, len(plist), len(blob), post_pos)
+        blobs.append(blob)
+        term_pos += len(term) + 1
+        post_pos += len(blob)
+
+    out_path.parent.mkdir(parents=True, exist_ok=True)
+    tmp_path = Path(str(out_path) + '.tmp')
+    with open(tmp_path, 'wb') as f:
+        f.write(HEADER.pack(MAGIC, VERSION, len(texts), term_count, ascii_terms, dict_off, heap_off, doclen_off, postings_off))
+        f.write(entries)
+        f.write(heap)
+        f.write(doclens.tobytes())
+        for blob in blobs:
+            f.write(blob)
+    os.replace(tmp_path, out_path)
+    return {'path': str(out_path), 'docs': len(texts), 'terms': term_count, 'ascii_terms': ascii_terms,
+            'postings_bytes': post_pos, 'size_bytes': out_path.stat().st_size}
+
+
+# ===== 検索 =====
+
+class KeywordIndex:
+    """keywords.index の読み取り専用リーダー（mmap）"""
+
+    def __init__(self, path: Path):
+        self.path = Path(path)
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        (magic, version, self.doc_count, self.term_count, self.ascii_terms, self._dict_off, self._heap_off,
+         self._doclen_off, self._postings_off) = HEADER.unpack_from(self._mm, 0)
+        if magic != MAGIC:
+            raise ValueError(f"keywords.index ではありません: {self.path}")
+        if version != VERSION:
+            raise ValueError(f"未対応のバージョン: {version}")
+        self._doclens: Optional[np.ndarray] = None
+        self._ascii_hay: Optional[str] = None
+        self._ascii_offsets: Optional[np.ndarray] = None
+
+    def _entry(self, i: int) -> Tuple[int, int, int, int, int, int]:
+        return DICT.unpack_from(self._mm, self._dict_off + i * DICT.size)
+
+    def _term_bytes(self, i: int) -> bytes:
+        off, length = self._entry(i)[:2]
+        start = self._heap_off + off
+        return self._mm[start:start + length]
+
+    def term_id(self, term: str) -> Optional[int]:
+        """語 → 辞書の序数（二分探索）"""
+        key = term.encode('utf-8')
+        lo, hi = 0, self.term_count
+        while lo < hi:
+            mid = (lo + hi) // 2
+            if self._term_bytes(mid) < key:
+                lo = mid + 1
+            else:
+                hi = mid
+        return lo if lo < self.term_count and self._term_bytes(lo) == key else None
+
+    def postings(self, i: int) -> Tuple[np.ndarray, np.ndarray]:
+        """辞書の序数 → (ラベル昇順, 出現回数)"""
+        _, _, _, df, length, off = self._entry(i)
+        start = self._postings_off + off
+        values = _decode_varints(self._mm[start:start + length])
+        return np.cumsum(values[:df]), values[df:2 * df]
+
+    def _ascii_terms_matching(self, piece: str, bounded_left: bool, bounded_right: bool) -> List[int]:
+        if bounded_left and bounded_right:
+            tid = self.term_id(piece)
+            return [] if tid is None else [tid]
+        if self._ascii_hay is None:
+            offs = np.frombuffer(self._mm, dtype=np.uint32, count=self.ascii_terms * DICT.size // 4,
+                                 offset=self._dict_off)[::DICT.size // 4]
+            self._ascii_offsets = np.array(offs, dtype=np.int64)
+            del offs
+            end = int(self._ascii_offsets[-1]) + self._entry(self.ascii_terms - 1)[1] if self.ascii_terms else 0
+            # 前後に区切り '\n' を付け、前方一致 / 後方一致を needle 側の '\n' で表す
+            self._ascii_hay = '\n' + self._mm[self._heap_off:self._heap_off + end].decode('ascii') + '\n'
+        hay, offsets = self._ascii_hay, self._ascii_offsets
+        blob_len = len(hay) - 2
+        needle = ('\n' if bounded_left else '') + piece + ('\n' if bounded_right else '')
+        found: List[int] = []
+        pos = hay.find(needle)
+        while pos >= 0:
+            start = pos + (1 if bounded_left else 0) - 1  # hay 先頭の '\n' を除いた blob 上の位置
+            tid = int(np.searchsorted(offsets, start, side='right')) - 1
+            if not found or found[-1] != tid:
+                found.append(tid)
+            # 同じ語の中の以降の出現は飛ばす
+            next_off = int(offsets[tid + 1]) if tid + 1 < len(offsets) else blob_len
+            pos = hay.find(needle, max(pos + 1, next_off))
+        return found
+
+    def _union(self, term_ids: Sequence[int]) -> np.ndarray:
+        if not term_ids:
+            return np.empty(0, dtype=np.int64)
+        if len(term_ids) == 1:
+            return self.postings(term_ids[0])[0]
+        return np.unique(np.concatenate([self.postings(t)[0] for t in term_ids]))
+
+    def _term_labels(self, term: str) -> np.ndarray:
+        tid = self.term_id(term)
+        return self.postings(tid)[0] if tid is not None else np.empty(0, dtype=np.int64)
+
+    def keyword_candidates(self, keyword: str) -> Optional[Tuple[np.ndarray, bool]]:
+        """キーワード1つの候補ラベルと厳密かどうか。索引で扱えない（片も連も無い）場合は None"""
+        kw = keyword.lower()
+        pieces = list(_PIECE_RE.finditer(kw))
+        if not pieces:
+            return None
+        labels: Optional[np.ndarray] = None
+        for m in pieces:
+            piece = m.group(0)
+            if piece.isascii():
+                got = self._union(self._ascii_terms_matching(piece, m.start() > 0, m.end() < len(kw)))
+            elif len(piece) == 1:
+                got = self._term_labels(piece)
+            else:
+                got = None
+                for j in range(len(piece) - 1):
+                    bg = self._term_labels(piece[j:j + 2])
+                    got = bg if got is None else np.intersect1d(got, bg, assume_unique=True)
+                    if not got.size:
+                        break
+            labels = got if labels is None else np.intersect1d(labels, got, assume_unique=True)
+            if not labels.size:
+                break
+        only = pieces[0].group(0)
+        exact = len(pieces) == 1 and only == kw and (only.isascii() or len(only) <= 2)
+        return labels, exact
+
+    def filter(self, keywords: Sequence[str],
+               text_of: Optional[Callable[[int], str]] = None) -> Optional[np.ndarray]:
+        """
+        AND 部分一致（snapshot_search と同じ意味）の一致ラベル
+        厳密でないキーワードは text_of(label) の本文で確認する（text_of が無ければ候補のまま返す）
+        索引で扱えないキーワードを含む場合は None（呼び出し側で全件走査）
+        """
+        labels: Optional[np.ndarray] = None
+        verify: List[str] = []
+        for kw in keywords:
+            res = self.keyword_candidates(kw)
+            if res is None:
+                return None
+            got, exact = res
+            if not exact:
+                verify.append(kw.lower())
+            labels = got if labels is None else np.intersect1d(labels, got, assume_unique=True)
+            if not labels.size:
+                return labels
+        if labels is None:
+            return np.arange(self.doc_count)
+        if verify and text_of is not None:
+            keep = [l for l in labels.tolist() if all(kw in text_of(l).lower() for kw in verify)]
+            labels = np.asarray(keep, dtype=np.int64)
+        return labels
+
+    @property
+    def doclens(self) -> np.ndarray:
+        if self._doclens is None:
+            self._doclens = np.frombuffer(self._mm, dtype=np.uint32, count=self.doc_count,
+                                          offset=self._doclen_off).astype(np.float32)
+        return self._doclens
+
+    def bm25(self, query: str, top_k: int, k1: float = BM25_K1, b: float = BM25_B) -> Tuple[np.ndarray, np.ndarray]:
+        """BM25 上位 top_k（ラベル, スコア）"""
+        dl = self.doclens
+        avgdl = float(dl.mean()) if dl.size else 1.0
+        scores = np.zeros(self.doc_count, dtype=np.float32)
+        for term, qtf in Counter(query_terms(query)).items():
+            tid = self.term_id(term)
+            if tid is None:
+                continue
+            labels, tfs = self.postings(tid)
+            idf = np.log(1.0 + (self.doc_count - labels.size + 0.5) / (labels.size + 0.5))
+            tf = tfs.astype(np.float32)
+            scores[labels] += qtf * idf * tf * (k1 + 1) / (tf + k1 * (1 - b + b * dl[labels] / avgdl))
+        k = min(top_k, int(np.count_nonzero(scores)))
+        if k <= 0:
+            return np.empty(0, dtype=np.int64), np.empty(0, dtype=np.float32)
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return top.astype(np.int64), scores[top]
+
+    def close(self) -> None:
+        try:
+            self._mm.close()
+            self._file.close()
+        except Exception:
+            pass
+
+
+def scan_filter(texts_lc: Sequence[str], keywords: Sequence[str]) -> List[int]:
+    """比較用: snapshot-search.ts と同じ全件走査（小文字化済み本文に対する AND 部分一致）"""
+    kws = [k.lower() for k in keywords]
+    return [i for i, t in enumerate(texts_lc) if all(k in t for k in kws)]
+
+
+def rrf_fuse(rankings: Sequence[Sequence[int]], k: int = 60) -> List[int]:
+    """Reciprocal Rank Fusion"""
+    score: Dict[int, float] = {}
+    for ranking in rankings:
+        for rank, label in enumerate(ranking):
+            score[int(label)] = score.get(int(label), 0.0) + 1.0 / (k + rank + 1)
+    return [l for l, _ in sorted(score.items(), key=lambda x: -x[1])]
+
+
+# ===== ベンチマーク =====
+
+def sample_keyword_sets(texts: Sequence[str], n: int, seed: int = 0) -> List[List[str]]:
+    """ランダムなチャンクから 1〜3 語（英単語 / 日本語2文字 / 複数語の句）を取り出したキーワード集合"""
+    rng = random.Random(seed)
+    nonempty = [t for t in texts if t.strip()]
+    sets: List[List[str]] = []
+    while nonempty and len(sets) < n:
+        lc = rng.choice(nonempty).lower()
+        words = [w for w in _WORD_RE.findall(lc) if len(w) >= 3]
+        runs = [r for r in _RUN_RE.findall(lc) if len(r) >= 2]
+        pool: List[str] = []
+        if words:
+            pool += rng.sample(words, min(2, len(words)))
+            w = rng.choice(words)
+            pool.append(w[:max(3, len(w) - 2)])  # 部分一致（前方の一部）
+        if runs:
+            r = rng.choice(runs)
+            s = rng.randrange(len(r) - 1)
+            pool.append(r[s:s + rng.choice([2, 3])])
+        m = re.search(r'[a-z0-9_]+ [a-z0-9_]+', lc)
+        if m:
+            pool.append(m.group(0))  # 句（本文での確認が必要）
+        if pool:
+            sets.append(rng.sample(pool, min(len(pool), rng.randint(1, 3))))
+    return sets
+
+
+def run_bench(args: argparse.Namespace, index: KeywordIndex, texts: List[str]) -> Dict[str, object]:
+    from retrieval_benchmark import percentiles
+    texts_lc = [t.lower() for t in texts]
+    if args.keywords:
+        sets = [[k.strip() for k in s.split(',') if k.strip()] for s in args.keywords.split(';') if s.strip()]
+    else:
+        sets = sample_keyword_sets(texts, args.num_queries)
+    scan_ms: List[float] = []
+    index_ms: List[float] = []
+    mismatches = 0
+    fallbacks = 0
+    candidates = 0
+    for kws in sets:
+        t0 = time.perf_counter()
+        expected = scan_filter(texts_lc, kws)
+        scan_ms.append((time.perf_counter() - t0) * 1000)
+        t0 = time.perf_counter()
+        got = index.filter(kws, text_of=lambda l: texts_lc[l])
+        index_ms.append((time.perf_counter() - t0) * 1000)
+        if got is None:
+            fallbacks += 1
+            continue
+        candidates += int(got.size)
+        if got.tolist() != expected:
+            mismatches += 1
+            if args.verbose:
+                print(f"[警告] 不一致: {kws} scan={len(expected)} index={got.size}")
+    report: Dict[str, object] = {
+        'keyword_sets': len(sets),
+        'scan_ms': percentiles(scan_ms),
+        'index_ms': percentiles(index_ms),
+        'mismatches': mismatches,
+        'fallbacks': fallbacks,
+        'mean_matched_chunks': candidates / max(1, len(sets) - fallbacks),
+    }
+    if args.hybrid:
+        report['hybrid'] = run_hybrid(args, index)
+    return report
+
+
+def run_hybrid(args: argparse.Namespace, index: KeywordIndex) -> Dict[str, object]:
+    """intent ごとに ベクトルのみ / BM25 + ベクトル（RRF）の候補数別 gold URL recall を比較"""
+    from retrieval_benchmark import (
+        CachedEmbedder, MmapFlatIndex, build_embedder, gold_urls_for_task, labels_to_urls,
+        load_chunk_urls, load_mapping, load_task_configs, recall_at_k,
+    )
+    index_dir = Path(args.index_dir)
+    flat = MmapFlatIndex(index_dir / args.vectors)
+    chunk_ids = load_mapping(index_dir, args.vectors)
+    chunk_urls = load_chunk_urls(index_dir)
+    configs = load_task_configs(Path(args.configs_dir))
+    regions = [r.strip() for r in args.regions.split(',') if r.strip()]
+    embedder = CachedEmbedder(build_embedder(args.embedder, model_id=args.embedding_model, regions=regions, dim=flat.d),
+                              Path(args.cache_file))
+    intents = [str(c.get('intent') or '') for c in configs]
+    queries = np.ascontiguousarray(embedder.embed(intents), dtype=np.float32)
+    sizes = sorted({int(s) for s in args.candidates.split(',') if s.strip()})
+    depth = max(sizes)
+    _, vec_labels = flat.search(queries, depth)
+
+    per_size: Dict[int, Dict[str, List[float]]] = {s: {'vector': [], 'hybrid': []} for s in sizes}
+    bm25_ms: List[float] = []
+    for cfg, intent, vec in zip(configs, intents, vec_labels):
+        gold = gold_urls_for_task(cfg, Path(args.tasks_dir))
+        if not gold:
+            continue
+        t0 = time.perf_counter()
+        bm_labels, _ = index.bm25(intent, depth)
+        bm25_ms.append((time.perf_counter() - t0) * 1000)
+        fused = rrf_fuse([[int(l) for l in vec if l >= 0], bm_labels.tolist()])
+        for s in sizes:
+            per_size[s]['vector'].append(recall_at_k(labels_to_urls(vec[:s], chunk_ids, chunk_urls), gold))
+            per_size[s]['hybrid'].append(recall_at_k(labels_to_urls(fused[:s], chunk_ids, chunk_urls), gold))
+    flat.close()
+    from retrieval_benchmark import percentiles
+    out: Dict[str, object] = {'tasks_with_gold': len(bm25_ms), 'bm25_ms': percentiles(bm25_ms), 'recall': {}}
+    for s in sizes:
+        v, h = per_size[s]['vector'], per_size[s]['hybrid']
+        out['recall'][str(s)] = {'vector': float(np.mean(v)) if v else 0.0, 'hybrid': float(np.mean(h)) if h else 0.0}
+    # ベクトルのみ・最大候補数の recall に、ハイブリッドが何件の候補で届くか（リランク入力の削減幅）
+    target = out['recall'][str(depth)]['vector']
+    out['hybrid_candidates_for_vector_recall'] = next(
+        (s for s in sizes if out['recall'][str(s)]['hybrid'] >= target), None)
+    return out
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='キーワード転置インデックス（keywords.index）の生成と検索')
+    ap.add_argument('--index-dir', default=str(DEFAULT_INDEX_DIR))
+    ap.add_argument('--vectors', default='vectors.faiss', help='ラベル順の基準とするマッピング（<vectors>.mapping.json）')
+    ap.add_argument('--path', default='', help='インデックスのパス（既定: <index-dir>/keywords.index）')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('build', help='mapping.json + chunks.parquet から keywords.index を生成')
+    q = sub.add_parser('query', help='キーワード（AND 部分一致）で絞り込み、BM25 順に表示')
+    q.add_argument('keywords', nargs='+')
+    q.add_argument('--top', type=int, default=10)
+    b = sub.add_parser('bench', help='全件走査との一致確認とレイテンシ比較（--hybrid で recall 比較）')
+    b.add_argument('--num-queries', type=int, default=200)
+    b.add_argument('--keywords', default='', help="キーワード集合を指定（'a,b;c' = [a,b] と [c]）")
+    b.add_argument('--hybrid', action='store_true', help='BM25 + ベクトル（RRF）とベクトルのみの gold URL recall を比較')
+    b.add_argument('--candidates', default='10,20,50,100', help='リランクに渡す候補数（カンマ区切り）')
+    b.add_argument('--configs-dir', default=str(BENCH_DIR / 'configs'))
+    b.add_argument('--tasks-dir', default=str(BENCH_DIR / 'tasks'))
+    b.add_argument('--embedder', default='bedrock')
+    b.add_argument('--embedding-model', default='cohere.embed-v4:0')
+    b.add_argument('--regions', default='ap-northeast-1')
+    b.add_argument('--cache-file', default=str(BENCH_DIR / 'resources' / 'cache' / 'query_embeddings.jsonl'))
+    b.add_argument('--output', default='', help='レポートJSONの出力先')
+    b.add_argument('-v', '--verbose', action='store_true')
+    args = ap.parse_args()
+
+    index_dir = Path(args.index_dir)
+    index_path = Path(args.path) if args.path else index_dir / 'keywords.index'
+
+    if args.cmd == 'build':
+        t0 = time.perf_counter()
+        texts = load_texts_by_label(index_dir, args.vectors)
+        info = build_index(texts, index_path)
+        print(f"[情報] キーワードインデックス生成: {info['path']} ({info['docs']}件, 語 {info['terms']}件, "
+              f"{info['size_bytes'] / 1e6:.1f}MB, {time.perf_counter() - t0:.1f}s)")
+        return
+
+    index = KeywordIndex(index_path)
+    texts = load_texts_by_label(index_dir, args.vectors)
+    if index.doc_count != len(texts):
+        print(f"[警告] インデックスの件数 {index.doc_count} とマッピング件数 {len(texts)} が一致しません（build で再生成してください）")
+
+    if args.cmd == 'query':
+        t0 = time.perf_counter()
+        labels = index.filter(args.keywords, text_of=lambda l: texts[l])
+        ms = (time.perf_counter() - t0) * 1000
+        if labels is None:
+            print("[警告] 索引で扱えないキーワードが含まれます（全件走査が必要）")
+            return
+        print(f"[結果] 一致: {labels.size}件（{ms:.3f}ms）")
+        ranked, _ = index.bm25(' '.join(args.keywords), index.doc_count)
+        allowed = set(labels.tolist())
+        for label in [int(l) for l in ranked if int(l) in allowed][:args.top]:
+            print(f"  {label}: {texts[label][:120].replace(chr(10), ' ')}")
+        return
+
+    report = run_bench(args, index, texts)
+    s, i = report['scan_ms'], report['index_ms']
+    print(f"[結果] キーワード集合: {report['keyword_sets']}件 / 不一致 {report['mismatches']} / 全件走査フォールバック {report['fallbacks']}")
+    print(f"[結果] 全件走査: p50={s['p50']:.3f}ms p99={s['p99']:.3f}ms")
+    print(f"[結果] 転置インデックス: p50={i['p50']:.3f}ms p99={i['p99']:.3f}ms")
+    hybrid = report.get('hybrid')
+    if hybrid:
+        for size, r in hybrid['recall'].items():
+            print(f"[結果] 候補 {size:>4}件: recall ベクトルのみ={r['vector']:.4f} ハイブリッド={r['hybrid']:.4f}")
+        print(f"[結果] ベクトルのみ（最大候補数）の recall に届くハイブリッド候補数: {hybrid['hybrid_candidates_for_vector_recall']}")
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+        print(f"[情報] レポート: {out}")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,154 @@
+#!/usr/bin/env python3
+"""
+スイープ単位のステップレイテンシ・レポート
+・リーダーボード風サマリー（tasks/task_<id>/*.json）の action_history に含まれる
+  duration_ms / breakdown（model / action / retrieval / observation / other）/ tokens を集計
+・アクション種別・URL（数値IDは {n} に畳み込み）ごとに p50 / p90 / p99 / max を出し、テールの大きい順に並べる
+・最も遅い個別ステップと、その支配的な内訳を一覧する
+・timing を含まない（計測導入前の）trajectory のステップは集計対象外
+
+使い方:
+  python scripts/latency_report.py                                   # tasks/ の各タスク最新ランを集計
+  python scripts/latency_report.py --tasks-dir /home/ec2-user/webarena-local/evaluation-result --all-runs
+  python scripts/latency_report.py --sort p99 --top 20 --output resources/bench/latency.json
+"""
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Dict, List
+
+from artifact_store import load_json
+from retrieval_benchmark import DEFAULT_TASKS_DIR, normalize_url, percentiles
+
+# evaluate.py の STEP_TIMING_COMPONENTS と同じ（evaluate.py は boto3 等を読み込むため import しない）
+STEP_TIMING_COMPONENTS = ('model_ms', 'action_ms', 'retrieval_ms', 'observation_ms', 'other_ms')
+_NUMERIC_SEGMENT = re.compile(r'/\d+(?=/|$)')
+
+
+def url_pattern(u: str) -> str:
+    """クエリを落とし、数値のパスセグメントを {n} に畳み込む（/edit/id/123/ → /edit/id/{n}）"""
+    u = normalize_url(u).split('?', 1)[0]
+    return _NUMERIC_SEGMENT.sub('/{n}', u)
+
+
+def load_summaries(tasks_dir: Path, all_runs: bool) -> List[dict]:
+    out: List[dict] = []
+    for task_dir in sorted(tasks_dir.glob('task_*')):
+        if not task_dir.is_dir():
+            continue
+        files = sorted(task_dir.glob('*.json'))
+        if not all_runs:
+            files = files[-1:]
+        for p in files:
+            try:
+                summary = load_json(p)
+            except Exception as e:
+                print(f"[警告] サマリー読み込み失敗: {p}: {e}")
+                continue
+            summary['_path'] = str(p)
+            out.append(summary)
+    return out
+
+
+def collect_steps(summaries: List[dict]) -> List[dict]:
+    steps: List[dict] = []
+    for s in summaries:
+        for h in s.get('action_history') or []:
+            if 'duration_ms' not in h:
+                continue
+            breakdown = h.get('breakdown') or {}
+            dominant = max(STEP_TIMING_COMPONENTS, key=lambda k: float(breakdown.get(k, 0.0)))
+            steps.append({
+                'task_id': s.get('task_id'),
+                'run': s.get('_path'),
+                'step': h.get('step'),
+                'action': h.get('action') or 'UNKNOWN',
+                'url': h.get('url_before') or '',
+                'url_pattern': url_pattern(h.get('url_before') or ''),
+                'duration_ms': float(h.get('duration_ms') or 0.0),
+                'breakdown': {k: float(breakdown.get(k, 0.0)) for k in STEP_TIMING_COMPONENTS},
+                'dominant': dominant,
+                'tokens': h.get('tokens') or {},
+            })
+    return steps
+
+
+def group_stats(steps: List[dict], key: str, sort_by: str) -> List[dict]:
+    groups: Dict[str, List[dict]] = {}
+    for st in steps:
+        groups.setdefault(str(st[key]), []).append(st)
+    rows: List[dict] = []
+    for name, items in groups.items():
+        durations = [it['duration_ms'] for it in items]
+        row = {key: name, 'total_ms': sum(durations), **percentiles(durations)}
+        row['breakdown_ms'] = {k: sum(it['breakdown'][k] for it in items) for k in STEP_TIMING_COMPONENTS}
+        rows.append(row)
+    rows.sort(key=lambda r: r.get(sort_by, 0.0), reverse=True)
+    return rows
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='action_history の所要時間からスイープ単位のレイテンシ内訳を集計する')
+    ap.add_argument('--tasks-dir', default=str(DEFAULT_TASKS_DIR), help='task_<id>/*.json を含むディレクトリ')
+    ap.add_argument('--all-runs', action='store_true', help='各タスクの全ランを対象にする（既定: 最新ランのみ）')
+    ap.add_argument('--sort', default='p90', choices=['p50', 'p90', 'p99', 'max', 'mean', 'total_ms', 'count'])
+    ap.add_argument('--top', type=int, default=10)
+    ap.add_argument('--output', default='', help='結果JSONの出力先')
+    args = ap.parse_args()
+
+    summaries = load_summaries(Path(args.tasks_dir), args.all_runs)
+    steps = collect_steps(summaries)
+    print(f"[情報] サマリー {len(summaries)}件 / 計測済みステップ {len(steps)}件")
+    if not steps:
+        print("[警告] timing を含むステップがありません（計測導入後の trajectory で評価してください）")
+        return
+
+    overall = percentiles([st['duration_ms'] for st in steps])
+    totals = {k: sum(st['breakdown'][k] for st in steps) for k in STEP_TIMING_COMPONENTS}
+    grand = sum(totals.values()) or 1.0
+    tokens: Dict[str, int] = {}
+    for st in steps:
+        for k, v in st['tokens'].items():
+            tokens[k] = tokens.get(k, 0) + int(v or 0)
+
+    print(f"[結果] ステップ: p50={overall['p50']:.0f}ms p90={overall['p90']:.0f}ms p99={overall['p99']:.0f}ms max={overall['max']:.0f}ms")
+    print("[結果] 内訳: " + ' / '.join(f"{k[:-3]}={v/1000:.1f}s({v/grand*100:.0f}%)" for k, v in totals.items()))
+    if tokens:
+        print("[結果] トークン: " + ' / '.join(f"{k}={v}" for k, v in tokens.items()))
+
+    by_action = group_stats(steps, 'action', args.sort)
+    by_url = group_stats(steps, 'url_pattern', args.sort)
+
+    print(f"\n[結果] アクション種別（{args.sort} 降順）")
+    for r in by_action[:args.top]:
+        print(f"  {r['action']:12s} n={r['count']:4d} p50={r['p50']:7.0f} p90={r['p90']:7.0f} p99={r['p99']:7.0f} max={r['max']:7.0f}ms")
+    print(f"\n[結果] URL（{args.sort} 降順）")
+    for r in by_url[:args.top]:
+        print(f"  n={r['count']:4d} p90={r['p90']:7.0f} p99={r['p99']:7.0f} max={r['max']:7.0f}ms  {r['url_pattern']}")
+
+    slowest = sorted(steps, key=lambda st: st['duration_ms'], reverse=True)[:args.top]
+    print("\n[結果] 最も遅いステップ")
+    for st in slowest:
+        print(f"  task={st['task_id']} step={st['step']} {st['action']} {st['duration_ms']:.0f}ms "
+              f"(主因: {st['dominant']}={st['breakdown'][st['dominant']]:.0f}ms) {st['url']}")
+
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump({
+                'summaries': len(summaries),
+                'steps': len(steps),
+                'overall_ms': overall,
+                'breakdown_ms': totals,
+                'tokens': tokens,
+                'by_action': by_action,
+                'by_url': by_url,
+                'slowest_steps': slowest,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"[情報] 結果を保存: {out}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,345 @@
+#!/usr/bin/env python3
+"""
+観測サイズ・コンテキスト圧縮レポート
+・trajectory（output/webarena/trajectories/task_<id>_<ts>.json / .ndjson）をステップ単位で走査し、
+  ページ全体のスナップショット（state の observation.text）と、エージェントが実際に受け取ったツール結果（action の raw_prediction）の
+  文字数・推定トークン数・圧縮率を出す
+・直前ステップの観測との重複（ref 番号を除いた行単位）と、エージェントのコンテキストに占める観測の割合を推定する
+・タスク・アクション種別（ツール名）・URL（数値IDは {n} に畳み込み）ごとに集計し、スナップショットが最も重いページを一覧する
+・--tasks-dir を指定するとリーダーボード風サマリーの action_history（raw_prediction / tokens）から集計する（observation.text は含まれない）
+
+推定トークン数は ASCII 4文字 = 1トークン、非ASCII（日本語など）1文字 = 1トークンの概算。
+コンテキスト占有率は「ステップ j のモデル入力には、それ以前の全ステップのツール結果が残っている」（1ステップ1回のモデル呼び出し、
+履歴の切り詰めなし）とみなし、その推定トークン数を action.timing.tokens（input + cache_read + cache_write）で割った値。
+
+使い方:
+  python scripts/observation_report.py                                    # 既定の trajectory ディレクトリを集計
+  python scripts/observation_report.py /path/to/trajectories --top 20 --output resources/bench/observation.json
+  python scripts/observation_report.py --tasks-dir tasks --all-runs
+"""
+import argparse
+import json
+import re
+from pathlib import Path
+from typing import Any, Dict, List, Optional, Tuple
+
+from artifact_store import load_json
+from latency_report import load_summaries, url_pattern
+from retrieval_benchmark import percentiles
+
+BENCH_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_TRAJECTORY_DIR = BENCH_DIR.parent.parent / 'output' / 'webarena' / 'trajectories'
+
+_REF_RE = re.compile(r'\s*\[\s*ref\s*=\s*[\w:-]+\s*\]', re.I)
+_TASK_RE = re.compile(r'task_(\d+)_')
+
+
+def estimate_tokens(text: str) -> int:
+    """ASCII は 4文字で1トークン、非ASCII は1文字1トークンの概算"""
+    if not text:
+        return 0
+    ascii_chars = sum(1 for ch in text if ord(ch) < 128)
+    return (ascii_chars + 3) // 4 + (len(text) - ascii_chars)
+
+
+def _normalized_lines(text: str) -> List[str]:
+    lines = (re.sub(r'\s+', ' ', _REF_RE.sub('', line)).strip() for line in text.splitlines())
+    return [line for line in lines if line]
+
+
+def observation_text(raw_prediction: str) -> str:
+    """ツール結果 JSON の文字列値を改行で連結（snapshotforai のように JSON 文字列として二重に埋め込まれた値も展開）"""
+    def _walk(v: Any, out: List[str]) -> None:
+        if isinstance(v, dict):
+            for x in v.values():
+                _walk(x, out)
+        elif isinstance(v, list):
+            for x in v:
+                _walk(x, out)
+        elif isinstance(v, str):
+            if v.startswith('"'):
+                try:
+                    v = str(json.loads(v))
+                except json.JSONDecodeError:
+                    pass
+            out.append(v)
+
+    try:
+        payload = json.loads(raw_prediction)
+    except (json.JSONDecodeError, TypeError):
+        return raw_prediction
+    parts: List[str] = []
+    _walk(payload, parts)
+    return '\n'.join(parts)
+
+
+def duplicate_share(text: str, prev: str) -> float:
+    """text の行（ref 番号・空白を正規化）のうち prev にも含まれる行の文字数割合"""
+    lines = _normalized_lines(text)
+    if not lines or not prev:
+        return 0.0
+    seen = set(_normalized_lines(prev))
+    total = sum(len(line) for line in lines)
+    return sum(len(line) for line in lines if line in seen) / total if total else 0.0
+
+
+def _tool_action(raw_prediction: str, fallback: str) -> str:
+    """raw_prediction（ツール結果 JSON）の action。解釈できなければ WebArena のアクション名"""
+    try:
+        payload = json.loads(raw_prediction)
+        if isinstance(payload, dict) and payload.get('action'):
+            return str(payload['action'])
+    except (json.JSONDecodeError, TypeError):
+        pass
+    return fallback
+
+
+def _action_name(code: Any) -> str:
+    # evaluate.py の _action_type_to_name と同じ（evaluate.py は boto3 等を読み込むため import しない）
+    try:
+        return {13: 'GOTO_URL', 6: 'CLICK', 7: 'TYPE', 2: 'KEY_PRESS', 17: 'STOP'}.get(int(code), f'UNKNOWN({code})')
+    except (TypeError, ValueError):
+        return 'UNKNOWN'
+
+
+def _context_tokens(tokens: Dict[str, Any]) -> int:
+    return sum(int(tokens.get(k) or 0) for k in ('input', 'cache_read', 'cache_write'))
+
+
+# ===== 入力 =====
+
+def load_trajectory(path: Path) -> Tuple[List[dict], List[dict]]:
+    """trajectory（{"trajectory": [...]} / JSON 配列 / NDJSON）→ (states, actions)"""
+    items: List[dict] = []
+    if path.suffix == '.ndjson':
+        from trajectory_stream import read_stream
+        read_stream(path, items.append)
+    else:
+        data = load_json(path)
+        # src/agent/tools/util.ts の保存形式は {"trajectory": [...], "final_url": ...}。古い形式の配列のみのファイルも読む
+        if isinstance(data, dict):
+            data = data.get('trajectory')
+        items = [x for x in data if isinstance(x, dict)] if isinstance(data, list) else []
+    states = [x for x in items if 'observation' in x and 'info' in x]
+    actions = [x for x in items if 'action_type' in x]
+    return states, actions
+
+
+def steps_from_trajectory(path: Path) -> List[dict]:
+    states, actions = load_trajectory(path)
+    m = _TASK_RE.search(path.name)
+    task_id = m.group(1) if m else path.stem
+    steps: List[dict] = []
+    for i, ac in enumerate(actions):
+        st = states[i] if i < len(states) else {}
+        timing = ac.get('timing') if isinstance(ac.get('timing'), dict) else {}
+        steps.append({
+            'task_id': task_id,
+            'run': str(path),
+            'step': i,
+            'url': str(((st.get('info') or {}).get('page') or {}).get('url') or ''),
+            'action': _tool_action(str(ac.get('raw_prediction') or ''), _action_name(ac.get('action_type', -1))),
+            'snapshot': str((st.get('observation') or {}).get('text') or ''),
+            'observation': str(ac.get('raw_prediction') or ''),
+            'tokens': dict(timing.get('tokens') or {}),
+        })
+    return steps
+
+
+def steps_from_summaries(summaries: List[dict]) -> List[dict]:
+    steps: List[dict] = []
+    for s in summaries:
+        for h in s.get('action_history') or []:
+            steps.append({
+                'task_id': str(s.get('task_id')),
+                'run': s.get('_path'),
+                'step': h.get('step'),
+                'url': h.get('url_before') or '',
+                'action': _tool_action(str(h.get('raw_prediction') or ''), h.get('action') or 'UNKNOWN'),
+                'snapshot': None,
+                'observation': str(h.get('raw_prediction') or ''),
+                'tokens': dict(h.get('tokens') or {}),
+            })
+    return steps
+
+
+# ===== 集計 =====
+
+def measure_steps(steps: List[dict]) -> List[dict]:
+    """ステップごとの文字数・推定トークン・重複・コンテキスト占有を計算（ラン単位で前ステップと比較）"""
+    out: List[dict] = []
+    prev_run = None
+    prev_obs = ''
+    resident = 0
+    for st in steps:
+        if st['run'] != prev_run:
+            prev_run, prev_obs, resident = st['run'], '', 0
+        obs = st['observation']
+        snap = st['snapshot']
+        # トークン数はモデルが受け取る JSON のまま、重複は展開した本文の行で比較
+        obs_tokens = estimate_tokens(obs)
+        obs_text = observation_text(obs)
+        dup = duplicate_share(obs_text, prev_obs)
+        ctx = _context_tokens(st['tokens'])
+        row = {
+            'task_id': st['task_id'],
+            'run': st['run'],
+            'step': st['step'],
+            'action': st['action'],
+            'url': st['url'],
+            'url_pattern': url_pattern(st['url']) if st['url'].startswith('http') else st['url'],
+            'observation_chars': len(obs),
+            'observation_tokens': obs_tokens,
+            'duplicate_share': dup,
+            'duplicate_tokens': int(obs_tokens * dup),
+            'context_tokens': ctx,
+            # このステップのモデル入力に残っている、それ以前のツール結果（推定）
+            'resident_observation_tokens': resident if ctx else 0,
+        }
+        if snap is not None:
+            snap_tokens = estimate_tokens(snap)
+            row['snapshot_chars'] = len(snap)
+            row['snapshot_tokens'] = snap_tokens
+            row['compression'] = (obs_tokens / snap_tokens) if snap_tokens else None
+        out.append(row)
+        prev_obs = obs_text
+        resident += obs_tokens
+    return out
+
+
+def group_rows(rows: List[dict], key: str) -> List[dict]:
+    groups: Dict[str, List[dict]] = {}
+    for r in rows:
+        groups.setdefault(str(r[key]), []).append(r)
+    out: List[dict] = []
+    for name, items in groups.items():
+        obs = [r['observation_tokens'] for r in items]
+        ctx = sum(r['context_tokens'] for r in items)
+        g: Dict[str, Any] = {
+            key: name,
+            'steps': len(items),
+            'observation_tokens': sum(obs),
+            'observation_tokens_pct': percentiles(obs),
+            'duplicate_tokens': sum(r['duplicate_tokens'] for r in items),
+            'context_tokens': ctx,
+            'context_share': (sum(r['resident_observation_tokens'] for r in items) / ctx) if ctx else None,
+        }
+        snaps = [r['snapshot_tokens'] for r in items if 'snapshot_tokens' in r]
+        if snaps:
+            g['snapshot_tokens'] = sum(snaps)
+            g['snapshot_tokens_mean'] = sum(snaps) / len(snaps)
+            g['compression'] = (sum(obs) / sum(snaps)) if sum(snaps) else None
+        out.append(g)
+    out.sort(key=lambda g: g['observation_tokens'], reverse=True)
+    return out
+
+
+def _fmt_share(v: Optional[float]) -> str:
+    return f"{v * 100:5.1f}%" if v is not None else '    -'
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='trajectory の観測サイズ・重複・コンテキスト占有を集計する')
+    ap.add_argument('paths', nargs='*', help='trajectory ファイル / ディレクトリ（既定: output/webarena/trajectories）')
+    ap.add_argument('--tasks-dir', default='', help='trajectory の代わりにサマリー（task_<id>/*.json）の action_history を集計')
+    ap.add_argument('--all-runs', action='store_true', help='--tasks-dir で各タスクの全ランを対象にする（既定: 最新ランのみ）')
+    ap.add_argument('--top', type=int, default=10)
+    ap.add_argument('--output', default='', help='結果JSONの出力先')
+    args = ap.parse_args()
+
+    if args.tasks_dir:
+        summaries = load_summaries(Path(args.tasks_dir), args.all_runs)
+        steps = steps_from_summaries(summaries)
+        print(f"[情報] サマリー {len(summaries)}件 / ステップ {len(steps)}件（observation.text は含まれないため圧縮率は出しません）")
+    else:
+        files: List[Path] = []
+        for p in [Path(x) for x in (args.paths or [str(DEFAULT_TRAJECTORY_DIR)])]:
+            if p.is_dir():
+                files.extend(sorted(list(p.glob('task_*.json')) + list(p.glob('task_*.ndjson'))))
+            elif p.exists():
+                files.append(p)
+            else:
+                print(f"[警告] 見つかりません: {p}")
+        steps = []
+        for f in files:
+            try:
+                steps.extend(steps_from_trajectory(f))
+            except Exception as e:
+                print(f"[警告] trajectory 読み込み失敗: {f}: {e}")
+        print(f"[情報] trajectory {len(files)}件 / ステップ {len(steps)}件")
+    if not steps:
+        print("[警告] 集計対象のステップがありません")
+        return
+
+    rows = measure_steps(steps)
+    total = group_rows(rows, 'run')
+    obs_total = sum(r['observation_tokens'] for r in rows)
+    dup_total = sum(r['duplicate_tokens'] for r in rows)
+    ctx_total = sum(r['context_tokens'] for r in rows)
+    resident_total = sum(r['resident_observation_tokens'] for r in rows)
+    snap_total = sum(r.get('snapshot_tokens', 0) for r in rows)
+    overall: Dict[str, Any] = {
+        'runs': len(total),
+        'steps': len(rows),
+        'observation_tokens': obs_total,
+        'observation_tokens_pct': percentiles([r['observation_tokens'] for r in rows]),
+        'duplicate_tokens': dup_total,
+        'duplicate_share': (dup_total / obs_total) if obs_total else 0.0,
+        'context_tokens': ctx_total,
+        'context_share': (resident_total / ctx_total) if ctx_total else None,
+    }
+    if snap_total:
+        overall['snapshot_tokens'] = snap_total
+        overall['compression'] = obs_total / snap_total
+
+    p = overall['observation_tokens_pct']
+    print(f"[結果] 観測（ツール結果）: 計 {obs_total} tok / ステップ p50={p['p50']:.0f} p90={p['p90']:.0f} max={p['max']:.0f}")
+    if snap_total:
+        print(f"[結果] ページ全体スナップショット: 計 {snap_total} tok / 圧縮率 {overall['compression'] * 100:.1f}%")
+    print(f"[結果] 直前ステップとの重複: {dup_total} tok（{overall['duplicate_share'] * 100:.1f}%）")
+    if ctx_total:
+        print(f"[結果] コンテキスト占有（推定）: {_fmt_share(overall['context_share']).strip()} / モデル入力 {ctx_total} tok")
+    else:
+        print("[情報] timing.tokens を含まないため、コンテキスト占有は出しません")
+
+    by_task = group_rows(rows, 'task_id')
+    by_action = group_rows(rows, 'action')
+    by_url = group_rows(rows, 'url_pattern')
+    for title, key, groups in (('タスク', 'task_id', by_task), ('アクション種別', 'action', by_action), ('URL', 'url_pattern', by_url)):
+        print(f"\n[結果] {title}（観測トークン降順）")
+        for g in groups[:args.top]:
+            snap = f" snap平均={g['snapshot_tokens_mean']:7.0f}" if 'snapshot_tokens_mean' in g else ''
+            print(f"  n={g['steps']:4d} 観測={g['observation_tokens']:8d} 重複={g['duplicate_tokens']:7d} "
+                  f"占有={_fmt_share(g['context_share'])}{snap}  {g[key]}")
+
+    # 圧縮の余地が大きいページ: スナップショット（無ければ観測）の平均トークンが大きい URL
+    heavy_key = 'snapshot_tokens_mean' if snap_total else 'observation_tokens'
+    heaviest = sorted(by_url, key=lambda g: g.get(heavy_key) or 0, reverse=True)[:args.top]
+    print(f"\n[結果] 最も重いページ（{'スナップショット平均' if snap_total else '観測合計'}）")
+    for g in heaviest:
+        comp = f" 圧縮率={g['compression'] * 100:5.1f}%" if g.get('compression') is not None else ''
+        print(f"  {g.get(heavy_key) or 0:9.0f} tok n={g['steps']:4d}{comp}  {g['url_pattern']}")
+
+    largest = sorted(rows, key=lambda r: r['observation_tokens'], reverse=True)[:args.top]
+    print("\n[結果] 観測が最も大きいステップ")
+    for r in largest:
+        print(f"  task={r['task_id']} step={r['step']} {r['action']} {r['observation_tokens']} tok "
+              f"(重複 {r['duplicate_share'] * 100:.0f}%) {r['url']}")
+
+    if args.output:
+        out = Path(args.output)
+        out.parent.mkdir(parents=True, exist_ok=True)
+        with open(out, 'w') as f:
+            json.dump({
+                'overall': overall,
+                'by_task': by_task,
+                'by_action': by_action,
+                'by_url': by_url,
+                'heaviest_pages': heaviest,
+                'largest_steps': largest,
+            }, f, ensure_ascii=False, indent=2)
+        print(f"[情報] 結果を保存: {out}")
+
+
+if __name__ == '__main__':
+    main()
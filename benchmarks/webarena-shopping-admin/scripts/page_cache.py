@@ -0,0 +1,253 @@
+#!/usr/bin/env python3
+"""
+program_html の対象ページのスイープ内キャッシュ（サイト状態のエポック単位）
+・キーは（解決済み URL, エポック）。ブラウザで開いたページの DOM（入力値・選択状態・非表示を属性に反映して直列化）と
+  locator ごとの値を保存し、同じエポック内の以降の評価はナビゲーションせずにキャッシュから答える
+  - 同じ locator: 保存済みの値（ブラウザの評価結果そのもの）
+  - 別の locator: 保存済み DOM を http_fastpath と同じ規則で評価（未対応の locator は通常どおりブラウザへ）
+・エポックは、require_reset のタスク、または変更系の intent（追加・更新・削除・承認 等）のタスクの評価開始時に進める
+  （エージェントがサイトを変更した後なので、それ以前のエポックのページは使わない）。古いエポックのエントリは削除する
+・require_reset のタスクの後はサイトがリセットされるため、そのタスクのエポックには reset_pending を記録し、
+  次のタスクの評価開始時に（変更系かどうかに関わらず）もう一度エポックを進める（変更後の状態のページを使わない）
+・url='last' の項目（エージェント操作後のページに依存）、ナビゲーション失敗・リダイレクトしたページはキャッシュしない
+・エポックファイル・エントリは保存先ディレクトリで共有し（fcntl.flock で排他）、順に実行される evaluate.py 間で使い回す。
+  スイープごとに保存先を分けるか、開始時に clear する。タスクを並列に評価するスイープでは、変更と読み取りの順序が保証されないため使わない
+
+環境変数:
+  AGENT_WEBARENA_PAGE_CACHE      true で有効化（既定 false）
+  AGENT_WEBARENA_PAGE_CACHE_DIR  保存先（既定 /tmp/webarena-page-cache）
+
+使い方:
+  python scripts/page_cache.py status                    # 現在のエポック・エントリ数
+  python scripts/page_cache.py bump --reason "DB reset"  # 手動でエポックを進める（サイトを外部でリセットした場合等）
+  python scripts/page_cache.py clear                     # スイープ開始時に全エントリとエポックを消去
+"""
+import argparse
+import fcntl
+import gzip
+import hashlib
+import json
+import os
+import re
+import shutil
+import time
+from pathlib import Path
+from typing import Any, Dict, Optional
+
+DEFAULT_CACHE_DIR = Path('/tmp/webarena-page-cache')
+EPOCH_FILE = 'epoch.json'
+
+# サイトの状態を変える intent（誤検出はキャッシュが効かなくなるだけなので広めに取る）
+MUTATING_INTENT = re.compile(
+    r'\b(add|approve|assign|cancel|change|create|delete|disable|draft|edit|enable|hold|increase|invoice|make|mark|'
+    r'modify|notify|reduce|refund|remove|rename|reply|set|ship|unhold|update)\b',
+    re.IGNORECASE,
+)
+
+# 入力値・選択状態・計算後の非表示を属性に反映してから DOM を直列化する（保存した DOM を静的に評価するため）
+CAPTURE_JS = """() => {
+  for (const el of document.querySelectorAll('input, textarea, select')) {
+    if (el.tagName === 'SELECT') {
+      for (const o of el.options) { if (o.selected) o.setAttribute('selected', ''); else o.removeAttribute('selected'); }
+    } else if (el.tagName === 'TEXTAREA') {
+      el.textContent = el.value;
+    } else {
+      if (el.type === 'checkbox' || el.type === 'radio') { if (el.checked) el.setAttribute('checked', ''); else el.removeAttribute('checked'); }
+      el.setAttribute('value', el.value);
+    }
+  }
+  for (const el of document.body.querySelectorAll('*')) {
+    if (!el.hasAttribute('hidden') && getComputedStyle(el).display === 'none') el.setAttribute('hidden', '');
+  }
+  return document.documentElement.outerHTML;
+}"""
+
+
+def cache_enabled() -> bool:
+    return str(os.environ.get('AGENT_WEBARENA_PAGE_CACHE', 'false')).strip().lower() == 'true'
+
+
+def is_mutating(cfg: dict) -> bool:
+    """タスクがサイトの状態を変えうるか（require_reset または変更系の intent）"""
+    if cfg.get('require_reset'):
+        return True
+    return bool(MUTATING_INTENT.search(str(cfg.get('intent') or '')))
+
+
+def _url_key(url: str) -> str:
+    return hashlib.sha256(url.encode('utf-8')).hexdigest()[:32]
+
+
+class PageCache:
+    """（URL, エポック）→ DOM と locator の値"""
+
+    def __init__(self, root: Optional[Path] = None):
+        env = str(os.environ.get('AGENT_WEBARENA_PAGE_CACHE_DIR', '')).strip()
+        self.root = Path(root or env or DEFAULT_CACHE_DIR)
+        self.lock_path = self.root / '.lock'
+        self._epoch: Optional[int] = None
+        self.hits = 0
+        self.dom_hits = 0
+        self.misses = 0
+        self.stored = 0
+        self.captured = 0
+
+    @classmethod
+    def from_env(cls) -> Optional['PageCache']:
+        return cls() if cache_enabled() else None
+
+    # ----- エポック -----
+
+    def _read_epoch(self) -> Dict[str, Any]:
+        try:
+            with open(self.root / EPOCH_FILE, 'r') as f:
+                return json.load(f)
+        except (FileNotFoundError, json.JSONDecodeError):
+            return {'epoch': 0}
+
+    @property
+    def epoch(self) -> int:
+        if self._epoch is None:
+            self._epoch = int(self._read_epoch().get('epoch') or 0)
+        return self._epoch
+
+    def bump(self, reason: str, task_id: Any = None, reset_pending: bool = False) -> int:
+        """エポックを進め、古いエポックのエントリを削除する（reset_pending: このエポックの後にサイトがリセットされる）"""
+        self.root.mkdir(parents=True, exist_ok=True)
+        with open(self.lock_path, 'a+') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                epoch = int(self._read_epoch().get('epoch') or 0) + 1
+                tmp = self.root / f'{EPOCH_FILE}.tmp'
+                with open(tmp, 'w') as f:
+                    json.dump({'epoch': epoch, 'reason': reason, 'task_id': task_id, 'reset_pending': reset_pending,
+                               'at': time.strftime('%Y-%m-%dT%H:%M:%S')}, f)
+                os.replace(tmp, self.root / EPOCH_FILE)
+                for d in self.root.glob('e*'):
+                    if d.is_dir() and d.name != f'e{epoch}':
+                        shutil.rmtree(d, ignore_errors=True)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+        self._epoch = epoch
+        return epoch
+
+    def begin_task(self, cfg: dict) -> int:
+        """評価開始時に呼ぶ。変更系のタスク、または直前が require_reset のタスク（サイトはリセット済み）ならエポックを進める"""
+        info = self._read_epoch()
+        reasons = []
+        if info.get('reset_pending'):
+            reasons.append(f"site reset after task {info.get('task_id')}")
+        if is_mutating(cfg):
+            reasons.append('require_reset' if cfg.get('require_reset') else 'mutating intent')
+        if reasons:
+            reason = ' / '.join(reasons)
+            epoch = self.bump(reason, cfg.get('task_id'), reset_pending=bool(cfg.get('require_reset')))
+            print(f"[情報] ページキャッシュ: エポックを {epoch} に更新（{reason}）")
+            return epoch
+        print(f"[情報] ページキャッシュ: エポック {self.epoch} を使用")
+        return self.epoch
+
+    # ----- エントリ -----
+
+    def _entry_path(self, url: str) -> Path:
+        return self.root / f'e{self.epoch}' / f'{_url_key(url)}.json.gz'
+
+    def _load(self, url: str) -> Optional[Dict[str, Any]]:
+        try:
+            with gzip.open(self._entry_path(url), 'rt', encoding='utf-8') as f:
+                entry = json.load(f)
+        except (FileNotFoundError, OSError, json.JSONDecodeError):
+            return None
+        # URL ハッシュの衝突・別エポックの書き込みを除外
+        if entry.get('url') != url or entry.get('epoch') != self.epoch:
+            return None
+        return entry
+
+    def _save(self, url: str, entry: Dict[str, Any]) -> None:
+        path = self._entry_path(url)
+        path.parent.mkdir(parents=True, exist_ok=True)
+        tmp = path.with_name(f'{path.name}.{os.getpid()}.tmp')
+        with gzip.open(tmp, 'wt', encoding='utf-8') as f:
+            json.dump(entry, f, ensure_ascii=False)
+        os.replace(tmp, path)
+
+    def lookup(self, url: str, locator: str) -> Optional[str]:
+        """キャッシュから locator の値を返す（無ければ None でナビゲーションへ）"""
+        entry = self._load(url)
+        value = None
+        if entry is not None:
+            value = (entry.get('locators') or {}).get(locator)
+            if value is None and entry.get('html'):
+                # 別の locator は保存済み DOM を静的に評価（http_fastpath は bs4 が必要なため必要時のみ読み込む）
+                from http_fastpath import read_html
+                value = read_html(entry['html'], locator)
+                if value is not None:
+                    self.dom_hits += 1
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        print(f"[情報] ページキャッシュ: ヒット（エポック {self.epoch}）{url}")
+        return value
+
+    def store(self, url: str, locator: str, value: str, page=None) -> None:
+        """locator の値を保存し、page が渡され DOM が未保存なら DOM も保存する"""
+        try:
+            entry = self._load(url) or {'url': url, 'epoch': self.epoch, 'html': None, 'locators': {}}
+            entry['locators'][locator] = value
+            if page is not None and not entry.get('html'):
+                try:
+                    entry['html'] = page.evaluate(CAPTURE_JS)
+                    self.captured += 1
+                except Exception as e:
+                    print(f"[警告] ページキャッシュ: DOM の保存に失敗: {e}")
+            entry['stored_at'] = time.time()
+            self._save(url, entry)
+            self.stored += 1
+        except OSError as e:
+            print(f"[警告] ページキャッシュへの保存に失敗: {e}")
+
+    def summary(self) -> dict:
+        return {
+            'epoch': self.epoch,
+            'hits': self.hits,
+            'dom_hits': self.dom_hits,
+            'misses': self.misses,
+            'stored': self.stored,
+            'captured': self.captured,
+        }
+
+
+def cmd_status(cache: PageCache) -> None:
+    info = cache._read_epoch()
+    entries = list((cache.root / f"e{cache.epoch}").glob('*.json.gz'))
+    size = sum(p.stat().st_size for p in entries)
+    print(f"[結果] 保存先: {cache.root}")
+    print(f"[結果] エポック {cache.epoch}（{info.get('reason') or '-'} / task {info.get('task_id')} / {info.get('at') or '-'}）")
+    print(f"[結果] エントリ {len(entries)}件 / {size / 1024:.1f}KB")
+    if info.get('reset_pending'):
+        print("[結果] 次のタスクの評価開始時にエポックを進めます（require_reset のタスクの後）")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='program_html の対象ページのスイープ内キャッシュ')
+    ap.add_argument('--dir', default='', help='保存先（既定: AGENT_WEBARENA_PAGE_CACHE_DIR または /tmp/webarena-page-cache）')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    sub.add_parser('status', help='現在のエポックとエントリ数を表示')
+    p_bump = sub.add_parser('bump', help='エポックを進める（古いエントリは削除）')
+    p_bump.add_argument('--reason', default='manual')
+    sub.add_parser('clear', help='全エントリとエポックを消去')
+    args = ap.parse_args()
+
+    cache = PageCache(Path(args.dir) if args.dir else None)
+    if args.cmd == 'status':
+        cmd_status(cache)
+    elif args.cmd == 'bump':
+        print(f"[結果] エポックを {cache.bump(args.reason)} に更新")
+    else:
+        shutil.rmtree(cache.root, ignore_errors=True)
+        print(f"[結果] 消去: {cache.root}")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,426 @@
+#!/usr/bin/env python3
+"""
+fuzzy_match のローカル事前判定（明らかな一致 / 不一致は判定モデルを呼ばずに確定する）
+・特徴量（回答は判定モデルに渡すのと同じ clean 前の生の回答）
+  - containment: 正規化した参照が正規化した回答にそのまま含まれる（例: "Chloe Tank Top" と "The best seller is **Chloe Tank Top**"）
+  - 数値: 参照に含まれる数値のうち回答に現れる割合。数値は値で比較する（"$25" と "25.00"、"$1,234.5" と "1234.50" は同じ。
+    数詞は複合語を含めて1つの数字に揃える: "twenty-five" → 25、"one hundred twenty" → 120）
+  - 否定: 参照に無い否定語（no / not / never / n't 等）が回答にある
+  - 語の被覆率: 参照の内容語のうち回答に現れる割合（回答全体 / 行・文単位の最大）
+  - 類似度: 回答の行・文ごとの文字 3-gram TF-IDF ベクトルと参照のコサイン類似度の最大（numpy で一括計算）
+・判定
+  - 一致: containment、または参照の内容語・数値をすべて含む行・文があり、その類似度が accept_sim 以上。
+    ただし参照が短い（内容語 MIN_ACCEPT_TOKENS 語未満）、または回答に否定語がある場合は一致として確定しない
+    （"in stock" と "No, it is not in stock"、"2" と "12 orders by 2 customers" のように含まれていても一致とは限らない）。
+    数値を含む参照は、語の境界での containment かつ参照の数値がすべて値で一致する場合だけ一致とする（"January: 11 orders"）
+  - 不一致: 参照の数値が回答に1つも無く語の被覆率が reject_cov 以下、または内容語を1つも共有せず類似度が reject_sim 以下
+  - それ以外（中間帯）は従来どおり判定モデルへ
+・閾値は保存済みの判定履歴（サマリーの eval_method_details の fuzzy_match の判定結果）で calibrate し、
+  scripts/prejudge_thresholds.json に保存する（履歴が MIN_CALIBRATION_SAMPLES 件未満なら保存しない）。
+  閾値ファイルは同梱しておらず、較正するまでは保守的な既定値を使う。stats で現在の閾値と判定モデルの一致率を確認できる
+
+環境変数:
+  AGENT_WEBARENA_PREJUDGE             on = 事前判定で確定した参照は判定モデルを呼ばない / shadow = 判定モデルも呼び、事前判定は記録のみ（既定 off）
+  AGENT_WEBARENA_PREJUDGE_THRESHOLDS  閾値ファイル（既定: scripts/prejudge_thresholds.json）
+
+使い方:
+  python scripts/prejudge.py calibrate --tasks-dir tasks --tasks-dir /home/ec2-user/webarena-local/evaluation-result
+  python scripts/prejudge.py stats --tasks-dir tasks -v
+  python scripts/prejudge.py check "The most recent cancelled order is **May 23, 2023**" "May 23 2023"
+"""
+import argparse
+import hashlib
+import json
+import math
+import os
+import re
+import sys
+import unicodedata
+from pathlib import Path
+from decimal import Decimal
+from typing import Any, Dict, List, Optional, Tuple
+
+import numpy as np
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+DEFAULT_THRESHOLDS_FILE = SCRIPT_DIR / 'prejudge_thresholds.json'
+MODES = ('off', 'on', 'shadow')
+
+# 閾値ファイルが無い場合の既定値（保守的: ほぼ containment と数値の欠落だけで確定する）
+DEFAULT_THRESHOLDS = {'containment': True, 'accept_sim': 0.9, 'reject_cov': 0.34, 'reject_sim': 0.05}
+
+NGRAM = 3
+MIN_CALIBRATION_SAMPLES = 50
+MIN_ACCEPT_TOKENS = 3  # 一致として確定できる参照の最小の内容語数（これ未満は偶然含まれることが多い）
+
+_STOPWORDS = frozenset(
+    'a an and are as at be by for from has have in is it its of on or that the their this to was were with'.split()
+)
+_SMALL_NUMBER_WORDS = {
+    'zero': 0, 'one': 1, 'two': 2, 'three': 3, 'four': 4, 'five': 5, 'six': 6, 'seven': 7, 'eight': 8, 'nine': 9,
+    'ten': 10, 'eleven': 11, 'twelve': 12, 'thirteen': 13, 'fourteen': 14, 'fifteen': 15, 'sixteen': 16,
+    'seventeen': 17, 'eighteen': 18, 'nineteen': 19,
+}
+_TENS_WORDS = {'twenty': 20, 'thirty': 30, 'forty': 40, 'fifty': 50, 'sixty': 60, 'seventy': 70, 'eighty': 80, 'ninety': 90}
+_SCALE_WORDS = {'thousand': 1000, 'million': 1000000}
+_TOKEN = re.compile(r'[a-z]+|\d+(?:\.\d+)?')
+_SEGMENT_SPLIT = re.compile(r'\n+|(?<=[.!?])\s+')
+_NUMBER = re.compile(r'^\d+(?:\.\d+)?$')
+_NEGATION = re.compile(r"\b(?:no|not|never|none|nothing|neither|nor|without|cannot)\b|n[’']t\b", re.IGNORECASE)
+
+
+def mode() -> str:
+    raw = str(os.environ.get('AGENT_WEBARENA_PREJUDGE', 'off')).strip().lower()
+    return raw if raw in MODES else 'off'
+
+
+def normalize(text: str) -> str:
+    """小文字化・記号（markdown を含む）除去・数詞の数字化・空白の正規化"""
+    s = unicodedata.normalize('NFKC', str(text or '')).lower()
+    s = re.sub(r'(?<=\d),(?=\d{3}\b)', '', s)  # 1,234 → 1234
+    s = re.sub(r'[^\w.]+|_', ' ', s)
+    s = re.sub(r'\.(?!\d)|(?<!\d)\.', ' ', s)   # 小数点以外の '.'
+    tokens = [_canonical_number(t) for t in _merge_number_words(s.split())]
+    return ' '.join(tokens)
+
+
+def _number_word_kind(token: str) -> Optional[str]:
+    if token in _SMALL_NUMBER_WORDS:
+        return 'small'
+    if token in _TENS_WORDS:
+        return 'tens'
+    if token == 'hundred':
+        return 'hundred'
+    if token in _SCALE_WORDS:
+        return 'scale'
+    return None
+
+
+def _merge_number_words(tokens: List[str]) -> List[str]:
+    """連続する数詞を1つの数字にする（"twenty five" → "25"、"two hundred fifty" → "250"、"five six" → "5 6"）"""
+    out: List[str] = []
+    total = current = 0
+    prev: Optional[str] = None  # 組み立て中の数の直前の語の種類（None = 組み立て中でない）
+
+    def flush() -> None:
+        nonlocal total, current, prev
+        if prev is not None:
+            out.append(str(total + current))
+        total = current = 0
+        prev = None
+
+    for t in tokens:
+        kind = _number_word_kind(t)
+        if kind is None:
+            flush()
+            out.append(t)
+            continue
+        # 続けて読めない並び（"five six"、"twenty thirty"、"fifteen five"）は別の数にする
+        if prev is not None and not (
+            (kind == 'small' and (prev in ('hundred', 'scale') or (prev == 'tens' and _SMALL_NUMBER_WORDS[t] < 10)))
+            or (kind == 'tens' and prev in ('hundred', 'scale'))
+            or (kind == 'hundred' and prev == 'small')
+            or (kind == 'scale' and prev in ('small', 'tens', 'hundred'))
+        ):
+            flush()
+        if kind == 'small':
+            current += _SMALL_NUMBER_WORDS[t]
+        elif kind == 'tens':
+            current += _TENS_WORDS[t]
+        elif kind == 'hundred':
+            current = (current or 1) * 100
+        else:
+            total += (current or 1) * _SCALE_WORDS[t]
+            current = 0
+        prev = kind
+    flush()
+    return out
+
+
+def _canonical_number(token: str) -> str:
+    """小数は値の表記に揃える（25.00 → 25、1234.50 → 1234.5）。整数は先頭の 0 を含めてそのまま（注文番号等）"""
+    if '.' not in token or not _NUMBER.match(token):
+        return token
+    return format(Decimal(token).normalize(), 'f')
+
+
+def has_negation(text: str) -> bool:
+    return bool(_NEGATION.search(str(text or '')))
+
+
+def _tokens(norm: str) -> List[str]:
+    return _TOKEN.findall(norm)
+
+
+def _content_tokens(norm: str) -> List[str]:
+    return [t for t in _tokens(norm) if t not in _STOPWORDS]
+
+
+def _grams(norm: str) -> List[str]:
+    padded = f' {norm} '
+    return [padded[i:i + NGRAM] for i in range(max(len(padded) - NGRAM + 1, 1))]
+
+
+def _coverage(ref_tokens: List[str], tokens: set) -> float:
+    if not ref_tokens:
+        return 0.0
+    return sum(1 for t in ref_tokens if t in tokens) / len(ref_tokens)
+
+
+def segment_similarity(segments: List[str], ref: str) -> np.ndarray:
+    """各行・文と参照の文字 n-gram TF-IDF コサイン類似度（IDF は行・文 + 参照を文書集合として算出）"""
+    docs = segments + [ref]
+    vocab: Dict[str, int] = {}
+    rows: List[Dict[int, int]] = []
+    for d in docs:
+        counts: Dict[int, int] = {}
+        for g in _grams(d):
+            idx = vocab.setdefault(g, len(vocab))
+            counts[idx] = counts.get(idx, 0) + 1
+        rows.append(counts)
+    tf = np.zeros((len(docs), len(vocab)), dtype=np.float32)
+    for i, counts in enumerate(rows):
+        if counts:
+            tf[i, list(counts.keys())] = list(counts.values())
+    df = np.count_nonzero(tf, axis=0)
+    idf = np.log((1.0 + len(docs)) / (1.0 + df)) + 1.0
+    mat = tf * idf
+    mat /= np.maximum(np.linalg.norm(mat, axis=1, keepdims=True), 1e-12)
+    return mat[:-1] @ mat[-1]
+
+
+def features(pred: str, reference: str) -> Dict[str, Any]:
+    norm_pred = normalize(pred)
+    norm_ref = normalize(reference)
+    ref_tokens = _content_tokens(norm_ref)
+    ref_numbers = [t for t in ref_tokens if _NUMBER.match(t)]
+    pred_tokens = set(_tokens(norm_pred))
+    segments = [normalize(s) for s in _SEGMENT_SPLIT.split(str(pred or ''))]
+    segments = [s for s in segments if s]
+
+    seg_cov = 0.0
+    seg_sim = 0.0
+    if segments and norm_ref:
+        sims = segment_similarity(segments, norm_ref)
+        covs = np.asarray([_coverage(ref_tokens, set(_tokens(s))) for s in segments])
+        seg_cov = float(covs.max())
+        # 被覆率が最大の行・文のうち最も類似度の高いもの
+        seg_sim = float(sims[covs == covs.max()].max())
+    return {
+        'containment': bool(norm_ref) and f' {norm_ref} ' in f' {norm_pred} ',
+        'ref_tokens': len(ref_tokens),
+        'negation': has_negation(pred) and not has_negation(reference),
+        'ref_numbers': ref_numbers,
+        'num_coverage': _coverage(ref_numbers, pred_tokens) if ref_numbers else None,
+        'token_coverage': round(_coverage(ref_tokens, pred_tokens), 4),
+        'seg_coverage': round(seg_cov, 4),
+        'seg_sim': round(seg_sim, 4),
+    }
+
+
+def decide(feat: Dict[str, Any], thresholds: Dict[str, Any]) -> Tuple[Optional[float], str]:
+    """(1.0 / 0.0 / None=判定モデルへ, 理由)"""
+    if _accept_allowed(feat):
+        if thresholds.get('containment', True) and feat['containment'] and _numbers_matched(feat):
+            return 1.0, 'containment'
+        if not feat['ref_numbers'] and feat['seg_coverage'] >= 1.0 and feat['seg_sim'] >= float(thresholds['accept_sim']):
+            return 1.0, 'segment'
+    if feat['num_coverage'] == 0.0 and feat['token_coverage'] <= float(thresholds['reject_cov']):
+        return 0.0, 'numbers_missing'
+    if feat['token_coverage'] == 0.0 and feat['seg_sim'] <= float(thresholds['reject_sim']):
+        return 0.0, 'disjoint'
+    return None, 'ambiguous'
+
+
+def _accept_allowed(feat: Dict[str, Any]) -> bool:
+    """一致として確定してよい参照・回答か（短い参照・否定語のある回答は判定モデルへ）"""
+    if feat.get('negation'):
+        return False
+    return int(feat.get('ref_tokens') or 0) >= MIN_ACCEPT_TOKENS
+
+
+def _numbers_matched(feat: Dict[str, Any]) -> bool:
+    """参照の数値がすべて回答に値として現れるか（数値の無い参照は常に真）"""
+    return not feat['ref_numbers'] or feat['num_coverage'] == 1.0
+
+
+def load_thresholds(path: Optional[Path] = None) -> Dict[str, Any]:
+    env = str(os.environ.get('AGENT_WEBARENA_PREJUDGE_THRESHOLDS', '')).strip()
+    path = Path(path or env or DEFAULT_THRESHOLDS_FILE)
+    try:
+        with open(path, 'r') as f:
+            raw = json.load(f)
+    except FileNotFoundError:
+        return dict(DEFAULT_THRESHOLDS)
+    return {**DEFAULT_THRESHOLDS, **(raw.get('thresholds') or {})}
+
+
+def fingerprint(thresholds: Dict[str, Any]) -> str:
+    """評価キャッシュのキーに含める（事前判定のロジック・閾値が変われば再評価）"""
+    h = hashlib.sha256(Path(__file__).read_bytes())
+    h.update(json.dumps(thresholds, sort_keys=True).encode('utf-8'))
+    return h.hexdigest()[:12]
+
+
+def prejudge(pred: str, reference: str, thresholds: Dict[str, Any]) -> Dict[str, Any]:
+    feat = features(pred, reference)
+    verdict, reason = decide(feat, thresholds)
+    return {'verdict': verdict, 'reason': reason, 'features': feat}
+
+
+# ----- 判定履歴での較正 -----
+
+_UNUSABLE_REASONING = ('[LLM呼び出しエラー]', '[エラー]', '[判定不明]', '[事前判定]')
+
+
+def load_history(tasks_dirs: List[Path]) -> List[dict]:
+    """サマリーの fuzzy_match の判定（判定モデルによるもの）を (回答, 参照, 判定) の組で集める（同じ組は最新の判定）"""
+    from latency_report import load_summaries
+    samples: Dict[Tuple[str, str], dict] = {}
+    for tasks_dir in tasks_dirs:
+        for s in load_summaries(tasks_dir, all_runs=True):
+            details = s.get('eval_method_details') or {}
+            pred = details.get('raw_prediction', s.get('pipeline_answer'))
+            for a in details.get('approaches') or []:
+                if a.get('type') != 'fuzzy_match' or a.get('fallback_to_ua_match') or not isinstance(a.get('refs'), list):
+                    continue
+                scores = a.get('individual_scores') or []
+                reasonings = a.get('llm_reasonings') or [''] * len(scores)
+                for ref, score, reasoning in zip(a['refs'], scores, reasonings):
+                    if str(reasoning).startswith(_UNUSABLE_REASONING):
+                        continue
+                    samples[(str(pred or ''), str(ref))] = {
+                        'task_id': s.get('task_id'),
+                        'pred': str(pred or ''),
+                        'reference': str(ref),
+                        'llm': float(score),
+                        'timestamp': s.get('timestamp') or '',
+                    }
+    return sorted(samples.values(), key=lambda x: (str(x['task_id']), x['reference']))
+
+
+def agreement(samples: List[dict], thresholds: Dict[str, Any]) -> Dict[str, Any]:
+    """事前判定と判定モデルの一致状況"""
+    stats: Dict[str, Any] = {'samples': len(samples), 'accepted': 0, 'rejected': 0, 'ambiguous': 0,
+                             'agree': 0, 'disagree': 0, 'by_reason': {}, 'disagreements': []}
+    for x in samples:
+        verdict, reason = decide(x['features'], thresholds)
+        r = stats['by_reason'].setdefault(reason, {'n': 0, 'agree': 0})
+        r['n'] += 1
+        if verdict is None:
+            stats['ambiguous'] += 1
+            continue
+        stats['accepted' if verdict == 1.0 else 'rejected'] += 1
+        if verdict == x['llm']:
+            stats['agree'] += 1
+            r['agree'] += 1
+        else:
+            stats['disagree'] += 1
+            stats['disagreements'].append({'task_id': x['task_id'], 'reference': x['reference'], 'llm': x['llm'],
+                                           'prejudge': verdict, 'reason': reason})
+    settled = stats['accepted'] + stats['rejected']
+    stats['settled'] = settled
+    stats['agreement'] = round(stats['agree'] / settled, 4) if settled else None
+    stats['calls_avoided'] = round(settled / len(samples), 4) if samples else 0.0
+    return stats
+
+
+def _candidates(values: List[float], disabled: float) -> List[float]:
+    return sorted(set([round(v, 4) for v in values] + [disabled]))
+
+
+def calibrate(samples: List[dict], max_disagree: float) -> Tuple[Dict[str, Any], Dict[str, Any]]:
+    """許容する不一致率以内で確定件数が最大の閾値（同数なら最も保守的なもの）を選ぶ"""
+    feats = [x['features'] for x in samples]
+    grid_accept = _candidates([f['seg_sim'] for f in feats if f['seg_coverage'] >= 1.0], 1.01)
+    grid_reject_cov = _candidates([f['token_coverage'] for f in feats if f['num_coverage'] == 0.0], -1.0)
+    grid_reject_sim = _candidates([f['seg_sim'] for f in feats if f['token_coverage'] == 0.0], -1.0)
+    allowed = math.floor(max_disagree * len(samples))
+    best: Optional[Tuple[tuple, Dict[str, Any], Dict[str, Any]]] = None
+    for containment in (True, False):
+        for accept_sim in grid_accept:
+            for reject_cov in grid_reject_cov:
+                for reject_sim in grid_reject_sim:
+                    th = {'containment': containment, 'accept_sim': accept_sim, 'reject_cov': reject_cov, 'reject_sim': reject_sim}
+                    st = agreement(samples, th)
+                    if st['disagree'] > allowed:
+                        continue
+                    rank = (st['settled'], -st['disagree'], containment, accept_sim, -reject_cov, -reject_sim)
+                    if best is None or rank > best[0]:
+                        best = (rank, th, st)
+    if best is None:
+        th = {'containment': False, 'accept_sim': 1.01, 'reject_cov': -1.0, 'reject_sim': -1.0}
+        return th, agreement(samples, th)
+    return best[1], best[2]
+
+
+def _print_stats(stats: Dict[str, Any], verbose: bool) -> None:
+    print(f"[結果] 判定履歴 {stats['samples']}件: 一致確定 {stats['accepted']} / 不一致確定 {stats['rejected']} / 中間帯（判定モデルへ） {stats['ambiguous']}")
+    print(f"[結果] 判定モデルとの一致率 {stats['agreement']}（不一致 {stats['disagree']}件） / 削減できる判定モデル呼び出し {stats['calls_avoided'] * 100:.1f}%")
+    for reason, r in sorted(stats['by_reason'].items()):
+        print(f"  {reason}: {r['n']}件" + (f"（一致 {r['agree']}）" if reason != 'ambiguous' else ''))
+    if verbose:
+        for d in stats['disagreements']:
+            print(f"  [不一致] task {d['task_id']} ref={d['reference']!r} 判定モデル={d['llm']} 事前判定={d['prejudge']}（{d['reason']}）")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='fuzzy_match のローカル事前判定')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+    p_cal = sub.add_parser('calibrate', help='判定履歴から閾値を決めて保存')
+    p_cal.add_argument('--tasks-dir', type=Path, action='append', required=True, help='サマリーの tasks ディレクトリ（複数指定可）')
+    p_cal.add_argument('--max-disagree', type=float, default=0.0, help='許容する判定モデルとの不一致率（既定 0）')
+    p_cal.add_argument('--output', type=Path, default=DEFAULT_THRESHOLDS_FILE)
+    p_cal.add_argument('--min-samples', type=int, default=MIN_CALIBRATION_SAMPLES,
+                       help=f'これ未満の判定履歴では閾値を保存しない（既定 {MIN_CALIBRATION_SAMPLES}）')
+    p_cal.add_argument('-v', '--verbose', action='store_true')
+    p_stats = sub.add_parser('stats', help='現在の閾値と判定履歴の一致状況')
+    p_stats.add_argument('--tasks-dir', type=Path, action='append', required=True)
+    p_stats.add_argument('--thresholds', type=Path, default=None)
+    p_stats.add_argument('-v', '--verbose', action='store_true')
+    p_check = sub.add_parser('check', help='1組の回答・参照を事前判定')
+    p_check.add_argument('pred')
+    p_check.add_argument('reference')
+    p_check.add_argument('--thresholds', type=Path, default=None)
+    args = ap.parse_args()
+
+    if args.cmd == 'check':
+        print(json.dumps(prejudge(args.pred, args.reference, load_thresholds(args.thresholds)), indent=2, ensure_ascii=False))
+        return
+
+    samples = load_history(args.tasks_dir)
+    if not samples:
+        print("[エラー] fuzzy_match の判定履歴がありません")
+        sys.exit(1)
+    for x in samples:
+        x['features'] = features(x['pred'], x['reference'])
+
+    if args.cmd == 'stats':
+        _print_stats(agreement(samples, load_thresholds(args.thresholds)), args.verbose)
+        return
+
+    thresholds, stats = calibrate(samples, args.max_disagree)
+    _print_stats(stats, args.verbose)
+    print(f"[結果] 閾値: {thresholds}")
+    if len(samples) < args.min_samples:
+        # 少ない履歴に合わせた閾値は過適合するため保存しない（既定値のまま）
+        print(f"[エラー] 判定履歴が {len(samples)}件のため閾値を保存しません（{args.min_samples}件以上が必要、--min-samples で変更可）")
+        sys.exit(1)
+    payload = {
+        'thresholds': thresholds,
+        'calibration': {
+            'tasks_dirs': [str(p) for p in args.tasks_dir],
+            'samples': stats['samples'],
+            'settled': stats['settled'],
+            'agreement': stats['agreement'],
+            'max_disagree': args.max_disagree,
+        },
+    }
+    with open(args.output, 'w') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+        f.write('\n')
+    print(f"[情報] 保存: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
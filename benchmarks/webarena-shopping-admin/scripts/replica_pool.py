@@ -0,0 +1,320 @@
+#!/usr/bin/env python3
+"""
+shopping-admin レプリカプール（ブラウザ採点の振り分け）
+・同等のサイトレプリカ（admin / フロントエンドのベースURL + storage_state）の一覧を JSON で受け取る
+・URL を指定する program_html 項目（読み取りのみ）を、未完了リクエスト数が最小の健全なレプリカへ振り分ける
+・未完了数とヘルス状態は共有ステートファイル（fcntl.flock で排他）に保持し、並列に動く複数の evaluate.py 間で共有する
+・ヘルスチェック: admin ベースURLへの HTTP GET（TTL 付きでキャッシュ）。ナビゲーション失敗時は不健全として一定時間除外
+・url_match 用に、レプリカのURLを正規（config 上の）ベースURLに戻す canonicalize を提供
+
+前提: レプリカは同じデータ（共有DB 等）を参照していること。採点はエージェントが変更したサイト状態を読むため、
+      独立したDBを持つレプリカを混在させると結果が変わる
+
+設定（AGENT_WEBARENA_REPLICAS に JSON ファイルのパスを指定）:
+  {
+    "canonical": {"admin": "http://127.0.0.1:7780/admin", "front": "http://127.0.0.1:7770"},
+    "replicas": [
+      {"name": "r1", "admin": "http://10.0.0.11:7780/admin", "front": "http://10.0.0.11:7770",
+       "storage_state": "/home/ec2-user/webarena-local/.auth/r1_state.json"},
+      ...
+    ]
+  }
+
+使い方:
+  python scripts/replica_pool.py status            # 未完了数・ヘルス状態を表示
+  python scripts/replica_pool.py check             # 全レプリカのヘルスチェックを実行
+"""
+import argparse
+import fcntl
+import hashlib
+import json
+import os
+import random
+import time
+import urllib.error
+import urllib.request
+from contextlib import contextmanager
+from pathlib import Path
+from typing import Dict, Iterator, List, Optional
+
+DEFAULT_CANONICAL_ADMIN = 'http://127.0.0.1:7780/admin'
+DEFAULT_CANONICAL_FRONT = 'http://127.0.0.1:7770'
+DEFAULT_STATE_DIR = Path('/tmp/webarena-replicas')
+
+HEALTH_TTL_S = 30.0  # ヘルスチェック結果の有効期間
+UNHEALTHY_BACKOFF_S = 60.0  # ナビゲーション失敗後に除外する期間
+LEASE_TTL_S = 600.0  # プロセス異常終了時に残ったリースを破棄するまでの時間
+HEALTH_TIMEOUT_S = 5.0
+
+
+class Replica:
+    def __init__(self, name: str, admin: str, front: str, storage_state: str = ''):
+        self.name = name
+        self.admin = admin.rstrip('/')
+        self.front = front.rstrip('/')
+        self.storage_state = storage_state
+
+    def __repr__(self) -> str:
+        return f"Replica({self.name}, admin={self.admin}, front={self.front})"
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+        return True
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+
+
+def _rebase(url: str, src: str, dst: str) -> Optional[str]:
+    if url == src or url.startswith(src + '/') or url.startswith(src + '?'):
+        return dst + url[len(src):]
+    return None
+
+
+class ReplicaPool:
+    def __init__(self, replicas: List[Replica], canonical_admin: str = DEFAULT_CANONICAL_ADMIN,
+                 canonical_front: str = DEFAULT_CANONICAL_FRONT, state_dir: Path = DEFAULT_STATE_DIR):
+        if not replicas:
+            raise ValueError('レプリカが1件もありません')
+        self.replicas = replicas
+        self.canonical_admin = canonical_admin.rstrip('/')
+        self.canonical_front = canonical_front.rstrip('/')
+        pool_id = hashlib.sha256(json.dumps([[r.name, r.admin, r.front] for r in replicas]).encode()).hexdigest()[:12]
+        state_dir.mkdir(parents=True, exist_ok=True)
+        self.state_path = state_dir / f'pool_{pool_id}.json'
+        self.lock_path = state_dir / f'pool_{pool_id}.lock'
+
+    @classmethod
+    def from_file(cls, path: Path) -> 'ReplicaPool':
+        with open(path, 'r') as f:
+            conf = json.load(f)
+        canonical = conf.get('canonical') or {}
+        replicas = [
+            Replica(str(r.get('name') or f'replica{i}'), str(r['admin']), str(r['front']), str(r.get('storage_state') or ''))
+            for i, r in enumerate(conf.get('replicas') or [])
+        ]
+        state_dir = str(os.environ.get('AGENT_WEBARENA_REPLICA_STATE_DIR', '')).strip()
+        return cls(replicas, str(canonical.get('admin') or DEFAULT_CANONICAL_ADMIN),
+                   str(canonical.get('front') or DEFAULT_CANONICAL_FRONT),
+                   Path(state_dir) if state_dir else DEFAULT_STATE_DIR)
+
+    @classmethod
+    def from_env(cls) -> Optional['ReplicaPool']:
+        """AGENT_WEBARENA_REPLICAS が未設定なら None（従来どおり単一インスタンス）"""
+        path = str(os.environ.get('AGENT_WEBARENA_REPLICAS', '')).strip()
+        if not path:
+            return None
+        try:
+            return cls.from_file(Path(path))
+        except Exception as e:
+            print(f"[警告] レプリカ設定の読み込みに失敗（単一インスタンスで続行）: {e}")
+            return None
+
+    # ---- URL 変換 ----
+
+    def rewrite(self, url: str, replica: Replica) -> str:
+        """正規ベースURL → レプリカのベースURL"""
+        for src, dst in ((self.canonical_admin, replica.admin), (self.canonical_front, replica.front)):
+            out = _rebase(url, src, dst)
+            if out is not None:
+                return out
+        return url
+
+    def canonicalize(self, url: str) -> str:
+        """レプリカのベースURL → 正規ベースURL（url_match の比較用）"""
+        for r in self.replicas:
+            for src, dst in ((r.admin, self.canonical_admin), (r.front, self.canonical_front)):
+                out = _rebase(url, src, dst)
+                if out is not None:
+                    return out
+        return url
+
+    # ---- 共有ステート ----
+
+    @contextmanager
+    def _locked_state(self) -> Iterator[Dict[str, dict]]:
+        with open(self.lock_path, 'a+') as lock:
+            fcntl.flock(lock, fcntl.LOCK_EX)
+            try:
+                try:
+                    with open(self.state_path, 'r') as f:
+                        state = json.load(f)
+                except (FileNotFoundError, json.JSONDecodeError):
+                    state = {}
+                for r in self.replicas:
+                    state.setdefault(r.name, {'leases': [], 'healthy': True, 'checked_at': 0.0, 'retry_at': 0.0})
+                yield state
+                tmp = self.state_path.with_suffix('.json.tmp')
+                with open(tmp, 'w') as f:
+                    json.dump(state, f)
+                os.replace(tmp, self.state_path)
+            finally:
+                fcntl.flock(lock, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _live_leases(entry: dict, now: float) -> List[dict]:
+        return [l for l in entry.get('leases') or []
+                if _pid_alive(int(l.get('pid', 0))) and now - float(l.get('at', 0.0)) < LEASE_TTL_S]
+
+    def check_health(self, replica: Replica) -> bool:
+        try:
+            req = urllib.request.Request(replica.admin, method='GET')
+            with urllib.request.urlopen(req, timeout=HEALTH_TIMEOUT_S) as res:
+                return int(res.status) < 500
+        except urllib.error.HTTPError as e:
+            return int(e.code) < 500
+        except Exception:
+            return False
+
+    def _refresh_health(self, now: float) -> None:
+        """TTL 切れのレプリカだけをロック外でチェックし、結果を書き戻す"""
+        with self._locked_state() as state:
+            stale = [r for r in self.replicas
+                     if now - float(state[r.name].get('checked_at', 0.0)) >= HEALTH_TTL_S
+                     and now >= float(state[r.name].get('retry_at', 0.0))]
+        if not stale:
+            return
+        results = {r.name: self.check_health(r) for r in stale}
+        with self._locked_state() as state:
+            for name, ok in results.items():
+                state[name]['healthy'] = ok
+                state[name]['checked_at'] = time.time()
+                if not ok:
+                    state[name]['retry_at'] = time.time() + UNHEALTHY_BACKOFF_S
+                    print(f"[警告] レプリカ {name} はヘルスチェックに失敗しました")
+
+    @contextmanager
+    def acquire(self, exclude: Optional[List[str]] = None) -> Iterator[Replica]:
+        """未完了リクエスト数が最小の健全なレプリカを1件リースする（全滅時は未完了数最小のものを使う）"""
+        now = time.time()
+        self._refresh_health(now)
+        token = f"{os.getpid()}-{random.getrandbits(32):08x}"
+        excluded = set(exclude or [])
+        with self._locked_state() as state:
+            candidates = []
+            for r in self.replicas:
+                entry = state[r.name]
+                entry['leases'] = self._live_leases(entry, now)
+                if r.name in excluded:
+                    continue
+                healthy = bool(entry.get('healthy', True))
+                candidates.append((0 if healthy else 1, len(entry['leases']), random.random(), r))
+            if not candidates:
+                candidates = [(0, len(state[r.name]['leases']), random.random(), r) for r in self.replicas]
+            chosen = min(candidates, key=lambda c: c[:3])[3]
+            state[chosen.name]['leases'].append({'token': token, 'pid': os.getpid(), 'at': now})
+        try:
+            yield chosen
+        finally:
+            with self._locked_state() as state:
+                entry = state[chosen.name]
+                entry['leases'] = [l for l in entry.get('leases') or [] if l.get('token') != token]
+
+    def mark_unhealthy(self, replica: Replica, reason: str = '') -> None:
+        with self._locked_state() as state:
+            state[replica.name]['healthy'] = False
+            state[replica.name]['checked_at'] = time.time()
+            state[replica.name]['retry_at'] = time.time() + UNHEALTHY_BACKOFF_S
+        print(f"[警告] レプリカ {replica.name} を一時的に除外します: {reason}")
+
+    def status(self) -> List[dict]:
+        now = time.time()
+        with self._locked_state() as state:
+            rows = []
+            for r in self.replicas:
+                entry = state[r.name]
+                entry['leases'] = self._live_leases(entry, now)
+                rows.append({'name': r.name, 'admin': r.admin, 'front': r.front, 'outstanding': len(entry['leases']),
+                             'healthy': bool(entry.get('healthy', True)),
+                             'checked_ago_s': round(now - float(entry.get('checked_at', 0.0)), 1) if entry.get('checked_at') else None})
+        return rows
+
+
+class ReplicaPages:
+    """
+    program_html の URL 指定項目を、リースしたレプリカ上の専用ページで開く（Playwright 同期API）
+    ・レプリカごとに storage_state 付きのコンテキストを1つ作り、タスク内で再利用
+    ・接続エラー / 5xx のレプリカは不健全として除外し、別レプリカで再試行
+    """
+
+    def __init__(self, pool: ReplicaPool, browser):
+        self.pool = pool
+        self.browser = browser
+        self._pages: Dict[str, object] = {}
+        self._contexts: List[object] = []
+
+    def _page_for(self, replica: Replica):
+        page = self._pages.get(replica.name)
+        if page is None:
+            kwargs = {}
+            if replica.storage_state and Path(replica.storage_state).exists():
+                kwargs['storage_state'] = replica.storage_state
+            context = self.browser.new_context(**kwargs)
+            self._contexts.append(context)
+            page = context.new_page()
+            self._pages[replica.name] = page
+        return page
+
+    def open(self, url: str, timeout_ms: float = 30000):
+        """url を開いたレプリカ上のページ（すべてのレプリカで失敗した場合は None。呼び出し側でメインのページに切り替える）"""
+        tried: List[str] = []
+        for _ in range(len(self.pool.replicas)):
+            with self.pool.acquire(exclude=tried) as replica:
+                tried.append(replica.name)
+                try:
+                    page = self._page_for(replica)
+                except Exception as e:
+                    print(f"[警告] レプリカ {replica.name} のページを作成できません: {e}")
+                    continue
+                target = self.pool.rewrite(url, replica)
+                print(f"[情報] レプリカ {replica.name} でナビゲート: {target}")
+                try:
+                    res = page.goto(target, timeout=timeout_ms, wait_until='networkidle')
+                    if res is not None and int(res.status) >= 500:
+                        self.pool.mark_unhealthy(replica, f'HTTP {res.status}')
+                        continue
+                    return page
+                except Exception as e:
+                    if 'net::ERR' in str(e):
+                        self.pool.mark_unhealthy(replica, str(e).splitlines()[0])
+                        continue
+                    # networkidle 待機のタイムアウト等はページが表示されていれば続行（従来と同じ扱い）
+                    print(f"[警告] ナビゲーション失敗: {e}")
+                    return page
+        print("[警告] すべてのレプリカでナビゲーションに失敗しました")
+        return None
+
+    def close(self) -> None:
+        for context in self._contexts:
+            try:
+                context.close()
+            except Exception:
+                pass
+        self._contexts.clear()
+        self._pages.clear()
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='shopping-admin レプリカプールの状態確認')
+    ap.add_argument('--config', default=os.environ.get('AGENT_WEBARENA_REPLICAS', ''), help='レプリカ設定JSON（既定: AGENT_WEBARENA_REPLICAS）')
+    ap.add_argument('cmd', choices=['status', 'check'])
+    args = ap.parse_args()
+    if not args.config:
+        print("[エラー] --config または AGENT_WEBARENA_REPLICAS を指定してください")
+        raise SystemExit(1)
+    pool = ReplicaPool.from_file(Path(args.config))
+    if args.cmd == 'check':
+        for r in pool.replicas:
+            t0 = time.perf_counter()
+            ok = pool.check_health(r)
+            print(f"[結果] {r.name:12s} {'OK ' if ok else 'NG '} {(time.perf_counter()-t0)*1000:.0f}ms {r.admin}")
+        return
+    for row in pool.status():
+        print(f"[結果] {row['name']:12s} outstanding={row['outstanding']} healthy={row['healthy']} {row['admin']}")
+
+
+if __name__ == '__main__':
+    main()
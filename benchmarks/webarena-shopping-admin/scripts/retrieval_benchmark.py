@@ -0,0 +1,575 @@
+#!/usr/bin/env python3
+"""
+検索ベンチマーク（resources/index 用）
+・vectors.faiss をメモリマップで開き（802MB を全読み込みしない）、configs/*.json の intent で検索
+・intent の埋め込みは差し替え可能な Embedder 経由（ディスクキャッシュ付き）
+・top-k 検索レイテンシ分位点、ロード時間、RSS、gold URL に対する recall@k を出力
+
+gold URL は各タスクの以下から構成する:
+  - eval.reference_url
+  - eval.program_html[].url（'last' は除外）
+  - tasks/task_<id>/*.json のうち success=true のランの pages_visited
+
+使い方:
+  python scripts/retrieval_benchmark.py --embedder bedrock --top-k 1,5,10,50
+  python scripts/retrieval_benchmark.py --loader faiss      # 比較用: faiss で全読み込み
+  python scripts/retrieval_benchmark.py --embedder random   # 認証情報なしでレイテンシのみ計測
+"""
+import argparse
+import hashlib
+import importlib
+import json
+import mmap
+import os
+import re
+import struct
+import time
+from pathlib import Path
+from typing import Any, Callable, Dict, List, Optional, Sequence, Tuple
+
+import artifact_store
+
+try:
+    import numpy as np
+except ImportError:
+    print("[エラー] numpy が見つかりません。pip install numpy を実行してください")
+    raise
+
+BENCH_DIR = Path(__file__).resolve().parent.parent
+DEFAULT_INDEX_DIR = BENCH_DIR / 'resources' / 'index'
+DEFAULT_CONFIGS_DIR = BENCH_DIR / 'configs'
+DEFAULT_TASKS_DIR = BENCH_DIR / 'tasks'
+DEFAULT_CACHE_FILE = BENCH_DIR / 'resources' / 'cache' / 'query_embeddings.jsonl'
+
+# adminのベースURL（config に start_url が無い場合の既定値）
+ADMIN_BASE = 'http://127.0.0.1:7780/admin'
+
+
+# ===== リソース計測 =====
+
+def current_rss_mb() -> float:
+    """現在のRSS（MB）。psutil が無ければ /proc/self/statm を読む"""
+    try:
+        import psutil  # type: ignore
+        return psutil.Process(os.getpid()).memory_info().rss / (1024 * 1024)
+    except Exception:
+        pass
+    try:
+        with open('/proc/self/statm', 'r') as f:
+            pages = int(f.read().split()[1])
+        return pages * os.sysconf('SC_PAGE_SIZE') / (1024 * 1024)
+    except Exception:
+        return 0.0
+
+
+def percentiles(values_ms: Sequence[float]) -> Dict[str, float]:
+    """レイテンシ分位点（ms）"""
+    if not values_ms:
+        return {'count': 0, 'mean': 0.0, 'p50': 0.0, 'p90': 0.0, 'p99': 0.0, 'max': 0.0}
+    arr = np.asarray(values_ms, dtype=np.float64)
+    return {
+        'count': int(arr.size),
+        'mean': float(arr.mean()),
+        'p50': float(np.percentile(arr, 50)),
+        'p90': float(np.percentile(arr, 90)),
+        'p99': float(np.percentile(arr, 99)),
+        'max': float(arr.max()),
+    }
+
+
+# ===== URL正規化 / gold URL =====
+
+def normalize_url(u: str) -> str:
+    """比較用URL正規化（/../ の解決、末尾スラッシュ除去、フラグメント除去）"""
+    u = str(u or '').strip()
+    if not u:
+        return ''
+    u = u.split('#', 1)[0]
+    while '/../' in u:
+        nu = re.sub(r'/[^/]+/\.\./', '/', u, count=1)
+        if nu == u:
+            break
+        u = nu
+    if u.endswith('/'):
+        u = u[:-1]
+    return u
+
+
+def resolve_config_url(url: str, start_url: str = ADMIN_BASE) -> str:
+    """program_html の url を絶対URLに解決（evaluate.py の _evaluate_program_html_fallback と同じ規則）"""
+    url = str(url or '').strip()
+    if not url or url == 'last':
+        return ''
+    if url.startswith('http'):
+        return normalize_url(url)
+    if url.startswith('../'):
+        relative_path = url.replace('../', '')
+        if '/admin' in start_url:
+            base_url = start_url.replace(':7780/admin', ':7770').replace('/admin', '')
+        else:
+            base_url = start_url.rsplit('/', 1)[0]
+        return normalize_url(f"{base_url}/{relative_path}")
+    return normalize_url(url)
+
+
+def load_task_configs(configs_dir: Path) -> List[dict]:
+    """configs/*.json を task_id 順に読み込む"""
+    configs: List[dict] = []
+    for p in sorted(configs_dir.glob('*.json'), key=lambda x: int(x.stem) if x.stem.isdigit() else 1 << 30):
+        try:
+            with open(p, 'r') as f:
+                cfg = json.load(f)
+            cfg.setdefault('task_id', int(p.stem) if p.stem.isdigit() else p.stem)
+            configs.append(cfg)
+        except Exception as e:
+            print(f"[警告] config 読み込み失敗: {p}: {e}")
+    return configs
+
+
+def iter_run_summaries(tasks_dir: Path, task_id: Any) -> List[dict]:
+    """tasks/task_<id>/*.json（リーダーボード風サマリー）を読み込む"""
+    out: List[dict] = []
+    task_dir = tasks_dir / f'task_{task_id}'
+    if not task_dir.is_dir():
+        return out
+    for p in sorted(task_dir.glob('*.json')):
+        try:
+            out.append(artifact_store.load_json(p))
+        except Exception as e:
+            print(f"[警告] サマリー読み込み失敗: {p}: {e}")
+    return out
+
+
+def gold_urls_for_task(cfg: dict, tasks_dir: Optional[Path] = None) -> List[str]:
+    """タスクの gold URL 集合（正規化済み・順序維持）"""
+    ev = cfg.get('eval') or {}
+    start_url = str(cfg.get('start_url') or ADMIN_BASE)
+    urls: List[str] = []
+    ref = str(ev.get('reference_url') or '').strip()
+    if ref.startswith('http'):
+        urls.append(normalize_url(ref))
+    for item in ev.get('program_html') or []:
+        u = resolve_config_url(str((item or {}).get('url') or ''), start_url)
+        if u:
+            urls.append(u)
+    if tasks_dir is not None:
+        for run in iter_run_summaries(tasks_dir, cfg.get('task_id')):
+            if not run.get('success'):
+                continue
+            for u in run.get('pages_visited') or []:
+                nu = normalize_url(u)
+                if nu.startswith('http') and nu != normalize_url(start_url):
+                    urls.append(nu)
+    seen = set()
+    unique: List[str] = []
+    for u in urls:
+        if u and u not in seen:
+            seen.add(u)
+            unique.append(u)
+    return unique
+
+
+# ===== インデックス =====
+
+def _read_flat_header(path: Path) -> Tuple[str, int, int, int, int]:
+    """
+    faiss IndexFlat のヘッダを読む（faiss の write_index と同じレイアウト）
+    fourcc(4) d(i32) ntotal(i64) dummy(i64) dummy(i64) is_trained(u8) metric(i32) [metric_arg(f32)] size(u64) data...
+    戻り値: (fourcc, d, ntotal, metric_type, data_offset)
+    """
+    with open(path, 'rb') as f:
+        head = f.read(64)
+    fourcc = head[:4].decode('ascii', errors='replace')
+    if fourcc not in ('IxFI', 'IxF2', 'IxFl'):
+        raise ValueError(f"IndexFlat 以外のインデックスはメモリマップ読み込み非対応です: fourcc={fourcc}")
+    d, ntotal = struct.unpack_from('<iq', head, 4)
+    off = 4 + 4 + 8 + 8 + 8 + 1
+    (metric_type,) = struct.unpack_from('<i', head, off)
+    off += 4
+    if metric_type > 1:
+        off += 4
+    (n_floats,) = struct.unpack_from('<Q', head, off)
+    off += 8
+    if n_floats != d * ntotal:
+        raise ValueError(f"ベクトル領域サイズが一致しません: {n_floats} != {d}*{ntotal}")
+    return fourcc, int(d), int(ntotal), int(metric_type), off
+
+
+class MmapFlatIndex:
+    """
+    vectors.faiss（IndexFlatIP）をメモリマップで開く読み取り専用インデックス
+    ・ロード時はヘッダのみ読み、ベクトル領域は OS のページキャッシュ経由で参照
+    ・検索はブロック単位の内積 + argpartition（faiss の IndexFlatIP と同じ結果）
+    """
+
+    def __init__(self, path: Path, block_rows: int = 8192):
+        self.path = Path(path)
+        fourcc, d, ntotal, metric, offset = _read_flat_header(self.path)
+        self.d = d
+        self.ntotal = ntotal
+        self.metric_type = metric
+        self._file = open(self.path, 'rb')
+        self._mm = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        self.vectors = np.frombuffer(self._mm, dtype=np.float32, count=d * ntotal, offset=offset).reshape(ntotal, d)
+        self.block_rows = max(1, int(block_rows))
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        q = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        nq = q.shape[0]
+        k = min(int(k), self.ntotal)
+        cand_d: List[np.ndarray] = []
+        cand_i: List[np.ndarray] = []
+        for start in range(0, self.ntotal, self.block_rows):
+            # ベクトル領域はヘッダ長の都合で4バイト境界に揃わないため、ブロック単位で整列コピーしてから BLAS に渡す
+            block = np.array(self.vectors[start:start + self.block_rows])
+            scores = q @ block.T
+            if self.metric_type == 1:
+                # L2: -||x-q||^2 の大きい順（= 距離の小さい順）
+                scores = 2 * scores - np.einsum('ij,ij->i', block, block)[None, :]
+            kk = min(k, block.shape[0])
+            part = np.argpartition(-scores, kk - 1, axis=1)[:, :kk]
+            cand_d.append(np.take_along_axis(scores, part, axis=1))
+            cand_i.append(part + start)
+        all_d = np.concatenate(cand_d, axis=1)
+        all_i = np.concatenate(cand_i, axis=1)
+        order = np.argsort(-all_d, axis=1)[:, :k]
+        return np.take_along_axis(all_d, order, axis=1), np.take_along_axis(all_i, order, axis=1).astype(np.int64)
+
+    def close(self) -> None:
+        try:
+            del self.vectors
+            self._mm.close()
+            self._file.close()
+        except Exception:
+            pass
+
+
+class FaissIndex:
+    """faiss.read_index によるインデックス（比較用・非フラットインデックス用）"""
+
+    def __init__(self, path: Path, mmap_flag: bool = False):
+        import faiss  # type: ignore
+        flags = 0
+        if mmap_flag:
+            # IndexFlatCodes のゼロコピー mmap は faiss>=1.9 の IO_FLAG_MMAP_IFC
+            flags = getattr(faiss, 'IO_FLAG_MMAP_IFC', 0) or getattr(faiss, 'IO_FLAG_MMAP', 0)
+            flags |= getattr(faiss, 'IO_FLAG_READ_ONLY', 0)
+        self.index = faiss.read_index(str(path), flags)
+        self.d = int(self.index.d)
+        self.ntotal = int(self.index.ntotal)
+
+    def search(self, queries: np.ndarray, k: int) -> Tuple[np.ndarray, np.ndarray]:
+        q = np.ascontiguousarray(np.atleast_2d(queries), dtype=np.float32)
+        return self.index.search(q, int(k))
+
+    def close(self) -> None:
+        self.index = None
+
+
+def open_index(path: Path, loader: str = 'mmap'):
+    """loader: mmap（自前メモリマップ）/ faiss-mmap / faiss（全読み込み）"""
+    if loader == 'mmap':
+        return MmapFlatIndex(path)
+    if loader == 'faiss-mmap':
+        return FaissIndex(path, mmap_flag=True)
+    if loader == 'faiss':
+        return FaissIndex(path, mmap_flag=False)
+    raise ValueError(f"不明なローダー: {loader}")
+
+
+def load_mapping(index_dir: Path, vectors_name: str = 'vectors.faiss') -> List[str]:
+    """vectors.faiss.mapping.json の chunkIds（FAISSラベル → chunk_id）"""
+    with open(index_dir / f'{vectors_name}.mapping.json', 'r') as f:
+        mapping = json.load(f)
+    return list(mapping.get('chunkIds') or [])
+
+
+def load_chunk_urls(index_dir: Path) -> Dict[str, str]:
+    """chunks.parquet から chunk_id → url のみを列指定で読む（chunk_text は読まない）"""
+    import pyarrow.parquet as pq  # type: ignore
+    table = pq.read_table(index_dir / 'chunks.parquet', columns=['chunk_id', 'url'])
+    ids = table.column('chunk_id').to_pylist()
+    urls = table.column('url').to_pylist()
+    return {str(i): str(u or '') for i, u in zip(ids, urls)}
+
+
+# ===== 埋め込み =====
+
+class Embedder:
+    """クエリ埋め込みのインターフェース（embed(texts) -> float32[n, d]）"""
+    name = 'base'
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        raise NotImplementedError
+
+
+class BedrockCohereEmbedder(Embedder):
+    """Bedrock 上の Cohere Embed（src/indexer/embeddings.ts の embedQuery と同じリクエスト）"""
+
+    def __init__(self, model_id: str = 'cohere.embed-v4:0', regions: Optional[List[str]] = None):
+        import boto3  # type: ignore
+        self.name = f'bedrock:{model_id}'
+        self.model_id = model_id
+        self.regions = regions or ['ap-northeast-1']
+        self._clients = {r: boto3.client('bedrock-runtime', region_name=r) for r in self.regions}
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        body = json.dumps({
+            'texts': texts,
+            'input_type': 'search_query',
+            'embedding_types': ['float'],
+            'truncate': 'RIGHT',
+        })
+        last_error: Optional[Exception] = None
+        for r in self.regions:
+            try:
+                resp = self._clients[r].invoke_model(modelId=self.model_id, body=body, contentType='application/json', accept='*/*')
+                payload = json.loads(resp['body'].read())
+                embs = payload.get('embeddings')
+                if isinstance(embs, dict):
+                    embs = embs.get('float')
+                return np.asarray(embs, dtype=np.float32)
+            except Exception as e:
+                last_error = e
+                print(f"[情報] embed: リージョン {r} でエラー。次を試行: {e}")
+        raise RuntimeError(f"全リージョンで埋め込みに失敗: {last_error}")
+
+
+class CohereApiEmbedder(Embedder):
+    """Cohere 公式API（COHERE_API_KEY）"""
+
+    def __init__(self, model_id: str = 'embed-v4.0'):
+        self.name = f'cohere-api:{model_id}'
+        self.model_id = model_id
+        self.api_key = os.environ.get('COHERE_API_KEY', '').strip()
+        if not self.api_key:
+            raise RuntimeError('COHERE_API_KEY が設定されていません')
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        import urllib.request
+        req = urllib.request.Request(
+            'https://api.cohere.com/v2/embed',
+            data=json.dumps({'texts': texts, 'model': self.model_id, 'input_type': 'search_query',
+                             'embedding_types': ['float'], 'truncate': 'END'}).encode('utf-8'),
+            headers={'Authorization': f'Bearer {self.api_key}', 'Content-Type': 'application/json'},
+        )
+        with urllib.request.urlopen(req, timeout=60) as resp:
+            payload = json.loads(resp.read())
+        return np.asarray(payload['embeddings']['float'], dtype=np.float32)
+
+
+class RandomEmbedder(Embedder):
+    """テキストのハッシュから決定的に生成する単位ベクトル（認証情報なしのレイテンシ計測用。recall は無意味）"""
+
+    def __init__(self, dim: int = 1536):
+        self.name = f'random:{dim}'
+        self.dim = dim
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        out = np.empty((len(texts), self.dim), dtype=np.float32)
+        for i, t in enumerate(texts):
+            seed = int.from_bytes(hashlib.sha256(t.encode('utf-8')).digest()[:8], 'little')
+            v = np.random.default_rng(seed).standard_normal(self.dim).astype(np.float32)
+            out[i] = v / (np.linalg.norm(v) or 1.0)
+        return out
+
+
+class CachedEmbedder(Embedder):
+    """
+    任意の Embedder をディスクキャッシュ（JSONL: {key, vector}）で包む
+    key = sha256(embedder.name + '\\0' + text)
+    """
+
+    def __init__(self, inner: Embedder, cache_file: Path):
+        self.inner = inner
+        self.name = inner.name
+        self.cache_file = Path(cache_file)
+        self._cache: Dict[str, List[float]] = {}
+        self.hits = 0
+        self.misses = 0
+        if self.cache_file.exists():
+            with open(self.cache_file, 'r') as f:
+                for line in f:
+                    try:
+                        rec = json.loads(line)
+                        self._cache[rec['key']] = rec['vector']
+                    except Exception:
+                        continue
+
+    def _key(self, text: str) -> str:
+        return hashlib.sha256(f"{self.inner.name}\0{text}".encode('utf-8')).hexdigest()
+
+    def embed(self, texts: List[str]) -> np.ndarray:
+        keys = [self._key(t) for t in texts]
+        missing = [i for i, k in enumerate(keys) if k not in self._cache]
+        self.hits += len(texts) - len(missing)
+        self.misses += len(missing)
+        if missing:
+            vecs = self.inner.embed([texts[i] for i in missing])
+            self.cache_file.parent.mkdir(parents=True, exist_ok=True)
+            with open(self.cache_file, 'a') as f:
+                for i, v in zip(missing, vecs):
+                    vec = [float(x) for x in v]
+                    self._cache[keys[i]] = vec
+                    f.write(json.dumps({'key': keys[i], 'vector': vec}) + '\n')
+        return np.asarray([self._cache[k] for k in keys], dtype=np.float32)
+
+
+def build_embedder(spec: str, *, model_id: str, regions: List[str], dim: int) -> Embedder:
+    """
+    spec: bedrock / cohere-api / random / <module>:<factory>
+    <module>:<factory> の場合は factory(model_id=..., regions=..., dim=...) が Embedder 互換オブジェクトを返すこと
+    """
+    if spec == 'bedrock':
+        return BedrockCohereEmbedder(model_id, regions)
+    if spec == 'cohere-api':
+        return CohereApiEmbedder(model_id if not model_id.startswith('cohere.') else 'embed-v4.0')
+    if spec == 'random':
+        return RandomEmbedder(dim)
+    if ':' in spec:
+        mod_name, factory_name = spec.split(':', 1)
+        factory: Callable[..., Embedder] = getattr(importlib.import_module(mod_name), factory_name)
+        return factory(model_id=model_id, regions=regions, dim=dim)
+    raise ValueError(f"不明な embedder: {spec}")
+
+
+# ===== 評価 =====
+
+def labels_to_urls(labels: Sequence[int], chunk_ids: List[str], chunk_urls: Dict[str, str]) -> List[str]:
+    """ラベル → chunk_id → URL（正規化・重複除去・順位維持）"""
+    seen = set()
+    urls: List[str] = []
+    for lab in labels:
+        lab = int(lab)
+        if lab < 0 or lab >= len(chunk_ids):
+            continue
+        u = normalize_url(chunk_urls.get(chunk_ids[lab], ''))
+        if u and u not in seen:
+            seen.add(u)
+            urls.append(u)
+    return urls
+
+
+def recall_at_k(retrieved: List[str], gold: List[str]) -> float:
+    if not gold:
+        return 0.0
+    got = set(retrieved)
+    return sum(1 for g in gold if g in got) / len(gold)
+
+
+def evaluate_recall(per_task: List[dict], ks: List[int]) -> Dict[str, Any]:
+    """per_task: [{task_id, gold, retrieved_by_k: {k: URL順位リスト}}] から recall@k / hit@k を集計"""
+    summary: Dict[str, Any] = {}
+    scored = [t for t in per_task if t['gold']]
+    for k in ks:
+        recalls = [recall_at_k(t['retrieved_by_k'][k], t['gold']) for t in scored]
+        hits = [1.0 if r > 0 else 0.0 for r in recalls]
+        summary[f'recall@{k}'] = float(np.mean(recalls)) if recalls else 0.0
+        summary[f'hit@{k}'] = float(np.mean(hits)) if hits else 0.0
+    summary['tasks_with_gold'] = len(scored)
+    return summary
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='resources/index に対する検索ベンチマーク（recall@k / レイテンシ / ロード時間 / RSS）')
+    ap.add_argument('--index-dir', default=str(DEFAULT_INDEX_DIR))
+    ap.add_argument('--vectors', default='vectors.faiss', help='インデックスファイル名（index-dir 相対）')
+    ap.add_argument('--configs-dir', default=str(DEFAULT_CONFIGS_DIR))
+    ap.add_argument('--tasks-dir', default=str(DEFAULT_TASKS_DIR))
+    ap.add_argument('--loader', default='mmap', choices=['mmap', 'faiss-mmap', 'faiss'])
+    ap.add_argument('--embedder', default=os.environ.get('BENCH_EMBEDDER', 'bedrock'),
+                    help='bedrock / cohere-api / random / <module>:<factory>')
+    ap.add_argument('--embedding-model', default=os.environ.get('AGENT_EMBEDDING_MODEL', '').strip() or 'cohere.embed-v4:0')
+    ap.add_argument('--regions', default=os.environ.get('AGENT_AWS_REGION', '').strip() or 'ap-northeast-1')
+    ap.add_argument('--cache-file', default=str(DEFAULT_CACHE_FILE), help='クエリ埋め込みキャッシュ（空文字で無効）')
+    ap.add_argument('--top-k', default='1,5,10,50')
+    ap.add_argument('--repeat', type=int, default=5, help='レイテンシ計測の繰り返し回数')
+    ap.add_argument('--output', default='', help='結果JSONの出力先')
+    args = ap.parse_args()
+
+    index_dir = Path(args.index_dir)
+    ks = sorted({int(x) for x in str(args.top_k).split(',') if x.strip()})
+    max_k = max(ks)
+
+    rss0 = current_rss_mb()
+    t0 = time.perf_counter()
+    index = open_index(index_dir / args.vectors, args.loader)
+    load_index_s = time.perf_counter() - t0
+    rss_index = current_rss_mb()
+    print(f"[情報] インデックス読み込み: loader={args.loader} ntotal={index.ntotal} d={index.d} {load_index_s*1000:.1f}ms RSS +{rss_index - rss0:.1f}MB")
+
+    t1 = time.perf_counter()
+    chunk_ids = load_mapping(index_dir, args.vectors)
+    chunk_urls = load_chunk_urls(index_dir)
+    load_meta_s = time.perf_counter() - t1
+    rss_meta = current_rss_mb()
+    print(f"[情報] マッピング/チャンクURL読み込み: {len(chunk_ids)}件 {load_meta_s*1000:.1f}ms RSS +{rss_meta - rss_index:.1f}MB")
+
+    configs = load_task_configs(Path(args.configs_dir))
+    intents = [str(c.get('intent') or '') for c in configs]
+    regions = [r.strip() for r in str(args.regions).split(',') if r.strip()]
+    embedder = build_embedder(args.embedder, model_id=args.embedding_model, regions=regions, dim=index.d)
+    if args.cache_file:
+        embedder = CachedEmbedder(embedder, Path(args.cache_file))
+    t2 = time.perf_counter()
+    query_vecs = embedder.embed(intents)
+    embed_s = time.perf_counter() - t2
+    if isinstance(embedder, CachedEmbedder):
+        print(f"[情報] 埋め込み: {len(intents)}件 {embed_s*1000:.1f}ms (cache hit={embedder.hits} miss={embedder.misses})")
+
+    # レイテンシ（1クエリずつ、max_k で計測）
+    latencies: List[float] = []
+    for _ in range(max(1, args.repeat)):
+        for i in range(len(intents)):
+            ts = time.perf_counter()
+            index.search(query_vecs[i:i + 1], max_k)
+            latencies.append((time.perf_counter() - ts) * 1000)
+    rss_search = current_rss_mb()
+
+    tasks_dir = Path(args.tasks_dir)
+    _, labels = index.search(query_vecs, max_k)
+    per_task: List[dict] = []
+    for cfg, row in zip(configs, labels):
+        gold = gold_urls_for_task(cfg, tasks_dir)
+        by_k = {k: labels_to_urls(row[:k], chunk_ids, chunk_urls) for k in ks}
+        per_task.append({'task_id': cfg.get('task_id'), 'gold': gold, 'retrieved_by_k': by_k})
+
+    recall = evaluate_recall(per_task, ks)
+    report = {
+        'index': str(index_dir / args.vectors),
+        'loader': args.loader,
+        'ntotal': index.ntotal,
+        'dimension': index.d,
+        'embedder': embedder.name,
+        'load_time_ms': {'index': load_index_s * 1000, 'mapping_and_urls': load_meta_s * 1000},
+        'rss_mb': {'start': rss0, 'after_index': rss_index, 'after_metadata': rss_meta, 'after_search': rss_search},
+        'search_latency_ms': percentiles(latencies),
+        'top_k': ks,
+        'recall': recall,
+        'per_task': [
+            {
+                'task_id': t['task_id'],
+                'gold_count': len(t['gold']),
+                **{f'recall@{k}': recall_at_k(t['retrieved_by_k'][k], t['gold']) for k in ks},
+            }
+            for t in per_task
+        ],
+    }
+
+    lat = report['search_latency_ms']
+    print(f"\n[結果] 検索レイテンシ (k={max_k}): mean={lat['mean']:.2f}ms p50={lat['p50']:.2f}ms p90={lat['p90']:.2f}ms p99={lat['p99']:.2f}ms")
+    print(f"[結果] RSS: start={rss0:.1f}MB index={rss_index:.1f}MB meta={rss_meta:.1f}MB search={rss_search:.1f}MB")
+    print(f"[結果] gold付きタスク: {recall['tasks_with_gold']}/{len(per_task)}")
+    for k in ks:
+        print(f"  - recall@{k}={recall[f'recall@{k}']:.3f} hit@{k}={recall[f'hit@{k}']:.3f}")
+
+    if args.output:
+        Path(args.output).parent.mkdir(parents=True, exist_ok=True)
+        with open(args.output, 'w') as f:
+            json.dump(report, f, indent=2, ensure_ascii=False)
+        print(f"[情報] 結果保存: {args.output}")
+    index.close()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,85 @@
+-- sql_verify.py のスタンドイン用フィクスチャ（MySQL / SQLite 共通）
+-- Magento 2.4 のテーブルのうち sql_checks.json が参照する列だけを持つ最小構成。
+-- 値は configs/ の program_html 期待値（タスク成功後の状態）に合わせている。
+CREATE TABLE IF NOT EXISTS eav_attribute (
+  attribute_id INTEGER PRIMARY KEY,
+  entity_type_id INTEGER NOT NULL,
+  attribute_code VARCHAR(255) NOT NULL,
+  backend_type VARCHAR(8) NOT NULL
+);
+CREATE TABLE IF NOT EXISTS catalog_product_entity_decimal (
+  value_id INTEGER PRIMARY KEY,
+  attribute_id INTEGER NOT NULL,
+  store_id INTEGER NOT NULL,
+  entity_id INTEGER NOT NULL,
+  value DECIMAL(20,6)
+);
+CREATE TABLE IF NOT EXISTS catalog_product_entity_int (
+  value_id INTEGER PRIMARY KEY,
+  attribute_id INTEGER NOT NULL,
+  store_id INTEGER NOT NULL,
+  entity_id INTEGER NOT NULL,
+  value INTEGER
+);
+CREATE TABLE IF NOT EXISTS cataloginventory_stock_item (
+  item_id INTEGER PRIMARY KEY,
+  product_id INTEGER NOT NULL,
+  stock_id INTEGER NOT NULL,
+  qty DECIMAL(12,4),
+  is_in_stock SMALLINT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS review (
+  review_id INTEGER PRIMARY KEY,
+  entity_pk_value INTEGER NOT NULL,
+  status_id SMALLINT NOT NULL
+);
+CREATE TABLE IF NOT EXISTS cms_page (
+  page_id INTEGER PRIMARY KEY,
+  title VARCHAR(255),
+  identifier VARCHAR(100)
+);
+CREATE TABLE IF NOT EXISTS sales_order (
+  entity_id INTEGER PRIMARY KEY,
+  increment_id VARCHAR(32),
+  state VARCHAR(32),
+  status VARCHAR(32)
+);
+CREATE TABLE IF NOT EXISTS sales_order_status (
+  status VARCHAR(32) PRIMARY KEY,
+  label VARCHAR(128) NOT NULL
+);
+
+REPLACE INTO eav_attribute (attribute_id, entity_type_id, attribute_code, backend_type) VALUES
+  (77, 4, 'price', 'decimal'),
+  (97, 4, 'status', 'int');
+
+REPLACE INTO catalog_product_entity_decimal (value_id, attribute_id, store_id, entity_id, value) VALUES
+  (1, 77, 0, 496, 22.330000),
+  (2, 77, 0, 499, 22.330000),
+  (3, 77, 0, 479, 21.560000),
+  (4, 77, 0, 482, 21.560000),
+  (5, 77, 0, 1481, 27.000000);
+
+REPLACE INTO catalog_product_entity_int (value_id, attribute_id, store_id, entity_id, value) VALUES
+  (1, 97, 0, 478, 2);
+
+REPLACE INTO cataloginventory_stock_item (item_id, product_id, stock_id, qty, is_in_stock) VALUES
+  (1, 872, 1, 5.0000, 1),
+  (2, 1861, 1, 0.0000, 0);
+
+REPLACE INTO review (review_id, entity_pk_value, status_id) VALUES
+  (347, 1, 1),
+  (349, 1, 1),
+  (352, 1, 1);
+
+REPLACE INTO cms_page (page_id, title, identifier) VALUES
+  (2, 'This is the home page!! Leave here!!', 'home');
+
+REPLACE INTO sales_order (entity_id, increment_id, state, status) VALUES
+  (307, '000000307', 'canceled', 'canceled');
+
+REPLACE INTO sales_order_status (status, label) VALUES
+  ('canceled', 'Canceled'),
+  ('complete', 'Complete'),
+  ('pending', 'Pending'),
+  ('processing', 'Processing');
@@ -0,0 +1,640 @@
+#!/usr/bin/env python3
+"""
+shopping-admin のスタンドイン Web サーバー（ブラウザ採点の負荷試験用）
+・Docker の Magento（benchmarks/setup/start-shopping-admin.sh）を起動せずに、evaluate.py のブラウザ採点経路
+  （program_html / url_match のフォールバック評価、CDP 再接続、レプリカプール）の処理量と同時実行性能を測るための軽量サーバー
+・configs/*.json の program_html / url_match が参照するページと、crawl.csv のスナップショットのページを同じ URL で返す
+・program_html 項目の locator（http_fastpath.parse_locator の対応形）ごとに querySelector が一致する要素を生成して値を埋める
+  値は sql_checks.json の規則に一致すれば sql_fixture.sql を投入した SQLite から、それ以外は config の期待値（タスク成功後の状態）
+  url='last' の項目は config の reference_url のページに載せる
+・本文のみ（locator 空）の項目は、crawl.csv の該当ページのスナップショットに期待文字列を加えた本文を返す
+・/admin 配下は Magento と同じ admin Cookie を要求する（storage_state の Cookie、またはログインフォームで発行した値）。
+  無ければログイン画面（http_fastpath のログイン画面判定・WebArena の自動ログインと同じ形）を返す
+・応答レイテンシ（--latency-ms ± --jitter-ms）と同時処理数の上限（--max-inflight、PHP-FPM のワーカー数相当）を設定できる
+・/__standin/stats でリクエスト数・応答時間のパーセンタイル・同時処理数を JSON で返す
+
+使い方:
+  python scripts/standin_server.py serve --latency-ms 300 --jitter-ms 100 --max-inflight 8
+  python scripts/standin_server.py serve --port 7780 --port 7781 --port 7782   # レプリカプールの負荷試験
+  python scripts/standin_server.py routes -v      # 生成するページと要素の一覧
+  python scripts/standin_server.py check          # 一時ポートで起動し、configs/ の項目を HTTP 高速経路で評価して期待値と照合
+"""
+import argparse
+import html
+import json
+import random
+import re
+import secrets
+import sys
+import tempfile
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+from typing import Deque, Dict, List, NamedTuple, Optional, Tuple
+from urllib.parse import parse_qs, urlparse
+
+import crawl_csv
+from http_fastpath import parse_locator
+from sql_verify import DEFAULT_CHECKS_FILE, DEFAULT_FIXTURE_FILE, SqlVerifier, load_rules, seed
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+BENCH_DIR = SCRIPT_DIR.parent
+DEFAULT_CONFIGS_DIR = BENCH_DIR / 'configs'
+DEFAULT_CSV = BENCH_DIR / 'resources' / 'crawl.csv'
+DEFAULT_STORAGE_STATE = Path('/home/ec2-user/webarena-local/.auth/shopping_admin_state.json')
+DEFAULT_PORT = 7780
+ADMIN_COOKIE = 'admin'  # Magento 管理画面のセッション Cookie 名
+ADMIN_USER = ('admin', 'admin1234')  # benchmarks/setup の管理者アカウント
+STATS_PATH = '/__standin/stats'
+LATENCY_HISTORY = 10000  # stats のパーセンタイルに使う直近の応答時間の件数
+
+# セレクタの単純セレクタ（タグ / #id / .class / [attr] / [attr="v"]）
+_SIMPLE = re.compile(
+    r"(?P<tag>[a-zA-Z][\w-]*)|#(?P<id>[\w-]+)|\.(?P<cls>[\w-]+)"
+    r"|\[\s*(?P<attr>[\w:-]+)\s*(?:=\s*(?:(?P<q>[\"'])(?P<qval>.*?)(?P=q)|(?P<val>[^\]\s]*))\s*)?\]"
+)
+
+
+class Element(NamedTuple):
+    selector: str
+    prop: str
+    value: str
+    source: str  # fixture | config | empty
+
+
+# ===== ページの組み立て =====
+
+def _resolve_url(url: str) -> str:
+    # /dir/../ を畳む（evaluate.py の _resolve_program_html_url と同じ）
+    while '/../' in url:
+        url = re.sub(r'/[^/]+/\.\./', '/', url)
+    return url
+
+
+def page_key(url: str) -> str:
+    """ページの照合キー（パス + クエリ。末尾スラッシュは無視）"""
+    u = urlparse(url)
+    path = u.path.rstrip('/') or '/'
+    return f"{path}?{u.query}" if u.query else path
+
+
+def _split_compounds(selector: str) -> List[str]:
+    """子孫結合子（空白 / >）で区切る（引用符・[] の中の空白は区切らない）"""
+    parts: List[str] = []
+    buf = ''
+    quote = ''
+    depth = 0
+    for ch in selector:
+        if quote:
+            quote = '' if ch == quote else quote
+        elif ch in ('"', "'"):
+            quote = ch
+        elif ch == '[':
+            depth += 1
+        elif ch == ']':
+            depth -= 1
+        elif depth == 0 and (ch.isspace() or ch == '>'):
+            if buf:
+                parts.append(buf)
+            buf = ''
+            continue
+        buf += ch
+    if buf:
+        parts.append(buf)
+    return parts
+
+
+def _parse_compound(compound: str) -> Optional[Tuple[str, Dict[str, str]]]:
+    """単純セレクタの並びを (タグ, 属性) に変換（未対応の形は None）"""
+    tag = ''
+    attrs: Dict[str, str] = {}
+    classes: List[str] = []
+    pos = 0
+    while pos < len(compound):
+        m = _SIMPLE.match(compound, pos)
+        if not m or m.end() == pos:
+            return None
+        if m.group('tag'):
+            tag = m.group('tag').lower()
+        elif m.group('id'):
+            attrs['id'] = m.group('id')
+        elif m.group('cls'):
+            classes.append(m.group('cls'))
+        else:
+            value = m.group('qval') if m.group('q') else m.group('val')
+            attrs[m.group('attr')] = value or ''
+        pos = m.end()
+    if classes:
+        attrs['class'] = ' '.join(classes)
+    return tag, attrs
+
+
+def _attrs_html(attrs: Dict[str, str]) -> str:
+    return ''.join(f' {k}="{html.escape(v, quote=True)}"' for k, v in attrs.items())
+
+
+def element_html(el: Element) -> Optional[str]:
+    """querySelector(el.selector) が一致し、el.prop が el.value を返す HTML 片（未対応のセレクタは None）"""
+    compounds = [_parse_compound(c) for c in _split_compounds(el.selector)]
+    if not compounds or any(c is None for c in compounds):
+        return None
+    opens: List[str] = []
+    closes: List[str] = []
+    for tag, attrs in compounds[:-1]:
+        opens.append(f"<{tag or 'div'}{_attrs_html(attrs)}>")
+        closes.insert(0, f"</{tag or 'div'}>")
+    tag, attrs = compounds[-1]
+    if el.prop == 'selectedIndex':
+        try:
+            index = max(int(el.value), 0)
+        except ValueError:
+            index = 0
+        options = ''.join(f'<option value="{i}"{" selected" if i == index else ""}>option {i}</option>' for i in range(index + 1))
+        inner = f"<select{_attrs_html(attrs)}>{options}</select>"
+    elif el.prop == 'value' and tag == 'select':
+        inner = f'<select{_attrs_html(attrs)}><option value="{html.escape(el.value, quote=True)}" selected>{html.escape(el.value)}</option></select>'
+    elif el.prop == 'value' and tag == 'textarea':
+        inner = f"<textarea{_attrs_html(attrs)}>{html.escape(el.value)}</textarea>"
+    elif el.prop == 'value':
+        inner = f'<{tag or "input"} type="text"{_attrs_html(attrs)} value="{html.escape(el.value, quote=True)}">'
+    else:
+        name = tag if tag and tag not in ('input', 'select', 'textarea') else 'div'
+        inner = f"<{name}{_attrs_html(attrs)}>{html.escape(el.value)}</{name}>"
+    return ''.join(opens) + inner + ''.join(closes)
+
+
+def _expected_text(required: dict) -> str:
+    if 'exact_match' in required:
+        return str(required['exact_match'])
+    must = required.get('must_include') or []
+    return ' '.join(str(m) for m in (must if isinstance(must, list) else [must]))
+
+
+def load_snapshots(csv_path: Path) -> Dict[str, str]:
+    """crawl.csv のページキー → スナップショット本文（同一URLは後の行を採用。本文はインデクサと同じ解釈で読む）"""
+    snapshots: Dict[str, str] = {}
+    for _, fields in crawl_csv.iter_rows(crawl_csv.read_lines(csv_path)):
+        url = fields.get('URL', '').strip()
+        if url:
+            snapshots[page_key(_resolve_url(url))] = crawl_csv.decode_snapshot_text(fields.get('snapshotforai', ''))
+    return snapshots
+
+
+class StandinSite:
+    """ページキー → 要素 / 本文の対応（起動時に組み立て、以降は読み取りのみ）"""
+
+    def __init__(self):
+        self.elements: Dict[str, List[Element]] = {}
+        self.texts: Dict[str, List[str]] = {}
+        self.snapshots: Dict[str, str] = {}
+        self.unsupported: List[str] = []
+        self.conflicts: List[str] = []
+
+    def add_element(self, key: str, el: Element) -> None:
+        items = self.elements.setdefault(key, [])
+        for other in items:
+            if other.selector == el.selector and other.prop == el.prop:
+                if other.value != el.value:
+                    self.conflicts.append(f"{key} {el.selector}: {other.value!r} / {el.value!r}")
+                return
+        items.append(el)
+
+    def add_text(self, key: str, text: str) -> None:
+        texts = self.texts.setdefault(key, [])
+        if text and text not in texts:
+            texts.append(text)
+
+    def keys(self) -> List[str]:
+        return sorted(set(self.elements) | set(self.texts) | set(self.snapshots))
+
+    def lookup(self, url: str) -> Optional[str]:
+        key = page_key(url)
+        if key in self.elements or key in self.texts or key in self.snapshots:
+            return key
+        path = key.split('?', 1)[0]
+        return path if (path in self.elements or path in self.texts or path in self.snapshots) else None
+
+    def render(self, key: str) -> str:
+        title = key.split('?', 1)[0].strip('/').replace('/', ' / ') or 'Dashboard'
+        parts = [
+            '<!doctype html><html><head><meta charset="utf-8">',
+            f'<title>{html.escape(title)} / Magento Admin</title></head><body>',
+            f'<header class="page-header"><h1 class="page-title">{html.escape(title)}</h1></header>',
+            '<main id="anchor-content" class="page-content"><form id="edit_form" onsubmit="return false">',
+        ]
+        for el in self.elements.get(key, []):
+            frag = element_html(el)
+            if frag:
+                parts.append(f'<div class="admin__field">{frag}</div>')
+        parts.append('</form>')
+        for text in self.texts.get(key, []):
+            parts.append(f'<div class="admin__page-section">{html.escape(text)}</div>')
+        snapshot = self.snapshots.get(key)
+        if snapshot:
+            parts.append(f'<pre class="standin-snapshot">{html.escape(snapshot)}</pre>')
+        parts.append('</main></body></html>')
+        return ''.join(parts)
+
+
+def _seeded_verifier(checks: Path, fixture: Path, workdir: Path) -> SqlVerifier:
+    dsn = f"sqlite:///{workdir / 'standin.sqlite'}"
+    seed(dsn, fixture)
+    return SqlVerifier(dsn, load_rules(checks))
+
+
+def build_site(configs_dir: Path, checks: Path, fixture: Path, csv_path: Optional[Path]) -> StandinSite:
+    site = StandinSite()
+    if csv_path and csv_path.exists():
+        site.snapshots = load_snapshots(csv_path)
+        print(f"[情報] crawl.csv のページ: {len(site.snapshots)}件")
+    elif csv_path:
+        print(f"[警告] crawl.csv が見つかりません（config のページのみ返します）: {csv_path}")
+
+    with tempfile.TemporaryDirectory(prefix='standin-') as tmp:
+        verifier = _seeded_verifier(checks, fixture, Path(tmp))
+        try:
+            for path in sorted(configs_dir.glob('*.json')):
+                with open(path, 'r') as f:
+                    cfg = json.load(f)
+                ev = cfg.get('eval') or {}
+                # 開始ページ・url_match の参照ページは要素が無くても返す
+                for url in (cfg.get('start_url'), ev.get('reference_url')):
+                    for u in str(url or '').split(' |OR| '):
+                        if u.strip().startswith('http'):
+                            site.texts.setdefault(page_key(_resolve_url(u.strip())), [])
+                for idx, item in enumerate(ev.get('program_html') or []):
+                    url = str(item.get('url') or '')
+                    if url == 'last':
+                        url = str(ev.get('reference_url') or '').split(' |OR| ')[0].strip()
+                    if not url:
+                        continue
+                    url = _resolve_url(url)
+                    key = page_key(url)
+                    locator = str(item.get('locator') or '')
+                    expected = _expected_text(item.get('required_contents') or {})
+                    reads = parse_locator(locator)
+                    if reads is None:
+                        site.unsupported.append(f"{path.name}[{idx}] {locator[:80]}")
+                        continue
+                    if not reads:
+                        site.add_text(key, expected)
+                        continue
+                    value = verifier.query(url, locator) if len(reads) == 1 else None
+                    for n, read in enumerate(reads):
+                        if n == 0:
+                            el = Element(read.selector, read.prop, value if value is not None else expected,
+                                         'fixture' if value is not None else 'config')
+                        else:
+                            el = Element(read.selector, read.prop, '', 'empty')
+                        if element_html(el) is None:
+                            site.unsupported.append(f"{path.name}[{idx}] {read.selector}")
+                            continue
+                        site.add_element(key, el)
+        finally:
+            verifier.close()
+    return site
+
+
+# ===== HTTP サーバー =====
+
+def _login_page(message: str = '') -> str:
+    note = f'<div class="message message-error">{html.escape(message)}</div>' if message else ''
+    return (
+        '<!doctype html><html><head><meta charset="utf-8"><title>Magento Admin</title></head><body>'
+        '<section class="page-wrapper"><form method="post" action="" id="login-form">'
+        f'<fieldset class="admin__fieldset"><legend>Welcome, please sign in</legend>{note}'
+        '<input id="username" name="login[username]" type="text" placeholder="user name">'
+        '<input id="login" name="login[password]" type="password" placeholder="password">'
+        '<button type="submit" class="action-login">Sign in</button></fieldset></form></section></body></html>'
+    )
+
+
+class ServerState:
+    """全ポート共通の Cookie・同時処理数・統計"""
+
+    def __init__(self, site: StandinSite, tokens: List[str], auth: bool, latency_ms: float, jitter_ms: float,
+                 max_inflight: int, verbose: bool):
+        self.site = site
+        self.tokens = set(tokens)
+        self.auth = auth
+        self.latency_ms = latency_ms
+        self.jitter_ms = jitter_ms
+        self.verbose = verbose
+        self.slots = threading.BoundedSemaphore(max_inflight) if max_inflight > 0 else None
+        self.max_inflight = max_inflight
+        self._lock = threading.Lock()
+        self._rendered: Dict[str, bytes] = {}
+        self.started = time.time()
+        self.requests = 0
+        self.by_status: Dict[str, int] = {}
+        self.inflight = 0
+        self.peak_inflight = 0
+        self.service_ms: Deque[float] = deque(maxlen=LATENCY_HISTORY)
+        self.queue_ms: Deque[float] = deque(maxlen=LATENCY_HISTORY)
+
+    def page_bytes(self, key: str) -> bytes:
+        body = self._rendered.get(key)
+        if body is None:
+            body = self.site.render(key).encode('utf-8')
+            with self._lock:
+                self._rendered[key] = body
+        return body
+
+    def delay(self) -> None:
+        if self.latency_ms <= 0 and self.jitter_ms <= 0:
+            return
+        ms = self.latency_ms + random.uniform(-self.jitter_ms, self.jitter_ms)
+        time.sleep(max(ms, 0.0) / 1000.0)
+
+    def begin(self) -> float:
+        t0 = time.perf_counter()
+        if self.slots is not None:
+            self.slots.acquire()
+        with self._lock:
+            self.inflight += 1
+            self.peak_inflight = max(self.peak_inflight, self.inflight)
+            self.queue_ms.append((time.perf_counter() - t0) * 1000.0)
+        return t0
+
+    def end(self, t0: float, status: int) -> None:
+        with self._lock:
+            self.inflight -= 1
+            self.requests += 1
+            self.by_status[str(status)] = self.by_status.get(str(status), 0) + 1
+            self.service_ms.append((time.perf_counter() - t0) * 1000.0)
+        if self.slots is not None:
+            self.slots.release()
+
+    def stats(self) -> dict:
+        with self._lock:
+            service = sorted(self.service_ms)
+            queue = sorted(self.queue_ms)
+            elapsed = max(time.time() - self.started, 1e-9)
+            return {
+                'requests': self.requests,
+                'by_status': dict(self.by_status),
+                'requests_per_s': round(self.requests / elapsed, 2),
+                'inflight': self.inflight,
+                'peak_inflight': self.peak_inflight,
+                'max_inflight': self.max_inflight,
+                'latency_ms': {'configured': self.latency_ms, 'jitter': self.jitter_ms},
+                'response_ms': _percentiles(service),
+                'queue_ms': _percentiles(queue),
+            }
+
+
+def _percentiles(sorted_values: List[float]) -> Dict[str, float]:
+    if not sorted_values:
+        return {}
+    n = len(sorted_values)
+    return {f"p{p}": round(sorted_values[min(int(n * p / 100), n - 1)], 2) for p in (50, 90, 99)}
+
+
+class StandinHandler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'
+    server_version = 'standin-shopping-admin'
+    disable_nagle_algorithm = True  # ヘッダーと本文の分割送信で keep-alive 時に遅延 ACK 待ちが入るのを防ぐ
+
+    @property
+    def state(self) -> ServerState:
+        return self.server.state  # type: ignore[attr-defined]
+
+    def log_message(self, format, *args) -> None:
+        if self.state.verbose:
+            super().log_message(format, *args)
+
+    def _cookies(self) -> Dict[str, str]:
+        pairs: Dict[str, str] = {}
+        for part in str(self.headers.get('Cookie') or '').split(';'):
+            name, sep, value = part.strip().partition('=')
+            if sep:
+                pairs[name] = value
+        return pairs
+
+    def _authorized(self) -> bool:
+        return not self.state.auth or self._cookies().get(ADMIN_COOKIE) in self.state.tokens
+
+    def _send(self, status: int, body: bytes, content_type: str = 'text/html; charset=UTF-8',
+              headers: Optional[Dict[str, str]] = None) -> None:
+        self.send_response(status)
+        self.send_header('Content-Type', content_type)
+        self.send_header('Content-Length', str(len(body)))
+        for k, v in (headers or {}).items():
+            self.send_header(k, v)
+        self.end_headers()
+        if self.command != 'HEAD':
+            self.wfile.write(body)
+
+    def _serve(self) -> int:
+        if urlparse(self.path).path.startswith('/admin'):
+            if self.command == 'POST' and not self._authorized():
+                return self._login()
+            if not self._authorized():
+                self._send(200, _login_page().encode('utf-8'))
+                return 200
+        key = self.state.site.lookup(self.path)
+        if key is None:
+            self._send(404, b'<!doctype html><html><body><h1>404 Error</h1><p>Page not found.</p></body></html>')
+            return 404
+        self._send(200, self.state.page_bytes(key))
+        return 200
+
+    def _login(self) -> int:
+        length = int(self.headers.get('Content-Length') or 0)
+        form = parse_qs(self.rfile.read(length).decode('utf-8', errors='replace')) if length else {}
+        user = (form.get('login[username]') or [''])[0]
+        password = (form.get('login[password]') or [''])[0]
+        if (user, password) != ADMIN_USER:
+            self._send(200, _login_page('The account sign-in was incorrect.').encode('utf-8'))
+            return 200
+        token = secrets.token_hex(16)
+        self.state.tokens.add(token)
+        self._send(302, b'', headers={
+            'Location': '/admin/admin/dashboard/',
+            'Set-Cookie': f'{ADMIN_COOKIE}={token}; path=/admin; HttpOnly',
+        })
+        return 302
+
+    def _handle(self) -> None:
+        state = self.state
+        if urlparse(self.path).path == STATS_PATH:
+            # 統計はレイテンシ・同時処理数の制御と集計の対象外
+            self._send(200, json.dumps(state.stats()).encode('utf-8'), 'application/json')
+            return
+        t0 = state.begin()
+        status = 500
+        try:
+            state.delay()
+            status = self._serve()
+        finally:
+            state.end(t0, status)
+
+    def do_GET(self) -> None:
+        self._handle()
+
+    def do_HEAD(self) -> None:
+        self._handle()
+
+    def do_POST(self) -> None:
+        self._handle()
+
+
+def start_servers(state: ServerState, host: str, ports: List[int]) -> List[ThreadingHTTPServer]:
+    servers: List[ThreadingHTTPServer] = []
+    for port in ports:
+        server = ThreadingHTTPServer((host, port), StandinHandler)
+        server.daemon_threads = True
+        server.state = state  # type: ignore[attr-defined]
+        threading.Thread(target=server.serve_forever, daemon=True).start()
+        servers.append(server)
+    return servers
+
+
+def storage_state_tokens(path: Path) -> List[str]:
+    """storage_state の admin Cookie の値（evaluate.py / http_fastpath が送る Cookie をそのまま受け付ける）"""
+    if not path.exists():
+        return []
+    with open(path, 'r') as f:
+        cookies = (json.load(f) or {}).get('cookies') or []
+    return [str(c.get('value') or '') for c in cookies if c.get('name') == ADMIN_COOKIE]
+
+
+# ===== サブコマンド =====
+
+def _site_from_args(args) -> StandinSite:
+    site = build_site(Path(args.configs_dir), Path(args.checks), Path(args.fixture), Path(args.csv) if args.csv else None)
+    print(f"[情報] ページ: {len(site.keys())}件（要素 {sum(len(v) for v in site.elements.values())}件）")
+    if site.unsupported:
+        print(f"[警告] 要素を生成できない locator: {len(site.unsupported)}件")
+    for c in site.conflicts:
+        print(f"[警告] 同じ要素に異なる値（先の値を採用）: {c}")
+    return site
+
+
+def cmd_serve(args) -> None:
+    site = _site_from_args(args)
+    tokens = [] if args.no_auth else storage_state_tokens(Path(args.storage_state))
+    if not args.no_auth and not tokens:
+        print(f"[警告] storage_state に admin Cookie がありません。ログインフォーム（{ADMIN_USER[0]} / {ADMIN_USER[1]}）で発行した Cookie のみ受け付けます")
+    state = ServerState(site, tokens, not args.no_auth, args.latency_ms, args.jitter_ms, args.max_inflight, args.verbose)
+    ports = args.port or [DEFAULT_PORT]
+    servers = start_servers(state, args.host, ports)
+    print(f"[情報] スタンドイン起動: {', '.join(f'http://{args.host}:{p}' for p in ports)}"
+          f"（レイテンシ {args.latency_ms:.0f}±{args.jitter_ms:.0f}ms / 同時処理数 {args.max_inflight or '無制限'}）")
+    print(f"[情報] 統計: http://{args.host}:{ports[0]}{STATS_PATH}")
+    try:
+        while True:
+            time.sleep(3600)
+    except KeyboardInterrupt:
+        pass
+    finally:
+        for server in servers:
+            server.shutdown()
+        print(f"[結果] {json.dumps(state.stats(), ensure_ascii=False)}")
+
+
+def cmd_routes(args) -> None:
+    site = _site_from_args(args)
+    sources: Dict[str, int] = {}
+    for els in site.elements.values():
+        for el in els:
+            sources[el.source] = sources.get(el.source, 0) + 1
+    print(f"[結果] config 由来のページ {len(set(site.elements) | set(site.texts))}件 / スナップショット {len(site.snapshots)}件 / "
+          f"要素の値: " + ', '.join(f"{k} {v}件" for k, v in sorted(sources.items())))
+    if args.verbose:
+        for key in sorted(set(site.elements) | set(site.texts)):
+            print(f"  {key}{'（スナップショットあり）' if key in site.snapshots else ''}")
+            for el in site.elements.get(key, []):
+                print(f"    {el.selector}.{el.prop} = {el.value[:60]!r} [{el.source}]")
+            for text in site.texts.get(key, []):
+                print(f"    本文: {text[:60]!r}")
+        for u in site.unsupported:
+            print(f"  未対応: {u}")
+
+
+def cmd_check(args) -> None:
+    """一時ポートで起動し、configs/ の program_html 項目（url='last' は reference_url のページ）を HTTP 高速経路で評価する"""
+    from http_fastpath import HttpFastPath
+
+    site = _site_from_args(args)
+    token = secrets.token_hex(16)
+    state = ServerState(site, [token], True, args.latency_ms, args.jitter_ms, args.max_inflight, False)
+    server = start_servers(state, '127.0.0.1', [0])[0]
+    port = server.server_address[1]
+    ok = ng = skipped = 0
+    t0 = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix='standin-check-') as tmp:
+        storage_state = Path(tmp) / 'state.json'
+        with open(storage_state, 'w') as f:
+            json.dump({'cookies': [{'name': ADMIN_COOKIE, 'value': token, 'domain': '127.0.0.1', 'path': '/'}]}, f)
+        fast = HttpFastPath(storage_state)
+        for path in sorted(Path(args.configs_dir).glob('*.json')):
+            with open(path, 'r') as f:
+                cfg = json.load(f)
+            ev = cfg.get('eval') or {}
+            for idx, item in enumerate(ev.get('program_html') or []):
+                url = str(item.get('url') or '')
+                if url == 'last':
+                    url = str(ev.get('reference_url') or '').split(' |OR| ')[0].strip()
+                if not url:
+                    skipped += 1
+                    continue
+                target = urlparse(_resolve_url(url))._replace(netloc=f'127.0.0.1:{port}').geturl()
+                value = fast.read(target, str(item.get('locator') or ''))
+                if value is None:
+                    print(f"  {path.name}[{idx}] 対象外（HTTP 高速経路で評価できない locator / 要素なし）")
+                    skipped += 1
+                    continue
+                required = item.get('required_contents') or {}
+                passed = True
+                if 'exact_match' in required:
+                    passed = value.strip().lower() == str(required['exact_match']).strip().lower()
+                for must in required.get('must_include') or []:
+                    passed = passed and str(must).strip().lower() in value.lower()
+                ok += int(passed)
+                ng += int(not passed)
+                if args.verbose or not passed:
+                    print(f"  {path.name}[{idx}] {'OK' if passed else 'NG'} 値={value[:80]!r} 期待={json.dumps(required, ensure_ascii=False)[:80]}")
+        fast.close()
+    elapsed = time.perf_counter() - t0
+    server.shutdown()
+    print(f"[結果] OK {ok}件 / NG {ng}件 / 対象外 {skipped}件（{elapsed:.2f}秒）")
+    print(f"[結果] {json.dumps(state.stats(), ensure_ascii=False)}")
+    sys.exit(1 if ng else 0)
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='shopping-admin のスタンドイン Web サーバー（ブラウザ採点の負荷試験用）')
+    common = argparse.ArgumentParser(add_help=False)
+    common.add_argument('--configs-dir', default=str(DEFAULT_CONFIGS_DIR))
+    common.add_argument('--checks', default=str(DEFAULT_CHECKS_FILE), help='program_html → SQL のマッピング（sql_verify.py と共通）')
+    common.add_argument('--fixture', default=str(DEFAULT_FIXTURE_FILE), help='要素の値に使うフィクスチャ SQL')
+    common.add_argument('--csv', default=str(DEFAULT_CSV), help='スナップショット本文に使う crawl.csv（空文字で無効）')
+    common.add_argument('--latency-ms', type=float, default=0.0, help='応答レイテンシの平均（ミリ秒）')
+    common.add_argument('--jitter-ms', type=float, default=0.0, help='応答レイテンシの揺らぎ（± ミリ秒、一様分布）')
+    common.add_argument('--max-inflight', type=int, default=0, help='同時処理数の上限（超過分は待機。0 で無制限）')
+    common.add_argument('-v', '--verbose', action='store_true')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    p_serve = sub.add_parser('serve', parents=[common], help='スタンドインを起動（Ctrl-C で停止し統計を表示）')
+    p_serve.add_argument('--host', default='127.0.0.1')
+    p_serve.add_argument('--port', type=int, action='append', help=f'待ち受けポート（複数指定可。既定 {DEFAULT_PORT}）')
+    p_serve.add_argument('--storage-state', default=str(DEFAULT_STORAGE_STATE), help='admin Cookie を受け付ける storage_state')
+    p_serve.add_argument('--no-auth', action='store_true', help='admin Cookie を確認しない')
+
+    sub.add_parser('routes', parents=[common], help='生成するページと要素を表示')
+    sub.add_parser('check', parents=[common], help='一時ポートで起動し、configs/ の項目を HTTP 高速経路で評価して期待値と照合')
+
+    args = ap.parse_args()
+    if args.cmd == 'serve':
+        cmd_serve(args)
+    elif args.cmd == 'routes':
+        cmd_routes(args)
+    else:
+        cmd_check(args)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,94 @@
+#!/usr/bin/env python3
+"""
+NDJSON trajectory（src/agent/tools/util.ts の startWebArenaTrajectoryStream が書き出す）の読み取り / 追従
+・1行目: {"type": "start", "pid": <エージェントのPID>, "task_id": ..., "config_file": ..., "cdp_endpoint": ...}
+・以降: state / action を1行1件（JSON 版 trajectory の要素と同じ形）
+・最終行: {"type": "end", "final_url": ..., "cdp_endpoint": ..., "evaluated_at": ..., "write_errors": <追記に失敗した行数>}
+  （中断時は {"type": "end", "aborted": true}。write_errors > 0 ならストリームは不完全で、evaluate.py は JSON 版で評価する）
+・follow=True では end 行が来るまで追記を待ち、各要素を到着順にコールバックへ渡す
+  書き込み途中の行（改行なし）は完成するまで待つ。エージェントのプロセスが end なしで終了した場合やアイドルが続いた場合は打ち切る
+
+環境変数:
+  AGENT_WEBARENA_STREAM_POLL_MS       追従時のポーリング間隔（既定 100ms）
+  AGENT_WEBARENA_STREAM_IDLE_TIMEOUT  追記が途絶えてから打ち切るまでの秒数（既定 1800）
+"""
+import json
+import os
+import time
+from pathlib import Path
+from typing import Callable, Dict, Optional
+
+
+class StreamAborted(RuntimeError):
+    """end 行なしでストリームが終わった / エージェントが中断を通知した"""
+
+
+def _pid_alive(pid: int) -> bool:
+    try:
+        os.kill(pid, 0)
+    except ProcessLookupError:
+        return False
+    except PermissionError:
+        return True
+    return True
+
+
+def read_stream(path: Path, on_item: Callable[[dict], None], *, follow: bool = False,
+                poll_s: Optional[float] = None, idle_timeout_s: Optional[float] = None) -> Dict[str, dict]:
+    """
+    NDJSON を読み、state / action を on_item に渡す。{'start': start 行, 'end': end 行} を返す
+
+    follow=False ではファイル末尾で終了（end 行が無ければ end は空）
+    """
+    if poll_s is None:
+        poll_s = float(os.environ.get('AGENT_WEBARENA_STREAM_POLL_MS', '100') or 100) / 1000.0
+    if idle_timeout_s is None:
+        idle_timeout_s = float(os.environ.get('AGENT_WEBARENA_STREAM_IDLE_TIMEOUT', '1800') or 1800)
+    start: dict = {}
+    end: dict = {}
+    buf = ''
+    writer_gone = False
+    last_progress = time.monotonic()
+    with open(path, 'r', encoding='utf-8') as f:
+        while True:
+            chunk = f.readline()
+            if chunk:
+                buf += chunk
+                if not buf.endswith('\n'):
+                    # 書き込み途中の行
+                    if writer_gone:
+                        break
+                    continue
+                line, buf = buf.strip(), ''
+                last_progress = time.monotonic()
+                if not line:
+                    continue
+                try:
+                    obj = json.loads(line)
+                except json.JSONDecodeError as e:
+                    print(f"[警告] trajectory ストリームの不正な行を無視: {e}")
+                    continue
+                kind = obj.get('type') if isinstance(obj, dict) else None
+                if kind == 'start':
+                    start = obj
+                elif kind == 'end':
+                    end = obj
+                    break
+                else:
+                    on_item(obj)
+                continue
+            if not follow or writer_gone:
+                break
+            if time.monotonic() - last_progress > idle_timeout_s:
+                raise StreamAborted(f"{idle_timeout_s:.0f}秒間 trajectory の追記がありません")
+            pid = int(start.get('pid') or 0)
+            if pid and not _pid_alive(pid):
+                # 終了直前の追記を取りこぼさないよう、もう一周だけ末尾まで読んでから判断する
+                writer_gone = True
+                continue
+            time.sleep(poll_s)
+    if follow and not end:
+        raise StreamAborted(f"エージェント（pid={start.get('pid')}）が終了しましたが end 行がありません")
+    if end.get('aborted'):
+        raise StreamAborted("エージェントが評価前に終了しました（aborted）")
+    return {'start': start, 'end': end}
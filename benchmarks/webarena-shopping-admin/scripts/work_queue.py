@@ -0,0 +1,555 @@
+#!/usr/bin/env python3
+"""
+複数ホストでの評価の分散実行（共有ストレージ上のリース方式ワークキュー）
+・ジョブ = trajectory + config + CDP エンドポイント（+ evaluate.py への追加フラグ）。enqueue でキューのディレクトリに積む
+・各ホストの worker がジョブをリースし（pending/ → leased/ への rename で排他。成功した1台だけが取得）、
+  evaluate.py を実行して結果を共有ディレクトリ（results/ と summaries/）に書き、done/ へ移す
+・リース中は leased/ のファイルの mtime を定期的に更新（ハートビート）。更新が lease 秒途絶えたジョブは
+  どの worker からでも pending/ へ戻す（再キュー）。戻されたジョブを元の worker が完了しても結果は採用しない
+・期限切れの判定はストレージ側の時刻（書き込んだファイルの mtime）で行うため、ホスト間の時計のずれに依存しない
+・merge で done/ の結果をまとめ、タスク別の平均スコア・状態別件数・ホスト別の処理件数と稼働時間・全体の所要時間を出す。
+  summaries/ はリーダーボード風サマリーの tasks ディレクトリと同じ構成なので compare_sweeps.py / latency_report.py にそのまま渡せる
+・共有ストレージは NFS / EFS 等（rename がアトミックなもの）。単一ホストでの試験はローカルディレクトリで代用できる。
+  trajectory・config のパスは全ホストから同じパスで読める必要がある
+
+キューのディレクトリ構成:
+  queue.json                     キュー設定（lease 秒・最大試行回数）
+  pending/<job>.json             未着手
+  leased/<job>.<token>.json      リース中（token はリースごとに一意）
+  done/<job>.json                完了（status / score / worker / 所要時間）
+  results/<job>.<token>.json     evaluate.py の結果JSON
+  summaries/task_<id>/<job>.json リーダーボード風サマリーの写し
+  logs/<job>.<token>.log         evaluate.py の出力
+  workers/<worker>.json          worker の状態（ハートビート）
+
+使い方:
+  python scripts/work_queue.py enqueue /mnt/efs/sweep-1 --trajectories 'output/webarena/trajectories/task_*.json' --repeat 3
+  python scripts/work_queue.py enqueue /mnt/efs/sweep-1 --manifest jobs.jsonl    # 1行1ジョブ {"trajectory", "config", "endpoint"}
+  python scripts/work_queue.py worker /mnt/efs/sweep-1 --endpoint http://localhost:9222 --slots 2 --exit-when-empty
+  python scripts/work_queue.py status /mnt/efs/sweep-1
+  python scripts/work_queue.py merge /mnt/efs/sweep-1 --output resources/bench/sweep-1.json
+"""
+import argparse
+import glob
+import json
+import os
+import re
+import secrets
+import shutil
+import socket
+import subprocess
+import sys
+import threading
+import time
+from pathlib import Path
+from typing import Dict, List, Optional
+
+import artifact_store
+
+SCRIPT_DIR = Path(__file__).resolve().parent
+CONFIGS_DIR = SCRIPT_DIR.parent / 'configs'
+EVAL_RESULT_DIR = Path('/home/ec2-user/webarena-local/evaluation-result')
+DEFAULT_ENDPOINT = 'http://localhost:9222'
+DEFAULT_LEASE_S = 120.0
+DEFAULT_MAX_ATTEMPTS = 3
+QUEUE_FILE = 'queue.json'
+SUBDIRS = ('pending', 'leased', 'done', 'results', 'summaries', 'logs', 'workers')
+
+_TRAJ_TASK_RE = re.compile(r'task_(\d+)_')
+
+
+def _write_json(path: Path, payload: dict) -> None:
+    """一時ファイル + rename で書き込む（読み手が書きかけを読まないように）"""
+    tmp = path.with_name(f'.{path.name}.{os.getpid()}.{threading.get_ident()}.tmp')
+    with open(tmp, 'w') as f:
+        json.dump(payload, f, indent=2, ensure_ascii=False)
+    os.replace(tmp, path)
+
+
+def _read_json(path: Path) -> Optional[dict]:
+    try:
+        with open(path, 'r') as f:
+            return json.load(f)
+    except (FileNotFoundError, json.JSONDecodeError):
+        return None
+
+
+class WorkQueue:
+    """共有ディレクトリ上のジョブキュー"""
+
+    def __init__(self, root: Path):
+        self.root = Path(root)
+        self.pending_dir = self.root / 'pending'
+        self.leased_dir = self.root / 'leased'
+        self.done_dir = self.root / 'done'
+        self.results_dir = self.root / 'results'
+        self.summaries_dir = self.root / 'summaries'
+        self.logs_dir = self.root / 'logs'
+        self.workers_dir = self.root / 'workers'
+        conf = _read_json(self.root / QUEUE_FILE) or {}
+        self.lease_s = float(conf.get('lease_s') or DEFAULT_LEASE_S)
+        self.max_attempts = int(conf.get('max_attempts') or DEFAULT_MAX_ATTEMPTS)
+
+    @classmethod
+    def create(cls, root: Path, lease_s: float, max_attempts: int) -> 'WorkQueue':
+        root = Path(root)
+        for name in SUBDIRS:
+            (root / name).mkdir(parents=True, exist_ok=True)
+        if not (root / QUEUE_FILE).exists():
+            _write_json(root / QUEUE_FILE, {
+                'lease_s': lease_s,
+                'max_attempts': max_attempts,
+                'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+            })
+        return cls(root)
+
+    # ----- 時刻 -----
+
+    def storage_now(self) -> float:
+        """ストレージ側の現在時刻（書き込んだファイルの mtime）。リース期限の判定はすべてこの時計で行う"""
+        probe = self.workers_dir / f'.clock-{socket.gethostname()}-{os.getpid()}'
+        with open(probe, 'w') as f:
+            f.write('')
+        return probe.stat().st_mtime
+
+    # ----- 投入 -----
+
+    def enqueue(self, jobs: List[dict]) -> int:
+        start = len(list(self.pending_dir.glob('*.json'))) + len(list(self.leased_dir.glob('*.json'))) + len(list(self.done_dir.glob('*.json')))
+        for i, job in enumerate(jobs, start=start):
+            job_id = f"{i:05d}-task{job['task_id']}-r{job['repeat']}"
+            _write_json(self.pending_dir / f'{job_id}.json', {**job, 'job_id': job_id, 'attempts': 0})
+        return len(jobs)
+
+    # ----- リース -----
+
+    def lease(self, worker: str) -> Optional['Lease']:
+        """未着手のジョブを1件リースする（他の worker と取り合いになった場合は次のジョブを試す）"""
+        for path in sorted(self.pending_dir.glob('*.json')):
+            job_id = path.stem
+            token = f'{worker}-{secrets.token_hex(4)}'
+            leased = self.leased_dir / f'{job_id}.{token}.json'
+            try:
+                os.rename(path, leased)
+            except FileNotFoundError:
+                continue
+            # rename は mtime を変えないため、取得直後に更新してから中身を書き換える
+            try:
+                os.utime(leased, None)
+            except FileNotFoundError:
+                # 更新前の古い mtime のまま他の worker に期限切れとして戻された
+                continue
+            job = _read_json(leased) or {'job_id': job_id}
+            job['attempts'] = int(job.get('attempts') or 0) + 1
+            job['lease'] = {'worker': worker, 'token': token, 'leased_at': time.time()}
+            _write_json(leased, job)
+            return Lease(self, job, leased)
+        return None
+
+    def reap(self) -> List[str]:
+        """ハートビートが lease 秒途絶えたリースを pending/ に戻す（試行回数の上限を超えたものは failed で完了）"""
+        now = self.storage_now()
+        reaped: List[str] = []
+        for path in self.leased_dir.glob('*.json'):
+            try:
+                if now - path.stat().st_mtime <= self.lease_s:
+                    continue
+            except FileNotFoundError:
+                continue
+            job_id = path.name.split('.', 1)[0]
+            job = _read_json(path) or {'job_id': job_id}
+            worker = (job.get('lease') or {}).get('worker')
+            if int(job.get('attempts') or 0) >= self.max_attempts:
+                target = self.done_dir / f'{job_id}.json'
+            else:
+                target = self.pending_dir / f'{job_id}.json'
+            try:
+                os.rename(path, target)
+            except FileNotFoundError:
+                continue  # 他の worker が先に戻した / 元の worker が完了した
+            if target.parent == self.done_dir:
+                job.update({'status': 'failed', 'error': f"リース期限切れが {job.get('attempts')} 回", 'worker': worker})
+                job.pop('lease', None)
+                _write_json(target, job)
+                print(f"[警告] {job_id}: 試行回数の上限に達したため failed にしました（最後の worker: {worker}）")
+            else:
+                print(f"[警告] {job_id}: リース期限切れのため再キューしました（worker: {worker}）")
+            reaped.append(job_id)
+        return reaped
+
+    def counts(self) -> Dict[str, int]:
+        return {name: len(list((self.root / name).glob('*.json'))) for name in ('pending', 'leased', 'done')}
+
+
+class Lease:
+    """1件のリース（heartbeat でファイルの mtime を更新。ファイルが消えていればリースを失っている）"""
+
+    def __init__(self, queue: WorkQueue, job: dict, path: Path):
+        self.queue = queue
+        self.job = job
+        self.path = path
+        self.token = job['lease']['token']
+        self.lost = False
+
+    def heartbeat(self) -> bool:
+        try:
+            os.utime(self.path, None)
+        except FileNotFoundError:
+            self.lost = True
+        return not self.lost
+
+    def complete(self, outcome: dict) -> bool:
+        """結果を確定して done/ に移す（リースを失っていれば False、結果は採用しない）"""
+        record = {**self.job, **outcome}
+        record.pop('lease', None)
+        record['worker'] = self.job['lease']['worker']
+        record['token'] = self.token
+        try:
+            # まずリースファイルを自分の token のまま done/ へ移し、成功した場合だけ中身を書き込む
+            os.rename(self.path, self.queue.done_dir / f"{self.job['job_id']}.json")
+        except FileNotFoundError:
+            self.lost = True
+            return False
+        _write_json(self.queue.done_dir / f"{self.job['job_id']}.json", record)
+        return True
+
+
+# ----- worker -----
+
+def _find_summary(task_id, result_file: Path, since: float) -> Optional[Path]:
+    """
+    evaluate.py が書いたリーダーボード風サマリー（since 以降に書かれ、artifacts.result_file がこのジョブの結果JSONのもの）
+    同じ trajectory の繰り返しが並行に走っても取り違えないよう、trajectory ではなくジョブごとの結果パスで照合する
+    """
+    task_dir = EVAL_RESULT_DIR / f'task_{task_id}'
+    candidates = [p for p in task_dir.glob('*.json') if p.stat().st_mtime >= since - 1.0]
+    for p in sorted(candidates, key=lambda p: p.stat().st_mtime, reverse=True):
+        try:
+            summary = artifact_store.load_json(p)  # 成果物ストアに格納済みでも同じ
+        except Exception:
+            continue
+        if str((summary.get('artifacts') or {}).get('result_file') or '') == str(result_file):
+            return p
+    return None
+
+
+def run_job(queue: WorkQueue, lease: Lease, endpoint_override: str) -> None:
+    """1ジョブを evaluate.py で評価し、結果を共有ディレクトリに書いて完了にする"""
+    job = lease.job
+    job_id = job['job_id']
+    result_file = queue.results_dir / f'{job_id}.{lease.token}.json'
+    log_file = queue.logs_dir / f'{job_id}.{lease.token}.log'
+    endpoint = endpoint_override or job.get('endpoint') or DEFAULT_ENDPOINT
+    cmd = [sys.executable, str(SCRIPT_DIR / 'evaluate.py'), job['trajectory'], job['config'], endpoint, str(result_file)]
+    cmd += list(job.get('flags') or [])
+    print(f"[情報] {job_id}: 評価開始（試行 {job['attempts']}）")
+    t0 = time.time()
+    with open(log_file, 'w') as log:
+        proc = subprocess.run(cmd, stdout=log, stderr=subprocess.STDOUT, cwd=str(SCRIPT_DIR.parent))
+    elapsed = time.time() - t0
+
+    result = _read_json(result_file)
+    outcome = {
+        'exit_code': proc.returncode,
+        'started_at': t0,
+        'finished_at': time.time(),
+        'elapsed_s': round(elapsed, 3),
+        'result_file': str(result_file),
+        'log_file': str(log_file),
+    }
+    if result is None:
+        outcome.update({'status': 'error', 'score': None, 'error': f'結果JSONが書かれませんでした（終了コード {proc.returncode}）'})
+    else:
+        outcome.update({'status': result.get('status') or 'ok', 'score': float(result.get('score') or 0.0)})
+    summary = _find_summary(job['task_id'], result_file, t0)
+    if summary is not None:
+        dest = queue.summaries_dir / f"task_{job['task_id']}" / f'{job_id}.json'
+        dest.parent.mkdir(parents=True, exist_ok=True)
+        shutil.copyfile(summary, dest)
+        outcome['summary_file'] = str(dest)
+
+    if lease.complete(outcome):
+        print(f"[情報] {job_id}: {outcome['status']} スコア={outcome['score']}（{elapsed:.1f}秒）")
+    else:
+        print(f"[警告] {job_id}: リースを失っていたため結果を破棄しました（再キュー済み）")
+
+
+class Worker:
+    """1ホストの worker（slots 件まで並行に評価し、保持中のリースのハートビートを送る）"""
+
+    def __init__(self, queue: WorkQueue, endpoint: str, slots: int, name: str = ''):
+        self.queue = queue
+        self.endpoint = endpoint
+        self.slots = max(1, slots)
+        self.name = name or f'{socket.gethostname()}-{os.getpid()}'
+        self.leases: Dict[str, Lease] = {}
+        self.lock = threading.Lock()
+        self.stop = threading.Event()
+        self.completed = 0
+        self.started_at = time.time()
+
+    def _heartbeat_loop(self) -> None:
+        interval = max(self.queue.lease_s / 4.0, 0.5)
+        while not self.stop.wait(interval):
+            with self.lock:
+                leases = list(self.leases.values())
+            for lease in leases:
+                if not lease.heartbeat():
+                    print(f"[警告] {lease.job['job_id']}: リースを失いました（期限切れで再キューされた）")
+            self._write_state()
+
+    def _write_state(self) -> None:
+        with self.lock:
+            active = sorted(self.leases)
+        _write_json(self.queue.workers_dir / f'{self.name}.json', {
+            'worker': self.name,
+            'host': socket.gethostname(),
+            'slots': self.slots,
+            'active': active,
+            'completed': self.completed,
+            'started_at': self.started_at,
+            'heartbeat_at': time.time(),
+        })
+
+    def _slot_loop(self, exit_when_empty: bool, poll_s: float) -> None:
+        while not self.stop.is_set():
+            lease = self.queue.lease(self.name)
+            if lease is None:
+                self.queue.reap()
+                counts = self.queue.counts()
+                if exit_when_empty and counts['pending'] == 0 and counts['leased'] == 0:
+                    return
+                self.stop.wait(poll_s)
+                continue
+            with self.lock:
+                self.leases[lease.job['job_id']] = lease
+            try:
+                run_job(self.queue, lease, self.endpoint)
+            except Exception as e:
+                # ジョブの実行自体が失敗した場合はリースを手放さず、期限切れによる再キューに任せる
+                print(f"[エラー] {lease.job['job_id']}: 実行に失敗: {e}")
+                with self.lock:
+                    self.leases.pop(lease.job['job_id'], None)
+                continue
+            with self.lock:
+                self.leases.pop(lease.job['job_id'], None)
+                self.completed += 1
+
+    def run(self, exit_when_empty: bool, poll_s: float) -> int:
+        print(f"[情報] worker {self.name}: slots={self.slots} lease={self.queue.lease_s:.0f}秒 キュー={self.queue.root}")
+        self._write_state()
+        hb = threading.Thread(target=self._heartbeat_loop, daemon=True)
+        hb.start()
+        threads = [threading.Thread(target=self._slot_loop, args=(exit_when_empty, poll_s), daemon=True) for _ in range(self.slots)]
+        for t in threads:
+            t.start()
+        try:
+            for t in threads:
+                while t.is_alive():
+                    t.join(timeout=1.0)
+        except KeyboardInterrupt:
+            print("[警告] 中断しました（実行中のジョブはリース期限切れ後に再キューされます）")
+        self.stop.set()
+        self._write_state()
+        print(f"[結果] worker {self.name}: 完了 {self.completed}件（{time.time() - self.started_at:.1f}秒）")
+        return self.completed
+
+
+# ----- 投入ジョブの組み立て -----
+
+def _task_id_from_config(config: str):
+    cfg = _read_json(Path(config)) or {}
+    return cfg.get('task_id')
+
+
+def _interleave(groups: List[List[dict]]) -> List[dict]:
+    """ジョブの繰り返しを周回順に並べる（1周目の全ジョブ → 2周目 …）。同じタスクの繰り返しが連続して同時に走らないように"""
+    rounds = max((len(g) for g in groups), default=0)
+    return [g[r] for r in range(rounds) for g in groups if r < len(g)]
+
+
+def _repeat_flags(flags: List[str], repeat: int) -> List[str]:
+    """繰り返しのあるジョブは evaluate.py に --force を付ける（評価キャッシュのヒットでは反復ごとの採点にならないため）"""
+    flags = list(flags)
+    if repeat > 1 and '--force' not in flags:
+        flags.append('--force')
+    return flags
+
+
+def jobs_from_trajectories(patterns: List[str], configs_dir: Path, endpoint: str, repeat: int, flags: List[str]) -> List[dict]:
+    groups: List[List[dict]] = []
+    for pattern in patterns:
+        for traj in sorted(glob.glob(pattern)):
+            m = _TRAJ_TASK_RE.search(Path(traj).name)
+            if not m:
+                print(f"[警告] ファイル名からタスクIDを取得できません（task_<id>_...）: {traj}")
+                continue
+            config = configs_dir / f'{m.group(1)}.json'
+            if not config.exists():
+                print(f"[警告] config が見つかりません: {config}")
+                continue
+            job_flags = _repeat_flags(flags, repeat)
+            groups.append([{
+                'task_id': int(m.group(1)),
+                'repeat': r,
+                'trajectory': str(Path(traj).resolve()),
+                'config': str(config.resolve()),
+                'endpoint': endpoint,
+                'flags': job_flags,
+            } for r in range(repeat)])
+    return _interleave(groups)
+
+
+def jobs_from_manifest(path: Path, endpoint: str, repeat: int, flags: List[str]) -> List[dict]:
+    groups: List[List[dict]] = []
+    with open(path, 'r') as f:
+        for line in f:
+            if not line.strip():
+                continue
+            row = json.loads(line)
+            task_id = row.get('task_id', _task_id_from_config(row['config']))
+            n = int(row.get('repeat') or repeat)
+            job_flags = _repeat_flags(list(row.get('flags') or flags), n)
+            groups.append([{
+                'task_id': task_id,
+                'repeat': r,
+                'trajectory': str(Path(row['trajectory']).resolve()),
+                'config': str(Path(row['config']).resolve()),
+                'endpoint': row.get('endpoint') or endpoint,
+                'flags': job_flags,
+            } for r in range(n)])
+    return _interleave(groups)
+
+
+# ----- 集計 -----
+
+def merge(queue: WorkQueue) -> dict:
+    """done/ の結果を1つのレポートにまとめる"""
+    records = [r for r in (_read_json(p) for p in sorted(queue.done_dir.glob('*.json'))) if r]
+    by_task: Dict[str, List[dict]] = {}
+    statuses: Dict[str, int] = {}
+    hosts: Dict[str, dict] = {}
+    for r in records:
+        by_task.setdefault(str(r.get('task_id')), []).append(r)
+        statuses[r.get('status') or 'unknown'] = statuses.get(r.get('status') or 'unknown', 0) + 1
+        worker = r.get('worker') or 'unknown'
+        h = hosts.setdefault(worker, {'jobs': 0, 'busy_s': 0.0})
+        h['jobs'] += 1
+        h['busy_s'] = round(h['busy_s'] + float(r.get('elapsed_s') or 0.0), 3)
+
+    tasks = {}
+    for task_id, runs in sorted(by_task.items(), key=lambda kv: (len(kv[0]), kv[0])):
+        scores = [float(r['score']) for r in runs if r.get('score') is not None]
+        tasks[task_id] = {
+            'runs': len(runs),
+            'scored': len(scores),
+            'mean_score': round(sum(scores) / len(scores), 4) if scores else None,
+            'statuses': sorted({r.get('status') or 'unknown' for r in runs}),
+        }
+
+    starts = [float(r['started_at']) for r in records if r.get('started_at')]
+    ends = [float(r['finished_at']) for r in records if r.get('finished_at')]
+    wall_s = (max(ends) - min(starts)) if starts and ends else 0.0
+    busy_s = sum(h['busy_s'] for h in hosts.values())
+    scored = [t['mean_score'] for t in tasks.values() if t['mean_score'] is not None]
+    return {
+        'queue': str(queue.root),
+        'counts': queue.counts(),
+        'jobs': len(records),
+        'statuses': statuses,
+        'mean_task_score': round(sum(scored) / len(scored), 4) if scored else None,
+        'wall_s': round(wall_s, 3),
+        'busy_s': round(busy_s, 3),
+        'parallelism': round(busy_s / wall_s, 2) if wall_s > 0 else None,
+        'workers': hosts,
+        'tasks': tasks,
+        'summaries_dir': str(queue.summaries_dir),
+    }
+
+
+def cmd_status(queue: WorkQueue) -> None:
+    counts = queue.counts()
+    print(f"[結果] {queue.root}: 未着手 {counts['pending']} / リース中 {counts['leased']} / 完了 {counts['done']}")
+    now = queue.storage_now()
+    for p in sorted(queue.leased_dir.glob('*.json')):
+        job = _read_json(p) or {}
+        age = now - p.stat().st_mtime
+        print(f"  {p.name.split('.', 1)[0]}  worker={(job.get('lease') or {}).get('worker')}  試行={job.get('attempts')}  "
+              f"ハートビート {age:.0f}秒前{'（期限切れ）' if age > queue.lease_s else ''}")
+    for p in sorted(queue.workers_dir.glob('*.json')):
+        w = _read_json(p) or {}
+        print(f"  worker {w.get('worker')}: 実行中 {len(w.get('active') or [])} / 完了 {w.get('completed')}")
+
+
+def main() -> None:
+    ap = argparse.ArgumentParser(description='複数ホストでの評価の分散実行（リース方式ワークキュー）')
+    sub = ap.add_subparsers(dest='cmd', required=True)
+
+    p_enq = sub.add_parser('enqueue', help='ジョブを投入')
+    p_enq.add_argument('root', type=Path, help='キューのディレクトリ（全ホストから見える共有ストレージ）')
+    src = p_enq.add_mutually_exclusive_group(required=True)
+    src.add_argument('--trajectories', nargs='+', help='trajectory のパス / glob（ファイル名 task_<id>_... から config を決める）')
+    src.add_argument('--manifest', type=Path, help='1行1ジョブの JSONL（trajectory, config, 任意で endpoint / repeat / flags）')
+    p_enq.add_argument('--configs-dir', type=Path, default=CONFIGS_DIR)
+    p_enq.add_argument('--endpoint', default=DEFAULT_ENDPOINT, help='ジョブの CDP エンドポイント（worker の --endpoint で上書き可）')
+    p_enq.add_argument('--repeat', type=int, default=1, help='各ジョブの反復回数')
+    p_enq.add_argument('--force', action='store_true', help='evaluate.py に --force を付ける（--repeat 2 以上では自動で付く）')
+    p_enq.add_argument('--lease', type=float, default=DEFAULT_LEASE_S, help='リース期間（秒、キュー作成時のみ有効）')
+    p_enq.add_argument('--max-attempts', type=int, default=DEFAULT_MAX_ATTEMPTS, help='リース期限切れでの再試行の上限（キュー作成時のみ有効）')
+
+    p_work = sub.add_parser('worker', help='ジョブをリースして評価')
+    p_work.add_argument('root', type=Path)
+    p_work.add_argument('--endpoint', default='', help='このホストの CDP エンドポイント（既定: ジョブの値）')
+    p_work.add_argument('--slots', type=int, default=1, help='このホストで並行に評価するジョブ数')
+    p_work.add_argument('--name', default='', help='worker 名（既定: <hostname>-<pid>）')
+    p_work.add_argument('--poll', type=float, default=5.0, help='キューが空のときの確認間隔（秒）')
+    p_work.add_argument('--exit-when-empty', action='store_true', help='未着手・リース中のジョブが無くなったら終了')
+
+    p_status = sub.add_parser('status', help='キューの状態を表示')
+    p_status.add_argument('root', type=Path)
+
+    p_reap = sub.add_parser('reap', help='期限切れのリースを再キュー')
+    p_reap.add_argument('root', type=Path)
+
+    p_merge = sub.add_parser('merge', help='結果を1つのレポートにまとめる')
+    p_merge.add_argument('root', type=Path)
+    p_merge.add_argument('--output', type=Path, default=None)
+    args = ap.parse_args()
+
+    if args.cmd == 'enqueue':
+        queue = WorkQueue.create(args.root, args.lease, args.max_attempts)
+        flags = ['--force'] if args.force else []
+        if args.manifest:
+            jobs = jobs_from_manifest(args.manifest, args.endpoint, args.repeat, flags)
+        else:
+            jobs = jobs_from_trajectories(args.trajectories, args.configs_dir, args.endpoint, args.repeat, flags)
+        print(f"[結果] {queue.enqueue(jobs)}件を投入しました: {queue.root}")
+        return
+
+    if not (args.root / QUEUE_FILE).exists():
+        print(f"[エラー] キューがありません（先に enqueue してください）: {args.root}")
+        sys.exit(1)
+    queue = WorkQueue(args.root)
+    if args.cmd == 'worker':
+        Worker(queue, args.endpoint, args.slots, args.name).run(args.exit_when_empty, args.poll)
+    elif args.cmd == 'status':
+        cmd_status(queue)
+    elif args.cmd == 'reap':
+        print(f"[結果] 再キュー {len(queue.reap())}件")
+    else:
+        report = merge(queue)
+        print(f"[結果] ジョブ {report['jobs']}件 / 状態 {report['statuses']} / タスク平均スコア {report['mean_task_score']}")
+        print(f"[結果] 所要時間 {report['wall_s']:.1f}秒 / 評価時間の合計 {report['busy_s']:.1f}秒 / 並列度 {report['parallelism']}")
+        for name, h in sorted(report['workers'].items()):
+            print(f"  {name}: {h['jobs']}件 / {h['busy_s']:.1f}秒")
+        if report['counts']['pending'] or report['counts']['leased']:
+            print(f"[警告] 未完了のジョブがあります: 未着手 {report['counts']['pending']} / リース中 {report['counts']['leased']}")
+        if args.output:
+            args.output.parent.mkdir(parents=True, exist_ok=True)
+            with open(args.output, 'w') as f:
+                json.dump(report, f, indent=2, ensure_ascii=False)
+            print(f"[情報] 保存: {args.output}")
+
+
+if __name__ == '__main__':
+    main()
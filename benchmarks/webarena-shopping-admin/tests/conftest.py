@@ -0,0 +1,18 @@
+"""
+scripts/ の評価ツールのテスト（python -m pytest benchmarks/webarena-shopping-admin/tests）
+・scripts/ のモジュールは互いにモジュール名で import するため、scripts/ を sys.path に追加する
+・ブラウザ・Bedrock・共有ストレージには接続しない（必要なものはフィクスチャと一時ディレクトリで用意する）
+"""
+import sys
+from pathlib import Path
+
+import pytest
+
+SCRIPTS_DIR = Path(__file__).resolve().parent.parent / 'scripts'
+FIXTURES_DIR = Path(__file__).resolve().parent / 'fixtures'
+sys.path.insert(0, str(SCRIPTS_DIR))
+
+
+@pytest.fixture
+def fixtures_dir() -> Path:
+    return FIXTURES_DIR
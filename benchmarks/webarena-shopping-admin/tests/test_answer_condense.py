@@ -0,0 +1,60 @@
+"""最終回答の圧縮（answer_condense）: 前置きの削除と最終回答の範囲"""
+import pytest
+
+import answer_condense
+
+
+@pytest.mark.parametrize('text', [
+    'Good fit and comfortable material are the main positives.',
+    'Great, the top seller is Chloe Tank with 5 units.',
+    'Done orders this month: 12.',
+])
+def test_sentences_starting_with_interjection_are_kept(text):
+    assert answer_condense.condense(text)['text'] == text
+
+
+def test_standalone_interjections_are_removed():
+    out = answer_condense.condense('Perfect! The top seller is Chloe Tank with 5 units. Task completed.')
+    assert out['text'] == 'The top seller is Chloe Tank with 5 units.'
+
+
+def test_final_span_skips_heading_only_lines():
+    assert answer_condense.condense('The top seller is Chloe Tank.\n\n## Answer:')['final_span'] == 'The top seller is Chloe Tank.'
+    assert answer_condense.condense('## Answer\n### Details:\nChloe Tank')['final_span'] == 'Chloe Tank'
+
+
+def test_memory_status_sentence_is_not_the_span():
+    text = ('## Summary\n\n**Total Canceled Orders: 142**\n\n'
+            'The complete list of canceled orders is now accessible on the Orders page. '
+            "I've saved this information to memory for future reference.")
+    out = answer_condense.condense(text, intent='Lookup orders that are canceled')
+    assert 'memory' not in out['final_span'] and 'memory' not in out['text']
+    assert 'canceled orders' in out['final_span']
+    assert not out['fallback']
+
+
+def test_span_unrelated_to_intent_falls_back_to_raw_answer():
+    text = 'Chloe Tank is the best seller.\n\nAll tasks have been completed successfully.'
+    out = answer_condense.condense(text, intent='What is the top-1 best selling product in 2022')
+    assert out['fallback'] == 'span_off_intent'
+    assert out['text'] == text
+
+
+def test_urls_outside_the_span_are_removed():
+    text = 'I checked http://127.0.0.1:7780/admin/sales/order for this.\nAnswer: 142 canceled orders'
+    out = answer_condense.condense(text, intent='How many canceled orders are there')
+    assert 'http' not in out['text'] and out['final_span'] == '142 canceled orders'
+
+
+def test_url_answer_is_kept():
+    text = 'Answer: http://127.0.0.1:7780/admin/salesrule/promoquote'
+    out = answer_condense.condense(text, intent='Give me the URL of the cart price rules page')
+    assert 'http://127.0.0.1:7780/admin/salesrule/promoquote' in out['text']
+
+
+def test_evidence_is_kept_when_intent_asks_for_reviews():
+    text = 'Review: "Runs small, and the fabric pills after one wash." \nSummary: customers dislike the fit.'
+    kept = answer_condense.condense(text, intent='Summarize the reviews that mention the fit')
+    assert 'Runs small' in kept['text'] and 'customers dislike the fit' in kept['text']
+    dropped = answer_condense.condense('The fit is the main complaint.\n' + text, intent='What is the main complaint about the fit')
+    assert 'Runs small' not in dropped['text']
@@ -0,0 +1,58 @@
+"""成果物ストア（artifact_store）: 格納・復元と gc の猶予時間"""
+import json
+import os
+import time
+
+import pytest
+
+import artifact_store
+
+
+@pytest.fixture
+def store(tmp_path, monkeypatch):
+    monkeypatch.delenv('AGENT_WEBARENA_ARTIFACT_STORE_DIR', raising=False)
+    return artifact_store.ArtifactStore(tmp_path / 'store')
+
+
+def _age(path, seconds: float) -> None:
+    t = time.time() - seconds
+    os.utime(path, (t, t))
+
+
+def test_pack_and_load_round_trip(store, tmp_path):
+    runs = tmp_path / 'runs'
+    runs.mkdir()
+    doc = {'task_config': {'intent': 'x' * 2000}, 'score': 1.0}
+    (runs / 'summary.json').write_text(json.dumps(doc))
+    store.pack_file(runs / 'summary.json')
+    assert artifact_store.load_json(runs / 'summary.json') == doc
+
+
+def test_gc_removes_only_old_unreferenced_blobs(store, tmp_path):
+    runs = tmp_path / 'runs'
+    runs.mkdir()
+    (runs / 'render_1.html').write_bytes(b'<html>' + b'a' * 2000 + b'</html>')
+    store.pack_file(runs / 'render_1.html')
+    referenced = store._find(store.put(b'<html>' + b'a' * 2000 + b'</html>'))
+    orphan = store._find(store.put(b'orphan'))
+    _age(referenced, 7200)
+    _age(orphan, 7200)
+
+    r = artifact_store.gc(store, [runs], grace_s=3600, dry_run=False)
+    assert r['kept'] == 1 and r['removed'] == 1
+    assert referenced.exists() and not orphan.exists()
+
+
+def test_reused_blob_is_inside_gc_grace_window(store, tmp_path):
+    # 記録を書く前のランが既存の blob を再利用した: 古い mtime のままだと gc に消される
+    sha = store.put(b'shared snapshot')
+    path = store._find(sha)
+    _age(path, 7200)
+    assert store.put(b'shared snapshot') == sha
+    assert store.reused == 1
+
+    runs = tmp_path / 'runs'
+    runs.mkdir()
+    r = artifact_store.gc(store, [runs], grace_s=3600, dry_run=False)
+    assert r['removed'] == 0 and r['skipped_recent'] == 1
+    assert path.exists()
@@ -0,0 +1,44 @@
+"""crawl.csv の読み取り（crawl_csv）がインデクサ（crawl-diff.ts）と同じ本文を返すこと"""
+import json
+
+import crawl_csv
+import dedup_snapshots
+
+
+def _crawler_row(url: str, page_id: int, snapshot: str) -> str:
+    # クローラは JSON.stringify した本文を CSV の引用フィールドとして書く（" は "" に）
+    quoted = '"' + json.dumps(snapshot, ensure_ascii=False).replace('"', '""') + '"'
+    return f'{url},{page_id},shopping_admin,{quoted},2024-01-01T00:00:00Z'
+
+
+HEADER = 'URL,id,site,snapshotforai,timestamp'
+
+
+def test_parse_csv_line_matches_indexer():
+    line = _crawler_row('http://x/admin/a?p=1', 3, '- button "Save, Close"\n- text: 5')
+    fields = crawl_csv.parse_csv_line(line)
+    assert fields[:3] == ['http://x/admin/a?p=1', '3', 'shopping_admin']
+    # " はすべて引用符として読み飛ばされ、エスケープは decodeSnapshotText で戻す
+    assert crawl_csv.decode_snapshot_text(fields[3]) == '- button \\Save, Close\\\n- text: 5'
+    assert fields[4] == '2024-01-01T00:00:00Z'
+
+
+def test_rows_fill_missing_columns():
+    rows = list(crawl_csv.iter_rows([HEADER, 'http://x/a,1', '', '"http://x/b",2,s,"text",t']))
+    assert [r[1]['URL'] for r in rows] == ['http://x/a', 'http://x/b']
+    assert rows[0][1]['snapshotforai'] == ''
+    assert rows[1][1]['snapshotforai'] == 'text'
+
+
+def test_dedup_crawl_reads_indexer_text(tmp_path):
+    body = '- heading "Orders"\n- grid:\n  - row "000000001 Complete $118.00"'
+    lines = [HEADER, _crawler_row('http://x/admin/sales/order/', 1, body),
+             _crawler_row('http://x/admin/sales/order/?limit=20', 2, body),
+             _crawler_row('http://x/admin/catalog/product/', 3, '- heading "Products"\n- grid: empty')]
+    src = tmp_path / 'crawl.csv'
+    src.write_text('\n'.join(lines) + '\n')
+    out = tmp_path / 'crawl.dedup.csv'
+    dedup_snapshots.dedup_crawl(src, out, threshold=0.9, bands=32)
+    kept = out.read_text().strip().split('\n')
+    assert kept[0] == HEADER
+    assert lines[1] in kept and lines[3] in kept and lines[2] not in kept
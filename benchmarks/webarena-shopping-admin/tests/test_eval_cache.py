@@ -0,0 +1,131 @@
+"""評価結果のメモ化（eval_cache のキーと evaluate.py のキャッシュヒット時の結果）"""
+import json
+from pathlib import Path
+
+import pytest
+
+import eval_cache
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setenv('AGENT_WEBARENA_EVAL_CACHE_DIR', str(tmp_path / 'cache'))
+    return tmp_path / 'cache'
+
+
+@pytest.fixture
+def evaluate(monkeypatch):
+    monkeypatch.setattr('sys.argv', ['evaluate.py'])
+    import evaluate as mod
+    return mod
+
+
+TRAJ = {'trajectory': [{'action_type': 'stop', 'answer': '42'}], 'final_url': 'http://x/'}
+CFG = {'task_id': 1, 'eval': {'eval_types': ['string_match'], 'reference_answers': {'exact_match': '42'}}}
+
+
+def test_key_ignores_volatile_trajectory_fields():
+    a = eval_cache.build_key(TRAJ, CFG, 'v1', 'm')
+    b = eval_cache.build_key({**TRAJ, 'evaluated_at': '2025-01-01'}, CFG, 'v1', 'm')
+    assert a['key'] == b['key']
+
+
+def test_key_changes_with_scoring_env():
+    a = eval_cache.build_key(TRAJ, CFG, 'v1', 'm', env={'AGENT_EVAL_OVERRIDE_ANSWER': ''})
+    b = eval_cache.build_key(TRAJ, CFG, 'v1', 'm', env={'AGENT_EVAL_OVERRIDE_ANSWER': '41'})
+    assert a['key'] != b['key']
+
+
+def test_sources_digest_changes_when_any_module_changes(tmp_path):
+    mods = [tmp_path / 'a.py', tmp_path / 'b.py']
+    for m in mods:
+        m.write_text('x = 1\n')
+    before = eval_cache.sources_digest(mods)
+    mods[1].write_text('x = 2\n')
+    assert eval_cache.sources_digest(mods) != before
+
+
+def test_evaluator_version_covers_helper_modules(evaluate):
+    for name in ('http_fastpath', 'sql_verify', 'replica_pool', 'page_cache', 'judge_hedge'):
+        assert name in evaluate._SCORING_MODULES
+        assert (Path(evaluate.__file__).parent / f'{name}.py').exists()
+
+
+def test_scoring_env_reads_override_answer(evaluate, monkeypatch):
+    monkeypatch.setenv('AGENT_EVAL_OVERRIDE_ANSWER', 'forced')
+    monkeypatch.setenv('AGENT_WEBARENA_HTTP_FASTPATH', 'true')
+    env = evaluate._scoring_env()
+    assert env['AGENT_EVAL_OVERRIDE_ANSWER'] == 'forced'
+    assert env['AGENT_WEBARENA_HTTP_FASTPATH'] == 'true'
+
+
+def test_lookup_misses_when_artifact_is_gone(cache_dir, tmp_path):
+    parts = eval_cache.build_key(TRAJ, CFG, 'v1', 'm')
+    summary = tmp_path / 'summary.json'
+    summary.write_text('{}')
+    eval_cache.store(parts, score=1.0, result={'score': 1.0}, artifacts={'summary_file': str(summary)})
+    assert eval_cache.lookup(parts['key'])['score'] == 1.0
+    summary.unlink()
+    assert eval_cache.lookup(parts['key']) is None
+
+
+def test_cache_hit_payload_uses_current_run_paths(evaluate):
+    cached = {
+        'score': 1.0,
+        'result': {'score': 1.0, 'trajectory_file': '/old/task_1_a.json', 'config_file': '/old/1.json'},
+        'artifacts': {'summary_file': '/old/summary.json'},
+    }
+    payload = evaluate._cached_result_payload(cached, 'k' * 64, '/new/task_1_b.json', 'configs/1.json')
+    assert payload['trajectory_file'] == '/new/task_1_b.json'
+    assert payload['config_file'] == 'configs/1.json'
+    assert payload['eval_cache'] == {'hit': True, 'key': 'k' * 64}
+    assert '/old/' not in json.dumps(payload)
+
+
+@pytest.mark.parametrize('approach', [
+    {'type': 'fuzzy_match', 'score': 0.0, 'llm_reasonings': ['[LLM呼び出しエラー] 全リージョン失敗: ThrottlingException']},
+    {'type': 'fuzzy_match', 'score': 0.0, 'llm_reasonings': ['correct', '[判定不明] maybe']},
+    {'type': 'fuzzy_match', 'score': 0.0, 'llm_reasonings': ['[エラー] timeout']},
+    {'type': 'fuzzy_match', 'score': 0.0, 'fallback_to_ua_match': True, 'llm_reasoning': '[判定不明] ...'},
+    {'type': 'fuzzy_match', 'score': 0.0, 'refs': ['x'], 'error': 'LLM not available'},
+])
+def test_judge_failures_are_not_cached(evaluate, cache_dir, tmp_path, approach):
+    parts = eval_cache.build_key(TRAJ, CFG, 'v1', 'm')
+    result = {'score': 0.0, 'eval_details': {'approaches': [{'type': 'exact_match', 'score': 1.0}, approach]}}
+    evaluate._store_eval_cache(parts, score=0.0, result=result, summary_file=None, render_path=tmp_path / 'r.html')
+    assert eval_cache.lookup(parts['key']) is None
+
+
+def test_judged_result_is_cached(evaluate, cache_dir, tmp_path):
+    parts = eval_cache.build_key(TRAJ, CFG, 'v1', 'm')
+    (tmp_path / 'r.html').write_text('<html></html>')
+    result = {'score': 0.0, 'eval_details': {'approaches': [{'type': 'fuzzy_match', 'score': 0.0, 'llm_reasonings': ['incorrect']}]}}
+    evaluate._store_eval_cache(parts, score=0.0, result=result, summary_file=None, render_path=tmp_path / 'r.html')
+    assert eval_cache.lookup(parts['key'])['score'] == 0.0
+
+
+def test_cache_hit_writes_summary_marked_as_hit(evaluate, tmp_path):
+    source = tmp_path / 'old' / 'source.json'
+    source.parent.mkdir()
+    source.write_text(json.dumps({
+        'task_id': 1, 'score': 1.0, 'pipeline_answer': '42', 'action_history': [{'step': 1}], 'step_timing': {'steps': 1},
+        'judge_usage': {'calls': 1}, 'artifacts': {'trajectory_file': '/old/task_1_a.json', 'html_render_file': '/old/render_1.html'},
+    }))
+    cached = {'score': 1.0, 'result': {'score': 1.0, 'eval_details': {'approaches': []}}, 'artifacts': {'summary_file': str(source)}}
+    out = evaluate._save_cached_summary(tmp_path / 'task_1', cached, 'k' * 64, task_id=1, cfg=CFG, execution_time=0.1,
+                                        trajectory_file='/new/task_1_b.json', result_file='/new/results/task_1_b_result.json')
+    p = json.loads(out.read_text())
+    assert p['eval_cache'] == {'hit': True, 'key': 'k' * 64, 'source_summary': str(source)}
+    assert p['score'] == 1.0 and p['step_timing'] == {'steps': 1} and 'judge_usage' not in p
+    assert p['artifacts']['trajectory_file'] == '/new/task_1_b.json'
+    assert p['artifacts']['result_file'] == '/new/results/task_1_b_result.json'
+    assert p['artifacts']['html_render_file'] == '/old/render_1.html'
+
+
+def test_cache_hit_summary_without_source(evaluate, tmp_path):
+    cached = {'score': 0.0, 'result': {'score': 0.0, 'eval_details': {'approaches': [], 'raw_prediction': '41'}},
+              'artifacts': {'summary_file': str(tmp_path / 'gone.json')}}
+    out = evaluate._save_cached_summary(tmp_path / 'task_1', cached, 'k' * 64, task_id=1, cfg=CFG, execution_time=0.1,
+                                        trajectory_file='/new/task_1_b.json', result_file='/new/r.json')
+    p = json.loads(out.read_text())
+    assert p['eval_cache']['hit'] and p['pipeline_answer'] == '41' and p['artifacts']['result_file'] == '/new/r.json'
@@ -0,0 +1,70 @@
+"""締め切り超過時の結果（evaluate._exit_timed_out）: 採点前は timed_out、採点後はスコアを残す"""
+import json
+
+import pytest
+
+import eval_deadline
+
+
+@pytest.fixture
+def evaluate(monkeypatch, tmp_path):
+    monkeypatch.setattr('sys.argv', ['evaluate.py'])
+    import evaluate as mod
+    summaries = []
+
+    def fake_summary(summary_dir, **kw):
+        # 実際の evaluation-result には書かない
+        path = tmp_path / f"summary_{len(summaries)}.json"
+        path.write_text(json.dumps({'score': kw['score'], 'success': kw['success'], 'error': kw['error']}))
+        summaries.append(path)
+        return path
+
+    monkeypatch.setattr(mod, '_save_leaderboard_style_summary', fake_summary)
+    monkeypatch.setattr(mod, '_DEADLINE', eval_deadline.TaskDeadline(5.0))
+    monkeypatch.setattr(mod, '_TIMEOUT_CONTEXT', {
+        'cfg': {'intent': 'q'}, 'task_id': 4, 'run_dir': tmp_path / 'run', 't0': 0.0,
+        'result_file': str(tmp_path / 'result.json'), 'trajectory_file': str(tmp_path / 'task_4_x.json'),
+        'config_file': 'configs/4.json', 'final_url': 'http://x/a', 'states': [],
+        'actions': [{'action_type': 17, 'answer': '42'}], 'incremental': None,
+    })
+    mod._summaries = summaries
+    return mod
+
+
+def _exit(evaluate, phase):
+    with pytest.raises(SystemExit) as e:
+        evaluate._exit_timed_out(phase)
+    assert e.value.code == 0
+
+
+def test_timeout_before_grading_scores_zero(evaluate, tmp_path):
+    _exit(evaluate, 'browser')
+    result = json.loads((tmp_path / 'result.json').read_text())
+    assert result['score'] == 0.0 and result['status'] == 'timed_out'
+    assert json.loads(evaluate._summaries[0].read_text())['error'] == 'timeout: browser'
+
+
+def test_timeout_in_report_keeps_graded_score(evaluate, tmp_path):
+    evaluate._TIMEOUT_CONTEXT['graded'] = {'score': 1.0, 'eval_details': {'approaches': []}, 'final_url': 'http://x/b'}
+    _exit(evaluate, 'report')
+    result = json.loads((tmp_path / 'result.json').read_text())
+    assert result['score'] == 1.0 and 'status' not in result
+    assert result['timed_out_phase'] == 'report' and result['final_url'] == 'http://x/b'
+    summary = json.loads(evaluate._summaries[0].read_text())
+    assert summary['success'] is True and summary['error'] == ''
+
+
+def test_fallback_browser_closed_even_if_context_close_fails(evaluate):
+    closed = []
+
+    class Target:
+        def __init__(self, name, fail=False):
+            self.name, self.fail = name, fail
+
+        def close(self):
+            if self.fail:
+                raise RuntimeError('Target closed')
+            closed.append(self.name)
+
+    evaluate._close_fallback_browser(Target('context', fail=True), Target('browser'))
+    assert closed == ['browser']
@@ -0,0 +1,51 @@
+"""program_html の HTTP 高速経路（http_fastpath）: locator の解釈・可視性・保存済みフィクスチャでの conformance"""
+import json
+
+import pytest
+
+pytest.importorskip('bs4')
+
+import http_fastpath  # noqa: E402
+
+
+def test_parse_locator_shapes():
+    reads = http_fastpath.parse_locator("(document.querySelector('#a')?.outerText || '') + document.querySelector(\"#b\").value")
+    assert [(r.selector, r.prop, r.optional) for r in reads] == [('#a', 'outerText', True), ('#b', 'value', False)]
+    assert http_fastpath.parse_locator('') == []
+    assert http_fastpath.parse_locator("document.querySelectorAll('tr').length") is None
+
+
+def test_empty_locator_goes_to_browser():
+    html = '<html><body><div class="no-display">secret</div><p>shown</p></body></html>'
+    assert http_fastpath.read_html(html, '') is None
+
+
+@pytest.mark.parametrize('html', [
+    '<div id="x">Total <span class="hidden">Refunded</span></div>',
+    '<style>.collapsed{display:none}</style><div id="x">Total <div class="collapsed">Refunded</div></div>',
+    '<div class="no-display"><span id="x">Refunded</span></div>',
+    '<div style="display: none"><span id="x">Refunded</span></div>',
+])
+def test_inner_text_falls_back_when_visibility_is_unknown(html):
+    assert http_fastpath.read_html(html, "document.querySelector('#x').innerText") is None
+
+
+def test_inline_hidden_descendant_is_excluded():
+    html = '<div id="x">Total <span style="display:none">Refunded</span><span hidden>Void</span></div>'
+    assert http_fastpath.read_html(html, "document.querySelector('#x').innerText") == 'Total'
+
+
+def test_visibility_independent_props_still_use_fast_path():
+    html = '<div class="hidden"><input id="q" value="7"><span id="t">a<b>b</b></span></div>'
+    assert http_fastpath.read_html(html, "document.querySelector('#q').value") == '7'
+    assert http_fastpath.read_html(html, "document.querySelector('#t').textContent") == 'ab'
+
+
+def test_fixture_conformance(fixtures_dir):
+    cases_dir = fixtures_dir / 'http_fastpath'
+    cases = http_fastpath.load_fixture_cases(cases_dir)
+    rows = http_fastpath.check_fixtures(cases_dir)
+    assert len(rows) == len(cases)
+    for case, row in zip(cases, rows):
+        assert row['status'] != 'disagree', json.dumps(row, ensure_ascii=False)
+        assert row['status'] == case['expect'], case['name']
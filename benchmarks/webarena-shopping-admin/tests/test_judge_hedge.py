@@ -0,0 +1,81 @@
+"""判定モデル呼び出しのヘッジ（judge_hedge）: 採用・放棄とすべての呼び出しの使用量記録"""
+import threading
+
+import pytest
+
+import judge_hedge
+
+
+class FixedHistory(judge_hedge.LatencyHistory):
+    """ファイルを使わず固定の待ち時間を返す履歴"""
+
+    def __init__(self, delay_s: float):
+        self.delay_s = delay_s
+        self.added = []
+
+    def add(self, latency_s: float) -> None:
+        self.added.append(latency_s)
+
+    def hedge_delay_s(self) -> float:
+        return self.delay_s
+
+
+@pytest.fixture(autouse=True)
+def fresh_stats(monkeypatch):
+    monkeypatch.setattr(judge_hedge, '_STATS', {'requests': 0, 'hedged': 0, 'hedge_calls': 0, 'abandoned': 0,
+                                                'abandoned_completed': 0, 'failed': 0, 'wins': {}})
+    monkeypatch.setattr(judge_hedge, '_ABANDONED', [])
+
+
+def _response(tokens: int) -> dict:
+    return {'usage': {'inputTokens': tokens, 'outputTokens': 1}}
+
+
+def test_abandoned_call_usage_is_recorded_after_drain():
+    release = threading.Event()
+    recorded = []
+
+    def invoke(region):
+        if region == 'us-west-2':
+            release.wait(5)  # 先頭リージョンが遅い
+            return _response(100)
+        return _response(10)
+
+    history = FixedHistory(0.01)
+    response, region = judge_hedge.hedged_call(['us-west-2', 'us-east-1'], lambda r: r, invoke,
+                                               history=history, on_response=recorded.append)
+    assert region == 'us-east-1' and response == _response(10)
+    s = judge_hedge.stats()
+    assert s['abandoned'] == 1 and s['abandoned_pending'] == 1 and s['hedge_calls'] == 1
+    assert recorded == [_response(10)]
+
+    release.set()
+    assert judge_hedge.drain(5) == 0
+    s = judge_hedge.stats()
+    assert s['abandoned_completed'] == 1 and s['abandoned_pending'] == 0
+    assert sorted(r['usage']['inputTokens'] for r in recorded) == [10, 100]
+    assert len(history.added) == 2
+
+
+def test_errors_fail_over_without_abandoning():
+    recorded = []
+
+    def invoke(region):
+        if region == 'a':
+            raise RuntimeError('ThrottlingException')
+        return _response(5)
+
+    response, region = judge_hedge.hedged_call(['a', 'b'], lambda r: r, invoke,
+                                               history=FixedHistory(5.0), on_response=recorded.append)
+    assert region == 'b'
+    assert recorded == [_response(5)]
+    assert judge_hedge.stats()['abandoned'] == 0
+
+
+def test_all_regions_failing_raises():
+    def invoke(region):
+        raise RuntimeError(f'down:{region}')
+
+    with pytest.raises(RuntimeError, match='down:b'):
+        judge_hedge.hedged_call(['a', 'b'], lambda r: r, invoke, history=FixedHistory(5.0))
+    assert judge_hedge.stats()['failed'] == 1
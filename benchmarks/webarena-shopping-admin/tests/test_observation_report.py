@@ -0,0 +1,42 @@
+"""観測サイズレポート（observation_report）の trajectory 読み込み"""
+import json
+
+import observation_report
+
+STATE_1 = {'observation': {'text': 'RootWebArea "Dashboard"\n  link "Sales" [ref=e12]'},
+           'info': {'page': {'url': 'http://127.0.0.1:7780/admin/dashboard/'}}}
+STATE_2 = {'observation': {'text': 'RootWebArea "Orders"\n  row "000000001 Complete" [ref=e40]'},
+           'info': {'page': {'url': 'http://127.0.0.1:7780/admin/sales/order/'}}}
+CLICK = {'action_type': 6, 'element_id': 'e12', 'raw_prediction': 'browser_click: link "Sales"',
+         'timing': {'tokens': {'input': 1200, 'output': 40, 'cache_read': 800, 'cache_write': 0}}}
+STOP = {'action_type': 17, 'answer': '000000001', 'raw_prediction': 'stop: 000000001',
+        'timing': {'tokens': {'input': 1500, 'output': 12}}}
+
+
+def _write(path, payload):
+    path.write_text(json.dumps(payload, ensure_ascii=False, indent=2))
+    return path
+
+
+def test_saved_trajectory_object(tmp_path):
+    # src/agent/tools/util.ts が書き出す形式
+    path = _write(tmp_path / 'task_4_20240101T000000.json', {
+        'trajectory': [STATE_1, CLICK, STATE_2, STOP],
+        'cdp_endpoint': 'http://127.0.0.1:9222',
+        'final_url': 'http://127.0.0.1:7780/admin/sales/order/',
+        'evaluated_at': '2024-01-01T00:00:00.000Z',
+    })
+    states, actions = observation_report.load_trajectory(path)
+    assert states == [STATE_1, STATE_2]
+    assert actions == [CLICK, STOP]
+    steps = observation_report.steps_from_trajectory(path)
+    assert [s['task_id'] for s in steps] == ['4', '4']
+    assert [s['url'] for s in steps] == ['http://127.0.0.1:7780/admin/dashboard/', 'http://127.0.0.1:7780/admin/sales/order/']
+    assert steps[0]['snapshot'] == STATE_1['observation']['text']
+    assert steps[0]['tokens']['cache_read'] == 800
+
+
+def test_bare_list_and_missing_trajectory(tmp_path):
+    states, actions = observation_report.load_trajectory(_write(tmp_path / 'task_4_a.json', [STATE_1, CLICK]))
+    assert (states, actions) == ([STATE_1], [CLICK])
+    assert observation_report.load_trajectory(_write(tmp_path / 'task_4_b.json', {'final_url': ''})) == ([], [])
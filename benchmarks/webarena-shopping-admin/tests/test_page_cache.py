@@ -0,0 +1,31 @@
+"""program_html 対象ページのキャッシュ（page_cache）のエポック管理"""
+import page_cache
+
+URL = 'http://127.0.0.1:7780/admin/catalog/product/edit/id/1/'
+LOCATOR = "document.querySelector('[name=\"product[name]\"]').value"
+
+
+def test_read_only_task_reuses_epoch(tmp_path):
+    cache = page_cache.PageCache(tmp_path)
+    epoch = cache.begin_task({'task_id': 1, 'intent': 'What is the price of product 1?'})
+    cache.store(URL, LOCATOR, 'Chloe Tank')
+    nxt = page_cache.PageCache(tmp_path)
+    assert nxt.begin_task({'task_id': 2, 'intent': 'Show the name of product 1'}) == epoch
+    assert nxt.lookup(URL, LOCATOR) == 'Chloe Tank'
+
+
+def test_task_after_require_reset_gets_new_epoch(tmp_path):
+    cache = page_cache.PageCache(tmp_path)
+    epoch = cache.begin_task({'task_id': 1, 'intent': 'Rename product 1 to Zoe Tank', 'require_reset': True})
+    # require_reset のタスクの評価中に保存したページ（変更後の状態）
+    cache.store(URL, LOCATOR, 'Zoe Tank')
+
+    nxt = page_cache.PageCache(tmp_path)
+    assert nxt.begin_task({'task_id': 2, 'intent': 'Show the name of product 1'}) == epoch + 1
+    assert nxt.lookup(URL, LOCATOR) is None
+
+    # リセット後のエポックは以降の読み取り専用タスクでそのまま使う
+    nxt.store(URL, LOCATOR, 'Chloe Tank')
+    third = page_cache.PageCache(tmp_path)
+    assert third.begin_task({'task_id': 3, 'intent': 'Show the name of product 1'}) == epoch + 1
+    assert third.lookup(URL, LOCATOR) == 'Chloe Tank'
@@ -0,0 +1,95 @@
+"""fuzzy_match のローカル事前判定（prejudge）"""
+import json
+import subprocess
+import sys
+
+import pytest
+
+import prejudge
+
+TH = dict(prejudge.DEFAULT_THRESHOLDS)
+
+
+def _verdict(pred, ref, th=None):
+    return prejudge.prejudge(pred, ref, th or TH)['verdict']
+
+
+@pytest.mark.parametrize('pred, ref', [
+    ('$25', '25.00'),
+    ('The grand total is $1,234.5.', '1234.50'),
+    ('Refunded 100.0 in total', '$100'),
+])
+def test_numbers_compared_by_value_are_not_rejected(pred, ref):
+    feat = prejudge.features(pred, ref)
+    assert feat['num_coverage'] == 1.0
+    assert _verdict(pred, ref) is None  # 短い参照は一致としても確定しない（判定モデルへ）
+
+
+def test_canonical_number_keeps_integers():
+    assert prejudge.normalize('Order 000000001 costs 25.00') == 'order 000000001 costs 25'
+
+
+@pytest.mark.parametrize('pred, ref', [
+    ('No, it is not in stock', 'in stock'),
+    ("It isn't in stock", 'in stock'),
+    ('12 orders by 2 customers', '2'),
+    ('Order 12 has 2 items', '2 items'),
+    ('The best seller is not the Chloe Tank Top', 'Chloe Tank Top'),
+])
+def test_containment_does_not_accept_risky_pairs(pred, ref):
+    assert prejudge.features(pred, ref)['containment']
+    assert _verdict(pred, ref) != 1.0
+    # 閾値をどう較正しても一致にはしない
+    assert _verdict(pred, ref, {**TH, 'accept_sim': 0.0}) != 1.0
+
+
+def test_containment_accepts_long_text_reference():
+    assert _verdict('The best seller is **Chloe Tank Top** with strong sales.', 'Chloe Tank Top') == 1.0
+    assert _verdict('It is not the Chloe Tank Top', 'not the Chloe Tank Top') == 1.0  # 否定は参照側にもある
+
+
+def test_numeric_reference_contained_with_all_numbers_is_accepted():
+    pred = 'Monthly counts for 2022: January: 11 orders, February: 16 orders.'
+    assert _verdict(pred, 'January: 11 orders') == 1.0
+    assert _verdict('In May we had 2,500 units sold in total', '2500 units sold') == 1.0
+    # 数値が値で一致しても、語の境界での containment でなければ判定モデルへ
+    assert _verdict('January had 11 orders', 'January: 11 orders') is None
+
+
+@pytest.mark.parametrize('text, norm', [
+    ('twenty-five dollars', '25 dollars'),
+    ('One hundred twenty-three items', '123 items'),
+    ('two thousand five hundred', '2500'),
+    ('five six', '5 6'),
+    ('fifteen five', '15 5'),
+])
+def test_compound_number_words_become_one_number(text, norm):
+    assert prejudge.normalize(text) == norm
+
+
+def test_number_words_are_not_rejected_as_missing_numbers():
+    assert _verdict('The total was twenty-five dollars.', '$25') != 0.0
+    assert prejudge.features('The total was twenty-five dollars.', '$25')['num_coverage'] == 1.0
+
+
+def test_missing_numbers_are_rejected():
+    assert _verdict('04:8', 'April: 7 orders') == 0.0
+
+
+def test_calibrate_refuses_small_history(tmp_path, monkeypatch):
+    tasks = tmp_path / 'tasks' / 'task_4'
+    tasks.mkdir(parents=True)
+    (tasks / '2024-01-01T00-00-00.json').write_text(json.dumps({
+        'task_id': 4, 'pipeline_answer': 'Chloe Tank Top', 'timestamp': '2024-01-01T00:00:00',
+        'eval_method_details': {'approaches': [{'type': 'fuzzy_match', 'refs': ['Chloe Tank Top'],
+                                                'individual_scores': [1.0], 'llm_reasonings': ['match']}]},
+    }))
+    out = tmp_path / 'th.json'
+    proc = subprocess.run([sys.executable, prejudge.__file__, 'calibrate', '--tasks-dir', str(tmp_path / 'tasks'),
+                           '--output', str(out)], capture_output=True, text=True)
+    assert proc.returncode == 1, proc.stdout + proc.stderr
+    assert not out.exists()
+
+
+def test_missing_thresholds_file_uses_defaults(tmp_path):
+    assert prejudge.load_thresholds(tmp_path / 'none.json') == prejudge.DEFAULT_THRESHOLDS
@@ -0,0 +1,68 @@
+"""program_html 項目のページ読み込み（evaluate._read_program_html_page）のレプリカ失敗時の扱い"""
+import pytest
+
+
+class FakePage:
+    def __init__(self, name: str, url: str = 'about:blank', bodies=None):
+        self.name = name
+        self.url = url
+        self.bodies = bodies or {}
+        self.visited = []
+
+    def goto(self, url, timeout=None, wait_until=None):
+        self.visited.append(url)
+        self.url = url
+
+    def inner_text(self, selector):
+        return self.bodies.get(self.url, f'<{self.name}:{self.url}>')
+
+    def evaluate(self, locator):
+        return self.inner_text('body')
+
+    def set_default_timeout(self, ms):
+        pass
+
+
+class FailingReplicaPages:
+    """すべてのレプリカでナビゲーションに失敗した ReplicaPages"""
+
+    def __init__(self, raises: bool = False):
+        self.raises = raises
+
+    def open(self, url, timeout_ms=30000):
+        if self.raises:
+            raise RuntimeError('browser closed')
+        return None
+
+
+@pytest.fixture
+def evaluate(monkeypatch):
+    monkeypatch.setattr('sys.argv', ['evaluate.py'])
+    import evaluate as mod
+    return mod
+
+
+TARGET = 'http://127.0.0.1:7780/admin/sales/order/view/order_id/1/'
+
+
+@pytest.mark.parametrize('raises', [False, True])
+def test_replica_failure_navigates_main_page(evaluate, raises):
+    page = FakePage('main', url='http://127.0.0.1:7780/admin/dashboard/', bodies={TARGET: 'Order #1 Complete'})
+    item = {'url': TARGET, 'locator': '', 'required_contents': {'must_include': ['Complete']}}
+    text = evaluate._read_program_html_page(item, {}, page, replica_pages=FailingReplicaPages(raises))
+    assert page.visited == [TARGET]
+    assert text == 'Order #1 Complete'
+
+
+def test_replica_page_is_used_when_open_succeeds(evaluate):
+    replica = FakePage('replica', bodies={TARGET: 'from replica'})
+
+    class Pages:
+        def open(self, url, timeout_ms=30000):
+            replica.goto(url)
+            return replica
+
+    page = FakePage('main')
+    text = evaluate._read_program_html_page({'url': TARGET, 'locator': ''}, {}, page, replica_pages=Pages())
+    assert text == 'from replica'
+    assert page.visited == []
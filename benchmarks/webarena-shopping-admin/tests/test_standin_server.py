@@ -0,0 +1,26 @@
+"""スタンドイン Web サーバー（standin_server）の統計と crawl.csv の読み込み"""
+import json
+
+import standin_server
+
+
+def test_latency_history_is_bounded(monkeypatch):
+    monkeypatch.setattr(standin_server, 'LATENCY_HISTORY', 5)
+    state = standin_server.ServerState(standin_server.StandinSite(), [], auth=False, latency_ms=0, jitter_ms=0,
+                                       max_inflight=2, verbose=False)
+    for _ in range(12):
+        state.end(state.begin(), 200)
+    assert len(state.service_ms) == 5 and len(state.queue_ms) == 5
+    stats = state.stats()
+    assert stats['requests'] == 12 and stats['by_status'] == {'200': 12}
+    assert set(stats['response_ms']) == {'p50', 'p90', 'p99'}
+
+
+def test_snapshots_decoded_like_indexer(tmp_path):
+    body = '- heading "Dashboard"\n- link "Sales"'
+    field = '"' + json.dumps(body).replace('"', '""') + '"'
+    path = tmp_path / 'crawl.csv'
+    path.write_text('URL,id,site,snapshotforai,timestamp\n'
+                    f'http://127.0.0.1:7780/admin/dashboard/,1,shopping_admin,{field},t\n')
+    snapshots = standin_server.load_snapshots(path)
+    assert list(snapshots.values()) == ['- heading \\Dashboard\\\n- link \\Sales\\']
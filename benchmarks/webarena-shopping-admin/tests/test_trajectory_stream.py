@@ -0,0 +1,55 @@
+"""NDJSON trajectory の読み取り（trajectory_stream）と evaluate.py の取り込み"""
+import json
+
+import pytest
+
+import trajectory_stream
+
+STATE = {'observation': {'text': 'RootWebArea'}, 'info': {'page': {'url': 'http://x/a'}}}
+ACTION = {'action_type': 6, 'element_id': '12'}
+STOP = {'action_type': 17, 'answer': 'done'}
+
+
+def _write_stream(path, items, end):
+    lines = [{'type': 'start', 'pid': 0, 'task_id': 1}] + items + ([{'type': 'end', **end}] if end is not None else [])
+    path.write_text(''.join(json.dumps(x) + '\n' for x in lines))
+
+
+@pytest.fixture
+def evaluate(monkeypatch):
+    monkeypatch.setattr('sys.argv', ['evaluate.py'])
+    import evaluate as mod
+    return mod
+
+
+def test_read_stream_collects_items(tmp_path):
+    path = tmp_path / 'task_1_x.ndjson'
+    _write_stream(path, [STATE, ACTION], {'final_url': 'http://x/a'})
+    items = []
+    meta = trajectory_stream.read_stream(path, items.append, follow=False)
+    assert items == [STATE, ACTION]
+    assert meta['end']['final_url'] == 'http://x/a'
+
+
+def test_aborted_stream_raises(tmp_path):
+    path = tmp_path / 'task_1_x.ndjson'
+    _write_stream(path, [STATE], {'aborted': True})
+    with pytest.raises(trajectory_stream.StreamAborted):
+        trajectory_stream.read_stream(path, lambda _: None, follow=False)
+
+
+def test_write_errors_fall_back_to_json_trajectory(tmp_path, evaluate):
+    # 追記に失敗して ACTION が欠けたストリームと、完全な JSON 版
+    path = tmp_path / 'task_1_x.ndjson'
+    _write_stream(path, [STATE, STOP], {'final_url': 'http://x/a', 'write_errors': 1})
+    (tmp_path / 'task_1_x.json').write_text(json.dumps({'trajectory': [STATE, ACTION, STATE, STOP]}))
+    data, inc = evaluate._follow_trajectory_stream(str(path), follow=False)
+    assert data['trajectory'] == [STATE, ACTION, STATE, STOP]
+    assert data['final_url'] == 'http://x/a'
+
+
+def test_write_errors_without_json_trajectory_abort(tmp_path, evaluate):
+    path = tmp_path / 'task_1_x.ndjson'
+    _write_stream(path, [STATE], {'final_url': '', 'write_errors': 2})
+    with pytest.raises(trajectory_stream.StreamAborted):
+        evaluate._follow_trajectory_stream(str(path), follow=False)
@@ -0,0 +1,116 @@
+"""共有ストレージ上のワークキュー（work_queue）: リース・期限切れの再キュー・繰り返しの並び・サマリーの照合"""
+import json
+import os
+import time
+
+import pytest
+
+import work_queue
+
+
+def _job(task_id, repeat=0):
+    return {'task_id': task_id, 'repeat': repeat, 'trajectory': f'/t/task_{task_id}_x.json',
+            'config': f'/c/{task_id}.json', 'endpoint': 'http://localhost:9222', 'flags': []}
+
+
+@pytest.fixture
+def queue(tmp_path):
+    q = work_queue.WorkQueue.create(tmp_path / 'q', lease_s=30.0, max_attempts=2)
+    q.enqueue([_job(4), _job(15)])
+    return q
+
+
+def _expire(lease):
+    old = time.time() - 3600
+    os.utime(lease.path, (old, old))
+
+
+def test_lease_is_exclusive(queue):
+    a = queue.lease('host-a')
+    b = queue.lease('host-b')
+    assert a.job['job_id'] != b.job['job_id']
+    assert queue.lease('host-c') is None
+    assert queue.counts() == {'pending': 0, 'leased': 2, 'done': 0}
+    assert a.job['attempts'] == 1 and a.heartbeat()
+
+
+def test_expired_lease_is_requeued_and_late_result_dropped(queue):
+    lease = queue.lease('host-a')
+    _expire(lease)
+    assert queue.reap() == [lease.job['job_id']]
+    assert not lease.heartbeat()
+    assert lease.complete({'status': 'ok', 'score': 1.0}) is False
+
+    again = queue.lease('host-b')
+    assert again.job['job_id'] == lease.job['job_id'] and again.job['attempts'] == 2
+    assert again.complete({'status': 'ok', 'score': 1.0}) is True
+    done = json.loads((queue.done_dir / f"{again.job['job_id']}.json").read_text())
+    assert done['worker'] == 'host-b' and done['token'] == again.token
+
+
+def test_lease_fails_after_max_attempts(queue):
+    for _ in range(2):
+        lease = queue.lease('host-a')
+        _expire(lease)
+        queue.reap()
+    done = json.loads((queue.done_dir / f"{lease.job['job_id']}.json").read_text())
+    assert done['status'] == 'failed' and done['attempts'] == 2
+
+
+def test_lease_skips_job_reaped_before_touch(queue, monkeypatch):
+    real_utime = os.utime
+    calls = []
+
+    def racing_utime(path, times=None):
+        calls.append(path)
+        if len(calls) == 1:
+            # rename 直後、mtime 更新前に他の worker が期限切れとして戻した
+            os.rename(path, queue.pending_dir / f"{path.name.split('.', 1)[0]}.json")
+            raise FileNotFoundError(path)
+        return real_utime(path, times)
+
+    monkeypatch.setattr(work_queue.os, 'utime', racing_utime)
+    lease = queue.lease('host-a')
+    assert lease is not None and len(calls) == 2
+    assert queue.counts()['leased'] == 1
+
+
+def test_repeats_are_interleaved(tmp_path):
+    configs = tmp_path / 'configs'
+    configs.mkdir()
+    for task_id in (4, 15):
+        (configs / f'{task_id}.json').write_text('{}')
+        (tmp_path / f'task_{task_id}_run.json').write_text('{}')
+    jobs = work_queue.jobs_from_trajectories([str(tmp_path / 'task_*.json')], configs, 'http://x', 3, [])
+    assert [(j['task_id'], j['repeat']) for j in jobs] == [(15, 0), (4, 0), (15, 1), (4, 1), (15, 2), (4, 2)]
+
+
+def test_repeats_bypass_eval_cache(tmp_path):
+    configs = tmp_path / 'configs'
+    configs.mkdir()
+    (configs / '4.json').write_text('{}')
+    (tmp_path / 'task_4_run.json').write_text('{}')
+    pattern = [str(tmp_path / 'task_*.json')]
+    assert all(j['flags'] == ['--force'] for j in work_queue.jobs_from_trajectories(pattern, configs, 'http://x', 3, []))
+    assert work_queue.jobs_from_trajectories(pattern, configs, 'http://x', 1, [])[0]['flags'] == []
+
+    manifest = tmp_path / 'jobs.jsonl'
+    manifest.write_text(json.dumps({'trajectory': str(tmp_path / 'task_4_run.json'), 'config': str(configs / '4.json'),
+                                    'task_id': 4, 'repeat': 2, 'flags': ['--profile']}) + '\n')
+    jobs = work_queue.jobs_from_manifest(manifest, 'http://x', 1, [])
+    assert len(jobs) == 2 and all(j['flags'] == ['--profile', '--force'] for j in jobs)
+
+
+def test_summary_matched_by_result_file(tmp_path, monkeypatch):
+    monkeypatch.setattr(work_queue, 'EVAL_RESULT_DIR', tmp_path / 'evaluation-result')
+    task_dir = tmp_path / 'evaluation-result' / 'task_4'
+    task_dir.mkdir(parents=True)
+    since = time.time()
+    results = [tmp_path / 'q' / 'results' / f'00000-task4-r{r}.tok.json' for r in (0, 1)]
+    for i, result in enumerate(results):
+        (task_dir / f'2024-01-01T00-00-00{"-2" if i else ""}.json').write_text(json.dumps({
+            'task_id': 4, 'artifacts': {'trajectory_file': '/t/task_4_x.json', 'result_file': str(result)}}))
+    found = [work_queue._find_summary(4, r, since) for r in results]
+    assert found[0] != found[1]
+    for result, path in zip(results, found):
+        assert json.loads(path.read_text())['artifacts']['result_file'] == str(result)
@@ -26,6 +26,7 @@ import { memoryTool } from './tools/memory.js';
 import { browserWebArenaAnswer } from './tools/browser-webarena-answer.js';
 import type { ToolUseInput } from './tools/types.js';
 import { recordBedrockCallStart, recordBedrockCallSuccess, recordBedrockCallError, flushObservability } from './observability.js';
+import { noteWebArenaModelTurn, noteWebArenaRetrieval, noteWebArenaToolStart } from './tools/util.js';
 
 export type ConverseLoopResult = {
   fullText: string;
@@ -126,6 +127,7 @@ export async function converseLoop(
     const currentMessages = addCachePoints(messages, anyClaude, anyNova, counts as any);
     let response: ConverseResponse | undefined;
     let lastError: any;
+    const turnStartedAt = Date.now();
 
     // 現在のアクティブリージョンから順に直列で試行し、成功リージョンを固定
     console.log(`[Region Router] 現在のアクティブリージョン: ${regionOrder[activeRegionIndex]} (index=${activeRegionIndex})`);
@@ -367,6 +369,8 @@ export async function converseLoop(
     }
 
     const usage = response.usage ?? ({} as any);
+    // trajectory のステップ計測用（リージョン/モデルのフェイルオーバー待ちを含む）
+    try { noteWebArenaModelTurn(Date.now() - turnStartedAt, usage); } catch {}
     totalInput += usage.inputTokens ?? 0;
     totalOutput += usage.outputTokens ?? 0;
     totalCacheRead += usage.cacheReadInputTokens ?? 0;
@@ -595,9 +599,13 @@ export async function converseLoop(
       }
 
       // 並列実行（DBクエリなどブラウザ非依存）: 例外は文字列化して返す
+      const toolNameAt = (index: number): string => String(contentBlocks[index]?.toolUse?.name ?? '');
+      noteWebArenaToolStart();
       const parallelResults = await Promise.all(parallelTasks.map(async (t) => {
+        const startedAt = Date.now();
         try {
           const text = await t.run();
+          if (toolNameAt(t.index) === 'snapshot_search') noteWebArenaRetrieval(Date.now() - startedAt);
           return { index: t.index, toolUseId: t.toolUseId, text };
         } catch (e: any) {
           const err = `エラー: ${String(e?.message ?? e)}`;
@@ -609,6 +617,7 @@ export async function converseLoop(
       const browserResults: Array<{ index: number; toolUseId: string; text: string | any }> = [];
       const orderedBrowserTasks = [...browserTasks].sort((a, b) => a.index - b.index);
       for (const t of orderedBrowserTasks) {
+        noteWebArenaToolStart();
         try {
           const text = await t.run();
           browserResults.push({ index: t.index, toolUseId: t.toolUseId, text });
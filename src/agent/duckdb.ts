@@ -1,4 +1,5 @@
 import duckdb from 'duckdb';
+import fs from 'fs';
 import path from 'path';
 
 let _db: duckdb.Database | null = null;
@@ -12,14 +13,47 @@ function getCsvPath(): string {
   return path.resolve(process.cwd(), 'output', 'crawl.csv');
 }
 
+type SourceKind = 'csv' | 'parquet' | 'duckdb';
+
+/**
+ * AGENT_CSV_PATH の種類を判定
+ * ・.duckdb / .db: convert_crawl.py で生成した永続DB（pages テーブル + インデックス）
+ * ・.parquet またはディレクトリ: convert_crawl.py で生成した Parquet（配下の *.parquet を読む）
+ * ・それ以外: CSV
+ */
+function getSourceKind(p: string): SourceKind {
+  const lower = p.toLowerCase();
+  if (lower.endsWith('.duckdb') || lower.endsWith('.db')) return 'duckdb';
+  if (lower.endsWith('.parquet')) return 'parquet';
+  try {
+    if (fs.statSync(p).isDirectory()) return 'parquet';
+  } catch {}
+  return 'csv';
+}
+
 async function initIfNeeded(): Promise<void> {
   if (_initialized && _db && _con) return;
+  const source = getCsvPath();
+  const kind = getSourceKind(source);
+  if (kind === 'duckdb') {
+    // 読み取り専用で開く（複数エージェントから同時に参照できる）
+    _db = new duckdb.Database(source, { access_mode: 'READ_ONLY' });
+    _con = _db.connect();
+    _initialized = true;
+    return;
+  }
   _db = new duckdb.Database(':memory:');
   _con = _db.connect();
-  const csv = getCsvPath();
-  const csvEscaped = csv.replace(/'/g, "''");
-  // CSV を pages ビューとして読む（ヘッダーあり、型は自動推定）
-  await exec(`CREATE OR REPLACE VIEW pages AS SELECT * FROM read_csv_auto('${csvEscaped}', HEADER=true);`);
+  if (kind === 'parquet') {
+    const glob = (fs.existsSync(source) && fs.statSync(source).isDirectory()) ? path.join(source, '**', '*.parquet') : source;
+    const globEscaped = glob.replace(/'/g, "''");
+    // ディレクトリ名を列として解釈させない（site 列はファイル内の値を使う）
+    await exec(`CREATE OR REPLACE VIEW pages AS SELECT * FROM read_parquet('${globEscaped}', hive_partitioning=false);`);
+  } else {
+    const csvEscaped = source.replace(/'/g, "''");
+    // CSV を pages ビューとして読む（ヘッダーあり、型は自動推定）
+    await exec(`CREATE OR REPLACE VIEW pages AS SELECT * FROM read_csv_auto('${csvEscaped}', HEADER=true);`);
+  }
   _initialized = true;
 }
 
@@ -71,7 +105,7 @@ export async function getCsvSchemaString(): Promise<string> {
       `SELECT * FROM pages LIMIT 3`
     );
     const lines: string[] = [];
-    lines.push('CSV source: ' + csvPath);
+    lines.push(`${getSourceKind(csvPath) === 'csv' ? 'CSV' : 'Data'} source: ` + csvPath);
     lines.push('- Column info:');
     if (cols.length) {
       for (const c of cols) lines.push(`  - ${c.name}: ${c.type || 'UNKNOWN'}`);
@@ -1,7 +1,7 @@
 import { converseLoop } from './converse.js';
 import { getDatabaseSchemaString } from './schema.js';
 import { createSystemPromptWithSchema } from './prompt.js';
-import { ensureSharedBrowserStarted, closeSharedBrowserWithDelay, finalizeWebArenaTrajectory, saveWebArenaTrajectory, initWebArenaTrajectory } from './tools/util.js';
+import { ensureSharedBrowserStarted, closeSharedBrowserWithDelay, finalizeWebArenaTrajectory, saveWebArenaTrajectory, initWebArenaTrajectory, startWebArenaTrajectoryStream, endWebArenaTrajectoryStream } from './tools/util.js';
 import { startSessionTrace } from './observability.js';
 import { promises as fs } from 'fs';
 import path from 'path';
@@ -235,6 +235,9 @@ export async function runSingleQuery(query: string): Promise<void> {
   
   // WebArena Trajectory初期化
   await initWebArenaTrajectory();
+
+  // ストリーミング評価（AGENT_WEBARENA_TRAJECTORY_STREAM=true）: 評価器を先に起動し、NDJSON trajectory に追従させる
+  const liveEvaluation = enableWebArenaEval ? await startLiveWebArenaEvaluation() : null;
   
   try {
     console.log('CSVスキーマを取得中...');
@@ -300,7 +303,7 @@ export async function runSingleQuery(query: string): Promise<void> {
     if (enableWebArenaEvalFinal) {
       // webarena_final_answerツールの結果を使用（優先）、なければfullText
       const finalAnswer = webarenaAnswer || fullText;
-      await runWebArenaEvaluation(enhancedQuery, finalAnswer);
+      await runWebArenaEvaluation(enhancedQuery, finalAnswer, liveEvaluation);
     }
   } catch (e: any) {
     console.error('\n========================================');
@@ -318,33 +321,109 @@ export async function runSingleQuery(query: string): Promise<void> {
     console.error('========================================\n');
     throw e; // 上位のcli.tsで処理させるため再スロー
   } finally {
+    // 評価に到達しなかった場合、追従中の評価器を中断させる（評価済みなら何もしない）
+    if (liveEvaluation) await endWebArenaTrajectoryStream({ aborted: true });
     // 完了時に5秒（または環境変数の指定 ms）待ってからクローズ
     await closeSharedBrowserWithDelay();
   }
 }
 
-async function runWebArenaEvaluation(query: string, answer: string): Promise<void> {
+type LiveWebArenaEvaluation = { trajPath: string; done: Promise<void> };
+
+function webArenaCdpEndpoint(): string {
+  // CDP Endpoint取得（DevToolsポートから生成）
+  const cdpPortEnv = String(process.env.AGENT_CDP_PORT || '').trim();
+  const cdpPort = Number.isFinite(Number(cdpPortEnv)) && Math.trunc(Number(cdpPortEnv)) > 0 ? Math.trunc(Number(cdpPortEnv)) : 9222;
+  return `http://127.0.0.1:${cdpPort}`;
+}
+
+function webArenaRunPaths(configFilePath: string): { taskId: string; trajPath: string; resultPath: string } {
+  // Trajectory保存（タスクID付きで構造化）
+  const taskId = configFilePath ? path.basename(configFilePath, '.json') : 'unknown';
+  const timestamp = new Date().toISOString().replace(/[:.]/g, '-').slice(0, 19);
+  const trajPath = path.resolve(__dirname, '..', '..', 'output', 'webarena', 'trajectories', `task_${taskId}_${timestamp}.json`);
+  const resultPath = path.resolve(__dirname, '..', '..', 'output', 'webarena', 'results', `task_${taskId}_${timestamp}.json`);
+  return { taskId, trajPath, resultPath };
+}
+
+async function resolveWebArenaEvalScript(): Promise<string | null> {
+  // 評価スクリプトパス（環境変数で指定可能、デフォルトは相対パス）
+  const envEvalScript = String(process.env.AGENT_WEBARENA_EVAL_SCRIPT || '').trim();
+  const evalScript = envEvalScript
+    ? path.resolve(envEvalScript)
+    : path.resolve(__dirname, '..', '..', 'scripts', 'evaluate_webarena.py');
+  
+  // 評価スクリプトの存在確認
+  try {
+    await fs.access(evalScript);
+  } catch (e: any) {
+    console.log(`[WebArena] 評価スクリプトが見つかりません: ${evalScript}`);
+    console.log('[WebArena] 評価をスキップします（Trajectory は保存済み）');
+    console.log('[ヒント] 評価スクリプトのパスを AGENT_WEBARENA_EVAL_SCRIPT 環境変数で指定できます');
+    return null;
+  }
+  return evalScript;
+}
+
+function spawnWebArenaEvaluator(evalScript: string, args: string[]): Promise<void> {
+  const pyBin = String(process.env.AGENT_PYTHON_BIN || '').trim() || 'python3';
+  console.log(`[WebArena] 評価実行: ${evalScript}`);
+  return new Promise<void>((resolve, reject) => {
+    const proc = spawn(pyBin, [evalScript, ...args], {
+      stdio: 'inherit',
+      cwd: process.cwd()
+    });
+    proc.on('close', (code) => {
+      if (code === 0) {
+        console.log('[WebArena] 評価完了');
+        resolve();
+      } else {
+        console.log(`[WebArena] 評価失敗（終了コード: ${code}）`);
+        reject(new Error(`評価スクリプトが失敗しました: ${code}`));
+      }
+    });
+    proc.on('error', (err) => {
+      console.error('[WebArena] 評価エラー:', err);
+      reject(err);
+    });
+  });
+}
+
+async function startLiveWebArenaEvaluation(): Promise<LiveWebArenaEvaluation | null> {
+  if (String(process.env.AGENT_WEBARENA_TRAJECTORY_STREAM ?? 'false').toLowerCase() !== 'true') return null;
+  const configFilePath = String(process.env.AGENT_WEBARENA_CONFIG_FILE || '').trim();
+  if (!configFilePath) return null;
+  const evalScript = await resolveWebArenaEvalScript();
+  if (!evalScript) return null;
+  try {
+    const cdpEndpoint = webArenaCdpEndpoint();
+    const { taskId, trajPath, resultPath } = webArenaRunPaths(configFilePath);
+    const streamPath = trajPath.replace(/\.json$/i, '.ndjson');
+    await startWebArenaTrajectoryStream(streamPath, { task_id: taskId, config_file: configFilePath, cdp_endpoint: cdpEndpoint });
+    console.log(`[WebArena] Trajectoryストリーム: ${streamPath}`);
+    const done = spawnWebArenaEvaluator(evalScript, [streamPath, configFilePath, cdpEndpoint, resultPath, '--follow']);
+    // 終了待ちは runWebArenaEvaluation で行う（それまでの未処理 rejection を抑止）
+    done.catch(() => {});
+    return { trajPath, done };
+  } catch (e: any) {
+    console.error('[WebArena] ストリーミング評価を開始できませんでした（従来の評価にフォールバック）:', e?.message ?? e);
+    return null;
+  }
+}
+
+async function runWebArenaEvaluation(query: string, answer: string, live: LiveWebArenaEvaluation | null = null): Promise<void> {
   try {
     console.log('\n[WebArena] 評価を開始します...');
     
-    // Trajectory確定
+    // Trajectory確定（ストリーミング時はここで最終 state と STOP が追記される）
     await finalizeWebArenaTrajectory(answer);
     
-    // CDP Endpoint取得（DevToolsポートから生成）
-    const { browser, context } = await ensureSharedBrowserStarted();
-    const cdpPortEnv = String(process.env.AGENT_CDP_PORT || '').trim();
-    const cdpPort = Number.isFinite(Number(cdpPortEnv)) && Math.trunc(Number(cdpPortEnv)) > 0 ? Math.trunc(Number(cdpPortEnv)) : 9222;
-    const cdpEndpoint = `http://127.0.0.1:${cdpPort}`;
-    
-    // Trajectory保存（タスクID付きで構造化）
+    // 評価器が CDP で接続するブラウザを起動済みにしておく（従来どおり）
+    await ensureSharedBrowserStarted();
+    const cdpEndpoint = webArenaCdpEndpoint();
     const configFilePath = String(process.env.AGENT_WEBARENA_CONFIG_FILE || '').trim();
-    const taskId = configFilePath ? path.basename(configFilePath, '.json') : 'unknown';
-    const timestamp = new Date().toISOString().replace(/[:.]/g, '-').slice(0, 19);
-    
-    const explicitTraj = String(process.env.AGENT_WEBARENA_TRAJECTORY_FILE || '').trim();
-    const trajPath = explicitTraj
-      ? path.resolve(__dirname, '..', '..', 'output', 'webarena', 'trajectories', `task_${taskId}_${timestamp}.json`)
-      : path.resolve(__dirname, '..', '..', 'output', 'webarena', 'trajectories', `task_${taskId}_${timestamp}.json`);
+    const paths = webArenaRunPaths(configFilePath);
+    const trajPath = live ? live.trajPath : paths.trajPath;
     const evaluatedAt = new Date().toISOString();
     await saveWebArenaTrajectory(trajPath, cdpEndpoint, evaluatedAt);
     try {
@@ -352,6 +431,18 @@ async function runWebArenaEvaluation(query: string, answer: string): Promise<voi
       console.log(`[WebArena] 録画ファイル予定名: ${videoPath}`);
     } catch {}
     console.log(`[WebArena] Trajectory保存: ${trajPath}`);
+
+    if (live) {
+      // 追従中の評価器に終了を通知し、残りの最終回答 / URL 判定の完了を待つ
+      let finalUrl = '';
+      try {
+        const { page } = await ensureSharedBrowserStarted();
+        finalUrl = page.url();
+      } catch {}
+      await endWebArenaTrajectoryStream({ final_url: finalUrl, cdp_endpoint: cdpEndpoint, evaluated_at: evaluatedAt });
+      await live.done;
+      return;
+    }
     
     // Python評価スクリプト実行
     if (!configFilePath) {
@@ -359,48 +450,10 @@ async function runWebArenaEvaluation(query: string, answer: string): Promise<voi
       return;
     }
     
-    // 評価スクリプトパス（環境変数で指定可能、デフォルトは相対パス）
-    const envEvalScript = String(process.env.AGENT_WEBARENA_EVAL_SCRIPT || '').trim();
-    const evalScript = envEvalScript
-      ? path.resolve(envEvalScript)
-      : path.resolve(__dirname, '..', '..', 'scripts', 'evaluate_webarena.py');
-    
-    // 評価スクリプトの存在確認
-    try {
-      await fs.access(evalScript);
-    } catch (e: any) {
-      console.log(`[WebArena] 評価スクリプトが見つかりません: ${evalScript}`);
-      console.log('[WebArena] 評価をスキップします（Trajectory は保存済み）');
-      console.log('[ヒント] 評価スクリプトのパスを AGENT_WEBARENA_EVAL_SCRIPT 環境変数で指定できます');
-      return;
-    }
-    
-    const pyBin = String(process.env.AGENT_PYTHON_BIN || '').trim() || 'python3';
-    console.log(`[WebArena] 評価実行: ${evalScript}`);
-    
-    const resultPath = path.resolve(__dirname, '..', '..', 'output', 'webarena', 'results', `task_${taskId}_${timestamp}.json`);
-    
-    await new Promise<void>((resolve, reject) => {
-      const proc = spawn(pyBin, [evalScript, trajPath, configFilePath, cdpEndpoint, resultPath], {
-        stdio: 'inherit',
-        cwd: process.cwd()
-      });
-      proc.on('close', (code) => {
-        if (code === 0) {
-          console.log('[WebArena] 評価完了');
-          resolve();
-        } else {
-          console.log(`[WebArena] 評価失敗（終了コード: ${code}）`);
-          reject(new Error(`評価スクリプトが失敗しました: ${code}`));
-        }
-      });
-      proc.on('error', (err) => {
-        console.error('[WebArena] 評価エラー:', err);
-        reject(err);
-      });
-    });
+    const evalScript = await resolveWebArenaEvalScript();
+    if (!evalScript) return;
+    await spawnWebArenaEvaluator(evalScript, [trajPath, configFilePath, cdpEndpoint, paths.resultPath]);
   } catch (e: any) {
     console.error('[WebArena] 評価中にエラーが発生しました:', e?.message ?? e);
   }
 }
-
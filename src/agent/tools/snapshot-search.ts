@@ -2,6 +2,7 @@ import { attachTodos, formatToolError, rerankPlainTextDocuments } from './util.j
 import { createIndexLoaderFromEnv } from '../../indexer/loader.js';
 import { EmbeddingsService } from '../../indexer/embeddings.js';
 import type { ChunkMetadata } from '../../indexer/types.js';
+import type { ChunkStore, StoredChunk } from '../../indexer/chunk-store.js';
 import { recordVectorSearchCallStart, recordVectorSearchCallSuccess, recordVectorSearchCallError, recordVectorSearchUsage } from '../observability.js';
 
 function splitKeywords(input: string): string[] {
@@ -27,6 +28,7 @@ function normalizeKeywords(input: any): string[] {
 }
 
 export async function snapshotSearch(input: { keywords: string[]; vectorQuery: string; topK?: number }): Promise<string> {
+  let chunkStore: ChunkStore | null = null;
   try {
     const vectorQuery = String((input as any)?.vectorQuery || '').trim();
     const topKInput = Math.trunc(Number((input as any)?.topK));
@@ -47,12 +49,43 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
       return JSON.stringify(payload);
     }
 
-    // 1) Parquetからチャンクメタデータを全件読み込み
-    console.info(`[snapshot_search] チャンクメタデータを読み込み中...`);
-    const allChunks = await indexLoader.loadAllChunks();
-    console.info(`[snapshot_search] 総チャンク数: ${allChunks.length}`);
+    // チャンクストア（chunks.store）があればラベル → チャンクの解決に使う
+    chunkStore = indexLoader.openChunkStore();
+
+    // キーワード転置インデックス（keywords.index）とチャンクストアがあれば、チャンク本文を全件読まずに絞り込む
+    let keywordLabels: Set<number> | null = null;
+    if (terms.length && chunkStore) {
+      const keywordIndex = indexLoader.openKeywordIndex();
+      if (keywordIndex && keywordIndex.docCount !== chunkStore.count) {
+        console.info(`[snapshot_search] keywords.index の件数（${keywordIndex.docCount}）が chunks.store（${chunkStore.count}）と一致しないため使用しません`);
+      } else if (keywordIndex) {
+        const tk = Date.now();
+        const candidates = keywordIndex.filter(terms);
+        if (candidates) {
+          // 索引だけでは厳密に判定できないキーワード（句・記号を含む等）は候補の本文で確認
+          const labels = Array.from(candidates.labels);
+          keywordLabels = new Set(candidates.verify.length
+            ? labels.filter((label) => {
+                const lc = chunkStore!.getByLabel(label)?.chunk_text.toLowerCase() ?? '';
+                return candidates.verify.every((kw) => lc.includes(kw));
+              })
+            : labels);
+          console.info(`[snapshot_search] キーワードインデックスで絞り込み: 候補=${labels.length} 本文確認=${candidates.verify.length ? labels.length : 0} (${Date.now() - tk}ms)`);
+        }
+      }
+    }
 
-    if (!allChunks.length) {
+    // 1) Parquetからチャンクメタデータを全件読み込み（キーワード無し or キーワードインデックスで絞り込み済み、かつチャンクストアありの場合は不要）
+    const needAllChunks = (terms.length > 0 && !keywordLabels) || !chunkStore;
+    let allChunks: ChunkMetadata[] = [];
+    if (needAllChunks) {
+      console.info(`[snapshot_search] チャンクメタデータを読み込み中...`);
+      allChunks = await indexLoader.loadAllChunks();
+    }
+    const totalChunks = needAllChunks ? allChunks.length : chunkStore!.count;
+    console.info(`[snapshot_search] 総チャンク数: ${totalChunks}`);
+
+    if (!totalChunks) {
       const payload = await attachTodos({ ok: true, action: 'snapshot_search', results: [] });
       return JSON.stringify(payload);
     }
@@ -69,9 +102,10 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
         })
       : allChunks;
     
-    console.info(`[snapshot_search] keywords(AND) terms=${JSON.stringify(terms)} matchedChunks=${keywordFiltered.length}/${allChunks.length}`);
+    const keywordFilteredCount = keywordLabels ? keywordLabels.size : needAllChunks ? keywordFiltered.length : totalChunks;
+    console.info(`[snapshot_search] keywords(AND) terms=${JSON.stringify(terms)} matchedChunks=${keywordFilteredCount}/${totalChunks}`);
 
-    if (!keywordFiltered.length) {
+    if (!keywordFilteredCount) {
       const payload = await attachTodos({ ok: true, action: 'snapshot_search', results: [], note: 'No chunks found matching keyword search (consider reducing/generalizing keywords to relax the condition)' });
       return JSON.stringify(payload);
     }
@@ -80,7 +114,7 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
     const envDefaultTop = Number(process.env.AGENT_SEARCH_TOP_K);
     const defaultTop = Number.isFinite(envDefaultTop) && envDefaultTop > 0 ? envDefaultTop : 10;
     const requestedTop = Number.isFinite(topKInput) && topKInput > 0 ? topKInput : defaultTop;
-    const vectorSearchK = Math.min(requestedTop * 10, keywordFiltered.length); // topK×10件
+    const vectorSearchK = Math.min(requestedTop * 10, keywordFilteredCount); // topK×10件
     
     console.info(`[snapshot_search] ベクトル検索: topK=${requestedTop}, vectorSearchK=${vectorSearchK}`);
 
@@ -100,7 +134,7 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
       provider,
       input: {
         query: vectorQuery,
-        keywordFilteredChunks: keywordFiltered.length,
+        keywordFilteredChunks: keywordFilteredCount,
         requestedTopK: requestedTop
       },
       name: 'Vector Search (Embed + Search)'
@@ -110,7 +144,7 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
     try {
       queryVector = await embeddingService.embedQuery(vectorQuery);
       // 使用量を記録（クエリ文字数 + フィルタ済みドキュメント数）
-      try { recordVectorSearchUsage(vectorSearchHandle, vectorQuery.length, keywordFiltered.length); } catch {}
+      try { recordVectorSearchUsage(vectorSearchHandle, vectorQuery.length, keywordFilteredCount); } catch {}
     } catch (e: any) {
       recordVectorSearchCallError(vectorSearchHandle, e, { stage: 'embed_query', modelId: embeddingModel, provider });
       throw e;
@@ -120,8 +154,8 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
     console.info(`[snapshot_search] ベクトルストアを読み込み中...`);
     const vectorStore = await indexLoader.loadVectorStore();
 
-    // キーワードフィルタリングされたチャンクのchunk_idを取得
-    const filteredChunkIds = new Set(keywordFiltered.map(c => c.chunk_id));
+    // キーワードフィルタリングされたチャンクのchunk_idを取得（全件対象 or キーワードインデックスのラベルで絞る場合は null）
+    const filteredChunkIds = terms.length && !keywordLabels ? new Set(keywordFiltered.map(c => c.chunk_id)) : null;
 
     // 4) ベクトル検索を実行（全ベクトルから検索し、後でフィルタリング）
     // 十分な数を取得するために、vectorSearchK * 2 を検索して後でフィルタリング
@@ -131,7 +165,7 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
 
     // キーワードフィルタリングされたチャンクのみを残す
     const filteredVectorResults = vectorResults
-      .filter(r => filteredChunkIds.has(r.chunkId))
+      .filter(r => (keywordLabels ? keywordLabels.has(r.index) : !filteredChunkIds || filteredChunkIds.has(r.chunkId)))
       .slice(0, vectorSearchK);
 
     console.info(`[snapshot_search] ベクトル検索結果: ${filteredVectorResults.length}件`);
@@ -142,7 +176,7 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
       metadata: {
         expandedK,
         vectorSearchK,
-        keywordFilteredChunks: keywordFiltered.length,
+        keywordFilteredChunks: keywordFilteredCount,
         finalVectorResults: filteredVectorResults.length
       }
     });
@@ -152,8 +186,14 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
       return JSON.stringify(payload);
     }
 
-    // チャンクIDからメタデータを取得
-    const chunkMap = await indexLoader.findChunksByIds(filteredVectorResults.map(r => r.chunkId));
+    // チャンクIDからメタデータを取得（チャンクストアがあればヒットしたラベルのみ読む。無ければ読み込み済みの全件から引く）
+    let chunkMap: Map<string, StoredChunk>;
+    if (chunkStore) {
+      chunkMap = chunkStore.getByLabels(filteredVectorResults.map(r => r.index));
+    } else {
+      const hitIds = new Set(filteredVectorResults.map(r => r.chunkId));
+      chunkMap = new Map(allChunks.filter(c => hitIds.has(c.chunk_id)).map(c => [c.chunk_id, c] as [string, StoredChunk]));
+    }
 
     // 5) リランク用のドキュメントを準備
     const rerankDocs = filteredVectorResults
@@ -187,7 +227,7 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
 
     const ms = Date.now() - t0;
     console.info(`[snapshot_search] 完了: ${top.length}件返却, 処理時間=${ms}ms`);
-    console.info(`[snapshot_search] 統計: totalChunks=${allChunks.length}, keywordFiltered=${keywordFiltered.length}, vectorSearchResults=${filteredVectorResults.length}, finalResults=${top.length}`);
+    console.info(`[snapshot_search] 統計: totalChunks=${totalChunks}, keywordFiltered=${keywordFilteredCount}, vectorSearchResults=${filteredVectorResults.length}, finalResults=${top.length}`);
 
     const payload = await attachTodos({ 
       ok: true, 
@@ -198,6 +238,8 @@ export async function snapshotSearch(input: { keywords: string[]; vectorQuery: s
   } catch (e: any) {
     const payload = await attachTodos({ ok: false, action: 'snapshot_search', error: formatToolError(e) });
     return JSON.stringify(payload);
+  } finally {
+    chunkStore?.close();
   }
 }
 
@@ -491,6 +491,19 @@ type WebArenaAction = {
   direction: string;
   key_comb: string;
   pw_code: string;
+  timing?: WebArenaStepTiming; // 任意: ステップ所要時間の内訳（評価側で action_history に展開）
+};
+// 前ステップ終了からこのステップ記録までの所要時間の内訳（duration_ms = model + action + retrieval + observation + other）
+type WebArenaStepTiming = {
+  started_at: string;
+  ended_at: string;
+  duration_ms: number;
+  model_ms: number; // Bedrock 応答待ち（リトライ・スロットリング待機を含む）
+  action_ms: number; // ツール実行（ブラウザ操作など）
+  retrieval_ms: number; // snapshot_search
+  observation_ms: number; // 記録時のスナップショット撮影
+  other_ms: number;
+  tokens: { input: number; output: number; cache_read: number; cache_write: number };
 };
 type WebArenaTrajectory = Array<WebArenaStateInfo | WebArenaAction>;
 
@@ -498,19 +511,134 @@ const _webArenaTrajectory: WebArenaTrajectory = [];
 let _lastActionPayload: any = null;
 let _trajectoryInitialized = false;
 
+// ステップ計測の累積（次に記録されるアクションへ割り当ててリセット）
+const _stepTiming = {
+  lastStepEndedAt: Date.now(),
+  toolStartedAt: 0,
+  modelMs: 0,
+  retrievalMs: 0,
+  tokens: { input: 0, output: 0, cache_read: 0, cache_write: 0 },
+};
+
+// NDJSON ストリーム（評価器が追従して逐次処理する）。null の間は書き出さない
+let _trajectoryStreamPath: string | null = null;
+let _trajectoryStreamWrite: Promise<void> = Promise.resolve();
+let _trajectoryStreamErrors = 0;
+
+function appendWebArenaTrajectoryStream(obj: Record<string, any>): void {
+  const streamPath = _trajectoryStreamPath;
+  if (!streamPath) return;
+  const line = JSON.stringify(obj) + '\n';
+  // 追記順を保つため直列化（失敗しても後続の追記は続ける。件数は end 行の write_errors で評価器に伝える）
+  _trajectoryStreamWrite = _trajectoryStreamWrite
+    .then(() => fs.appendFile(streamPath, line, 'utf-8'))
+    .catch((e: any) => {
+      _trajectoryStreamErrors += 1;
+      console.warn(`[警告] trajectory ストリームへの追記に失敗: ${streamPath}: ${e?.message ?? e}`);
+    });
+}
+
+function pushWebArenaTrajectoryItem(item: WebArenaStateInfo | WebArenaAction): void {
+  _webArenaTrajectory.push(item);
+  appendWebArenaTrajectoryStream(item);
+}
+
+/**
+ * trajectory を NDJSON（1行1 state/action、先頭に start 行、末尾に end 行）で逐次書き出す
+ */
+export async function startWebArenaTrajectoryStream(outPath: string, header: Record<string, any>): Promise<void> {
+  const absPath = path.resolve(outPath);
+  await fs.mkdir(path.dirname(absPath), { recursive: true }).catch(()=>{});
+  await fs.writeFile(absPath, JSON.stringify({ type: 'start', pid: process.pid, ...header }) + '\n', 'utf-8');
+  _trajectoryStreamPath = absPath;
+  _trajectoryStreamErrors = 0;
+  // 開始前に記録済みの項目があれば先に書き出す
+  for (const item of _webArenaTrajectory) appendWebArenaTrajectoryStream(item);
+}
+
+/**
+ * end 行（final_url 等、または aborted）を書き出してストリームを閉じる（未開始・終了済みなら何もしない）
+ */
+export async function endWebArenaTrajectoryStream(meta: Record<string, any>): Promise<void> {
+  if (!_trajectoryStreamPath) return;
+  // それまでの追記の完了を待ってから、失敗件数を end 行に載せる
+  await _trajectoryStreamWrite;
+  appendWebArenaTrajectoryStream({ type: 'end', ...meta, write_errors: _trajectoryStreamErrors });
+  _trajectoryStreamPath = null;
+  await _trajectoryStreamWrite;
+}
+
 export async function initWebArenaTrajectory(): Promise<void> {
   try {
     _webArenaTrajectory.length = 0;
     _lastActionPayload = null;
     _trajectoryInitialized = false;
+    _trajectoryStreamPath = null;
+    _stepTiming.lastStepEndedAt = Date.now();
+    _stepTiming.toolStartedAt = 0;
+    _stepTiming.modelMs = 0;
+    _stepTiming.retrievalMs = 0;
+    _stepTiming.tokens = { input: 0, output: 0, cache_read: 0, cache_write: 0 };
   } catch {}
 }
 
+/**
+ * モデル1ターン分の応答時間とトークン使用量を記録（converse.ts から呼び出し）
+ */
+export function noteWebArenaModelTurn(ms: number, usage: any): void {
+  _stepTiming.modelMs += Math.max(0, ms);
+  _stepTiming.tokens.input += Number(usage?.inputTokens ?? 0) || 0;
+  _stepTiming.tokens.output += Number(usage?.outputTokens ?? 0) || 0;
+  _stepTiming.tokens.cache_read += Number(usage?.cacheReadInputTokens ?? 0) || 0;
+  _stepTiming.tokens.cache_write += Number(usage?.cacheWriteInputTokens ?? 0) || 0;
+}
+
+/**
+ * ツール実行開始を記録（ブラウザ操作は順次実行のため直前の開始時刻 = 記録対象アクションの開始時刻）
+ */
+export function noteWebArenaToolStart(): void {
+  _stepTiming.toolStartedAt = Date.now();
+}
+
+/**
+ * snapshot_search の所要時間を記録（trajectory には記録されないため次のアクションに加算）
+ */
+export function noteWebArenaRetrieval(ms: number): void {
+  _stepTiming.retrievalMs += Math.max(0, ms);
+}
+
+function takeWebArenaStepTiming(recordStartedAt: number, observationMs: number): WebArenaStepTiming {
+  const now = Date.now();
+  const startedAt = _stepTiming.lastStepEndedAt;
+  const durationMs = Math.max(0, now - startedAt);
+  const actionMs = _stepTiming.toolStartedAt && _stepTiming.toolStartedAt >= startedAt
+    ? Math.max(0, recordStartedAt - _stepTiming.toolStartedAt)
+    : 0;
+  const timing: WebArenaStepTiming = {
+    started_at: new Date(startedAt).toISOString(),
+    ended_at: new Date(now).toISOString(),
+    duration_ms: durationMs,
+    model_ms: _stepTiming.modelMs,
+    action_ms: actionMs,
+    retrieval_ms: _stepTiming.retrievalMs,
+    observation_ms: observationMs,
+    other_ms: Math.max(0, durationMs - _stepTiming.modelMs - actionMs - _stepTiming.retrievalMs - observationMs),
+    tokens: { ..._stepTiming.tokens },
+  };
+  _stepTiming.lastStepEndedAt = now;
+  _stepTiming.toolStartedAt = 0;
+  _stepTiming.modelMs = 0;
+  _stepTiming.retrievalMs = 0;
+  _stepTiming.tokens = { input: 0, output: 0, cache_read: 0, cache_write: 0 };
+  return timing;
+}
+
 async function recordWebArenaTrajectoryStep(payload: any): Promise<void> {
   try {
     const action = String(payload?.action || '').trim();
     if (!action || action === 'snapshot_search' || action === 'run_query' || action === 'batch') return;
     
+    const recordStartedAt = Date.now();
     const { page } = await ensureSharedBrowserStarted();
     const url = String(payload?.snapshots?.url || page.url());
     let snapshotText = getResolutionSnapshotText() || '';
@@ -521,6 +649,7 @@ async function recordWebArenaTrajectoryStep(payload: any): Promise<void> {
         snapshotText = snaps.text || '';
       } catch {}
     }
+    const observationMs = Date.now() - recordStartedAt;
     
     // 初回のみ: 初期StateInfo追加（WebArenaのenv.reset()相当）
     if (!_trajectoryInitialized) {
@@ -532,7 +661,7 @@ async function recordWebArenaTrajectoryStep(payload: any): Promise<void> {
           observation_metadata: { obs_nodes_info: {} }
         }
       };
-      _webArenaTrajectory.push(initialState);
+      pushWebArenaTrajectoryItem(initialState);
       _trajectoryInitialized = true;
     }
     
@@ -546,7 +675,7 @@ async function recordWebArenaTrajectoryStep(payload: any): Promise<void> {
           observation_metadata: { obs_nodes_info: {} }
         }
       };
-      _webArenaTrajectory.push(stateInfo);
+      pushWebArenaTrajectoryItem(stateInfo);
     }
     
     // Action追加（簡易マッピング）
@@ -565,14 +694,16 @@ async function recordWebArenaTrajectoryStep(payload: any): Promise<void> {
       direction: '',
       key_comb: action === 'press' ? String(payload?.key || '') : '',
       pw_code: '',
+      timing: takeWebArenaStepTiming(recordStartedAt, observationMs),
     };
-    _webArenaTrajectory.push(waAction);
+    pushWebArenaTrajectoryItem(waAction);
     _lastActionPayload = payload;
   } catch {}
 }
 
 export async function finalizeWebArenaTrajectory(answer: string): Promise<void> {
   try {
+    const recordStartedAt = Date.now();
     const { page } = await ensureSharedBrowserStarted();
     
     // 最終StateInfo
@@ -584,7 +715,7 @@ export async function finalizeWebArenaTrajectory(answer: string): Promise<void>
         observation_metadata: { obs_nodes_info: {} }
       }
     };
-    _webArenaTrajectory.push(finalState);
+    pushWebArenaTrajectoryItem(finalState);
     
     // STOP action
     const stopAction: WebArenaAction = {
@@ -602,8 +733,9 @@ export async function finalizeWebArenaTrajectory(answer: string): Promise<void>
       direction: '',
       key_comb: '',
       pw_code: '',
+      timing: takeWebArenaStepTiming(recordStartedAt, 0),
     };
-    _webArenaTrajectory.push(stopAction);
+    pushWebArenaTrajectoryItem(stopAction);
   } catch {}
 }
 
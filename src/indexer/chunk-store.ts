@@ -0,0 +1,118 @@
+import { closeSync, existsSync, openSync, readSync } from 'fs';
+import { createHash } from 'node:crypto';
+import type { ChunkMetadata } from './types.js';
+
+/**
+ * chunks.store（benchmarks/.../scripts/chunk_store.py で生成）のリーダー
+ * ・オープン時はヘッダ（64バイト）のみ読み込む
+ * ・FAISSラベル（序数）→ チャンクの解決は、オフセット表の1エントリと対象文字列のみを pread する
+ */
+export type StoredChunk = Pick<ChunkMetadata, 'chunk_id' | 'page_id' | 'url' | 'chunk_index' | 'chunk_text'>;
+
+const MAGIC = 'WGCS';
+const VERSION = 1;
+const HEADER_SIZE = 64;
+const ENTRY_SIZE = 48;
+const LOOKUP_SIZE = 16;
+
+function chunkIdHash(chunkId: string): bigint {
+  // sha256 先頭8バイトのリトルエンディアン（chunk_store.py の chunk_id_hash と同じ定義）
+  return createHash('sha256').update(chunkId, 'utf8').digest().readBigUInt64LE(0);
+}
+
+export class ChunkStore {
+  private fd: number;
+  readonly count: number;
+  private tableOff: number;
+  private lookupOff: number;
+  private heapOff: number;
+
+  private constructor(fd: number, header: Buffer) {
+    this.fd = fd;
+    this.count = Number(header.readBigUInt64LE(8));
+    this.tableOff = Number(header.readBigUInt64LE(16));
+    this.lookupOff = Number(header.readBigUInt64LE(24));
+    this.heapOff = Number(header.readBigUInt64LE(32));
+  }
+
+  /**
+   * ストアを開く（ファイルが無い場合は null）
+   */
+  static open(filePath: string): ChunkStore | null {
+    if (!existsSync(filePath)) return null;
+    const fd = openSync(filePath, 'r');
+    const header = Buffer.alloc(HEADER_SIZE);
+    readSync(fd, header, 0, HEADER_SIZE, 0);
+    if (header.toString('ascii', 0, 4) !== MAGIC || header.readUInt32LE(4) !== VERSION) {
+      closeSync(fd);
+      throw new Error(`chunks.store の形式が不正です: ${filePath}`);
+    }
+    return new ChunkStore(fd, header);
+  }
+
+  private read(position: number, length: number): Buffer {
+    const buf = Buffer.alloc(length);
+    if (length > 0) readSync(this.fd, buf, 0, length, position);
+    return buf;
+  }
+
+  private readString(off: number, length: number): string {
+    return this.read(this.heapOff + off, length).toString('utf-8');
+  }
+
+  /**
+   * FAISSラベル（序数）からチャンクを取得
+   */
+  getByLabel(label: number): StoredChunk | null {
+    if (!Number.isInteger(label) || label < 0 || label >= this.count) return null;
+    const e = this.read(this.tableOff + label * ENTRY_SIZE, ENTRY_SIZE);
+    const idOff = Number(e.readBigUInt64LE(0));
+    const urlOff = Number(e.readBigUInt64LE(8));
+    const textOff = Number(e.readBigUInt64LE(16));
+    return {
+      chunk_id: this.readString(idOff, e.readUInt32LE(24)),
+      url: this.readString(urlOff, e.readUInt32LE(28)),
+      chunk_text: this.readString(textOff, e.readUInt32LE(32)),
+      page_id: e.readInt32LE(36),
+      chunk_index: e.readInt32LE(40),
+    };
+  }
+
+  /**
+   * 複数ラベルをまとめて解決（chunk_id をキーにした Map）
+   */
+  getByLabels(labels: number[]): Map<string, StoredChunk> {
+    const out = new Map<string, StoredChunk>();
+    for (const label of labels) {
+      const chunk = this.getByLabel(label);
+      if (chunk) out.set(chunk.chunk_id, chunk);
+    }
+    return out;
+  }
+
+  /**
+   * chunk_id → 序数（ハッシュ表の二分探索）
+   */
+  ordinalOf(chunkId: string): number | null {
+    const h = chunkIdHash(chunkId);
+    let lo = 0;
+    let hi = this.count;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      const mh = this.read(this.lookupOff + mid * LOOKUP_SIZE, 8).readBigUInt64LE(0);
+      if (mh < h) lo = mid + 1;
+      else hi = mid;
+    }
+    for (; lo < this.count; lo++) {
+      const rec = this.read(this.lookupOff + lo * LOOKUP_SIZE, 12);
+      if (rec.readBigUInt64LE(0) !== h) break;
+      const ordinal = rec.readUInt32LE(8);
+      if (this.getByLabel(ordinal)?.chunk_id === chunkId) return ordinal;
+    }
+    return null;
+  }
+
+  close(): void {
+    try { closeSync(this.fd); } catch {}
+  }
+}
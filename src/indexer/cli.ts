@@ -30,6 +30,10 @@ async function main() {
   const minChunkSize = Number.isFinite(Number(minChunkSizeEnv)) ? Math.trunc(Number(minChunkSizeEnv)) : 500;
   const concurrency = Number.isFinite(Number(concurrencyEnv)) ? Math.max(1, Math.trunc(Number(concurrencyEnv))) : 1;
   
+  // 差分更新（既存インデックスを新しいCSVに合わせて更新）
+  const patchMode = String(process.env.INDEXER_PATCH ?? 'false').toLowerCase() === 'true';
+  const patchBaseCsv = String(process.env.INDEXER_PATCH_BASE_CSV ?? '').trim();
+
   const regions = parseRegions(regionsStr);
   const provider = (providerStr === 'cohere-api' || providerStr === 'bedrock') ? providerStr : 'bedrock';
 
@@ -42,11 +46,18 @@ async function main() {
     provider: provider as 'bedrock' | 'cohere-api',
     maxChunkSize,
     minChunkSize,
-    concurrency
+    concurrency,
+    ...(patchBaseCsv ? { patchBaseCsvPath: path.resolve(process.cwd(), patchBaseCsv) } : {})
   };
 
   try {
     const processor = new IndexerProcessor(config);
+    if (patchMode) {
+      await processor.patch();
+      console.log('\n✅ インデックスの差分更新が完了しました！');
+      console.log(`   ディレクトリ: ${path.join(outputDir, indexName)}/`);
+      process.exit(0);
+    }
     await processor.process();
     
     console.log('\n✅ インデックス作成が完了しました！');
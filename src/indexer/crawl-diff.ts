@@ -0,0 +1,154 @@
+import { promises as fs } from 'fs';
+import { computeSha256Hex } from '../utilities/text.js';
+import { normalizeUrl } from '../utilities/url.js';
+import type { PageRecord } from './types.js';
+
+/**
+ * クロールCSVの差分（再クロール後に変更ページだけを再インデックスするため）
+ * ・URL（normalizeUrl）単位で比較。同一URLの行が複数ある場合は後の行（再クロールで追記された行）を採用
+ * ・内容は正規化後のハッシュで比較（ref 番号・空白の揺れは変更とみなさない）
+ */
+export interface CrawlDiffEntry {
+  url: string;
+  old_id?: number | undefined;
+  new_id?: number | undefined;
+}
+
+export interface CrawlDiff {
+  added: CrawlDiffEntry[];
+  changed: CrawlDiffEntry[];
+  removed: CrawlDiffEntry[];
+  unchanged: number;
+}
+
+/**
+ * CSVの1行をパース（quoted fieldsに対応）
+ */
+function parseCsvLine(line: string): string[] {
+  const values: string[] = [];
+  let current = '';
+  let inQuotes = false;
+
+  for (let i = 0; i < line.length; i++) {
+    const char = line[i]!;
+
+    if (char === '"') {
+      inQuotes = !inQuotes;
+    } else if (char === ',' && !inQuotes) {
+      values.push(current.trim().replace(/^"|"$/g, ''));
+      current = '';
+    } else {
+      current += char;
+    }
+  }
+
+  values.push(current.trim().replace(/^"|"$/g, ''));
+  return values;
+}
+
+/**
+ * クロールCSVからページデータを読み込み
+ */
+export async function loadCrawlCsv(csvPath: string): Promise<PageRecord[]> {
+  const csvContent = await fs.readFile(csvPath, 'utf-8');
+  const lines = csvContent.trim().split('\n');
+
+  if (lines.length < 2) {
+    throw new Error('CSVファイルが空です');
+  }
+
+  // ヘッダー行をパース
+  const header = lines[0]!.split(',').map(h => h.trim().replace(/^"|"$/g, ''));
+
+  // データ行をパース（簡易的なCSVパーサー、quoted fieldsに対応）
+  const pages: PageRecord[] = [];
+  for (let i = 1; i < lines.length; i++) {
+    const line = lines[i]!;
+    if (!line.trim()) continue;
+
+    const record: PageRecord = {};
+    const values = parseCsvLine(line);
+
+    for (let j = 0; j < header.length; j++) {
+      const key = header[j]!;
+      const value = values[j] ?? '';
+
+      if (key === 'id' || key === 'depth') {
+        record[key] = parseInt(value, 10);
+      } else {
+        record[key] = value;
+      }
+    }
+
+    pages.push(record);
+  }
+
+  return pages;
+}
+
+/**
+ * スナップショット列の本文（CSVからの読み込みでエスケープされた改行を実際の改行に変換）
+ */
+export function decodeSnapshotText(page: PageRecord): string {
+  // 列名は snapshotforai（スペースなし）
+  return ((page['snapshotforai'] ?? '') as string)
+    .replace(/\\r\\n/g, '\n')
+    .replace(/\\n/g, '\n')
+    .replace(/\\t/g, '\t')
+    .replace(/\\"/g, '"')
+    .replace(/\\\\/g, '\\');
+}
+
+/**
+ * 差分判定用の正規化（ref 番号はクロールごとに振り直されるため除去し、行内の空白と空行を畳む）
+ */
+export function normalizeSnapshotForDiff(text: string): string {
+  return text
+    .replace(/\s*\[\s*ref\s*=\s*[\w:-]+\s*\]/gi, '')
+    .split(/\r?\n/)
+    .map(line => line.replace(/\s+/g, ' ').trimEnd())
+    .filter(line => line.trim().length > 0)
+    .join('\n');
+}
+
+export function snapshotContentHash(page: PageRecord): string {
+  return computeSha256Hex(normalizeSnapshotForDiff(decodeSnapshotText(page)));
+}
+
+export function pageUrlKey(page: PageRecord): string {
+  return normalizeUrl(String(page.URL ?? ''));
+}
+
+/**
+ * URLごとに最後の行を残す（順序は各URLの初出順）
+ */
+export function latestPagesByUrl(pages: PageRecord[]): Map<string, PageRecord> {
+  const byUrl = new Map<string, PageRecord>();
+  for (const page of pages) {
+    const key = pageUrlKey(page);
+    if (!key) continue;
+    byUrl.set(key, page);
+  }
+  return byUrl;
+}
+
+export function diffCrawlPages(oldPages: PageRecord[], newPages: PageRecord[]): CrawlDiff {
+  const oldByUrl = latestPagesByUrl(oldPages);
+  const newByUrl = latestPagesByUrl(newPages);
+  const diff: CrawlDiff = { added: [], changed: [], removed: [], unchanged: 0 };
+
+  for (const [key, page] of newByUrl) {
+    const prev = oldByUrl.get(key);
+    if (!prev) {
+      diff.added.push({ url: key, new_id: page.id });
+    } else if (snapshotContentHash(prev) !== snapshotContentHash(page)) {
+      diff.changed.push({ url: key, old_id: prev.id, new_id: page.id });
+    } else {
+      diff.unchanged++;
+    }
+  }
+  for (const [key, page] of oldByUrl) {
+    if (!newByUrl.has(key)) diff.removed.push({ url: key, old_id: page.id });
+  }
+  return diff;
+}
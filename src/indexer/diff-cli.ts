@@ -0,0 +1,54 @@
+import 'dotenv/config';
+import { promises as fs } from 'fs';
+import path from 'path';
+import yargs from 'yargs';
+import { hideBin } from 'yargs/helpers';
+import { diffCrawlPages, loadCrawlCsv } from './crawl-diff.js';
+
+async function main() {
+  const argv = yargs(hideBin(process.argv))
+    .usage('$0 <old.csv> <new.csv> [--output diff.json]')
+    .option('output', {
+      alias: 'o',
+      type: 'string',
+      describe: '差分（added / changed / removed）をJSONで保存するパス',
+    })
+    .help(false)
+    .parseSync() as any;
+
+  const oldCsv = String(argv._[0] ?? '').trim();
+  const newCsv = String(argv._[1] ?? '').trim();
+  if (!oldCsv || !newCsv) {
+    console.error('比較する2つのCSVを指定してください: crawl-diff <old.csv> <new.csv> [--output diff.json]');
+    process.exit(1);
+  }
+
+  try {
+    const [oldPages, newPages] = await Promise.all([
+      loadCrawlCsv(path.resolve(process.cwd(), oldCsv)),
+      loadCrawlCsv(path.resolve(process.cwd(), newCsv)),
+    ]);
+    const diff = diffCrawlPages(oldPages, newPages);
+
+    console.log(`[CrawlDiff] ${oldCsv} → ${newCsv}`);
+    console.log(`  追加: ${diff.added.length} / 変更: ${diff.changed.length} / 削除: ${diff.removed.length} / 変更なし: ${diff.unchanged}`);
+    for (const [label, entries] of [['+', diff.added], ['~', diff.changed], ['-', diff.removed]] as const) {
+      for (const e of entries.slice(0, 20)) console.log(`  ${label} ${e.url}`);
+      if (entries.length > 20) console.log(`  ${label} ...（他 ${entries.length - 20} 件）`);
+    }
+
+    const output = String(argv.output ?? '').trim();
+    if (output) {
+      const outPath = path.resolve(process.cwd(), output);
+      await fs.mkdir(path.dirname(outPath), { recursive: true });
+      await fs.writeFile(outPath, JSON.stringify({ old_csv: oldCsv, new_csv: newCsv, ...diff }, null, 2), 'utf-8');
+      console.log(`[CrawlDiff] 保存: ${outPath}`);
+    }
+    process.exit(0);
+  } catch (e: any) {
+    console.error('\n❌ エラーが発生しました:', e?.message ?? e);
+    process.exit(1);
+  }
+}
+
+main();
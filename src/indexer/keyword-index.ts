@@ -0,0 +1,263 @@
+import { closeSync, existsSync, openSync, readSync } from 'fs';
+
+/**
+ * keywords.index（benchmarks/.../scripts/keyword_index.py で生成）のリーダー
+ * ・snapshot_search の keywords（AND 部分一致・小文字比較）を、chunk_text の全件読み込みなしで絞り込む
+ * ・ポスティングは FAISS ラベル（序数）。辞書・ポスティングは必要な範囲のみ pread する
+ * ・照合規則は keyword_index.py の keyword_candidates と同じ（厳密でないキーワードは呼び出し側で本文確認）
+ */
+const MAGIC = 'WGKI';
+const VERSION = 1;
+const HEADER_SIZE = 64;
+const DICT_SIZE = 24;
+
+// 英数字の片 / 非英数字・非空白の連（ASCII 記号は区切りとして扱う）
+const PIECE_RE = /[a-z0-9_]+|[^\x00-\x7f\s]+/g;
+
+export interface KeywordFilterResult {
+  /** 候補ラベル（昇順） */
+  labels: Uint32Array;
+  /** 本文での確認が必要なキーワード（空なら labels は厳密な一致集合） */
+  verify: string[];
+}
+
+interface DictEntry {
+  termOff: number;
+  termLen: number;
+  df: number;
+  postingsLen: number;
+  postingsOff: number;
+}
+
+function intersectSorted(a: Uint32Array, b: Uint32Array): Uint32Array {
+  const out = new Uint32Array(Math.min(a.length, b.length));
+  let i = 0;
+  let j = 0;
+  let n = 0;
+  while (i < a.length && j < b.length) {
+    const x = a[i]!;
+    const y = b[j]!;
+    if (x === y) {
+      out[n++] = x;
+      i++;
+      j++;
+    } else if (x < y) {
+      i++;
+    } else {
+      j++;
+    }
+  }
+  return out.subarray(0, n);
+}
+
+export class KeywordIndex {
+  private fd: number;
+  readonly docCount: number;
+  readonly termCount: number;
+  private asciiTerms: number;
+  private dictOff: number;
+  private heapOff: number;
+  private postingsOff: number;
+  // ASCII 語の部分一致用（初回のみ読み込み）
+  private asciiHay: string | null = null;
+  private asciiOffsets: Uint32Array | null = null;
+
+  private constructor(fd: number, header: Buffer) {
+    this.fd = fd;
+    this.docCount = Number(header.readBigUInt64LE(8));
+    this.termCount = Number(header.readBigUInt64LE(16));
+    this.asciiTerms = Number(header.readBigUInt64LE(24));
+    this.dictOff = Number(header.readBigUInt64LE(32));
+    this.heapOff = Number(header.readBigUInt64LE(40));
+    this.postingsOff = Number(header.readBigUInt64LE(56));
+  }
+
+  /**
+   * インデックスを開く（ファイルが無い場合は null）
+   */
+  static open(filePath: string): KeywordIndex | null {
+    if (!existsSync(filePath)) return null;
+    const fd = openSync(filePath, 'r');
+    const header = Buffer.alloc(HEADER_SIZE);
+    readSync(fd, header, 0, HEADER_SIZE, 0);
+    if (header.toString('ascii', 0, 4) !== MAGIC || header.readUInt32LE(4) !== VERSION) {
+      closeSync(fd);
+      throw new Error(`keywords.index の形式が不正です: ${filePath}`);
+    }
+    return new KeywordIndex(fd, header);
+  }
+
+  private read(position: number, length: number): Buffer {
+    const buf = Buffer.alloc(length);
+    if (length > 0) readSync(this.fd, buf, 0, length, position);
+    return buf;
+  }
+
+  private entry(i: number): DictEntry {
+    const e = this.read(this.dictOff + i * DICT_SIZE, DICT_SIZE);
+    return {
+      termOff: e.readUInt32LE(0),
+      termLen: e.readUInt16LE(4),
+      df: e.readUInt32LE(8),
+      postingsLen: e.readUInt32LE(12),
+      postingsOff: Number(e.readBigUInt64LE(16)),
+    };
+  }
+
+  private termBytes(i: number): Buffer {
+    const e = this.entry(i);
+    return this.read(this.heapOff + e.termOff, e.termLen);
+  }
+
+  /**
+   * 語 → 辞書の序数（UTF-8 バイト列の二分探索）
+   */
+  termId(term: string): number | null {
+    const key = Buffer.from(term, 'utf-8');
+    let lo = 0;
+    let hi = this.termCount;
+    while (lo < hi) {
+      const mid = (lo + hi) >>> 1;
+      if (Buffer.compare(this.termBytes(mid), key) < 0) lo = mid + 1;
+      else hi = mid;
+    }
+    return lo < this.termCount && Buffer.compare(this.termBytes(lo), key) === 0 ? lo : null;
+  }
+
+  /**
+   * 辞書の序数 → ラベル（昇順）。出現回数（BM25 用）は読み飛ばす
+   */
+  postings(i: number): Uint32Array {
+    const e = this.entry(i);
+    const buf = this.read(this.postingsOff + e.postingsOff, e.postingsLen);
+    const labels = new Uint32Array(e.df);
+    let pos = 0;
+    let prev = 0;
+    for (let n = 0; n < e.df; n++) {
+      let v = 0;
+      let shift = 0;
+      for (;;) {
+        const b = buf[pos++]!;
+        v += (b & 0x7f) * 2 ** shift;
+        if (b < 0x80) break;
+        shift += 7;
+      }
+      prev += v;
+      labels[n] = prev;
+    }
+    return labels;
+  }
+
+  private loadAsciiTerms(): void {
+    const dict = this.read(this.dictOff, this.asciiTerms * DICT_SIZE);
+    const offsets = new Uint32Array(this.asciiTerms);
+    for (let i = 0; i < this.asciiTerms; i++) offsets[i] = dict.readUInt32LE(i * DICT_SIZE);
+    const end = this.asciiTerms ? offsets[this.asciiTerms - 1]! + dict.readUInt16LE((this.asciiTerms - 1) * DICT_SIZE + 4) : 0;
+    this.asciiOffsets = offsets;
+    // 前後に区切り '\n' を付け、前方一致 / 後方一致を needle 側の '\n' で表す
+    this.asciiHay = `\n${this.read(this.heapOff, end).toString('latin1')}\n`;
+  }
+
+  /**
+   * ASCII の片に一致する語（前後がキーワード内で区切られているかで 完全 / 前方 / 後方 / 部分 一致）
+   */
+  private asciiTermsMatching(piece: string, boundedLeft: boolean, boundedRight: boolean): number[] {
+    if (boundedLeft && boundedRight) {
+      const id = this.termId(piece);
+      return id === null ? [] : [id];
+    }
+    if (this.asciiHay === null) this.loadAsciiTerms();
+    const hay = this.asciiHay!;
+    const offsets = this.asciiOffsets!;
+    const blobLen = hay.length - 2;
+    const needle = `${boundedLeft ? '\n' : ''}${piece}${boundedRight ? '\n' : ''}`;
+    const found: number[] = [];
+    let pos = hay.indexOf(needle);
+    while (pos >= 0) {
+      const start = pos + (boundedLeft ? 1 : 0) - 1; // hay 先頭の '\n' を除いた位置
+      let lo = 0;
+      let hi = offsets.length;
+      while (lo < hi) {
+        const mid = (lo + hi) >>> 1;
+        if (offsets[mid]! <= start) lo = mid + 1;
+        else hi = mid;
+      }
+      const id = lo - 1;
+      if (found[found.length - 1] !== id) found.push(id);
+      // 同じ語の中の以降の出現は飛ばす
+      const nextOff = id + 1 < offsets.length ? offsets[id + 1]! : blobLen;
+      pos = hay.indexOf(needle, Math.max(pos + 1, nextOff));
+    }
+    return found;
+  }
+
+  private union(ids: number[]): Uint32Array {
+    if (!ids.length) return new Uint32Array(0);
+    if (ids.length === 1) return this.postings(ids[0]!);
+    const merged = new Set<number>();
+    for (const id of ids) for (const label of this.postings(id)) merged.add(label);
+    return Uint32Array.from(merged).sort();
+  }
+
+  private termLabels(term: string): Uint32Array {
+    const id = this.termId(term);
+    return id === null ? new Uint32Array(0) : this.postings(id);
+  }
+
+  /**
+   * キーワード1つの候補ラベルと厳密かどうか（片も連も無いキーワードは索引で扱えないため null）
+   */
+  keywordCandidates(keyword: string): { labels: Uint32Array; exact: boolean } | null {
+    const kw = keyword.toLowerCase();
+    const pieces = [...kw.matchAll(PIECE_RE)];
+    if (!pieces.length) return null;
+    let labels: Uint32Array | null = null;
+    for (const m of pieces) {
+      const piece = m[0];
+      const start = m.index ?? 0;
+      let got: Uint32Array;
+      if (/^[a-z0-9_]+$/.test(piece)) {
+        got = this.union(this.asciiTermsMatching(piece, start > 0, start + piece.length < kw.length));
+      } else {
+        const chars = Array.from(piece);
+        if (chars.length === 1) {
+          got = this.termLabels(piece);
+        } else {
+          got = this.termLabels(chars[0]! + chars[1]!);
+          for (let j = 1; j < chars.length - 1 && got.length; j++) {
+            got = intersectSorted(got, this.termLabels(chars[j]! + chars[j + 1]!));
+          }
+        }
+      }
+      labels = labels === null ? got : intersectSorted(labels, got);
+      if (!labels.length) break;
+    }
+    const only = pieces[0]![0];
+    const exact = pieces.length === 1 && only === kw && (/^[a-z0-9_]+$/.test(only) || Array.from(only).length <= 2);
+    return { labels: labels ?? new Uint32Array(0), exact };
+  }
+
+  /**
+   * keywords の AND 部分一致の候補（索引で扱えないキーワードを含む場合は null → 全件走査）
+   */
+  filter(keywords: string[]): KeywordFilterResult | null {
+    let labels: Uint32Array | null = null;
+    const verify: string[] = [];
+    for (const keyword of keywords) {
+      const res = this.keywordCandidates(keyword);
+      if (!res) return null;
+      if (!res.exact) verify.push(keyword.toLowerCase());
+      labels = labels === null ? res.labels : intersectSorted(labels, res.labels);
+      if (!labels.length) return { labels, verify: [] };
+    }
+    if (labels === null) {
+      labels = new Uint32Array(this.docCount);
+      for (let i = 0; i < this.docCount; i++) labels[i] = i;
+    }
+    return { labels, verify };
+  }
+
+  close(): void {
+    try { closeSync(this.fd); } catch {}
+  }
+}
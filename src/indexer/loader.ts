@@ -1,8 +1,14 @@
+import { statSync } from 'fs';
 import parquet from 'parquetjs';
 import { VectorStore } from './vector-store.js';
+import { ChunkStore } from './chunk-store.js';
+import { KeywordIndex } from './keyword-index.js';
 import { getIndexPaths } from './paths.js';
 import type { ChunkMetadata } from './types.js';
 
+// キーワードインデックスはプロセス内で使い回す（ASCII 語彙の読み込みを初回のみにするため）。再生成は mtime で検知
+const keywordIndexCache = new Map<string, { mtimeMs: number; index: KeywordIndex }>();
+
 /**
  * インデックスローダー（Agent用）
  * インデックス名を指定するだけで3ファイル全部を読み込む
@@ -12,10 +18,10 @@ export class IndexLoader {
   private baseDir: string;
   private paths: ReturnType<typeof getIndexPaths>;
   
-  constructor(indexName: string, baseDir: string = 'output/indexes') {
+  constructor(indexName: string, baseDir: string = 'output/indexes', vectorsFile: string = 'vectors.faiss') {
     this.indexName = indexName;
     this.baseDir = baseDir;
-    this.paths = getIndexPaths(indexName, baseDir);
+    this.paths = getIndexPaths(indexName, baseDir, vectorsFile);
   }
 
   /**
@@ -26,6 +32,48 @@ export class IndexLoader {
     return await VectorStore.load(this.paths.vectorsPath);
   }
 
+  /**
+   * メモリマップ型チャンクストアを開く（chunks.store が無い場合は null）
+   * ラベル → チャンクの解決に使い、Parquet全件読み込みを避ける
+   */
+  openChunkStore(): ChunkStore | null {
+    try {
+      const store = ChunkStore.open(this.paths.chunkStorePath);
+      if (store) console.log(`[IndexLoader] チャンクストア使用: ${this.paths.chunkStorePath} (${store.count}件)`);
+      return store;
+    } catch (e: any) {
+      console.log(`[IndexLoader] チャンクストアを開けません（Parquetにフォールバック）: ${e?.message ?? e}`);
+      return null;
+    }
+  }
+
+  /**
+   * キーワード転置インデックスを開く（keywords.index が無い場合は null）
+   * 返したインデックスはプロセス内で共有するため、呼び出し側で close しないこと
+   */
+  openKeywordIndex(): KeywordIndex | null {
+    const filePath = this.paths.keywordIndexPath;
+    try {
+      const mtimeMs = statSync(filePath, { throwIfNoEntry: false })?.mtimeMs;
+      const cached = keywordIndexCache.get(filePath);
+      if (mtimeMs === undefined) {
+        cached?.index.close();
+        keywordIndexCache.delete(filePath);
+        return null;
+      }
+      if (cached && cached.mtimeMs === mtimeMs) return cached.index;
+      cached?.index.close();
+      const index = KeywordIndex.open(filePath);
+      if (!index) return null;
+      keywordIndexCache.set(filePath, { mtimeMs, index });
+      console.log(`[IndexLoader] キーワードインデックス使用: ${filePath} (${index.docCount}件, 語 ${index.termCount}件)`);
+      return index;
+    } catch (e: any) {
+      console.log(`[IndexLoader] キーワードインデックスを開けません（全件走査にフォールバック）: ${e?.message ?? e}`);
+      return null;
+    }
+  }
+
   /**
    * チャンクメタデータを読み込み（全件）
    */
@@ -83,13 +131,15 @@ export class IndexLoader {
 export function createIndexLoaderFromEnv(): IndexLoader | null {
   const indexName = String(process.env.AGENT_INDEX_NAME ?? '').trim();
   const indexDir = String(process.env.AGENT_INDEX_DIR ?? '').trim() || 'output/indexes';
+  // 圧縮ANNインデックス（build_ann_index.py の出力）を使う場合はファイル名を指定
+  const vectorsFile = String(process.env.AGENT_INDEX_VECTORS_FILE ?? '').trim() || 'vectors.faiss';
   
   if (!indexName) {
     console.log('[IndexLoader] AGENT_INDEX_NAME が未設定のため、インデックスローダーを作成しません');
     return null;
   }
   
-  return new IndexLoader(indexName, indexDir);
+  return new IndexLoader(indexName, indexDir, vectorsFile);
 }
 
 
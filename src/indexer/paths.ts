@@ -5,14 +5,17 @@ import type { IndexPaths } from './types.js';
  * インデックス名からファイルパスを生成
  * @param indexName インデックス名（例: "shopping"）
  * @param baseDir ベースディレクトリ（デフォルト: "output/indexes"）
+ * @param vectorsFile ベクトルインデックスのファイル名（デフォルト: "vectors.faiss"）
  */
-export function getIndexPaths(indexName: string, baseDir: string = 'output/indexes'): IndexPaths {
+export function getIndexPaths(indexName: string, baseDir: string = 'output/indexes', vectorsFile: string = 'vectors.faiss'): IndexPaths {
   const indexDir = path.join(baseDir, indexName);
   
   return {
     chunksPath: path.join(indexDir, 'chunks.parquet'),
-    vectorsPath: path.join(indexDir, 'vectors.faiss'),
-    mappingPath: path.join(indexDir, 'vectors.faiss.mapping.json'),
+    vectorsPath: path.join(indexDir, vectorsFile),
+    mappingPath: path.join(indexDir, `${vectorsFile}.mapping.json`),
+    chunkStorePath: path.join(indexDir, 'chunks.store'),
+    keywordIndexPath: path.join(indexDir, 'keywords.index'),
     indexDir
   };
 }
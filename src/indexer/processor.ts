@@ -8,6 +8,8 @@ import { chunkSnapshotText } from '../agent/tools/util.js';
 import { computeSha256Hex } from '../utilities/text.js';
 import type { ChunkMetadata, PageRecord, IndexerConfig } from './types.js';
 import { getIndexPaths } from './paths.js';
+import { IndexLoader } from './loader.js';
+import { loadCrawlCsv, decodeSnapshotText, diffCrawlPages, latestPagesByUrl, pageUrlKey } from './crawl-diff.js';
 
 export class IndexerProcessor {
   private config: IndexerConfig;
@@ -64,68 +66,160 @@ export class IndexerProcessor {
   }
 
   /**
-   * CSVからページデータを読み込み
+   * 差分更新: 既存インデックス（chunks.parquet / vectors.faiss / マッピング）を新しいCSVに合わせて更新
+   * ・内容が変わっていないページのチャンクとベクトルはそのまま（page_id が変わった場合はチャンクIDのみ付け替え）
+   * ・変更 / 追加ページは再チャンク化し、既存チャンクと本文が同一のものはベクトルを再利用、それ以外のみ埋め込む
+   * ・削除ページ・再利用されなかった旧チャンクのベクトルはフラットインデックスから削除し、新規ベクトルは末尾に追加
+   * ・同一URLの行が複数ある場合は後の行（再クロールで追記された行）を採用
    */
-  private async loadCsvPages(): Promise<PageRecord[]> {
-    const csvContent = await fs.readFile(this.config.csvPath, 'utf-8');
-    const lines = csvContent.trim().split('\n');
-    
-    if (lines.length < 2) {
-      throw new Error('CSVファイルが空です');
-    }
+  async patch(): Promise<void> {
+    const t0 = Date.now();
+    console.log('\n========================================');
+    console.log('[Indexer] 差分更新開始');
+    console.log('========================================');
+    console.log(`インデックス: ${this.paths.indexDir}`);
+    console.log(`入力CSV: ${this.config.csvPath}`);
+    if (this.config.patchBaseCsvPath) console.log(`比較元CSV: ${this.config.patchBaseCsvPath}`);
+    console.log('========================================\n');
 
-    // ヘッダー行をパース
-    const header = lines[0]!.split(',').map(h => h.trim().replace(/^"|"$/g, ''));
-    
-    // データ行をパース（簡易的なCSVパーサー、quoted fieldsに対応）
-    const pages: PageRecord[] = [];
-    for (let i = 1; i < lines.length; i++) {
-      const line = lines[i]!;
-      if (!line.trim()) continue;
-      
-      const record: PageRecord = {};
-      const values = this.parseCsvLine(line);
-      
-      for (let j = 0; j < header.length; j++) {
-        const key = header[j]!;
-        const value = values[j] ?? '';
-        
-        if (key === 'id' || key === 'depth') {
-          record[key] = parseInt(value, 10);
+    // 1. 既存インデックスと新しいCSVを読み込み
+    console.log('[1/4] 既存インデックスとCSVを読み込み中...');
+    const loader = new IndexLoader(this.config.indexName, this.config.outputDir);
+    const vectorStore = await loader.loadVectorStore();
+    if (!vectorStore.isFlat()) {
+      throw new Error('圧縮ANNインデックスは差分更新できません（vectors.faiss のフラットインデックスを対象にしてください）');
+    }
+    // 同一URLの行を重複してインデックスしていた場合はチャンクIDが重なるため、後の行を採用
+    const oldChunks = Array.from(new Map((await loader.loadAllChunks()).map(c => [c.chunk_id, c] as const)).values());
+    const labelByChunkId = new Map<string, number>();
+    vectorStore.getChunkIds().forEach((id, label) => labelByChunkId.set(id, label));
+    const oldByUrl = new Map<string, ChunkMetadata[]>();
+    for (const chunk of oldChunks) {
+      const key = pageUrlKey({ URL: chunk.url });
+      const list = oldByUrl.get(key) ?? [];
+      list.push(chunk);
+      oldByUrl.set(key, list);
+    }
+    const newPages = latestPagesByUrl(await this.loadCsvPages());
+
+    // 変更なしとみなすURL: 比較元CSVがあれば正規化ハッシュの差分、無ければ snapshot_hash の一致で判定
+    let unchangedUrls: Set<string> | null = null;
+    if (this.config.patchBaseCsvPath) {
+      const diff = diffCrawlPages(await loadCrawlCsv(this.config.patchBaseCsvPath), Array.from(newPages.values()));
+      const touched = new Set([...diff.added, ...diff.changed].map(e => e.url));
+      unchangedUrls = new Set(Array.from(newPages.keys()).filter(k => !touched.has(k)));
+      console.log(`✓ クロール差分: 追加 ${diff.added.length} / 変更 ${diff.changed.length} / 削除 ${diff.removed.length} / 変更なし ${diff.unchanged}`);
+    }
+    console.log(`✓ 既存: ${oldChunks.length} チャンク / 新CSV: ${newPages.size} ページ\n`);
+
+    // 2. ページごとに保持 / 再チャンク化を決定
+    console.log('[2/4] 変更ページを再チャンク化中...');
+    // 本文ハッシュ → 未使用の旧ラベル（変更ページ内で本文が同一のチャンクはベクトルを再利用）
+    const reusable = new Map<string, number[]>();
+    const keptLabels = new Set<number>();
+    // 全チャンクにベクトルがあり、単一のスナップショット由来である場合のみそのまま保持できる
+    const keepPage = (chunks: ChunkMetadata[]): boolean =>
+      chunks.every(c => labelByChunkId.has(c.chunk_id)) && new Set(chunks.map(c => c.snapshot_hash)).size === 1;
+    const finalChunks: ChunkMetadata[] = [];
+    const renames: Array<{ label: number; chunkId: string }> = [];
+    const toEmbed: ChunkMetadata[] = [];
+    const pending: PageRecord[] = [];
+    let keptPages = 0;
+
+    for (const [key, page] of newPages) {
+      const prev = oldByUrl.get(key) ?? [];
+      const unchanged = prev.length > 0 && keepPage(prev) && (unchangedUrls
+        ? unchangedUrls.has(key)
+        : prev.every(c => c.snapshot_hash === computeSha256Hex(decodeSnapshotText(page))));
+      if (!unchanged) {
+        pending.push(page);
+        continue;
+      }
+      keptPages++;
+      const pageId = page.id ?? prev[0]!.page_id;
+      for (const chunk of prev) {
+        const label = labelByChunkId.get(chunk.chunk_id)!;
+        const chunkId = `page_${pageId}_chunk_${chunk.chunk_index}`;
+        keptLabels.add(label);
+        if (chunkId !== chunk.chunk_id) renames.push({ label, chunkId });
+        finalChunks.push({ ...chunk, chunk_id: chunkId, page_id: pageId });
+      }
+    }
+    for (const chunk of oldChunks) {
+      const label = labelByChunkId.get(chunk.chunk_id);
+      if (label === undefined || keptLabels.has(label)) continue;
+      const key = computeSha256Hex(chunk.chunk_text);
+      const list = reusable.get(key) ?? [];
+      list.push(label);
+      reusable.set(key, list);
+    }
+    let reused = 0;
+    for (const page of pending) {
+      for (const chunk of this.chunkPage(page)) {
+        const label = reusable.get(computeSha256Hex(chunk.chunk_text))?.shift();
+        if (label !== undefined) {
+          keptLabels.add(label);
+          if (vectorStore.getChunkIds()[label] !== chunk.chunk_id) renames.push({ label, chunkId: chunk.chunk_id });
+          reused++;
         } else {
-          record[key] = value;
+          toEmbed.push(chunk);
         }
+        finalChunks.push(chunk);
       }
-      
-      pages.push(record);
     }
+    console.log(`✓ 保持: ${keptPages} ページ / 再チャンク化: ${pending.length} ページ（ベクトル再利用 ${reused} / 新規埋め込み ${toEmbed.length} チャンク）\n`);
+
+    // 3. 新規チャンクのみ埋め込み
+    console.log('[3/4] 埋め込み処理中...');
+    const { vectors, chunkIds } = toEmbed.length > 0 ? await this.embedChunks(toEmbed) : { vectors: [], chunkIds: [] };
+    console.log(`✓ 埋め込み完了: ${vectors.length} ベクトル\n`);
 
-    return pages;
+    // 4. インデックスを更新して保存（付け替え → 削除 → 追加の順。削除でラベルが詰められるため）
+    console.log('[4/4] 保存中...');
+    for (const { label, chunkId } of renames) vectorStore.renameChunkId(label, chunkId);
+    const dropLabels: number[] = [];
+    for (let label = 0; label < vectorStore.getSize(); label++) {
+      if (!keptLabels.has(label)) dropLabels.push(label);
+    }
+    const removed = vectorStore.removeLabels(dropLabels);
+    vectorStore.addVectors(vectors, chunkIds);
+    await this.saveChunksParquet(finalChunks);
+    await vectorStore.save(this.paths.vectorsPath);
+
+    // ラベル順が変わるため、chunks.store（chunk_store.py で生成）と keywords.index（keyword_index.py で生成）は古いまま使えない
+    try {
+      await fs.unlink(this.paths.chunkStorePath);
+      console.log(`  - 古いチャンクストアを削除: ${this.paths.chunkStorePath}（chunk_store.py build で再生成してください）`);
+    } catch {}
+    try {
+      await fs.unlink(this.paths.keywordIndexPath);
+      console.log(`  - 古いキーワードインデックスを削除: ${this.paths.keywordIndexPath}（keyword_index.py build で再生成してください）`);
+    } catch {}
+    console.log('  - 圧縮ANNインデックス（build_ann_index.py）を使っている場合は再構築してください');
+
+    const report = {
+      patched_at: new Date().toISOString(),
+      csv: this.config.csvPath,
+      base_csv: this.config.patchBaseCsvPath ?? null,
+      pages: { kept: keptPages, reprocessed: pending.length, total: newPages.size },
+      chunks: { total: finalChunks.length, kept_vectors: keptLabels.size, reused_vectors: reused, embedded: toEmbed.length, removed_vectors: removed },
+      duration_ms: Date.now() - t0
+    };
+    const reportPath = path.join(this.paths.indexDir, 'patch-report.json');
+    await fs.writeFile(reportPath, JSON.stringify(report, null, 2), 'utf-8');
+    console.log(`  - 差分更新レポート: ${reportPath}`);
+    console.log('✓ 保存完了\n');
+
+    console.log('========================================');
+    console.log(`[Indexer] 差分更新完了（${((Date.now() - t0) / 1000).toFixed(1)}秒）`);
+    console.log('========================================');
   }
 
   /**
-   * CSVの1行をパース（quoted fieldsに対応）
+   * CSVからページデータを読み込み
    */
-  private parseCsvLine(line: string): string[] {
-    const values: string[] = [];
-    let current = '';
-    let inQuotes = false;
-    
-    for (let i = 0; i < line.length; i++) {
-      const char = line[i]!;
-      
-      if (char === '"') {
-        inQuotes = !inQuotes;
-      } else if (char === ',' && !inQuotes) {
-        values.push(current.trim().replace(/^"|"$/g, ''));
-        current = '';
-      } else {
-        current += char;
-      }
-    }
-    
-    values.push(current.trim().replace(/^"|"$/g, ''));
-    return values;
+  private async loadCsvPages(): Promise<PageRecord[]> {
+    return await loadCrawlCsv(this.config.csvPath);
   }
 
   /**
@@ -152,56 +246,7 @@ export class IndexerProcessor {
     progressBar.start(pages.length, 0);
 
     for (const page of pages) {
-      const pageId = page.id ?? 0;
-      const url = page.URL ?? '';
-      const site = page.site ?? '';
-      // 列名は snapshotforai（スペースなし）
-      let snapshotText = (page['snapshotforai'] ?? '') as string;
-      
-      // CSVからの読み込みでエスケープされた改行を実際の改行に変換
-      snapshotText = snapshotText
-        .replace(/\\r\\n/g, '\n')
-        .replace(/\\n/g, '\n')
-        .replace(/\\t/g, '\t')
-        .replace(/\\"/g, '"')
-        .replace(/\\\\/g, '\\');
-      
-      const snapshotHash = computeSha256Hex(snapshotText);
-
-      if (!snapshotText || snapshotText.trim().length === 0) {
-        progressBar.increment();
-        continue;
-      }
-
-      // チャンク分割（既存のロジックを再利用）
-      const chunkTexts = chunkSnapshotText(
-        snapshotText,
-        this.config.maxChunkSize,
-        this.config.minChunkSize
-      );
-
-      // デバッグ出力：各ページのチャンク分割結果
-      if (chunkTexts.length > 1) {
-        const sizes = chunkTexts.map(ct => ct.length);
-        const avgSize = Math.round(sizes.reduce((a, b) => a + b, 0) / sizes.length);
-        console.log(`  Page ${pageId}: ${snapshotText.length}文字 → ${chunkTexts.length}チャンク (平均: ${avgSize}文字, 範囲: ${Math.min(...sizes)}-${Math.max(...sizes)}文字)`);
-      }
-
-      for (let i = 0; i < chunkTexts.length; i++) {
-        const chunkText = chunkTexts[i]!;
-        chunks.push({
-          chunk_id: `page_${pageId}_chunk_${i}`,
-          page_id: pageId,
-          url,
-          site,
-          chunk_index: i,
-          chunk_text: chunkText,
-          char_count: chunkText.length,
-          created_at: new Date().toISOString(),
-          snapshot_hash: snapshotHash
-        });
-      }
-
+      chunks.push(...this.chunkPage(page, true));
       progressBar.increment();
     }
 
@@ -209,6 +254,48 @@ export class IndexerProcessor {
     return chunks;
   }
 
+  /**
+   * 1ページ分のチャンクを作成（スナップショットが空なら空配列）
+   */
+  private chunkPage(page: PageRecord, verbose: boolean = false): ChunkMetadata[] {
+    const pageId = page.id ?? 0;
+    const url = page.URL ?? '';
+    const site = page.site ?? '';
+    const snapshotText = decodeSnapshotText(page);
+    const snapshotHash = computeSha256Hex(snapshotText);
+
+    if (!snapshotText || snapshotText.trim().length === 0) {
+      return [];
+    }
+
+    // チャンク分割（既存のロジックを再利用）
+    const chunkTexts = chunkSnapshotText(
+      snapshotText,
+      this.config.maxChunkSize,
+      this.config.minChunkSize
+    );
+
+    // デバッグ出力：各ページのチャンク分割結果
+    if (verbose && chunkTexts.length > 1) {
+      const sizes = chunkTexts.map(ct => ct.length);
+      const avgSize = Math.round(sizes.reduce((a, b) => a + b, 0) / sizes.length);
+      console.log(`  Page ${pageId}: ${snapshotText.length}文字 → ${chunkTexts.length}チャンク (平均: ${avgSize}文字, 範囲: ${Math.min(...sizes)}-${Math.max(...sizes)}文字)`);
+    }
+
+    const createdAt = new Date().toISOString();
+    return chunkTexts.map((chunkText, i) => ({
+      chunk_id: `page_${pageId}_chunk_${i}`,
+      page_id: pageId,
+      url,
+      site,
+      chunk_index: i,
+      chunk_text: chunkText,
+      char_count: chunkText.length,
+      created_at: createdAt,
+      snapshot_hash: snapshotHash
+    }));
+  }
+
   /**
    * チャンクを埋め込む（バッチ一括処理、最大96個ずつAPI呼び出し）
    */
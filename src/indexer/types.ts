@@ -49,6 +49,8 @@ export interface IndexerConfig {
   minChunkSize: number;
   // 埋め込みサブバッチ（最大96件）を同時に投げる並列実行数
   concurrency: number;
+  // 差分更新時の比較元CSV（既存インデックスの作成に使ったCSV。未指定なら snapshot_hash で判定）
+  patchBaseCsvPath?: string;
 }
 
 /**
@@ -58,6 +60,8 @@ export interface IndexPaths {
   chunksPath: string;          // chunks.parquet
   vectorsPath: string;         // vectors.faiss
   mappingPath: string;         // vectors.faiss.mapping.json
+  chunkStorePath: string;      // chunks.store（任意: chunk_store.py で生成）
+  keywordIndexPath: string;    // keywords.index（任意: keyword_index.py で生成）
   indexDir: string;            // インデックスディレクトリ
 }
 
@@ -2,7 +2,7 @@ import faiss from 'faiss-node';
 import { promises as fs } from 'fs';
 import path from 'path';
 
-const { IndexFlatIP } = faiss;
+const { Index, IndexFlatIP } = faiss;
 
 /**
  * Faissベクトルストアのラッパー
@@ -11,6 +11,7 @@ export class VectorStore {
   private index: any;
   private dimension: number;
   private chunkIds: string[];
+  private indexType?: string;
 
   constructor(dimension: number = 1536) {
     this.dimension = dimension;
@@ -113,21 +114,63 @@ export class VectorStore {
     
     // マッピングを読み込み
     const mappingContent = await fs.readFile(mappingPath, 'utf-8');
-    const mapping = JSON.parse(mappingContent) as { chunkIds: string[]; dimension: number };
+    const mapping = JSON.parse(mappingContent) as { chunkIds: string[]; dimension: number; indexType?: string };
 
-    // Faissインデックスを読み込み
-    const index = IndexFlatIP.read(filePath);
+    // Faissインデックスを読み込み（IVF/HNSW等の圧縮インデックスも読めるよう汎用の Index.read を使用）
+    const index = Index.read(filePath);
     
     const store = new VectorStore(mapping.dimension);
     store.index = index;
     store.chunkIds = mapping.chunkIds;
+    if (mapping.indexType) store.indexType = mapping.indexType;
 
-    console.log(`[VectorStore] インデックス読み込み: ${filePath}`);
+    console.log(`[VectorStore] インデックス読み込み: ${filePath}${mapping.indexType ? ` (${mapping.indexType})` : ''}`);
     console.log(`[VectorStore] 総ベクトル数: ${store.chunkIds.length}`);
 
     return store;
   }
 
+  /**
+   * フラットインデックスか（build_ann_index.py の圧縮インデックスは indexType を持つ）
+   */
+  isFlat(): boolean {
+    return !this.indexType;
+  }
+
+  /**
+   * ラベル（序数）→ チャンクIDの一覧
+   */
+  getChunkIds(): readonly string[] {
+    return this.chunkIds;
+  }
+
+  /**
+   * ラベルのチャンクIDを付け替える（ベクトルはそのまま）
+   */
+  renameChunkId(label: number, chunkId: string): void {
+    if (label < 0 || label >= this.chunkIds.length) {
+      throw new Error(`ラベルが範囲外です: ${label}`);
+    }
+    this.chunkIds[label] = chunkId;
+  }
+
+  /**
+   * ラベルを削除（フラットインデックスのみ）。後続のラベルは順序を保ったまま詰められる
+   */
+  removeLabels(labels: number[]): number {
+    if (labels.length === 0) return 0;
+    if (!this.isFlat()) {
+      throw new Error(`圧縮インデックス（${this.indexType}）からは削除できません`);
+    }
+    const drop = new Set(labels);
+    const removed = (this.index as any).removeIds(Array.from(drop).sort((a, b) => a - b));
+    if (removed !== drop.size) {
+      throw new Error(`ベクトル削除数が一致しません: expected ${drop.size}, got ${removed}`);
+    }
+    this.chunkIds = this.chunkIds.filter((_, i) => !drop.has(i));
+    return removed;
+  }
+
   /**
    * インデックスのベクトル数を取得
    */